@@ -20,13 +20,8 @@ class FollowPathAndAggro:
 
     def _find_nearest_enemy(self):
         my_pos = Player.GetXY()
-        enemies = [
-            e for e in AgentArray.GetEnemyArray()
-            if Agent.IsAlive(e) and Utils.Distance(my_pos, Agent.GetXY(e)) <= self.aggro_range
-        ]
-        if not enemies:
-            return None
-        return AgentArray.Sort.ByDistance(enemies, my_pos)[0]
+        nearest = AgentArray.Routines.GetNearest(AgentArray.GetEnemyArray(), my_pos, self.aggro_range, Agent.IsAlive)
+        return nearest or None
 
     def _throttled_scan(self):
         curr_pos = Player.GetXY()
@@ -1555,15 +1555,11 @@ class CombatClass:
 
 
         if self.IsPartyMember(agent_id):
-            player_buffs = self.shared_memory_handler.get_agent_buffs(agent_id)
-            for buff in player_buffs:                
-                if buff == skill_id or buff in shared_effects:
-                    result = True
+            buff_exists = self.shared_memory_handler.buff_exists
+            result = buff_exists(agent_id, skill_id) or any(buff_exists(agent_id, shared_buff) for shared_buff in shared_effects)
         else:
-            result = (
-                GLOBAL_CACHE.Effects.BuffExists(agent_id, skill_id) 
-                or GLOBAL_CACHE.Effects.EffectExists(agent_id, skill_id)
-                or any(GLOBAL_CACHE.Effects.BuffExists(agent_id, shared_buff) or GLOBAL_CACHE.Effects.EffectExists(agent_id, shared_buff) for shared_buff in shared_effects))
+            effect_ids = GLOBAL_CACHE.Effects.GetEffectSkillIDs(agent_id)
+            result = skill_id in effect_ids or not effect_ids.isdisjoint(shared_effects)
 
         if not result and not exact_weapon_spell:
            skilltype, _ = GLOBAL_CACHE.Skill.GetType(skill_id)
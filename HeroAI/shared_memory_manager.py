@@ -50,6 +50,8 @@ class SharedMemoryManager:
 
             # Attach the shared memory structure
             self.game_struct = GameStruct.from_buffer(self.shm.buf)
+            self._buff_version = None
+            self._buff_index = {}
 
             # Initialize default values
             for i in range(self.num_players):
@@ -362,16 +364,35 @@ class SharedMemoryManager:
             buff.PlayerID = 0
             buff.Buff_id = 0
             buff.LastUpdated = 0
+            self._bump_buff_version()
 
         except Exception as e:
             Py4GW.Console.Log(SMM_MODULE_NAME, f"Failed to reset buff {index}: {e}", Py4GW.Console.MessageType.Error)
 
+    def _bump_buff_version(self):
+        """Mark the PlayerBuffs keys as changed for every process; call after the PlayerID/Buff_id writes."""
+        self.game_struct.PlayerBuffsVersion = (self.game_struct.PlayerBuffsVersion + 1) & 0xFFFFFFFF
+
+    def _refresh_buff_index(self):
+        """Rebuild the (PlayerID, Buff_id) -> buff slot table when PlayerBuffsVersion moved."""
+        version = self.game_struct.PlayerBuffsVersion
+        if version == self._buff_version:
+            return
+        words = memoryview(bytes(self.game_struct.PlayerBuffs)).cast('i')
+        buff_index = {}
+        for index, key in enumerate(zip(words[0::3].tolist(), words[1::3].tolist())):
+            buff_index.setdefault(key, index)
+        self._buff_version = version
+        self._buff_index = buff_index
+
     def get_buff(self,agent_id, skill_id):
         """Retrieve a specific buff with timeout checks."""
         buff_index = 0
         try:
-
-            for buff_index, buff in enumerate(self.game_struct.PlayerBuffs):
+            self._refresh_buff_index()
+            buff_index = self._buff_index.get((agent_id, skill_id))
+            if buff_index is not None:
+                buff = self.game_struct.PlayerBuffs[buff_index]
                 if buff.PlayerID == agent_id and buff.Buff_id == skill_id:
                     current_offset = get_base_timestamp()
                     if current_offset - buff.LastUpdated > SUBSCRIBE_TIMEOUT_SECONDS:
@@ -411,10 +432,11 @@ class SharedMemoryManager:
         try:
 
             # Check for an existing buff with the same Buff_id and PlayerID
-            for buff_index, buff in enumerate(self.game_struct.PlayerBuffs):
-                if buff.Buff_id == buff_data["Buff_id"] and buff.PlayerID == buff_data["PlayerID"]:
-                    buff.LastUpdated = buff_data["LastUpdated"]
-                    return True
+            self._refresh_buff_index()
+            buff_index = self._buff_index.get((buff_data["PlayerID"], buff_data["Buff_id"]))
+            if buff_index is not None:
+                self.game_struct.PlayerBuffs[buff_index].LastUpdated = buff_data["LastUpdated"]
+                return True
 
             # Reset expired buffs
             for buff_index, buff in enumerate(self.game_struct.PlayerBuffs):
@@ -425,6 +447,7 @@ class SharedMemoryManager:
                     buff.PlayerID = buff_data["PlayerID"]
                     buff.Buff_id = buff_data["Buff_id"]
                     buff.LastUpdated = buff_data["LastUpdated"]
+                    self._bump_buff_version()
                     return True
 
             # Find an empty slot for the new buff
@@ -433,6 +456,7 @@ class SharedMemoryManager:
                     buff.PlayerID = buff_data["PlayerID"]
                     buff.Buff_id = buff_data["Buff_id"]
                     buff.LastUpdated = buff_data["LastUpdated"]
+                    self._bump_buff_version()
                     return True
 
             # No available slots
@@ -1,4 +1,4 @@
-from ctypes import Structure, c_int, c_float, c_bool
+from ctypes import Structure, c_int, c_uint, c_float, c_bool
 from enum import Enum, IntEnum
 from .constants import (
     MAX_NUM_PLAYERS,
@@ -65,6 +65,7 @@ class GameStruct(Structure):
         ("Candidates", CandidateStruct * MAX_NUM_PLAYERS),
         ("GameOptions", GameOptionStruct * MAX_NUM_PLAYERS),
         ("PlayerBuffs", PlayerBuff * MAX_NUMBER_OF_BUFFS),
+        ("PlayerBuffsVersion", c_uint),  # bumped whenever a PlayerBuffs PlayerID/Buff_id changes
     ]
 
 
@@ -1,7 +1,5 @@
 import PyAgent
 
-from .model_data import ModelData
-
 class ItemOwnerCache:
     _instance = None
 
@@ -140,6 +138,7 @@ class Agent:
             except (ValueError, AttributeError):
                 return 0  # Default to 0 for any invalid cases
 
+        from .model_data import ModelData
         agent_instance = Agent.agent_instance(agent_id)
         model_id = agent_instance.living_agent.player_number
         attribute_list = []
@@ -166,6 +165,7 @@ class Agent:
         """
         import re
         from .Skill import Skill
+        from .model_data import ModelData
         def format_skill_name(skill_name):
             """
             Formats a skill name by removing punctuation, replacing spaces with underscores,
@@ -337,6 +337,7 @@ class Agent:
         Args: agent_id (int): The ID of the agent.
         Returns: tuple
         """
+        from .model_data import ModelData
         agent_instance = Agent.agent_instance(agent_id)
         model_id = agent_instance.living_agent.player_number
         if model_id in ModelData:
@@ -1,4 +1,6 @@
 import PyAgent
+import math
+from array import array
 
 from .Agent import *
 from .Player import *
@@ -175,10 +177,7 @@ class AgentArray:
                 return []
             return AgentArray.Sort.ByCondition(
                 agent_array,
-                condition_func=lambda agent_id: Utils.Distance(
-                    GLOBAL_CACHE.Agent.GetXY(agent_id),
-                    (pos[0], pos[1])
-                ),
+                condition_func=GLOBAL_CACHE.AgentArray.GetSnapshot().DistanceKey(pos, GLOBAL_CACHE.Agent.GetXY),
                 reverse=descending
             )
 
@@ -193,7 +192,7 @@ class AgentArray:
                 return []
             return AgentArray.Sort.ByCondition(
                 agent_array,
-                condition_func=lambda agent_id: GLOBAL_CACHE.Agent.GetHealth(agent_id),
+                condition_func=GLOBAL_CACHE.AgentArray.GetSnapshot().HealthKey(GLOBAL_CACHE.Agent.GetHealth),
                 reverse=descending
             )
 
@@ -245,15 +244,125 @@ class AgentArray:
             """
             if agent_array is None:
                 return []
+            snapshot = GLOBAL_CACHE.AgentArray.GetSnapshot()
+            distance = snapshot.DistanceKey(pos, GLOBAL_CACHE.Agent.GetXY)
+            in_range = None
+            if len(agent_array) >= AgentSpatialGrid.MIN_QUERY_SIZE:
+                in_range = snapshot.Grid().QueryRadiusSet(pos, max_distance)
+
             def distance_filter(agent_id):
-                agent_x, agent_y = GLOBAL_CACHE.Agent.GetXY(agent_id)
-                distance = Utils.Distance((agent_x, agent_y), (pos[0], pos[1]))
-                return (distance > max_distance) if negate else (distance <= max_distance)
+                if in_range is not None and agent_id in snapshot:
+                    return (agent_id not in in_range) if negate else (agent_id in in_range)
+                agent_distance = distance(agent_id)
+                return (agent_distance > max_distance) if negate else (agent_distance <= max_distance)
 
             return AgentArray.Filter.ByCondition(agent_array, distance_filter)
 
 
     class Routines:
+            @staticmethod
+            def GetNearest(agent_array, pos, max_distance, filter_func=None):
+                from .GlobalCache import GLOBAL_CACHE
+                """
+                Returns the agent of agent_array nearest to pos within max_distance that passes
+                filter_func, or 0. Same result as Filter.ByDistance + Sort.ByDistance + first,
+                without sorting the whole array.
+                """
+                if not agent_array:
+                    return 0
+                snapshot = GLOBAL_CACHE.AgentArray.GetSnapshot()
+                candidates = set(agent_array)
+
+                def accept(agent_id):
+                    return agent_id in candidates and (filter_func is None or filter_func(agent_id))
+
+                grid = snapshot.Grid()
+                distance = snapshot.DistanceKey(pos, GLOBAL_CACHE.Agent.GetXY)
+                nearest = grid.QueryNearest(pos, 2, max_distance, predicate=accept)
+                best_id = nearest[0] if nearest else 0
+                best_distance = distance(best_id) if best_id else math.inf
+                tied = []
+                if len(nearest) > 1 and distance(nearest[1]) == best_distance:
+                    tied = [agent_id for agent_id in grid.QueryRadius(pos, best_distance) if distance(agent_id) == best_distance and accept(agent_id)]
+
+                # Agents the snapshot has not seen yet go through the regular getters
+                for agent_id in agent_array:
+                    if agent_id in snapshot:
+                        continue
+                    agent_distance = distance(agent_id)
+                    if agent_distance > max_distance or agent_distance > best_distance:
+                        continue
+                    if filter_func is not None and not filter_func(agent_id):
+                        continue
+                    if agent_distance < best_distance:
+                        best_id, best_distance, tied = agent_id, agent_distance, []
+                    else:
+                        tied.extend((best_id, agent_id))
+
+                if tied:
+                    # Equal distances resolve to the earliest agent in agent_array, like a stable sort
+                    tied = set(tied)
+                    return next(agent_id for agent_id in agent_array if agent_id in tied)
+                return best_id
+
+            @staticmethod
+            def GetLargestAgentCluster(agent_array, cluster_radius):
+                from .GlobalCache import GLOBAL_CACHE
+                from .py4gwcorelib_src.Clustering import PointGrid
+                """
+                Groups agents into clusters (agents chained together by cluster_radius) using a
+                neighbour grid, and returns the largest one.
+
+                Args:
+                    agent_array (list[int]): List of agent IDs.
+                    cluster_radius (float): Maximum distance between agents to consider them in the same cluster.
+
+                Returns:
+                    tuple[list[int], tuple[float, float]]: Agent IDs of the largest cluster and its
+                    center of mass, or ([], (0.0, 0.0)) if agent_array is empty.
+                """
+                if not agent_array:
+                    return [], (0.0, 0.0)
+
+                # Visit agents in set order, like the original implementation, so ties between
+                # equally sized clusters and the center sums come out identical.
+                agents = list(set(agent_array))
+                snapshot = GLOBAL_CACHE.AgentArray.GetSnapshot()
+                positions = [snapshot.GetXY(agent_id) or GLOBAL_CACHE.Agent.GetXY(agent_id) for agent_id in agents]
+                grid = PointGrid(positions, cluster_radius)
+                cluster_radius_sq = cluster_radius ** 2
+
+                visited = [False] * len(agents)
+                largest_cluster = []
+                for start in range(len(agents)):
+                    if visited[start]:
+                        continue
+                    visited[start] = True
+                    cluster = [start]
+                    stack = [start]
+                    while stack:
+                        node = stack.pop()
+                        x1, y1 = positions[node]
+                        for other in grid.Candidates(positions[node]):
+                            if visited[other]:
+                                continue
+                            x2, y2 = positions[other]
+                            dx, dy = x1 - x2, y1 - y2
+                            if (dx * dx + dy * dy) <= cluster_radius_sq:
+                                visited[other] = True
+                                cluster.append(other)
+                                stack.append(other)
+                    if len(cluster) > len(largest_cluster):
+                        largest_cluster = cluster
+
+                total_x = total_y = 0
+                for index in largest_cluster:
+                    x, y = positions[index]
+                    total_x += x
+                    total_y += y
+                center_pos = (total_x / len(largest_cluster), total_y / len(largest_cluster))
+                return [agents[index] for index in largest_cluster], center_pos
+
             @staticmethod
             def DetectLargestAgentCluster(agent_array, cluster_radius):
                 from .GlobalCache import GLOBAL_CACHE
@@ -274,53 +383,348 @@ class AgentArray:
                 if not agent_array:
                     return 0  # no agents
 
-                cluster_radius_sq = cluster_radius ** 2
-
-                def is_in_radius(agent1, agent2):
-                    x1, y1 = GLOBAL_CACHE.Agent.GetXY(agent1)
-                    x2, y2 = GLOBAL_CACHE.Agent.GetXY(agent2)
-                    dx, dy = x1 - x2, y1 - y2
-                    return (dx * dx + dy * dy) <= cluster_radius_sq
+                largest_cluster, center_pos = AgentArray.Routines.GetLargestAgentCluster(agent_array, cluster_radius)
+                snapshot = GLOBAL_CACHE.AgentArray.GetSnapshot()
 
-                # --- Group agents into clusters ---
-                unvisited = set(agent_array)
-                clusters = []
+                # --- Find agent closest to center ---
+                def dist(agent_id):
+                    ax, ay = snapshot.GetXY(agent_id) or GLOBAL_CACHE.Agent.GetXY(agent_id)
+                    return Utils.Distance((ax, ay), center_pos)
 
-                while unvisited:
-                    current = unvisited.pop()
-                    cluster = [current]
-                    stack = [current]
+                closest_agent_id = min(largest_cluster, key=dist)
+                return closest_agent_id
 
-                    while stack:
-                        node = stack.pop()
-                        neighbors = [a for a in list(unvisited) if is_in_radius(node, a)]
-                        for n in neighbors:
-                            unvisited.remove(n)
-                            cluster.append(n)
-                            stack.append(n)
+            @staticmethod
+            def GetBestAoETarget(agent_array, aoe_radius):
+                from .GlobalCache import GLOBAL_CACHE
+                from .py4gwcorelib_src.Clustering import PointGrid
+                """
+                Finds the agent whose position covers the most agents of agent_array within aoe_radius
+                (itself included). Ties go to the earliest agent in agent_array.
 
-                    clusters.append(cluster)
+                Returns:
+                    tuple[int, int]: (agent_id, covered_count), or (0, 0) if agent_array is empty.
+                """
+                if not agent_array:
+                    return 0, 0
+
+                snapshot = GLOBAL_CACHE.AgentArray.GetSnapshot()
+                positions = [snapshot.GetXY(agent_id) or GLOBAL_CACHE.Agent.GetXY(agent_id) for agent_id in agent_array]
+                grid = PointGrid(positions, aoe_radius)
+
+                best_index, best_count = 0, -1
+                for index, pos in enumerate(positions):
+                    count = grid.Count(pos)
+                    if count > best_count:
+                        best_index, best_count = index, count
+                return agent_array[best_index], best_count
+
+
+class AgentSnapshot:
+    """
+    Immutable struct-of-arrays copy of the agent array, built once per RawAgentArray refresh.
+    Row i of every column describes agent ids[i]; Row() maps an agent id to its row.
+    Columns are read-only memoryviews over array.array buffers.
+    """
+    FLAG_LIVING = 0x01
+    FLAG_ITEM = 0x02
+    FLAG_GADGET = 0x04
+    FLAG_ALIVE = 0x08
+
+    __slots__ = ("ids", "x", "y", "z", "hp", "energy", "allegiance", "flags",
+                 "model_id", "effects", "type_map", "model_state", "_rows", "_grid")
+
+    def __init__(self, agents=()):
+        ids, xs, ys, zs = [], [], [], []
+        hps, energies, allegiances, flags = [], [], [], []
+        model_ids, effects, type_maps, model_states = [], [], [], []
+
+        for agent in agents:
+            living = agent.living_agent
+            agent_effects = living.effects
+            agent_type_map = living.type_map
+            hp = living.hp
+
+            agent_flags = 0
+            if agent.is_living:
+                agent_flags |= AgentSnapshot.FLAG_LIVING
+            if agent.is_item:
+                agent_flags |= AgentSnapshot.FLAG_ITEM
+            if agent.is_gadget:
+                agent_flags |= AgentSnapshot.FLAG_GADGET
+            # Same rule as AgentCache.IsAlive
+            if not ((agent_effects & 0x0010) or (agent_type_map & 0x000008)) and hp > 0.0:
+                agent_flags |= AgentSnapshot.FLAG_ALIVE
+
+            ids.append(agent.id)
+            xs.append(agent.x)
+            ys.append(agent.y)
+            zs.append(agent.z)
+            hps.append(hp)
+            energies.append(living.energy)
+            allegiances.append(living.allegiance.ToInt())
+            flags.append(agent_flags)
+            model_ids.append(living.player_number)
+            effects.append(agent_effects)
+            type_maps.append(agent_type_map)
+            model_states.append(living.model_state)
+
+        self.ids = memoryview(array('L', ids)).toreadonly()
+        self.x = memoryview(array('d', xs)).toreadonly()
+        self.y = memoryview(array('d', ys)).toreadonly()
+        self.z = memoryview(array('d', zs)).toreadonly()
+        self.hp = memoryview(array('d', hps)).toreadonly()
+        self.energy = memoryview(array('d', energies)).toreadonly()
+        self.allegiance = memoryview(array('l', allegiances)).toreadonly()
+        self.flags = memoryview(array('L', flags)).toreadonly()
+        self.model_id = memoryview(array('L', model_ids)).toreadonly()
+        self.effects = memoryview(array('L', effects)).toreadonly()
+        self.type_map = memoryview(array('L', type_maps)).toreadonly()
+        self.model_state = memoryview(array('L', model_states)).toreadonly()
+        self._rows = {agent_id: row for row, agent_id in enumerate(ids)}
+        self._grid = None
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, agent_id):
+        return agent_id in self._rows
+
+    def Grid(self) -> "AgentSpatialGrid":
+        """Spatial index over this snapshot, built on first use."""
+        if self._grid is None:
+            self._grid = AgentSpatialGrid(self)
+        return self._grid
+
+    def Row(self, agent_id: int) -> int:
+        """Row of the agent in every column, or -1 if it is not in the snapshot."""
+        return self._rows.get(agent_id, -1)
+
+    def GetXY(self, agent_id: int):
+        row = self._rows.get(agent_id)
+        if row is None:
+            return None
+        return self.x[row], self.y[row]
+
+    def GetHealth(self, agent_id: int):
+        row = self._rows.get(agent_id)
+        if row is None:
+            return None
+        return self.hp[row]
+
+    def IsAlive(self, agent_id: int) -> bool:
+        row = self._rows.get(agent_id)
+        return row is not None and (self.flags[row] & AgentSnapshot.FLAG_ALIVE) != 0
+
+    def DistanceKey(self, pos, fallback=None):
+        """
+        Returns a function agent_id -> distance to pos, reading the snapshot columns.
+        Agents missing from the snapshot go through fallback(agent_id) -> (x, y),
+        or are treated as infinitely far if no fallback is given.
+        """
+        px, py = pos[0], pos[1]
+        rows = self._rows
+        xs, ys = self.x, self.y
+        sqrt = math.sqrt
+
+        def distance(agent_id):
+            row = rows.get(agent_id)
+            if row is not None:
+                ax, ay = xs[row], ys[row]
+            elif fallback is not None:
+                ax, ay = fallback(agent_id)
+            else:
+                return math.inf
+            return sqrt((ax - px) ** 2 + (ay - py) ** 2)
+
+        return distance
+
+    def HealthKey(self, fallback=None):
+        """Returns a function agent_id -> hp, with the same fallback rules as DistanceKey."""
+        rows = self._rows
+        hps = self.hp
+
+        def health(agent_id):
+            row = rows.get(agent_id)
+            if row is not None:
+                return hps[row]
+            if fallback is not None:
+                return fallback(agent_id)
+            return 0.0
+
+        return health
+
+
+class AgentSpatialGrid:
+    """
+    Uniform grid over an AgentSnapshot for radius, k-nearest and polygon queries.
+    Living agents are also bucketed per allegiance so queries can skip other allegiances.
+    Distances use the same formula as Utils.Distance, so results match a brute-force scan.
+    """
+    CELL_SIZE = 1000.0
+    MIN_QUERY_SIZE = 32  # below this, checking each agent directly is cheaper than a grid query
+
+    def __init__(self, snapshot: "AgentSnapshot", cell_size: float = CELL_SIZE):
+        self._snapshot = snapshot
+        self._cell_size = cell_size
+        self._inv_cell_size = 1.0 / cell_size
+        self._cells: dict[tuple[int, int], list[int]] = {}
+        self._allegiance_cells: dict[int, dict[tuple[int, int], list[int]]] = {}
+        self._bounds = (0, 0, -1, -1)  # min_cx, min_cy, max_cx, max_cy
+
+        inv = self._inv_cell_size
+        floor = math.floor
+        cells = self._cells
+        allegiance_cells = self._allegiance_cells
+        living_flag = AgentSnapshot.FLAG_LIVING
+        for row, (x, y, allegiance, flags) in enumerate(zip(snapshot.x, snapshot.y, snapshot.allegiance, snapshot.flags)):
+            key = (floor(x * inv), floor(y * inv))
+            cell = cells.get(key)
+            if cell is None:
+                cells[key] = [row]
+            else:
+                cell.append(row)
+            if flags & living_flag:
+                buckets = allegiance_cells.get(allegiance)
+                if buckets is None:
+                    buckets = allegiance_cells[allegiance] = {}
+                cell = buckets.get(key)
+                if cell is None:
+                    buckets[key] = [row]
+                else:
+                    cell.append(row)
+        if cells:
+            cxs = [cx for cx, _ in cells]
+            cys = [cy for _, cy in cells]
+            self._bounds = (min(cxs), min(cys), max(cxs), max(cys))
+
+    def _buckets(self, allegiance):
+        if allegiance is None:
+            return self._cells
+        return self._allegiance_cells.get(int(allegiance), {})
+
+    def _rows_in_box(self, buckets, min_x, min_y, max_x, max_y):
+        """Rows of every cell overlapping the box, in no particular order."""
+        if not buckets:
+            return []
+        b_min_cx, b_min_cy, b_max_cx, b_max_cy = self._bounds
+        inv = self._inv_cell_size
+        min_cx = max(math.floor(min_x * inv), b_min_cx) if min_x > -math.inf else b_min_cx
+        min_cy = max(math.floor(min_y * inv), b_min_cy) if min_y > -math.inf else b_min_cy
+        max_cx = min(math.floor(max_x * inv), b_max_cx) if max_x < math.inf else b_max_cx
+        max_cy = min(math.floor(max_y * inv), b_max_cy) if max_y < math.inf else b_max_cy
+        if min_cx > max_cx or min_cy > max_cy:
+            return []
 
-                # --- Find largest cluster ---
-                largest_cluster = max(clusters, key=len)
+        rows = []
+        if (max_cx - min_cx + 1) * (max_cy - min_cy + 1) > len(buckets):
+            # Box covers more cells than are occupied, walk the occupied ones instead
+            for (cx, cy), cell in buckets.items():
+                if min_cx <= cx <= max_cx and min_cy <= cy <= max_cy:
+                    rows.extend(cell)
+            return rows
+        get = buckets.get
+        for cx in range(min_cx, max_cx + 1):
+            for cy in range(min_cy, max_cy + 1):
+                cell = get((cx, cy))
+                if cell:
+                    rows.extend(cell)
+        return rows
+
+    def _rows_in_radius(self, pos, radius, allegiance):
+        px, py = pos[0], pos[1]
+        xs, ys = self._snapshot.x, self._snapshot.y
+        sqrt = math.sqrt
+        candidates = self._rows_in_box(self._buckets(allegiance), px - radius, py - radius, px + radius, py + radius)
+        return [row for row in candidates if sqrt((xs[row] - px) ** 2 + (ys[row] - py) ** 2) <= radius]
+
+    def QueryRadius(self, pos, radius: float, allegiance=None) -> list[int]:
+        """Agent ids within radius of pos (inclusive), in snapshot order."""
+        ids = self._snapshot.ids
+        return [ids[row] for row in sorted(self._rows_in_radius(pos, radius, allegiance))]
+
+    def QueryRadiusSet(self, pos, radius: float, allegiance=None) -> set[int]:
+        """Same as QueryRadius, as a set for membership tests."""
+        ids = self._snapshot.ids
+        return {ids[row] for row in self._rows_in_radius(pos, radius, allegiance)}
+
+    def QueryNearest(self, pos, k: int = 1, max_distance: float = math.inf, allegiance=None, predicate=None) -> list[int]:
+        """
+        Up to k agent ids within max_distance of pos, nearest first.
+        predicate(agent_id) can reject candidates; it is only called for agents in range.
+        """
+        if k <= 0 or not self._cells:
+            return []
+        buckets = self._buckets(allegiance)
+        if not buckets:
+            return []
 
-                # --- Compute cluster center (average XY) ---
-                total_x = total_y = 0
-                for agent_id in largest_cluster:
-                    x, y = GLOBAL_CACHE.Agent.GetXY(agent_id)
-                    total_x += x
-                    total_y += y
-                center_x = total_x / len(largest_cluster)
-                center_y = total_y / len(largest_cluster)
-                center_pos = (center_x, center_y)
+        px, py = pos[0], pos[1]
+        snapshot = self._snapshot
+        ids, xs, ys = snapshot.ids, snapshot.x, snapshot.y
+        sqrt = math.sqrt
+        cell_size = self._cell_size
+        inv = self._inv_cell_size
+        b_min_cx, b_min_cy, b_max_cx, b_max_cy = self._bounds
+        ocx, ocy = math.floor(px * inv), math.floor(py * inv)
+        max_ring = max(abs(ocx - b_min_cx), abs(ocx - b_max_cx), abs(ocy - b_min_cy), abs(ocy - b_max_cy))
+
+        best: list[tuple[float, int]] = []
+        get = buckets.get
+        for ring in range(max_ring + 1):
+            # Anything in this ring or beyond is at least (ring - 1) cells away
+            ring_floor = (ring - 1) * cell_size
+            if ring_floor > max_distance:
+                break
+            if len(best) >= k and best[k - 1][0] < ring_floor:
+                break
+            if ring == 0:
+                ring_cells = [(ocx, ocy)]
+            else:
+                ring_cells = [(ocx + dx, ocy - ring) for dx in range(-ring, ring + 1)]
+                ring_cells += [(ocx + dx, ocy + ring) for dx in range(-ring, ring + 1)]
+                ring_cells += [(ocx - ring, ocy + dy) for dy in range(-ring + 1, ring)]
+                ring_cells += [(ocx + ring, ocy + dy) for dy in range(-ring + 1, ring)]
+
+            found = False
+            for key in ring_cells:
+                cell = get(key)
+                if not cell:
+                    continue
+                for row in cell:
+                    distance = sqrt((xs[row] - px) ** 2 + (ys[row] - py) ** 2)
+                    if distance > max_distance:
+                        continue
+                    if predicate is not None and not predicate(ids[row]):
+                        continue
+                    best.append((distance, row))
+                    found = True
+            if found:
+                best.sort()
+                del best[k:]
+
+        return [ids[row] for _, row in best]
+
+    def QueryPolygon(self, polygon, allegiance=None) -> list[int]:
+        """Agent ids inside polygon (list of (x, y) vertices), in snapshot order."""
+        if len(polygon) < 3:
+            return []
+        poly_xs = [p[0] for p in polygon]
+        poly_ys = [p[1] for p in polygon]
+        candidates = self._rows_in_box(self._buckets(allegiance), min(poly_xs), min(poly_ys), max(poly_xs), max(poly_ys))
+        xs, ys = self._snapshot.x, self._snapshot.y
+        edges = list(zip(polygon, polygon[-1:] + polygon[:-1]))
 
-                # --- Find agent closest to center ---
-                def dist(agent_id):
-                    ax, ay = GLOBAL_CACHE.Agent.GetXY(agent_id)
-                    return Utils.Distance((ax, ay), center_pos)
+        def inside(x, y):
+            result = False
+            for (x1, y1), (x2, y2) in edges:
+                if (y1 > y) != (y2 > y) and x < (x2 - x1) * (y - y1) / (y2 - y1) + x1:
+                    result = not result
+            return result
 
-                closest_agent_id = min(largest_cluster, key=dist)
-                return closest_agent_id
+        rows = sorted(row for row in candidates if inside(xs[row], ys[row]))
+        ids = self._snapshot.ids
+        return [ids[row] for row in rows]
 
 
 class RawAgentArray:
@@ -354,6 +758,7 @@ class RawAgentArray:
         self.agent_cache = {}           # id -> agent instance
         self.current_map_id = 0
         self.owner_cache = {}            # id -> owner_id (for items)
+        self.snapshot = AgentSnapshot()  # struct-of-arrays view of agent_array
 
         # === Name handling ===
         self.agent_name_map: dict[int, Tuple[str, float]] = {}  # id -> (name, timestamp)
@@ -429,6 +834,7 @@ class RawAgentArray:
 
         # === Step 5: Build id → agent map ===
         self.agent_dict = {agent.id: agent for agent in self.agent_array}
+        self.snapshot = AgentSnapshot(self.agent_array)
 
         # === Step 6: Rebuild filtered arrays ===
         self.ally_array.clear()
@@ -491,6 +897,7 @@ class RawAgentArray:
         # === Clear caches and mappings ===
         self.agent_dict.clear()
         self.agent_cache.clear()
+        self.snapshot = AgentSnapshot()
         self.agent_name_map.clear()
         self.name_requested.clear()
 
@@ -502,6 +909,10 @@ class RawAgentArray:
         self.update()
         return self.agent_array
     
+    def get_snapshot(self) -> AgentSnapshot:
+        self.update()
+        return self.snapshot
+
     def get_ally_array(self):
         self.update()
         return self.ally_array
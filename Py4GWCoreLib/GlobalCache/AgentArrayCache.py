@@ -62,5 +62,8 @@ class AgentArrayCache:
     
     def GetRawGadgetArray(self):
         return self._raw_agent_array.get_gadget_array()
+
+    def GetSnapshot(self):
+        return self._raw_agent_array.get_snapshot()
     
    
\ No newline at end of file
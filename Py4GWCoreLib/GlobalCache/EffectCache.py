@@ -1,17 +1,72 @@
 import PyEffects
 import PyPlayer
+import time
 from Py4GWCoreLib.Py4GWcorelib import ActionQueueManager
 
 class EffectsCache:
+    """
+    Frame-stamped effects cache. Each agent is read from PyEffects at most once per
+    frame tick, the first time it is queried; _update_cache() advances the tick.
+    When nothing has called _update_cache() for _max_tick_gap seconds (no
+    GLOBAL_CACHE update loop is running), every query reads PyEffects live.
+    """
     _buff_cache: dict[int, list] = {}
     _effect_cache: dict[int, list] = {}
+    _buff_id_cache: dict[int, set[int]] = {}
+    _effect_id_cache: dict[int, set[int]] = {}
+    _buff_by_skill: dict[int, dict[int, object]] = {}
+    _effect_by_skill: dict[int, dict[int, object]] = {}
+    _frame_stamps: dict[int, int] = {}
+    _frame: int = 0
+    _last_tick: float = 0.0
+    _max_tick_gap: float = 0.1  # seconds without _update_cache before queries read live
+    _map_id: int = 0
+    _hits: int = 0
+    _misses: int = 0
+
+    @classmethod
+    def _update_cache(cls, map_id: int = 0):
+        """Advance the frame tick. Called once per frame from GlobalCache."""
+        if map_id != cls._map_id:
+            cls._map_id = map_id
+            cls._reset_cache()
+        cls._frame += 1
+        cls._last_tick = time.monotonic()
 
     @classmethod
     def _update_or_insert(cls, agent_id: int):
         """Insert or update cache for agent."""
         effects = PyEffects.PyEffects(agent_id)
-        cls._buff_cache[agent_id] = effects.GetBuffs()
-        cls._effect_cache[agent_id] = effects.GetEffects()
+        buffs = effects.GetBuffs()
+        effect_list = effects.GetEffects()
+        cls._buff_cache[agent_id] = buffs
+        cls._effect_cache[agent_id] = effect_list
+        cls._buff_id_cache[agent_id] = {buff.skill_id for buff in buffs}
+        cls._effect_id_cache[agent_id] = {effect.skill_id for effect in effect_list}
+
+        # First occurrence wins, matching the old linear lookups
+        buff_by_skill = {}
+        for buff in buffs:
+            buff_by_skill.setdefault(buff.skill_id, buff)
+        effect_by_skill = {}
+        for effect in effect_list:
+            effect_by_skill.setdefault(effect.skill_id, effect)
+        cls._buff_by_skill[agent_id] = buff_by_skill
+        cls._effect_by_skill[agent_id] = effect_by_skill
+        cls._frame_stamps[agent_id] = cls._frame
+
+    @classmethod
+    def _ensure(cls, agent_id: int):
+        """Populate the agent lazily, once per frame tick, or on every call when the tick is not driven."""
+        if time.monotonic() - cls._last_tick > cls._max_tick_gap:
+            cls._misses += 1
+            cls._update_or_insert(agent_id)
+            return
+        if cls._frame_stamps.get(agent_id) == cls._frame:
+            cls._hits += 1
+            return
+        cls._misses += 1
+        cls._update_or_insert(agent_id)
 
     @classmethod
     def _reset_cache(cls, agent_id = None):
@@ -19,9 +74,29 @@ class EffectsCache:
         if agent_id is None:
             cls._buff_cache.clear()
             cls._effect_cache.clear()
+            cls._buff_id_cache.clear()
+            cls._effect_id_cache.clear()
+            cls._buff_by_skill.clear()
+            cls._effect_by_skill.clear()
+            cls._frame_stamps.clear()
         else:
             cls._buff_cache.pop(agent_id, None)
             cls._effect_cache.pop(agent_id, None)
+            cls._buff_id_cache.pop(agent_id, None)
+            cls._effect_id_cache.pop(agent_id, None)
+            cls._buff_by_skill.pop(agent_id, None)
+            cls._effect_by_skill.pop(agent_id, None)
+            cls._frame_stamps.pop(agent_id, None)
+
+    @classmethod
+    def GetCacheStats(cls) -> tuple[int, int]:
+        """Return (hits, misses) since the last ResetCacheStats."""
+        return cls._hits, cls._misses
+
+    @classmethod
+    def ResetCacheStats(cls):
+        cls._hits = 0
+        cls._misses = 0
 
     @classmethod
     def DropBuff(cls, buff_id: int):
@@ -38,12 +113,12 @@ class EffectsCache:
 
     @classmethod
     def GetBuffs(cls, agent_id: int):
-        cls._update_or_insert(agent_id)
+        cls._ensure(agent_id)
         return cls._buff_cache[agent_id]
 
     @classmethod
     def GetEffects(cls, agent_id: int):
-        cls._update_or_insert(agent_id)
+        cls._ensure(agent_id)
         return cls._effect_cache[agent_id]
 
     @classmethod
@@ -54,37 +129,43 @@ class EffectsCache:
     def GetEffectCount(cls, agent_id: int):
         return len(cls.GetEffects(agent_id))
 
+    @classmethod
+    def GetEffectSkillIDs(cls, agent_id: int) -> set[int]:
+        """Skill ids of every buff and effect on the agent."""
+        cls._ensure(agent_id)
+        return cls._buff_id_cache[agent_id] | cls._effect_id_cache[agent_id]
+
     @classmethod
     def BuffExists(cls, agent_id: int, skill_id: int):
-        return any(buff.skill_id == skill_id for buff in cls.GetBuffs(agent_id))
+        cls._ensure(agent_id)
+        return skill_id in cls._buff_id_cache[agent_id]
 
     @classmethod
     def EffectExists(cls, agent_id: int, skill_id: int):
-        return any(effect.skill_id == skill_id for effect in cls.GetEffects(agent_id))
-    
+        cls._ensure(agent_id)
+        return skill_id in cls._effect_id_cache[agent_id]
+
     @classmethod
     def HasEffect(cls,agent_id: int, skill_id: int):
-        return cls.EffectExists(agent_id, skill_id) or cls.BuffExists(agent_id, skill_id)
+        cls._ensure(agent_id)
+        return skill_id in cls._effect_id_cache[agent_id] or skill_id in cls._buff_id_cache[agent_id]
 
     @classmethod
     def EffectAttributeLevel(cls, agent_id: int, skill_id: int):
-        for effect in cls.GetEffects(agent_id):
-            if effect.skill_id == skill_id:
-                return effect.attribute_level
-        return 0
+        cls._ensure(agent_id)
+        effect = cls._effect_by_skill[agent_id].get(skill_id)
+        return effect.attribute_level if effect is not None else 0
 
     @classmethod
     def GetEffectTimeRemaining(cls, agent_id: int, skill_id: int):
-        for effect in cls.GetEffects(agent_id):
-            if effect.skill_id == skill_id:
-                return effect.time_remaining
-        return 0
+        cls._ensure(agent_id)
+        effect = cls._effect_by_skill[agent_id].get(skill_id)
+        return effect.time_remaining if effect is not None else 0
 
     @classmethod
     def GetBuffID(cls, skill_id: int) -> int:
         player_instance = PyPlayer.PyPlayer()
         agent_id = player_instance.id
-        for buff in cls.GetBuffs(agent_id):
-            if buff.skill_id == skill_id:
-                return buff.buff_id
-        return 0
\ No newline at end of file
+        cls._ensure(agent_id)
+        buff = cls._buff_by_skill[agent_id].get(skill_id)
+        return buff.buff_id if buff is not None else 0
@@ -61,6 +61,7 @@ class GlobalCache:
         
     def _update_cache(self):
         self.Map._update_cache()
+        self.Effects._update_cache(self.Map.GetMapID())
         if self.Map.IsMapLoading() or self.Map.IsInCinematic():
             self.Party._update_cache()
             self.Player._update_cache()
@@ -1,5 +1,5 @@
 import PyInventory
-from Py4GWCoreLib.Py4GWcorelib import ActionQueueManager
+from Py4GWCoreLib.Py4GWcorelib import ActionQueueManager, AssignStorageSlots
 from Py4GWCoreLib import ConsoleLog
 from Py4GWCoreLib.UIManager import UIManager
 from Py4GWCoreLib import Bags
@@ -105,15 +105,10 @@ class InventoryCache:
             Bag_enum.Bag_2.value
         ]
 
-        bags = self._raw_item_cache.get_bags(bags_to_check)
-        total_quantity = 0
-
-        for bag in bags:
-            for item in bag.GetItems():
-                if item.item_id == item_id:
-                    total_quantity += item.quantity
-
-        return total_quantity
+        bag_id, _ = self._raw_item_cache.index.find(item_id, bags_to_check)
+        if bag_id is None:
+            return 0
+        return self._raw_item_cache.index.items[item_id].quantity
 
     def GetModelCount(self, model_id: int) -> int:
         """
@@ -135,15 +130,7 @@ class InventoryCache:
             Bag_enum.Bag_2.value
         ]
 
-        bags = self._raw_item_cache.get_bags(bags_to_check)
-        total_quantity = 0
-
-        for bag in bags:
-            for item in bag.GetItems():
-                if item.model_id == model_id:
-                    total_quantity += item.quantity
-
-        return total_quantity
+        return self._raw_item_cache.index.get_model_quantity(model_id, bags_to_check)
     
     def GetModelCountInStorage(self, model_id: int, Anniversary_panel: bool = True) -> int:
         """
@@ -176,15 +163,7 @@ class InventoryCache:
             Bag_enum.Storage_14.value,
         ]
 
-        bags = self._raw_item_cache.get_bags([bag for bag in bags_to_check if bag is not None])
-        total_quantity = 0
-
-        for bag in bags:
-            for item in bag.GetItems():
-                if item.model_id == model_id:
-                    total_quantity += item.quantity
-
-        return total_quantity
+        return self._raw_item_cache.index.get_model_quantity(model_id, [bag for bag in bags_to_check if bag is not None])
 
     def GetModelCountInEquipped(self, model_id: int) -> int:
         """
@@ -216,19 +195,12 @@ class InventoryCache:
             Bag_enum.Bag_2.value
         ]
 
-        bags = self._raw_item_cache.get_bags(bags_to_check)
-        id_kits = []
-
-        for bag in bags:
-            for item in bag.GetItems():
-                if self.item_cache.Usage.IsIDKit(item.item_id):
-                    id_kits.append(item)
-
+        id_kits = self._raw_item_cache.index.get_kits("id", bags_to_check)
         if not id_kits:
             return 0
 
-        id_kit_with_lowest_uses = min(id_kits, key=lambda item: self.item_cache.Usage.GetUses(item.item_id))
-        return id_kit_with_lowest_uses.item_id
+        item_id, _ = min(id_kits, key=lambda kit: kit[1])  # first of the lowest
+        return item_id
     
 
     def GetFirstUnidentifiedItem(self) -> int:
@@ -271,22 +243,12 @@ class InventoryCache:
             Bag_enum.Bag_2.value
         ]
 
-        bags = self._raw_item_cache.get_bags(bags_to_check)
-        kits = []
-
-        for bag in bags:
-            for item in bag.GetItems():
-                if not self.item_cache.Usage.IsSalvageKit(item.item_id):
-                    continue
-                if use_lesser and not self.item_cache.Usage.IsLesserKit(item.item_id):
-                    continue
-                kits.append(item)
-
+        kits = self._raw_item_cache.index.get_kits("lesser_salvage" if use_lesser else "salvage", bags_to_check)
         if not kits:
             return 0
 
-        best_kit = min(kits, key=lambda item: self.item_cache.Usage.GetUses(item.item_id))
-        return best_kit.item_id
+        item_id, _ = min(kits, key=lambda kit: kit[1])  # first of the lowest
+        return item_id
 
     def GetFirstSalvageableItem(self) -> int:
         """
@@ -325,14 +287,8 @@ class InventoryCache:
             Bag_enum.Bag_2.value
         ]
 
-        bags = self._raw_item_cache.get_bags(bags_to_check)
-
-        for bag in bags:
-            for item in bag.GetItems():
-                if item.model_id == model_id:
-                    return item.item_id
-
-        return 0
+        item_ids = self._raw_item_cache.index.get_model_item_ids(model_id, bags_to_check)
+        return item_ids[0] if item_ids else 0
     
     def GetAllItemIdsByModelID(self, model_id: int) -> list[int]:
         """
@@ -348,15 +304,7 @@ class InventoryCache:
             Bag_enum.Bag_1.value,
             Bag_enum.Bag_2.value
         ]
-        item_ids = []
-
-        bags = self._raw_item_cache.get_bags(bags_to_check)
-
-        for bag in bags:
-            for item in bag.GetItems():
-                if item.model_id == model_id:
-                    item_ids.append(item.item_id)
-        return item_ids
+        return self._raw_item_cache.index.get_model_item_ids(model_id, bags_to_check)
     
     def GetfirstModelIDInStorage(self, model_id: int) -> int:
         """
@@ -383,14 +331,8 @@ class InventoryCache:
             Bag_enum.Storage_14.value
         ]
 
-        bags = self._raw_item_cache.get_bags(bags_to_check)
-
-        for bag in bags:
-            for item in bag.GetItems():
-                if item.model_id == model_id:
-                    return item.item_id
-
-        return 0
+        item_ids = self._raw_item_cache.index.get_model_item_ids(model_id, bags_to_check)
+        return item_ids[0] if item_ids else 0
 
     def IdentifyItem (self, item_id, id_kit_id):
         """
@@ -525,14 +467,7 @@ class InventoryCache:
         Locate the bag ID and slot of the given item ID in inventory bags (1, 2, 3, 4).
         """
         bags_to_check = [1, 2, 3, 4]
-        bags = self._raw_item_cache.get_bags(bags_to_check)
-
-        for bag in bags:
-            for item in bag.GetItems():
-                if item.item_id == item_id:
-                    return bag.id, item.slot
-
-        return None, None
+        return self._raw_item_cache.index.find(item_id, bags_to_check)
 
     def DepositItemToStorage(self, item_id: int, Anniversary_panel: bool = True, ammount:int = -1) -> bool:
         """
@@ -561,7 +496,6 @@ class InventoryCache:
                     continue
             return valid_bags
         
-        MAX_STACK_SIZE = 250
         quantity = self.item_cache.Properties.GetQuantity(item_id)
         is_stackable = self.item_cache.Customization.IsStackable(item_id)
 
@@ -575,49 +509,20 @@ class InventoryCache:
             dye_info = Item.Customization.GetDyeInfo(item_id)
             dye1_to_match = dye_info.dye1.ToInt()
 
-        storage_bags = GetStorageBags()
-        remaining_quantity = quantity
-        moved_any = False
-        model_id = self.item_cache.GetModelID(item_id)
-
-        for bag_enum, bag in storage_bags:
-            items = bag.GetItems()
-
-            # === Fill partial stacks ===
-            if is_stackable:
-                for item in items:
-                    if item.model_id == model_id:
-                        
-                        if is_dye:
-                            item_dye_info = self.item_cache.Customization.GetDyeInfo(item.item_id)
-                            if item_dye_info.dye1.ToInt() != dye1_to_match:
-                                continue
-                    
-                        current_qty = self.item_cache.Properties.GetQuantity(item.item_id)
-                        if current_qty < MAX_STACK_SIZE:
-                            space_left = MAX_STACK_SIZE - current_qty
-                            to_move = min(space_left, remaining_quantity)
-                            to_move = min(to_move, ammount) if ammount > 0 else to_move
-                            if to_move > 0:
-                                self.MoveItem(item_id, bag_enum.value, item.slot, to_move)
-                                remaining_quantity -= to_move
-                                moved_any = True
-                                if remaining_quantity == 0:
-                                    return True
-
-            # === Fill empty slots ===
-            occupied_slots = {item.slot for item in items}
-            for slot in range(bag.GetSize()):
-                if slot in occupied_slots:
-                    continue
-                to_move = remaining_quantity if not is_stackable else min(remaining_quantity, MAX_STACK_SIZE)
-                self.MoveItem(item_id, bag_enum.value, slot, to_move)
-                remaining_quantity -= to_move
-                moved_any = True
-                if remaining_quantity == 0:
-                    return True
-
-        return moved_any
+        storage_bags = []
+        for bag_enum, bag in GetStorageBags():
+            slots = []
+            for item in bag.GetItems():
+                dye1 = 0
+                if is_dye and item.model_id == model_id:
+                    dye1 = self.item_cache.Customization.GetDyeInfo(item.item_id).dye1.ToInt()
+                slots.append([item.slot, item.item_id, item.model_id, item.quantity, dye1])
+            storage_bags.append((bag_enum.value, bag.GetSize(), slots))
+
+        moves = AssignStorageSlots(storage_bags, item_id, model_id, quantity, is_stackable, dye1_to_match, ammount)
+        for bag_id, slot, to_move in moves:
+            self.MoveItem(item_id, bag_id, slot, to_move)
+        return len(moves) > 0
     
     def WithdrawItemFromStorage(self, item_id: int, ammount:int = -1) -> bool:
         """
@@ -37,8 +37,110 @@ class Bag_enum(Enum):
     Equipped_Items = 22
     Max = 23
 
+class InventoryIndex:
+    """
+    Lookups over the cached bags by item id, model id and kit kind, kept current by RawItemCache.update.
+    A bag's model and kit entries are rebuilt only when its (item id, slot, model id, quantity, uses)
+    signature changes; item objects are re-pointed on every read so other fields stay current.
+    """
+    KIT_KINDS = ("id", "salvage", "lesser_salvage", "expert_salvage", "perfect_salvage")
+
+    def __init__(self):
+        self.slots: Dict[int, tuple[int, int]] = {}  # item_id -> (bag_id, slot)
+        self.items: Dict[int, PyItem.PyItem] = {}  # item_id -> item from the current bags
+        self._bag_items: Dict[int, List[int]] = {}  # bag_id -> item ids in GetItems order
+        self._signatures: Dict[int, tuple] = {}
+        self._models: Dict[int, Dict[int, List[int]]] = {}  # bag_id -> model_id -> item ids
+        self._model_quantities: Dict[int, Dict[int, int]] = {}  # bag_id -> model_id -> total quantity
+        self._kits: Dict[int, Dict[str, List[tuple[int, int]]]] = {}  # bag_id -> kind -> (item_id, uses)
+
+    def clear(self):
+        self.slots.clear()
+        self.items.clear()
+        self._bag_items.clear()
+        self._signatures.clear()
+        self._models.clear()
+        self._model_quantities.clear()
+        self._kits.clear()
+
+    def remove_bag(self, bag_id: int):
+        for item_id in self._bag_items.pop(bag_id, ()):
+            if self.slots.get(item_id, (None,))[0] == bag_id:  # not already re-indexed into a bag it moved to
+                del self.slots[item_id]
+                self.items.pop(item_id, None)
+        self._signatures.pop(bag_id, None)
+        self._models.pop(bag_id, None)
+        self._model_quantities.pop(bag_id, None)
+        self._kits.pop(bag_id, None)
+
+    def update_bag(self, bag_id: int, items: List[PyItem.PyItem]) -> bool:
+        """Index the bag's current items; returns True if its entries had to be rebuilt."""
+        signature = tuple((item.item_id, item.slot, item.model_id, item.quantity, item.uses) for item in items)
+        if signature == self._signatures.get(bag_id):
+            for item in items:
+                self.items[item.item_id] = item
+            return False
+
+        self.remove_bag(bag_id)
+        models: Dict[int, List[int]] = {}
+        quantities: Dict[int, int] = {}
+        kits: Dict[str, List[tuple[int, int]]] = {}
+        for item in items:
+            item_id = item.item_id
+            self.items[item_id] = item
+            self.slots[item_id] = (bag_id, item.slot)
+            models.setdefault(item.model_id, []).append(item_id)
+            quantities[item.model_id] = quantities.get(item.model_id, 0) + item.quantity
+            if item.is_id_kit:
+                kits.setdefault("id", []).append((item_id, item.uses))
+            if item.is_salvage_kit:
+                kits.setdefault("salvage", []).append((item_id, item.uses))
+                if item.is_lesser_kit:
+                    kits.setdefault("lesser_salvage", []).append((item_id, item.uses))
+            if item.is_expert_salvage_kit:
+                kits.setdefault("expert_salvage", []).append((item_id, item.uses))
+            if item.is_perfect_salvage_kit:
+                kits.setdefault("perfect_salvage", []).append((item_id, item.uses))
+
+        self._bag_items[bag_id] = [item.item_id for item in items]
+        self._signatures[bag_id] = signature
+        self._models[bag_id] = models
+        self._model_quantities[bag_id] = quantities
+        self._kits[bag_id] = kits
+        return True
+
+    def get_bag_item_ids(self, bag_id: int) -> List[int]:
+        return list(self._bag_items.get(bag_id, ()))
+
+    def find(self, item_id: int, bag_ids=None) -> tuple[int | None, int | None]:
+        """(bag_id, slot) of the item, optionally only if it is in one of bag_ids."""
+        location = self.slots.get(item_id)
+        if location is None or (bag_ids is not None and location[0] not in bag_ids):
+            return None, None
+        return location
+
+    def get_model_item_ids(self, model_id: int, bag_ids) -> List[int]:
+        """Item ids of the model in bag_ids, in bag then slot order."""
+        item_ids = []
+        for bag_id in bag_ids:
+            item_ids.extend(self._models.get(bag_id, {}).get(model_id, ()))
+        return item_ids
+
+    def get_model_quantity(self, model_id: int, bag_ids) -> int:
+        return sum(self._model_quantities.get(bag_id, {}).get(model_id, 0) for bag_id in bag_ids)
+
+    def get_kits(self, kind: str, bag_ids) -> List[tuple[int, int]]:
+        """(item_id, uses) of each kit of the kind (see KIT_KINDS) in bag_ids, in bag then slot order."""
+        kits = []
+        for bag_id in bag_ids:
+            kits.extend(self._kits.get(bag_id, {}).get(kind, ()))
+        return kits
+
+
 class RawItemCache:
     _instance = None
+    LIVE_BAGS = frozenset((Bag_enum.Backpack.value, Bag_enum.Belt_Pouch.value, Bag_enum.Bag_1.value,
+                           Bag_enum.Bag_2.value, Bag_enum.Equipment_Pack.value, Bag_enum.Equipped_Items.value))
 
     def __new__(cls, throttle: int = 75):
         if cls._instance is None:
@@ -54,6 +156,11 @@ class RawItemCache:
         self.throttle = throttle
         self.bags: Dict[int, PyInventory.Bag] = {}
         self.transitory_items: Dict[int, PyItem.PyItem] = {}
+        self.index = InventoryIndex()
+        self._item_counts: Dict[int, int] = {}  # bag_id -> items_count when its items were last read
+        self._storage_turn = 0
+        self.refresh_stats = {"updates": 0, "bags_read": 0, "bags_rebuilt": 0, "items_read": 0}
+        self._refresh_stats_start = time.perf_counter()
         self.update_throttle = ThrottledTimer(throttle)
         self.map_valid = False
         self._initialized = True
@@ -61,34 +168,97 @@ class RawItemCache:
     def reset(self):
         self.bags.clear()
         self.transitory_items.clear()
+        self.index.clear()
+        self._item_counts.clear()
         self.update_throttle.Reset()
         self.map_valid = False
         
+    def reset_refresh_stats(self):
+        for key in self.refresh_stats:
+            self.refresh_stats[key] = 0
+        self._refresh_stats_start = time.perf_counter()
+        
+    def get_refresh_stats(self) -> Dict[str, float]:
+        """
+        Update counters since the last reset_refresh_stats(), plus bags rebuilt and items read per second.
+        """
+        elapsed = max(time.perf_counter() - self._refresh_stats_start, 1e-9)
+        stats: Dict[str, float] = dict(self.refresh_stats)
+        stats["bags_rebuilt_per_second"] = stats["bags_rebuilt"] / elapsed
+        stats["items_per_second"] = stats["items_read"] / elapsed
+        return stats
+        
+    def _read_bag(self, bag: int) -> bool:
+        """Materialize the bag's items into the index; returns True if its entries changed."""
+        bag_instance = self.bags[bag]
+        try:
+            items = bag_instance.GetItems()
+        except Exception:
+            self.bags.pop(bag, None)
+            self.index.remove_bag(bag)
+            self._item_counts.pop(bag, None)
+            return True
+
+        self._item_counts[bag] = bag_instance.items_count
+        self.refresh_stats["bags_read"] += 1
+        self.refresh_stats["items_read"] += len(items)
+        if self.index.update_bag(bag, items):
+            self.refresh_stats["bags_rebuilt"] += 1
+            return True
+        return False
+
     def update(self):
         
         if not self.update_throttle.IsExpired():
             return
 
         self.update_throttle.Reset()
-        self.bags.clear()
+        self.refresh_stats["updates"] += 1
 
         for bag in range(Bag_enum.Backpack.value, Bag_enum.Max.value):
             try:
-                bag_instance = PyInventory.Bag(bag, str(bag))
-                self.bags[bag] = bag_instance
+                bag_instance = self.bags.get(bag)
+                if bag_instance is None:
+                    self.bags[bag] = PyInventory.Bag(bag, str(bag))
+                else:
+                    bag_instance.GetContext()
             except Exception:
+                self.bags.pop(bag, None)
+                self.index.remove_bag(bag)
+                self._item_counts.pop(bag, None)
                 continue  # Skip invalid bags
+
+        # Inventory bags are read every update. Storage bags only change through them, so each is read
+        # when its item count changes, when any bag changed this update, or on its round-robin turn.
+        changed = False
+        storage = []
+        for bag in sorted(self.bags):
+            if bag in self.LIVE_BAGS:
+                changed |= self._read_bag(bag)
+            else:
+                storage.append(bag)
+
+        skipped = []
+        if storage:
+            self._storage_turn = (self._storage_turn + 1) % len(storage)
+        for position, bag in enumerate(storage):
+            if changed or position == self._storage_turn or self._item_counts.get(bag) != self.bags[bag].items_count:
+                changed |= self._read_bag(bag)
+            else:
+                skipped.append(bag)
+        if changed:
+            for bag in skipped:  # items may have moved in from or out to a bag passed over above
+                self._read_bag(bag)
             
         # Clean up transitory items that no longer exist
         to_remove = []
         for item_id, item in self.transitory_items.items():
-            this_item = PyItem.PyItem(item_id)
-            if not this_item:
-                to_remove.append(item_id)
-            elif item.agent_id == 0:  # Invalid agent ID
+            if item.agent_id == 0:  # Invalid agent ID
                 to_remove.append(item_id)
             elif item.agent_item_id == 0:  # Invalid agent item I
-                to_remove.append(item_id)   
+                to_remove.append(item_id)
+            elif not item.IsItemValid(item_id):
+                to_remove.append(item_id)
 
         for item_id in to_remove:
             del self.transitory_items[item_id]
@@ -111,11 +281,7 @@ class RawItemCache:
         if bag not in self.bags:
             return []
 
-        bag_instance = self.bags[bag]
-        items = bag_instance.GetItems()
-        item_ids = [item.item_id for item in items]
-        
-        return item_ids
+        return self.index.get_bag_item_ids(bag)
                     
     def get_all_items(self):
         """
@@ -126,11 +292,8 @@ class RawItemCache:
         for bag in range(Bag_enum.Backpack.value, Bag_enum.Max.value):
             if bag not in self.bags:
                 continue
-            
-            bag_instance = self.bags[bag]
-            items = bag_instance.GetItems()
-            item_ids = [item.item_id for item in items]
-            all_item_ids.extend(item_ids)
+
+            all_item_ids.extend(self.index.get_bag_item_ids(bag))
 
         return all_item_ids
     
@@ -168,10 +331,9 @@ class RawItemCache:
         return list(self.bags.values())
     
     def get_item_by_id(self, item_id: int):
-        for bag in self.bags.values():
-            item = bag.FindItemById(item_id)
-            if item:
-                return item
+        item = self.index.items.get(item_id)
+        if item:
+            return item
         
         # Check transitory cache
         item = self.transitory_items.get(item_id)
@@ -231,15 +393,8 @@ class ItemCache:
     
     def GetItemIdFromModelID(self, model_id):
         """Purpose: Retrieve the item ID from the model ID."""
-        bags = self.raw_item_array.get_all_bags()
-
-        for bag in bags:
-            for item in bag.GetItems():
-                # Check if the item's model ID matches the given model ID
-                if item.model_id == model_id:
-                    return item.item_id  # Return the item ID if a match is found
-
-        return 0  # Return 0 if no matching item is found
+        item_ids = self.raw_item_array.index.get_model_item_ids(model_id, self.raw_item_array.bags)
+        return item_ids[0] if item_ids else 0  # Return 0 if no matching item is found
     
     def GetItemByAgentID(self, agent_id: int):
         item = self.raw_item_array.get_item_by_id(agent_id)
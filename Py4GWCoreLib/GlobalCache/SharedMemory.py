@@ -1,11 +1,17 @@
 import Py4GW
-from Py4GWCoreLib import ConsoleLog, Map, Party, Player, Agent, Effects, SharedCommandType, ThrottledTimer
+from Py4GWCoreLib import ConsoleLog, Map, Party, Player, Agent, SharedCommandType, ThrottledTimer
+from .EffectCache import EffectsCache
 from ctypes import Structure, c_int, c_uint, c_float, c_bool, c_wchar
 from multiprocessing import shared_memory
 import ctypes
 from ctypes import sizeof
 from datetime import datetime, timezone
+import os
+import sys
+import tempfile
+import threading
 import time
+from contextlib import contextmanager
 
 SHMEM_MAX_EMAIL_LEN = 64
 SHMEM_MAX_CHAR_LEN = 30
@@ -17,6 +23,9 @@ SHMEM_ZERO_EPOCH = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0
 SHMEM_SUBSCRIBE_TIMEOUT_MILISECONDS = 5000 # milliseconds
 
 SHMEM_NUMBER_OF_SKILLS = 8
+SHMEM_MESSAGE_QUEUE_SIZE = 16  # Per receiving account
+SHMEM_SEQUENCE_MASK = 0xFFFFFFFF
+SHMEM_SEQLOCK_MAX_RETRIES = 64
 
     
 class AccountData(Structure):
@@ -68,6 +77,16 @@ class SharedMessage(Structure):
         ("Active", c_bool), 
         ("Running", c_bool),
         ("Timestamp", c_uint), 
+        ("Sequence", c_uint),  # Ticket the message was published with, orders a receiver's queue oldest first
+    ]
+    
+class SharedMessageQueue(Structure):
+    _pack_ = 1
+    _fields_ = [
+        ("NextTicket", c_uint),  # Ticket of the next message sent, only advanced under the producer mutex
+        ("Sent", c_uint),
+        ("Overflows", c_uint),  # Messages rejected because every entry was still in use
+        ("Messages", SharedMessage * SHMEM_MESSAGE_QUEUE_SIZE),
     ]
     
 class HeroAIOptionStruct(Structure):
@@ -89,9 +108,191 @@ class AllAccounts(Structure):
     _pack_ = 1
     _fields_ = [
         ("AccountData", AccountData * SHMEM_MAX_NUM_PLAYERS),
-        ("SharedMessage", SharedMessage * SHMEM_MAX_NUM_PLAYERS),  # Messages for each player
+        ("MessageQueues", SharedMessageQueue * SHMEM_MAX_NUM_PLAYERS),  # Incoming messages for each player slot
         ("HeroAIOptions", HeroAIOptionStruct * SHMEM_MAX_NUM_PLAYERS),  # Game options for HeroAI
+        ("SlotGenerations", c_uint * SHMEM_MAX_NUM_PLAYERS),  # Bumped whenever a slot's lookup keys change
+        ("SlotSequences", c_uint * SHMEM_MAX_NUM_PLAYERS),  # Seqlock per AccountData slot, odd while a write is in progress
     ]
+
+
+def _build_account_data_spans(max_span: int = 64) -> list[tuple[int, int]]:
+    """Byte ranges of AccountData, one per field, with large arrays split into max_span chunks."""
+    spans = []
+    for name, _ in AccountData._fields_:
+        descriptor = getattr(AccountData, name)
+        start = descriptor.offset
+        end = start + descriptor.size
+        while start < end:
+            spans.append((start, min(start + max_span, end)))
+            start += max_span
+    return spans
+
+_ACCOUNT_DATA_SPANS = _build_account_data_spans()
+
+
+def _account_slot_key(player: AccountData) -> tuple:
+    """Fields of an AccountData slot that the lookup tables are keyed on."""
+    return (
+        player.IsSlotActive,
+        player.IsAccount,
+        player.IsHero,
+        player.IsPet,
+        player.AccountEmail,
+        player.PlayerID,
+        player.OwnerPlayerID,
+        player.HeroID,
+        player.PartyID,
+        player.MapID,
+        player.MapRegion,
+        player.MapDistrict,
+    )
+
+
+class SharedMemoryIndex:
+    """
+    Lookup tables from email, agent id, owner id, party id and map to AccountData slots.
+    Refresh() only re-reads slots whose generation counter moved since the last refresh,
+    so other processes writing their own slots never force a full re-scan.
+    """
+    def __init__(self, account_views: list[AccountData], slot_generations):
+        self._account_views = account_views
+        self._slot_generations = slot_generations
+        self._num_slots = len(account_views)
+        self._seen_generations: list[int | None] = [None] * self._num_slots
+        self._slot_keys: list[tuple | None] = [None] * self._num_slots
+        self.active: set[int] = set()
+        self.by_email: dict[str, set[int]] = {}
+        self.by_player_id: dict[int, set[int]] = {}
+        self.by_owner: dict[int, set[int]] = {}
+        self.by_party: dict[int, set[int]] = {}
+        self.by_map: dict[tuple[int, int, int], set[int]] = {}
+        self.reindexed_slots = 0
+
+    @staticmethod
+    def _add(table: dict, key, index: int):
+        table.setdefault(key, set()).add(index)
+
+    @staticmethod
+    def _discard(table: dict, key, index: int):
+        slots = table.get(key)
+        if slots is not None:
+            slots.discard(index)
+            if not slots:
+                del table[key]
+
+    def _unlink(self, index: int):
+        key = self._slot_keys[index]
+        if key is None:
+            return
+        is_active, is_account, is_hero, is_pet, email, player_id, owner_id, _, party_id, map_id, map_region, map_district = key
+        self._slot_keys[index] = None
+        if not is_active:
+            return
+        self.active.discard(index)
+        if is_account:
+            self._discard(self.by_email, email, index)
+        if is_hero or is_pet:
+            self._discard(self.by_owner, owner_id, index)
+        self._discard(self.by_player_id, player_id, index)
+        self._discard(self.by_party, party_id, index)
+        self._discard(self.by_map, (map_id, map_region, map_district), index)
+
+    def _link(self, index: int, key: tuple):
+        self._slot_keys[index] = key
+        is_active, is_account, is_hero, is_pet, email, player_id, owner_id, _, party_id, map_id, map_region, map_district = key
+        if not is_active:
+            return
+        self.active.add(index)
+        if is_account:
+            self._add(self.by_email, email, index)
+        if is_hero or is_pet:
+            self._add(self.by_owner, owner_id, index)
+        self._add(self.by_player_id, player_id, index)
+        self._add(self.by_party, party_id, index)
+        self._add(self.by_map, (map_id, map_region, map_district), index)
+
+    def InvalidateSlot(self, index: int):
+        """Force the slot to be re-read on the next refresh."""
+        self._seen_generations[index] = None
+
+    def Refresh(self):
+        """Re-index the slots whose generation changed since the last refresh."""
+        generations = self._slot_generations[:]
+        if generations == self._seen_generations:
+            return
+        for index, generation in enumerate(generations):
+            if generation == self._seen_generations[index]:
+                continue
+            key = _account_slot_key(self._account_views[index])
+            if self._slot_generations[index] != generation:
+                continue  # a writer raced us, pick it up on the next refresh
+            self._unlink(index)
+            self._link(index, key)
+            self._seen_generations[index] = generation
+            self.reindexed_slots += 1
+
+    def GetSlotKey(self, index: int) -> tuple | None:
+        return self._slot_keys[index]
+
+    def FindAccount(self, account_email: str) -> int:
+        slots = self.by_email.get(account_email)
+        return min(slots) if slots else -1
+
+    def GetActiveSlots(self) -> list[int]:
+        return sorted(self.active)
+
+    def GetSlotsByPlayerID(self, player_id: int) -> list[int]:
+        return sorted(self.by_player_id.get(player_id, ()))
+
+    def GetSlotsByOwner(self, owner_id: int) -> list[int]:
+        return sorted(self.by_owner.get(owner_id, ()))
+
+    def GetSlotsByParty(self, party_id: int) -> list[int]:
+        return sorted(self.by_party.get(party_id, ()))
+
+    def GetSlotsByMap(self, map_id: int, map_region: int, map_district: int) -> list[int]:
+        return sorted(self.by_map.get((map_id, map_region, map_district), ()))
+
+    def GetMaps(self) -> list[tuple[int, int, int]]:
+        return list(self.by_map.keys())
+        
+class SharedMemoryMutex:
+    """
+    Named cross-process mutex. Python has no portable compare-and-swap on shared memory,
+    so producers serialize the short ticket claim on a message queue through this, and
+    clients serialize the resets of timed-out slots.
+    """
+    def __init__(self, name: str):
+        self._thread_lock = threading.Lock()
+        if sys.platform == "win32":
+            self._kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+            self._kernel32.CreateMutexW.restype = ctypes.c_void_p
+            self._kernel32.CreateMutexW.argtypes = [ctypes.c_void_p, ctypes.c_bool, ctypes.c_wchar_p]
+            self._kernel32.WaitForSingleObject.argtypes = [ctypes.c_void_p, ctypes.c_uint]
+            self._kernel32.ReleaseMutex.argtypes = [ctypes.c_void_p]
+            self._handle = self._kernel32.CreateMutexW(None, False, f"Local\\{name}")
+            self._file = None
+        else:
+            import fcntl
+            self._fcntl = fcntl
+            self._file = open(os.path.join(tempfile.gettempdir(), f"{name}.lock"), "a+")
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        if self._file is None:
+            self._kernel32.WaitForSingleObject(self._handle, 0xFFFFFFFF)
+        else:
+            self._fcntl.flock(self._file.fileno(), self._fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._file is None:
+            self._kernel32.ReleaseMutex(self._handle)
+        else:
+            self._fcntl.flock(self._file.fileno(), self._fcntl.LOCK_UN)
+        self._thread_lock.release()
+        return False
+
         
 class Py4GWSharedMemoryManager:
     _instance = None  # Singleton instance
@@ -112,24 +313,164 @@ class Py4GWSharedMemoryManager:
             self.throttle_timer_150 = ThrottledTimer(150)
             self.throttle_timer_63 = ThrottledTimer(63) # 4 frames at 15 FPS
         
-        # Create or attach shared memory
+            # Create or attach shared memory
+            try:
+                self.shm = shared_memory.SharedMemory(name=self.shm_name)
+                ConsoleLog(SMM_MODULE_NAME, "Attached to existing shared memory.", Py4GW.Console.MessageType.Info)
+            except FileNotFoundError:
+                self.shm = shared_memory.SharedMemory(name=self.shm_name, create=True, size=self.size)
+                ConsoleLog(SMM_MODULE_NAME, "Shared memory area created.", Py4GW.Console.MessageType.Success)
+
+            # Attach the shared memory structure once per mapping
+            self._attach_views()
+            self.ResetAllData()  # Initialize all player data
+        
+            self._initialized = True
+            
+    def _attach_views(self):
+        """Build the persistent ctypes views over the mapped buffer."""
+        if self.shm.buf is None:
+            raise RuntimeError("Shared memory is not initialized.")
+        if self.shm.size < self.size:
+            raise RuntimeError(f"Shared memory area is {self.shm.size} bytes, expected at least {self.size}.")
+        self.game_struct = AllAccounts.from_buffer(self.shm.buf)
+        self._account_views: list[AccountData] = [self.game_struct.AccountData[i] for i in range(self.max_num_players)]
+        self._queue_views: list[SharedMessageQueue] = [self.game_struct.MessageQueues[i] for i in range(self.max_num_players)]
+        self._message_views: list[SharedMessage] = [queue.Messages[i] for queue in self._queue_views for i in range(SHMEM_MESSAGE_QUEUE_SIZE)]
+        self._mutex = SharedMemoryMutex(f"{self.shm_name}_messages")
+        self._hero_ai_views: list[HeroAIOptionStruct] = [self.game_struct.HeroAIOptions[i] for i in range(self.max_num_players)]
+        self._slot_generations = self.game_struct.SlotGenerations
+        self._slot_sequences = self.game_struct.SlotSequences
+        self._last_snapshots: dict[int, AccountData] = {}
+        self._shadows: dict[int, tuple[AccountData, int]] = {}
+        self._buff_id_sets: dict[int, tuple[int, frozenset[int]]] = {}
+        self.bytes_written_total = 0
+        self.bytes_written_this_frame = 0
+        self.bytes_written_last_frame = 0
+        self.seqlock_read_retries = 0
+        self.seqlock_stale_reads = 0
+        self._committed_slot_keys: dict[int, tuple] = {}
+        self.index = SharedMemoryIndex(self._account_views, self._slot_generations)
+    
+    @contextmanager
+    def _slot_write(self, index: int):
+        """Hold the slot seqlock odd for the duration of a write so readers retry."""
+        if index < 0:
+            yield
+            return
+        sequences = self._slot_sequences
+        # Force the parity rather than incrementing: if two writers ever interleave, or one dies
+        # mid-write, the next write puts readers back in step instead of inverting the parity for good
+        start = sequences[index] | 1
+        sequences[index] = start
         try:
-            self.shm = shared_memory.SharedMemory(name=self.shm_name)
-            ConsoleLog(SMM_MODULE_NAME, "Attached to existing shared memory.", Py4GW.Console.MessageType.Info)
-        except FileNotFoundError:
-            self.shm = shared_memory.SharedMemory(name=self.shm_name, create=True, size=self.size)
-            ConsoleLog(SMM_MODULE_NAME, "Shared memory area created.", Py4GW.Console.MessageType.Success)
-
-        # Attach the shared memory structure
-        #self.game_struct = AllAccounts.from_buffer(self.shm.buf)
-        self.ResetAllData()  # Initialize all player data
+            yield
+        finally:
+            sequences[index] = (start + 1) & SHMEM_SEQUENCE_MASK
+            
+    def GetAccountDataSnapshot(self, index: int) -> AccountData:
+        """
+        Get a consistent private copy of an AccountData slot, retrying while a writer holds the seqlock.
+        If the writer never lets go, the last consistent copy of the slot is returned instead.
+        """
+        view = self._account_views[index]
+        sequences = self._slot_sequences
+        snapshot = None
+        for _ in range(SHMEM_SEQLOCK_MAX_RETRIES):
+            before = sequences[index]
+            if not before & 1:
+                snapshot = AccountData.from_buffer_copy(view)
+                if sequences[index] == before:
+                    self._last_snapshots[index] = snapshot
+                    return snapshot
+            self.seqlock_read_retries += 1
+            time.sleep(0)
+        
+        # Writer is stalled or gone, fall back to the last consistent copy of this slot
+        self.seqlock_stale_reads += 1
+        last_snapshot = self._last_snapshots.get(index)
+        if last_snapshot is not None:
+            return last_snapshot
+        return snapshot if snapshot is not None else AccountData.from_buffer_copy(view)
+    
+    def _pack_buffs(self, skill_ids: list[int]) -> ctypes.Array:
+        """Build a zero-padded PlayerBuffs array in one allocation."""
+        return (c_uint * SHMEM_MAX_NUMBER_OF_BUFFS)(*skill_ids[:SHMEM_MAX_NUMBER_OF_BUFFS])
+    
+    def _begin_staged_write(self, index: int) -> AccountData:
+        """Get a private copy of the slot to build the next update into."""
+        if index < 0:
+            return AccountData()
+        shadow = self._shadows.get(index)
+        if shadow is None or shadow[1] != self._slot_sequences[index]:
+            # Someone else touched the slot since our last flush, resync from shared memory.
+            # Copy the snapshot: it may be the last consistent copy other readers were handed
+            return AccountData.from_buffer_copy(self.GetAccountDataSnapshot(index))
+        return AccountData.from_buffer_copy(shadow[0])
+    
+    def _flush_staged_write(self, index: int, staging: AccountData):
+        """Copy only the byte ranges of staging that differ from what the slot last held."""
+        if index < 0:
+            return
+        shadow = self._shadows.get(index)
+        if shadow is None or shadow[1] != self._slot_sequences[index]:
+            current = bytes(self._account_views[index])
+        else:
+            current = bytes(shadow[0])
+        updated = bytes(staging)
         
-        self._initialized = True
+        ranges = []
+        for start, end in _ACCOUNT_DATA_SPANS:
+            if updated[start:end] == current[start:end]:
+                continue
+            if ranges and ranges[-1][1] == start:
+                ranges[-1][1] = end
+            else:
+                ranges.append([start, end])
+        
+        if ranges:
+            destination = ctypes.addressof(self._account_views[index])
+            source = ctypes.addressof(staging)
+            with self._slot_write(index):
+                for start, end in ranges:
+                    ctypes.memmove(destination + start, source + start, end - start)
+            written = sum(end - start for start, end in ranges)
+            self.bytes_written_this_frame += written
+            self.bytes_written_total += written
+        self._shadows[index] = (staging, self._slot_sequences[index])
+    
+    def BeginFrame(self):
+        """Start a new frame of Set*Data calls; bytes_written_last_frame then holds the frame just ended."""
+        self.bytes_written_last_frame = self.bytes_written_this_frame
+        self.bytes_written_this_frame = 0
+    
+    def _bump_slot_generation(self, index: int):
+        """Signal readers in every process that this slot's lookup keys changed."""
+        self._slot_generations[index] = (self._slot_generations[index] + 1) & 0xFFFFFFFF
+        
+    def _commit_slot_keys(self, index: int):
+        """Bump the slot generation only if the lookup keys differ from the last commit."""
+        if index < 0:
+            return
+        key = _account_slot_key(self._account_views[index])
+        if self._committed_slot_keys.get(index) != key:
+            self._committed_slot_keys[index] = key
+            self._bump_slot_generation(index)
     
     def GetStruct(self) -> AllAccounts:
-        if self.shm.buf is None:
-            raise RuntimeError("Shared memory is not initialized.")
-        return AllAccounts.from_buffer(self.shm.buf)
+        return self.game_struct
+    
+    def GetAccountDataSlot(self, index: int) -> AccountData:
+        """Get the AccountData view for a slot index."""
+        return self._account_views[index]
+    
+    def GetSharedMessageSlot(self, index: int) -> SharedMessage:
+        """Get the SharedMessage view for a message index (receiver slot * SHMEM_MESSAGE_QUEUE_SIZE + position)."""
+        return self._message_views[index]
+    
+    def GetHeroAIOptionsSlot(self, index: int) -> HeroAIOptionStruct:
+        """Get the HeroAIOptionStruct view for a slot index."""
+        return self._hero_ai_views[index]
         
     def GetBaseTimestamp(self):
         # Return milliseconds since ZERO_EPOCH
@@ -170,43 +511,20 @@ class Py4GWSharedMemoryManager:
     def ResetPlayerData(self, index):
         """Reset data for a specific player."""
         if 0 <= index < self.max_num_players:
-            player = self.GetStruct().AccountData[index]
-            player.IsSlotActive = False
-            player.AccountEmail = ""
-            player.AccountName = ""
-            player.CharacterName = ""
-            player.IsAccount = False
-            player.IsHero = False
-            player.IsPet = False
-            player.IsNPC = False
-            player.OwnerPlayerID = 0
-            player.HeroID = 0
-            player.MapID = 0
-            player.MapRegion = 0
-            player.MapDistrict = 0
-            player.PlayerID = 0
-            player.PlayerHP = 0.0
-            player.PlayerMaxHP = 0.0
-            player.PlayerHealthRegen = 0.0
-            player.PlayerEnergy = 0.0
-            player.PlayerMaxEnergy = 0.0
-            player.PlayerEnergyRegen = 0.0  
-            player.PlayerPosX = 0.0
-            player.PlayerPosY = 0.0
-            player.PlayerPosZ = 0.0
-            player.PlayerFacingAngle = 0.0
-            player.PlayerTargetID = 0
-            player.PlayerLoginNumber = 0
-            player.PlayerIsTicked = False
-            player.PartyID = 0
-            player.PartyPosition = 0
-            player.PatyIsPartyLeader = False
-            for j in range(SHMEM_MAX_NUMBER_OF_BUFFS):
-                player.PlayerBuffs[j] = 0
-            player.LastUpdated = self.GetBaseTimestamp()
+            with self._slot_write(index):
+                self._reset_player_fields(self._account_views[index])
+            self._committed_slot_keys.pop(index, None)
+            self._shadows.pop(index, None)
+            self._bump_slot_generation(index)
             
+    def _reset_player_fields(self, player: AccountData):
+        # Zero everything past SlotNumber in one pass, all fields are zero-valued when cleared
+        offset = AccountData.IsSlotActive.offset
+        ctypes.memset(ctypes.addressof(player) + offset, 0, sizeof(AccountData) - offset)
+        player.LastUpdated = self.GetBaseTimestamp()
+        
     def ResetHeroAIData(self, index): 
-            option = self.GetStruct().HeroAIOptions[index]
+            option = self._hero_ai_views[index]
             option.Following = True
             option.Avoidance = True
             option.Looting = True
@@ -222,28 +540,42 @@ class Py4GWSharedMemoryManager:
 
     def FindAccount(self, account_email: str) -> int:
         """Find the index of the account with the given email."""
+        self.index.Refresh()
+        index = self.index.FindAccount(account_email)
+        if index == -1:
+            return -1
+        player = self._account_views[index]
+        if player.IsSlotActive and player.IsAccount and player.AccountEmail == account_email:
+            return index
+        
+        # Slot is mid-write by another process, fall back to a scan
+        self.index.InvalidateSlot(index)
         for i in range(self.max_num_players):
-            player = self.GetStruct().AccountData[i]
+            player = self._account_views[i]
             if not player.IsSlotActive:
                 continue
-            if self.GetStruct().AccountData[i].AccountEmail == account_email and player.IsAccount:
+            if player.AccountEmail == account_email and player.IsAccount:
                 return i
         return -1
     
     def FindHero(self, hero_data) -> int:
         """Find the index of the hero with the given ID."""
-        for i in range(self.max_num_players):
-            player = self.GetStruct().AccountData[i]
+        self.index.Refresh()
+        hero_id = hero_data.hero_id.GetID()
+        owner_id = Party.Players.GetAgentIDByLoginNumber(hero_data.owner_player_id)
+        for i in self.index.GetSlotsByOwner(owner_id):
+            player = self._account_views[i]
             if not player.IsSlotActive:
                 continue
-            if player.IsHero and player.HeroID == hero_data.hero_id.GetID() and player.OwnerPlayerID == Party.Players.GetAgentIDByLoginNumber(hero_data.owner_player_id):
+            if player.IsHero and player.HeroID == hero_id and player.OwnerPlayerID == owner_id:
                 return i
         return -1
     
     def FindPet(self, pet_data) -> int:
         """Find the index of the pet with the given ID."""
-        for i in range(self.max_num_players):
-            player = self.GetStruct().AccountData[i]
+        self.index.Refresh()
+        for i in self.index.GetSlotsByOwner(pet_data.owner_agent_id):
+            player = self._account_views[i]
             if not player.IsSlotActive:
                 continue
             if player.IsPet and player.PlayerID == pet_data.agent_id and player.OwnerPlayerID == pet_data.owner_agent_id:
@@ -253,7 +585,7 @@ class Py4GWSharedMemoryManager:
     def FindEmptySlot(self) -> int:
         """Find the first empty slot in shared memory."""
         for i in range(self.max_num_players):
-            if not self.GetStruct().AccountData[i].IsSlotActive:
+            if not self._account_views[i].IsSlotActive:
                 return i
         return -1
     
@@ -262,10 +594,12 @@ class Py4GWSharedMemoryManager:
         index = self.FindAccount(account_email)
         if index == -1:
             index = self.FindEmptySlot()
-            player = self.GetStruct().AccountData[index]
-            player.IsSlotActive = True
-            player.AccountEmail = account_email
-            player.LastUpdated = self.GetBaseTimestamp()
+            player = self._account_views[index]
+            with self._slot_write(index):
+                player.IsSlotActive = True
+                player.AccountEmail = account_email
+                player.LastUpdated = self.GetBaseTimestamp()
+            self._commit_slot_keys(index)
         return index
     
     def GetHeroSlot(self, hero_data) -> int:
@@ -273,12 +607,14 @@ class Py4GWSharedMemoryManager:
         index = self.FindHero(hero_data)
         if index == -1:
             index = self.FindEmptySlot()
-            hero = self.GetStruct().AccountData[index]
-            hero.IsSlotActive = True
-            hero.IsHero = True
-            hero.OwnerPlayerID = Party.Players.GetAgentIDByLoginNumber(hero_data.owner_player_id)
-            hero.HeroID = hero_data.hero_id.GetID()
-            hero.LastUpdated = self.GetBaseTimestamp()
+            hero = self._account_views[index]
+            with self._slot_write(index):
+                hero.IsSlotActive = True
+                hero.IsHero = True
+                hero.OwnerPlayerID = Party.Players.GetAgentIDByLoginNumber(hero_data.owner_player_id)
+                hero.HeroID = hero_data.hero_id.GetID()
+                hero.LastUpdated = self.GetBaseTimestamp()
+            self._commit_slot_keys(index)
         return index
     
     def GetPetSlot(self, pet_data) -> int:
@@ -286,12 +622,14 @@ class Py4GWSharedMemoryManager:
         index = self.FindPet(pet_data)
         if index == -1:
             index = self.FindEmptySlot()
-            pet = self.GetStruct().AccountData[index]
-            pet.IsSlotActive = True
-            pet.IsPet = True
-            pet.OwnerPlayerID = pet_data.owner_agent_id
-            pet.PlayerID = pet_data.agent_id
-            pet.LastUpdated = self.GetBaseTimestamp()
+            pet = self._account_views[index]
+            with self._slot_write(index):
+                pet.IsSlotActive = True
+                pet.IsPet = True
+                pet.OwnerPlayerID = pet_data.owner_agent_id
+                pet.PlayerID = pet_data.agent_id
+                pet.LastUpdated = self.GetBaseTimestamp()
+            self._commit_slot_keys(index)
         return index
     
     def _updatechache(self):
@@ -342,11 +680,17 @@ class Py4GWSharedMemoryManager:
         return -1
         
     def SetPlayerData(self, account_email: str):
-        """Set player data for the account with the given email."""      
+        """Set player data for the account with the given email."""
         index = self.GetAccountSlot(account_email)
         if index != -1:
-            self._updatechache()
-            player = self.GetStruct().AccountData[index]
+            self._updatechache()  # native reads stay outside the seqlock window
+        staging = self._begin_staged_write(index)
+        self._set_player_data(index, staging, account_email)
+        self._flush_staged_write(index, staging)
+        self._commit_slot_keys(index)
+        
+    def _set_player_data(self, index: int, player: AccountData, account_email: str):
+        if index != -1:
             player.SlotNumber = index
             player.IsSlotActive = True
             player.IsAccount = True
@@ -402,34 +746,23 @@ class Py4GWSharedMemoryManager:
             player.PartyID = self.party_instance.party_id
             player.PartyPosition = party_number
             player.PatyIsPartyLeader = self.party_instance.is_party_leader
-            effects_instance = Effects.get_instance(self.player_instance.id)
-            buff_list = effects_instance.GetBuffs()
-            effect_list = effects_instance.GetEffects()
-            for j in range(SHMEM_MAX_NUMBER_OF_BUFFS):
-                player.PlayerBuffs[j] = 0
-                
-            index = 0
-
-            for buff in buff_list:
-                if index >= SHMEM_MAX_NUMBER_OF_BUFFS:
-                    break
-                player.PlayerBuffs[index] = buff.skill_id
-                index += 1
-
-            for effect in effect_list:
-                if index >= SHMEM_MAX_NUMBER_OF_BUFFS:
-                    break
-                player.PlayerBuffs[index] = effect.skill_id
-                index += 1
+            skill_ids = [buff.skill_id for buff in EffectsCache.GetBuffs(self.player_instance.id)]
+            skill_ids.extend(effect.skill_id for effect in EffectsCache.GetEffects(self.player_instance.id))
+            player.PlayerBuffs = self._pack_buffs(skill_ids)
             
         else:
             ConsoleLog(SMM_MODULE_NAME, "No empty slot available for new player data.", Py4GW.Console.MessageType.Error)
             
     def SetHeroData(self,hero_data):
-        """Set player data for the account with the given email."""      
+        """Set player data for the account with the given email."""
         index = self.GetHeroSlot(hero_data)
+        staging = self._begin_staged_write(index)
+        self._set_hero_data(index, staging, hero_data)
+        self._flush_staged_write(index, staging)
+        self._commit_slot_keys(index)
+        
+    def _set_hero_data(self, index: int, hero: AccountData, hero_data):
         if index != -1:
-            hero = self.GetStruct().AccountData[index]
             hero.SlotNumber = index
             hero.IsSlotActive = True
             hero.IsAccount = False
@@ -485,25 +818,9 @@ class Py4GWSharedMemoryManager:
             hero.PartyID = self.party_instance.party_id
             hero.PartyPosition = 0
             hero.PatyIsPartyLeader = False
-            effects_instance = Effects.get_instance(agent_id)
-            buff_list = effects_instance.GetBuffs()
-            effect_list = effects_instance.GetEffects()
-            for j in range(SHMEM_MAX_NUMBER_OF_BUFFS):
-                hero.PlayerBuffs[j] = 0
-                
-            index = 0
-
-            for buff in buff_list:
-                if index >= SHMEM_MAX_NUMBER_OF_BUFFS:
-                    break
-                hero.PlayerBuffs[index] = buff.skill_id
-                index += 1
-
-            for effect in effect_list:
-                if index >= SHMEM_MAX_NUMBER_OF_BUFFS:
-                    break
-                hero.PlayerBuffs[index] = effect.skill_id
-                index += 1
+            skill_ids = [buff.skill_id for buff in EffectsCache.GetBuffs(agent_id)]
+            skill_ids.extend(effect.skill_id for effect in EffectsCache.GetEffects(agent_id))
+            hero.PlayerBuffs = self._pack_buffs(skill_ids)
             
         else:
             ConsoleLog(SMM_MODULE_NAME, "No empty slot available for new hero data.", Py4GW.Console.MessageType.Error)
@@ -516,8 +833,13 @@ class Py4GWSharedMemoryManager:
             return
         
         index = self.GetPetSlot(pet_info)
+        staging = self._begin_staged_write(index)
+        self._set_pet_data(index, staging, pet_info)
+        self._flush_staged_write(index, staging)
+        self._commit_slot_keys(index)
+        
+    def _set_pet_data(self, index: int, pet: AccountData, pet_info):
         if index != -1:
-            pet = self.GetStruct().AccountData[index]
             pet.SlotNumber = index
             pet.IsSlotActive = True
             pet.IsPet = True
@@ -572,30 +894,13 @@ class Py4GWSharedMemoryManager:
             pet.PlayerFacingAngle = agent_instance.rotation_angle
             pet.PlayerTargetID = pet_info.locked_target_id
             
-            effects_instance = Effects.get_instance(self.player_instance.id)
-            buff_list = effects_instance.GetBuffs()
-            effect_list = effects_instance.GetEffects()
-            for j in range(SHMEM_MAX_NUMBER_OF_BUFFS):
-                pet.PlayerBuffs[j] = 0
-                
-            index = 0
-
-            for buff in buff_list:
-                if index >= SHMEM_MAX_NUMBER_OF_BUFFS:
-                    break
-                pet.PlayerBuffs[index] = buff.skill_id
-                index += 1
-
-            for effect in effect_list:
-                if index >= SHMEM_MAX_NUMBER_OF_BUFFS:
-                    break
-                pet.PlayerBuffs[index] = effect.skill_id
-                index += 1
+            skill_ids = [buff.skill_id for buff in EffectsCache.GetBuffs(self.player_instance.id)]
+            skill_ids.extend(effect.skill_id for effect in EffectsCache.GetEffects(self.player_instance.id))
+            pet.PlayerBuffs = self._pack_buffs(skill_ids)
             
         else:
             ConsoleLog(SMM_MODULE_NAME, "No empty slot available for new Pet data.", Py4GW.Console.MessageType.Error)
-        
-        
+            
     def SetHeroesData(self):
         """Set data for all heroes in the given list."""
         owner_id = self.player_instance.id if self.player_instance else 0
@@ -606,10 +911,11 @@ class Py4GWSharedMemoryManager:
             self.SetHeroData(hero_data)
             
     def GetAllActivePlayers(self) -> list[AccountData]:
-        """Get all active players in shared memory."""
+        """Get consistent snapshots of all active players in shared memory."""
         players = []
-        for i in range(self.max_num_players):
-            player = self.GetStruct().AccountData[i]
+        self.index.Refresh()
+        for i in self.index.GetActiveSlots():
+            player = self.GetAccountDataSnapshot(i)
             if player.IsSlotActive:
                 players.append(player)
         return players
@@ -617,8 +923,9 @@ class Py4GWSharedMemoryManager:
     def GetAllAccountData(self) -> list[AccountData]:
         """Get all player data, ordered by PartyID, PartyPosition, PlayerLoginNumber, CharacterName."""
         players = []
-        for i in range(self.max_num_players):
-            player = self.GetStruct().AccountData[i]
+        self.index.Refresh()
+        for i in self.index.GetActiveSlots():
+            player = self.GetAccountDataSnapshot(i)
             if player.IsSlotActive and player.IsAccount:
                 players.append(player)
 
@@ -639,15 +946,16 @@ class Py4GWSharedMemoryManager:
         """Get player data for the account with the given email."""
         index = self.FindAccount(account_email)
         if index != -1:
-            return self.GetStruct().AccountData[index]
+            return self.GetAccountDataSnapshot(index)
         else:
             ConsoleLog(SMM_MODULE_NAME, f"Account {account_email} not found.", Py4GW.Console.MessageType.Error)
             return None
      
     def GetAccountDataFromPartyNumber(self, party_number: int) -> AccountData | None:
         """Get player data for the account with the given party number."""
-        for i in range(self.max_num_players):
-            player = self.GetStruct().AccountData[i]
+        self.index.Refresh()
+        for i in self.index.GetActiveSlots():
+            player = self.GetAccountDataSnapshot(i)
             if player.IsSlotActive and player.PartyPosition == party_number:
                 return player
         ConsoleLog(SMM_MODULE_NAME, f"Party number {party_number} not found.", Py4GW.Console.MessageType.Error)
@@ -658,37 +966,49 @@ class Py4GWSharedMemoryManager:
         if effect_id == 0:
             return False
         
-        player = self.GetAccountDataFromEmail(account_email)
-        if player:
-            for buff in player.PlayerBuffs:
-                if buff == effect_id:
-                    return True
-        return False
+        index = self.FindAccount(account_email)
+        if index == -1:
+            ConsoleLog(SMM_MODULE_NAME, f"Account {account_email} not found.", Py4GW.Console.MessageType.Error)
+            return False
+        return effect_id in self.GetSlotBuffIDs(index)
+    
+    def GetSlotBuffIDs(self, index: int) -> frozenset[int]:
+        """Skill ids in a slot's PlayerBuffs, rebuilt only when the slot seqlock moves."""
+        sequence = self._slot_sequences[index]
+        cached = self._buff_id_sets.get(index)
+        if cached is not None and cached[0] == sequence and not sequence & 1:
+            return cached[1]
+        snapshot = self.GetAccountDataSnapshot(index)
+        buff_ids = frozenset(snapshot.PlayerBuffs)
+        self._buff_id_sets[index] = (sequence, buff_ids)
+        return buff_ids
     
     def GetAllAccountHeroAIOptions(self) -> list[HeroAIOptionStruct]:
         """Get HeroAI options for all accounts."""
         options = []
-        for i in range(self.max_num_players):
-            player = self.GetStruct().AccountData[i]
+        self.index.Refresh()
+        for i in self.index.GetActiveSlots():
+            player = self._account_views[i]
             if player.IsSlotActive and player.IsAccount:
-                options.append(self.GetStruct().HeroAIOptions[i])
+                options.append(self._hero_ai_views[i])
         return options
         
     def GetHeroAIOptions(self, account_email: str) -> HeroAIOptionStruct | None:
         """Get HeroAI options for the account with the given email."""
         index = self.FindAccount(account_email)
         if index != -1:
-            return self.GetStruct().HeroAIOptions[index]
+            return self._hero_ai_views[index]
         else:
             ConsoleLog(SMM_MODULE_NAME, f"Account {account_email} not found.", Py4GW.Console.MessageType.Error)
             return None
         
     def GetGerHeroAIOptionsByPartyNumber(self, party_number: int) -> HeroAIOptionStruct | None:
         """Get HeroAI options for the account with the given party number."""
-        for i in range(self.max_num_players):
-            player = self.GetStruct().AccountData[i]
+        self.index.Refresh()
+        for i in self.index.GetActiveSlots():
+            player = self._account_views[i]
             if player.IsSlotActive and player.PartyPosition == party_number:
-                return self.GetStruct().HeroAIOptions[i]
+                return self._hero_ai_views[i]
         return None    
         
         
@@ -696,7 +1016,7 @@ class Py4GWSharedMemoryManager:
         """Set HeroAI options for the account with the given email."""
         index = self.FindAccount(account_email)
         if index != -1:
-            self.GetStruct().HeroAIOptions[index] = options
+            self.game_struct.HeroAIOptions[index] = options
         else:
             ConsoleLog(SMM_MODULE_NAME, f"Account {account_email} not found.", Py4GW.Console.MessageType.Error)
     
@@ -704,7 +1024,7 @@ class Py4GWSharedMemoryManager:
         """Set a specific HeroAI property for the account with the given email."""
         index = self.FindAccount(account_email)
         if index != -1:
-            options = self.GetStruct().HeroAIOptions[index]
+            options = self._hero_ai_views[index]
             
             if property_name.startswith("Skill_"):
                 skill_index = int(property_name.split("_")[1])
@@ -724,8 +1044,9 @@ class Py4GWSharedMemoryManager:
     def GetMapsFromPlayers(self):
         """Get a list of unique maps from all active players."""
         maps = set()
-        for i in range(self.max_num_players):
-            player = self.GetStruct().AccountData[i]
+        self.index.Refresh()
+        for i in self.index.GetActiveSlots():
+            player = self.GetAccountDataSnapshot(i)
             if player.IsSlotActive and player.IsAccount:
                 maps.add((player.MapID, player.MapRegion, player.MapDistrict))
         return list(maps)
@@ -735,8 +1056,9 @@ class Py4GWSharedMemoryManager:
         Get a list of unique PartyIDs for players in the specified map/region/district.
         """
         parties = set()
-        for i in range(self.max_num_players):
-            player = self.GetStruct().AccountData[i]
+        self.index.Refresh()
+        for i in self.index.GetSlotsByMap(map_id, map_region, map_district):
+            player = self.GetAccountDataSnapshot(i)
             if (player.IsSlotActive and player.IsAccount and
                 player.MapID == map_id and
                 player.MapRegion == map_region and
@@ -748,8 +1070,9 @@ class Py4GWSharedMemoryManager:
     def GetPlayersFromParty(self, party_id: int, map_id: int, map_region: int, map_district: int):
         """Get a list of players in a specific party on a specific map."""
         players = []
-        for i in range(self.max_num_players):
-            player = self.GetStruct().AccountData[i]
+        self.index.Refresh()
+        for i in self.index.GetSlotsByParty(party_id):
+            player = self.GetAccountDataSnapshot(i)
             if (player.IsSlotActive and player.IsAccount and
                 player.MapID == map_id and
                 player.MapRegion == map_region and
@@ -761,8 +1084,9 @@ class Py4GWSharedMemoryManager:
     def GetHeroesFromPlayers(self, owner_player_id: int):
         """Get a list of heroes owned by the specified player."""
         heroes = []
-        for i in range(self.max_num_players):
-            player = self.GetStruct().AccountData[i]
+        self.index.Refresh()
+        for i in self.index.GetSlotsByOwner(owner_player_id):
+            player = self.GetAccountDataSnapshot(i)
             if (player.IsSlotActive and player.IsHero and
                 player.OwnerPlayerID == owner_player_id):
                 heroes.append(player)
@@ -771,8 +1095,9 @@ class Py4GWSharedMemoryManager:
     def GetPetsFromPlayers(self, owner_agent_id: int):
         """Get a list of pets owned by the specified player."""
         pets = []
-        for i in range(self.max_num_players):
-            player = self.GetStruct().AccountData[i]
+        self.index.Refresh()
+        for i in self.index.GetSlotsByOwner(owner_agent_id):
+            player = self.GetAccountDataSnapshot(i)
             if (player.IsSlotActive and player.IsPet and
                 player.OwnerPlayerID == owner_agent_id):
                 pets.append(player)
@@ -781,29 +1106,84 @@ class Py4GWSharedMemoryManager:
     def UpdateTimeouts(self):
         current_time = self.GetBaseTimestamp()
 
-        for index in range(self.max_num_players):
-            player = self.GetStruct().AccountData[index]
+        self.index.Refresh()
+        for index in self.index.GetActiveSlots():
+            player = self._account_views[index]
 
             if player.IsSlotActive:
                 delta = current_time - player.LastUpdated
                 if delta > SHMEM_SUBSCRIBE_TIMEOUT_MILISECONDS:
                     #ConsoleLog(SMM_MODULE_NAME, f"Player {player.AccountEmail} has timed out after {delta} ms.", Py4GW.Console.MessageType.Warning)
-                    self.ResetPlayerData(index)
+                    self._reset_timed_out_slot(index)
 
     #("ExtraData", c_wchar * 4 * SHMEM_MAX_CHAR_LEN),
     
-    def SendMessage(self, sender_email: str, receiver_email: str, command: SharedCommandType, params: tuple = (0.0, 0.0, 0.0, 0.0), ExtraData: tuple = ()):
-        """Send a message to another player."""
+    def _reset_timed_out_slot(self, index: int):
+        """
+        Reset a slot that stopped updating and drop its queued messages. Every client runs the timeouts,
+        so the reset happens under the mutex: two writers in one slot would break its seqlock.
+        """
+        with self._mutex:
+            player = self._account_views[index]
+            # Another client may have reset the slot, or its owner come back, while we waited
+            if not player.IsSlotActive:
+                return
+            if self.GetBaseTimestamp() - player.LastUpdated <= SHMEM_SUBSCRIBE_TIMEOUT_MILISECONDS:
+                return
+            self.ResetPlayerData(index)
+            queue = self._queue_views[index]
+            ctypes.memset(ctypes.addressof(queue), 0, sizeof(SharedMessageQueue))
+    
+    def _pending_messages(self, receiver_index: int) -> list[tuple[int, SharedMessage]]:
+        """(index, message) for the published messages still queued for a receiver slot, oldest first."""
+        base = receiver_index * SHMEM_MESSAGE_QUEUE_SIZE
+        next_ticket = self._queue_views[receiver_index].NextTicket
+        pending = []
+        for index in range(base, base + SHMEM_MESSAGE_QUEUE_SIZE):
+            message = self._message_views[index]
+            if not message.Active:
+                continue
+            # Skip messages sent after next_ticket was read. Every older one was published before the
+            # ticket moved, so the scan cannot miss one of those and hand out a newer message first.
+            # Tickets wrap, so compare distances modulo 2**32; older messages are further behind
+            distance = (message.Sequence - next_ticket) & SHMEM_SEQUENCE_MASK
+            if distance >= 0x80000000:
+                pending.append((distance, index, message))
+        pending.sort(key=lambda entry: entry[0])
+        return [(index, message) for _, index, message in pending]
+    
+    def GetMessageQueueStats(self, account_email: str) -> tuple[int, int, int]:
+        """Get (pending, sent, overflows) for the message queue of the given account."""
+        receiver_index = self.FindAccount(account_email)
+        if receiver_index == -1:
+            return 0, 0, 0
+        queue = self._queue_views[receiver_index]
+        return len(self._pending_messages(receiver_index)), queue.Sent, queue.Overflows
+    
+    def SendMessage(self, sender_email: str, receiver_email: str, command: SharedCommandType, params: tuple = (0.0, 0.0, 0.0, 0.0), ExtraData: tuple = ()) -> bool:
+        """Send a message to another player. Returns False if the receiver is unknown or its queue is full."""
         import ctypes as ct
-        index = self.FindAccount(receiver_email)
-        if index == -1:
+        receiver_index = self.FindAccount(receiver_email)
+        if receiver_index == -1:
             ConsoleLog(SMM_MODULE_NAME, f"Receiver account {receiver_email} not found.", Py4GW.Console.MessageType.Error)
-            return
+            return False
         
-        for i in range(self.max_num_players):
-            message = self.GetStruct().SharedMessage[i]
-            if message.Active:
-                continue  # Find the first unfinished message slot
+        queue = self._queue_views[receiver_index]
+        base = receiver_index * SHMEM_MESSAGE_QUEUE_SIZE
+        with self._mutex:
+            ticket = queue.NextTicket
+            message = None
+            # Receivers finish entries in any order; they mostly finish them in the order sent,
+            # so the entry after the last one used is usually free and the probe stops at once
+            for offset in range(SHMEM_MESSAGE_QUEUE_SIZE):
+                candidate = self._message_views[base + (ticket + offset) % SHMEM_MESSAGE_QUEUE_SIZE]
+                if not candidate.Active:
+                    message = candidate
+                    break
+            if message is None:
+                queue.Overflows = (queue.Overflows + 1) & SHMEM_SEQUENCE_MASK
+                ConsoleLog(SMM_MODULE_NAME, f"Message queue for {receiver_email} is full, message dropped.", Py4GW.Console.MessageType.Warning)
+                return False
             
             message.SenderEmail = sender_email
             message.ReceiverEmail = receiver_email
@@ -816,42 +1196,43 @@ class Py4GWSharedMemoryManager:
                         SHMEM_MAX_CHAR_LEN)
                     for j in range(4)]
             message.ExtraData = (arr_type * 4)(*packed)
-            message.Active = True
             message.Running = False
             message.Timestamp = self.GetBaseTimestamp()
-            return
+            message.Sequence = ticket
+            
+            # Publish the entry only once it is complete
+            message.Active = True
+            queue.NextTicket = (ticket + 1) & SHMEM_SEQUENCE_MASK
+            queue.Sent = (queue.Sent + 1) & SHMEM_SEQUENCE_MASK
+        return True
      
     def GetNextMessage(self, account_email: str) -> tuple[int, SharedMessage | None]:
         """Read the next message for the given account.
         Returns the raw SharedMessage. Use self._c_wchar_array_to_str() to read ExtraData safely.
         """
-        for index in range(self.max_num_players):
-            message = self.GetStruct().SharedMessage[index]
-            if message.ReceiverEmail == account_email and message.Active and not message.Running:
-                return index, message
-        return -1, None
-
-
+        return self.PreviewNextMessage(account_email, include_running=False)
     
     def PreviewNextMessage(self, account_email: str, include_running: bool = True) -> tuple[int, SharedMessage | None]:
         """Preview the next message for the given account.
         If include_running is True, will also return a running message.
         Ensures ExtraData is returned as tuple[str] using existing helpers.
         """
-        for index in range(self.max_num_players):
-            message = self.GetStruct().SharedMessage[index]
-            if message.ReceiverEmail != account_email or not message.Active:
+        receiver_index = self.FindAccount(account_email)
+        if receiver_index == -1:
+            return -1, None
+        
+        for index, message in self._pending_messages(receiver_index):
+            if message.ReceiverEmail != account_email:
+                message.Active = False  # left over from a previous owner of this slot
                 continue
             if not message.Running or include_running:
                 return index, message
         return -1, None
-
-
     
     def MarkMessageAsRunning(self, account_email: str, message_index: int):
         """Mark a specific message as running."""
-        if 0 <= message_index < self.max_num_players:
-            message = self.GetStruct().SharedMessage[message_index]
+        if 0 <= message_index < len(self._message_views):
+            message = self._message_views[message_index]
             if message.ReceiverEmail == account_email:
                 message.Running = True
                 message.Active = True
@@ -862,10 +1243,10 @@ class Py4GWSharedMemoryManager:
             ConsoleLog(SMM_MODULE_NAME, f"Invalid message index: {message_index}.", Py4GW.Console.MessageType.Error)
             
     def MarkMessageAsFinished(self, account_email: str, message_index: int):
-        """Mark a specific message as finished."""
+        """Mark a specific message as finished, freeing its queue entry for the next message sent."""
         import ctypes as ct
-        if 0 <= message_index < self.max_num_players:
-            message = self.GetStruct().SharedMessage[message_index]
+        if 0 <= message_index < len(self._message_views):
+            message = self._message_views[message_index]
             if message.ReceiverEmail == account_email:
                 message.SenderEmail = ""
                 message.ReceiverEmail = ""
@@ -897,9 +1278,7 @@ class Py4GWSharedMemoryManager:
     def GetAllMessages(self) -> list[tuple[int, SharedMessage]]:
         """Get all messages in shared memory with their index."""
         messages = []
-        for index in range(self.max_num_players):
-            message = self.GetStruct().SharedMessage[index]
-            if message.Active:
-                messages.append((index, message))  # Add index and message
+        for receiver_index in range(self.max_num_players):
+            messages.extend(self._pending_messages(receiver_index))
         return messages
 
@@ -5,6 +5,7 @@ import PyOverlay
 from .enums import outposts, explorables, explorable_name_to_id, FlagPreference
 from .UIManager import *
 from .Overlay import *
+from array import array
 import math
 
 class Map:
@@ -505,44 +506,134 @@ class Map:
                     PyOverlay.Point2D(int(shifted_br[0]), int(shifted_br[1])),
                 ]
                 
+        class GeometryCache:
+            """
+            Trapezoid corners of the current map in flat int buffers (TL, TR, BL, BR per quad),
+            read once per map, plus the last result of each geometry getter. Screen results are
+            rebuilt only when the mission map projection (pan, zoom, scale) changes.
+            Point lists handed out are shared between calls; don't modify them.
+            """
+            _map_id: int = -1
+            _layers: list = []  # per layer, (XTL, XTR, YT, XBL, XBR, YB) per trapezoid
+            _corners: dict = {}  # bucket_size -> (xs, ys)
+            _results: dict = {}  # (bucket_size, shifted, screen) -> (origin, projection, geometry)
+
+            @classmethod
+            def Invalidate(cls):
+                cls._map_id = -1
+                cls._layers = []
+                cls._corners = {}
+                cls._results = {}
+
+            @classmethod
+            def _Refresh(cls):
+                map_id = Map.GetMapID()
+                if map_id == cls._map_id:
+                    return
+                cls.Invalidate()
+                layers = [[(t.XTL, t.XTR, t.YT, t.XBL, t.XBR, t.YB) for t in layer.trapezoids]
+                          for layer in Map.Pathing.GetPathingMaps()]
+                if any(layers):  # not loaded yet: try again on the next call
+                    cls._map_id = map_id
+                    cls._layers = layers
+
+            @staticmethod
+            def _BucketMerge(trapezoids, bucket_size: float):
+                """Bounding trapezoid of each group whose centroids share a bucket (pathing map tester logic)."""
+                buckets = {}
+                for xtl, xtr, yt, xbl, xbr, yb in trapezoids:
+                    key = (int(((xtl + xtr + xbl + xbr) / 4) // bucket_size), int(((yt + yb) / 2) // bucket_size))
+                    b = buckets.get(key)
+                    if b is None:
+                        buckets[key] = [xtl, xtr, yt, xbl, xbr, yb]
+                    else:
+                        b[0] = min(b[0], xtl)
+                        b[1] = max(b[1], xtr)
+                        b[2] = max(b[2], yt)
+                        b[3] = min(b[3], xbl)
+                        b[4] = max(b[4], xbr)
+                        b[5] = min(b[5], yb)
+                merged = []
+                for xtl, xtr, yt, xbl, xbr, yb in buckets.values():
+                    if yt < yb:
+                        yt, yb = yb, yt
+                    merged.append((xtl, xtr, yt, xbl, xbr, yb))
+                return merged
+
+            @classmethod
+            def GetCorners(cls, bucket_size: float = 0.0):
+                """(xs, ys) int arrays, four corners per quad; bucket_size > 0 merges trapezoids per layer first."""
+                cls._Refresh()
+                corners = cls._corners.get(bucket_size)
+                if corners is None:
+                    xs, ys = array("q"), array("q")
+                    for layer in cls._layers:
+                        quads = cls._BucketMerge(layer, bucket_size) if bucket_size > 0 else layer
+                        for xtl, xtr, yt, xbl, xbr, yb in quads:
+                            xs.extend((int(xtl), int(xtr), int(xbl), int(xbr)))
+                            ys.extend((int(yt), int(yt), int(yb), int(yb)))
+                    corners = cls._corners[bucket_size] = (xs, ys)
+                return corners
+
+            @staticmethod
+            def _Projection():
+                """Everything GameMapToScreen reads, fetched once: (origin or None, pan, scale, zoom, center)."""
+                left, top, _, _ = Map.GetMapWorldMapBounds()
+                boundaries = Map.map_instance().map_boundaries
+                origin = None
+                if len(boundaries) >= 5:
+                    origin = (left + abs(boundaries[1]) / 96.0, top + abs(boundaries[4]) / 96.0)
+                return (origin, Map.MissionMap.GetPanOffset(), Map.MissionMap.GetScale(),
+                        Map.MissionMap.GetZoom() + 0.0, Map.MissionMap.GetMapScreenCenter())
+
+            @staticmethod
+            def _Project(xs, ys, projection):
+                """GameMapToScreen over whole buffers, same float operations in the same order."""
+                origin, (pan_x, pan_y), (scale_x, scale_y), zoom, (center_x, center_y) = projection
+                if origin is None:  # GamePosToWorldMap's fail-safe puts every point at world (0, 0)
+                    return ([int((0.0 - pan_x) * scale_x * zoom + center_x)] * len(xs),
+                            [int((0.0 - pan_y) * scale_y * zoom + center_y)] * len(ys))
+                origin_x, origin_y = origin
+                return ([int((x / 96.0 + origin_x - pan_x) * scale_x * zoom + center_x) for x in xs],
+                        [int((-y / 96.0 + origin_y - pan_y) * scale_y * zoom + center_y) for y in ys])
+
+            @classmethod
+            def GetGeometry(cls, bucket_size: float = 0.0, origin=None, screen: bool = False) -> List[List[PyOverlay.Point2D]]:
+                """Quads as [TL, TR, BL, BR] point lists, optionally shifted by -origin and/or projected to the screen."""
+                xs, ys = cls.GetCorners(bucket_size)
+                projection = cls._Projection() if screen else None
+                slot = (bucket_size, origin is not None, screen)
+                cached = cls._results.get(slot)
+                if cached is not None and cached[0] == origin and cached[1] == projection:
+                    return cached[2]
+
+                if origin is not None:
+                    origin_x, origin_y = origin
+                    xs = [int(x - origin_x) for x in xs]
+                    ys = [int(y - origin_y) for y in ys]
+                if screen:
+                    xs, ys = cls._Project(xs, ys, projection)
+                Point2D = PyOverlay.Point2D
+                points = [Point2D(x, y) for x, y in zip(xs, ys)]
+                geometry = [points[i:i + 4] for i in range(0, len(points), 4)]
+                cls._results[slot] = (origin, projection, geometry)
+                return geometry
+
         @staticmethod
-        def GetComputedGeometry() -> List[List[PyOverlay.Point2D]]:
-            pathintg_maps = Map.Pathing.GetPathingMaps()
-            geometry = []
-            for layer in pathintg_maps:
-                for trapezoid in layer.trapezoids:
-                    geometry.append(Map.Pathing.Quad(trapezoid).GetPoints())
-            return geometry
-                    
-                
+        def GetComputedGeometry(bucket_size: float = 0.0) -> List[List[PyOverlay.Point2D]]:
+            return list(Map.Pathing.GeometryCache.GetGeometry(bucket_size))
+
         @staticmethod
-        def GetScreenComputedGeometry() -> List[List[PyOverlay.Point2D]]:
-            pathintg_maps = Map.Pathing.GetPathingMaps()
-            geometry = []
-            for layer in pathintg_maps:
-                for trapezoid in layer.trapezoids:
-                    geometry.append(Map.Pathing.Quad(trapezoid).GetScreenPoints())
-            return geometry
-            
+        def GetScreenComputedGeometry(bucket_size: float = 0.0) -> List[List[PyOverlay.Point2D]]:
+            return list(Map.Pathing.GeometryCache.GetGeometry(bucket_size, screen=True))
+
         @staticmethod
-        def GetShiftedComputedGeometry(origin_x: float, origin_y: float) -> List[List[PyOverlay.Point2D]]:
-            pathing_maps = Map.Pathing.GetPathingMaps()
-            geometry = []
-            for layer in pathing_maps:
-                for trapezoid in layer.trapezoids:
-                    quad = Map.Pathing.Quad(trapezoid)
-                    geometry.append(quad.GetShiftedPoints(origin_x, origin_y))
-            return geometry
+        def GetShiftedComputedGeometry(origin_x: float, origin_y: float, bucket_size: float = 0.0) -> List[List[PyOverlay.Point2D]]:
+            return list(Map.Pathing.GeometryCache.GetGeometry(bucket_size, origin=(origin_x, origin_y)))
 
         @staticmethod
-        def GetshiftedScreenComputedGeometry(origin_x: float, origin_y: float) -> List[List[PyOverlay.Point2D]]:
-            pathing_maps = Map.Pathing.GetPathingMaps()
-            geometry = []
-            for layer in pathing_maps:
-                for trapezoid in layer.trapezoids:
-                    quad = Map.Pathing.Quad(trapezoid)
-                    geometry.append(quad.GetShiftedScreenPoints(origin_x, origin_y))
-            return geometry
+        def GetshiftedScreenComputedGeometry(origin_x: float, origin_y: float, bucket_size: float = 0.0) -> List[List[PyOverlay.Point2D]]:
+            return list(Map.Pathing.GeometryCache.GetGeometry(bucket_size, origin=(origin_x, origin_y), screen=True))
     
     class MissionMap:
         @staticmethod
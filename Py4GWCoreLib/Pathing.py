@@ -3,19 +3,44 @@ import PyPathing
 import PyOverlay
 import PyMap
 import math
+import gc
 import heapq
-import pickle
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+import zlib
 
 from .enums import name_to_map_id
-from typing import List, Tuple, Optional, Dict
-from collections import defaultdict
+from typing import Callable, List, Tuple, Optional, Dict
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, defaultdict
 from Py4GWCoreLib import Utils
+from .py4gwcorelib_src.MultiThreading import MultiThreading
 
 PathingMap = PyPathing.PathingMap
 PathingTrapezoid = PyPathing.PathingTrapezoid
 PathingPortal = PyPathing.Portal
 Point2D = PyOverlay.Point2D
 
+# On-disk NavMesh cache. Bump the version whenever the layout or the portal rules change.
+NAVMESH_FORMAT_VERSION = 2
+_NAVMESH_MAGIC = b"P4NM"
+# magic, version, map id, grid size, trapezoids, portals, graph keys, graph values,
+# grid cells, grid values, payload size, crc32, geometry hash (padded to 8 bytes)
+_NAVMESH_HEADER = struct.Struct("<4sIId7QI16s8x")
+_NAVMESH_CRC_OFFSET = struct.calcsize("<4sIId7Q")
+
+
+def _navmesh_checksum(header: bytes, payload) -> int:
+    """crc32 of the header, with its crc field zeroed, followed by the payload."""
+    crc = zlib.crc32(header[:_NAVMESH_CRC_OFFSET] + bytes(4) + header[_NAVMESH_CRC_OFFSET + 4:])
+    return zlib.crc32(payload, crc)
+
 class AABB:
     def __init__(self, t: PathingTrapezoid):
         self.m_t = t
@@ -31,6 +56,8 @@ class Portal:
         
 #region NavMesh
 class NavMesh:
+    POINT_INDEX_MAX_CELLS = 256
+
     def __init__(self, pathing_maps, map_id: int, GRID_SIZE:float = 1000):
         self.map_id = map_id
         self.GRID_SIZE = GRID_SIZE
@@ -40,7 +67,16 @@ class NavMesh:
         self.trap_id_to_layer: Dict[int, int] = {}         # trap id -> layer z
         self.layer_portals: Dict[int, List[PathingPortal]] = {}
         self.spatial_grid: Dict[Tuple[float, float], List[PathingTrapezoid]] = {}
+        self._point_indices: Dict[float, tuple] = {}  # tol -> (traps, cell -> trap order, wide trap order)
+        self._search_graph: Optional[AStarGraph] = None
+
+        self._index_layers(pathing_maps)
+        self.create_all_local_portals()
+        self.create_all_cross_layer_portals()
+        self._populate_spatial_grid()
 
+    
+    def _index_layers(self, pathing_maps):
         # Index data — use index, not pmap.zplane
         for i, layer in enumerate(pathing_maps):
             plane_index = i  # actual plane ID
@@ -50,11 +86,6 @@ class NavMesh:
             self.trapezoids.update({t.id: t for t in traps})
             self.trap_id_to_layer.update({t.id: plane_index for t in traps})
 
-        self.create_all_local_portals()
-        self.create_all_cross_layer_portals()
-        self._populate_spatial_grid()
-
-    
     def get_adjacent_side(self, a: PathingTrapezoid, b: PathingTrapezoid) -> Optional[str]:
         if abs(a.YB - b.YT) < 1.0: return 'bottom_top'
         if abs(a.YT - b.YB) < 1.0: return 'top_bottom'
@@ -66,14 +97,12 @@ class NavMesh:
         pt1, pt2 = box1.m_t, box2.m_t
         tolerance = 32.0
 
-        def is_close(a, b): return abs(a - b) < tolerance
-
         if side == 'bottom_top':
             if not pt1.YB == pt2.YT:
                 return False
             x_min = max(pt1.XBL, pt2.XBR)
             x_max = min(pt1.XBR, pt2.XBL)
-            if is_close(x_max, x_min): return False
+            if abs(x_max - x_min) < tolerance: return False
             p1, p2 = (x_min, pt1.YB), (x_max, pt1.YB)
 
         elif side == 'top_bottom':
@@ -81,7 +110,7 @@ class NavMesh:
                 return False
             x_min = max(pt1.XTL, pt2.XTR)
             x_max = min(pt1.XTR, pt2.XTL)
-            if is_close(x_max, x_min): return False
+            if abs(x_max - x_min) < tolerance: return False
             p1, p2 = (x_min, pt1.YT), (x_max, pt1.YT)
 
         elif side == 'left_right':
@@ -89,7 +118,7 @@ class NavMesh:
                 return False
             y_min = max(pt1.YT, pt2.YT)
             y_max = min(pt1.YB, pt2.YB)
-            if is_close(y_max, y_min): return False
+            if abs(y_max - y_min) < tolerance: return False
             p1, p2 = (pt1.XTR, y_min), (pt1.XBR, y_max)
 
         elif side == 'right_left':
@@ -97,7 +126,7 @@ class NavMesh:
                 return False
             y_min = max(pt1.YT, pt2.YT)
             y_max = min(pt1.YB, pt2.YB)
-            if is_close(y_max, y_min): return False
+            if abs(y_max - y_min) < tolerance: return False
             p1, p2 = (pt1.XTL, y_min), (pt1.XBL, y_max)
 
         elif side is None:
@@ -121,6 +150,7 @@ class NavMesh:
         for trap_id, z in self.trap_id_to_layer.items():
             zplane_traps[z].append(self.trapezoids[trap_id])
 
+        boxes: Dict[int, AABB] = {}  # AABBs are read-only, one per trapezoid is enough
         for traps in zplane_traps.values():
             trap_by_id = {t.id: t for t in traps}
 
@@ -129,13 +159,22 @@ class NavMesh:
                     tj = trap_by_id.get(nid)
                     if not tj or ti.id == tj.id:
                         continue
-                    ai = AABB(ti)
-                    aj = AABB(tj)
                     side = self.get_adjacent_side(ti, tj)
                     if side:
-                        self.create_portal(ai, aj, side)
-                        
-    def touching(self, a: AABB, b: AABB, vert_tol: float = 100.2, horiz_tol: float = 100.6) -> bool:
+                        self.create_portal(self._get_box(boxes, ti), self._get_box(boxes, tj), side)
+
+    @staticmethod
+    def _get_box(boxes: Dict[int, AABB], t: PathingTrapezoid) -> AABB:
+        box = boxes.get(t.id)
+        if box is None:
+            box = boxes[t.id] = AABB(t)
+        return box
+
+    TOUCH_VERT_TOL = 100.2
+    TOUCH_HORIZ_TOL = 100.6
+    TOUCH_SWEEP_MIN_PAIRS = 256  # smaller groups are cheaper to test pairwise
+
+    def touching(self, a: AABB, b: AABB, vert_tol: float = TOUCH_VERT_TOL, horiz_tol: float = TOUCH_HORIZ_TOL) -> bool:
         # Same vertical alignment
         if abs(a.m_t.YB - b.m_t.YT) < vert_tol or abs(a.m_t.YT - b.m_t.YB) < vert_tol:
             left_a = min(a.m_t.XBL, a.m_t.XTL)
@@ -156,10 +195,50 @@ class NavMesh:
 
         return False
 
-                        
-    def create_all_cross_layer_portals(self):
-        from collections import defaultdict
+    def _touching_pairs(self, traps_i: List[PathingTrapezoid], traps_j: List[PathingTrapezoid], boxes: Dict[int, AABB]):
+        """
+        Yield (ai, aj) for every touching pair, in the same order as testing each ti
+        against every tj. Large groups only test the tj whose facing edge is within
+        tolerance of ti's, found by binary search on the sorted edge coordinates.
+        """
+        if len(traps_i) * len(traps_j) < self.TOUCH_SWEEP_MIN_PAIRS:
+            for ti in traps_i:
+                ai = self._get_box(boxes, ti)
+                for tj in traps_j:
+                    if ti.id == tj.id:
+                        continue
+                    aj = self._get_box(boxes, tj)
+                    if self.touching(ai, aj):
+                        yield ai, aj
+            return
+
+        # touching() needs ti.YB~tj.YT, ti.YT~tj.YB, ti.XBR~tj.XBL or ti.XBL~tj.XBR.
+        # The window is padded by a unit so float rounding can't drop a pair; the exact test decides.
+        axes = []
+        for attr, tol in (("YT", self.TOUCH_VERT_TOL), ("YB", self.TOUCH_VERT_TOL),
+                          ("XBL", self.TOUCH_HORIZ_TOL), ("XBR", self.TOUCH_HORIZ_TOL)):
+            keyed = sorted((getattr(t, attr), j) for j, t in enumerate(traps_j)
+                           if getattr(t, attr) == getattr(t, attr))  # NaN never touches
+            axes.append(([v for v, _ in keyed], [j for _, j in keyed], tol + 1.0))
+
+        (yt, yt_order, yt_pad), (yb, yb_order, yb_pad), (xbl, xbl_order, xbl_pad), (xbr, xbr_order, xbr_pad) = axes
+        for ti in traps_i:
+            hits = set(yt_order[bisect_left(yt, ti.YB - yt_pad):bisect_right(yt, ti.YB + yt_pad)])
+            hits.update(yb_order[bisect_left(yb, ti.YT - yb_pad):bisect_right(yb, ti.YT + yb_pad)])
+            hits.update(xbl_order[bisect_left(xbl, ti.XBR - xbl_pad):bisect_right(xbl, ti.XBR + xbl_pad)])
+            hits.update(xbr_order[bisect_left(xbr, ti.XBL - xbr_pad):bisect_right(xbr, ti.XBL + xbr_pad)])
+            if not hits:
+                continue
+            ai = self._get_box(boxes, ti)
+            for j in sorted(hits):
+                tj = traps_j[j]
+                if ti.id == tj.id:
+                    continue
+                aj = self._get_box(boxes, tj)
+                if self.touching(ai, aj):
+                    yield ai, aj
 
+    def create_all_cross_layer_portals(self):
         portal_groups = defaultdict(lambda: defaultdict(list))  # pair_index → zplane → List[Trap]
 
         # Step 1: group by pair_index and zplane
@@ -172,6 +251,7 @@ class NavMesh:
                     portal_groups[p.pair_index][z].append(trap)
 
         # Step 2: only test across zplane groups
+        boxes: Dict[int, AABB] = {}
         for zplane_map in portal_groups.values():
             zplanes = list(zplane_map.keys())
             if len(zplanes) < 2:
@@ -180,19 +260,11 @@ class NavMesh:
             # For each pair of zplanes (usually just 2)
             for i in range(len(zplanes)):
                 for j in range(i + 1, len(zplanes)):
-                    zi, zj = zplanes[i], zplanes[j]
-                    traps_i = zplane_map[zi]
-                    traps_j = zplane_map[zj]
-
-                    for ti in traps_i:
-                        ai = AABB(ti)
-                        for tj in traps_j:
-                            if ti.id == tj.id:
-                                continue
-                            aj = AABB(tj)
-                            if self.touching(ai, aj):
-                                self.create_portal(ai, aj, None)
-                                
+                    traps_i = zplane_map[zplanes[i]]
+                    traps_j = zplane_map[zplanes[j]]
+                    for ai, aj in self._touching_pairs(traps_i, traps_j, boxes):
+                        self.create_portal(ai, aj, None)
+
     def get_position(self, t_id: int) -> Tuple[float, float]:
         t = self.trapezoids[t_id]
         cx = (t.XTL + t.XTR + t.XBL + t.XBR) / 4
@@ -201,16 +273,113 @@ class NavMesh:
 
     def get_neighbors(self, t_id: int) -> List[int]:
         return self.portal_graph.get(t_id, [])
+
+    def get_search_graph(self) -> "AStarGraph":
+        """Flat-array A* graph for this mesh, built on first use."""
+        if self._search_graph is None:
+            self._search_graph = AStarGraph(self)
+        return self._search_graph
+
+    def get_memory_usage(self) -> int:
+        """
+        Approximate bytes held by this mesh: its dicts and lists, portals and their AABBs,
+        and the lazily built point indices and A* graph. Per-object sizes are sampled once.
+        """
+        size = sys.getsizeof
+        total = size(self.trapezoids) + size(self.trap_id_to_layer) + size(self.layer_portals)
+        if self.trapezoids:
+            total += len(self.trapezoids) * size(next(iter(self.trapezoids.values())))
+
+        total += size(self.portals)
+        if self.portals:
+            p = self.portals[0]
+            total += len(self.portals) * (size(p) + size(p.__dict__) + size(p.p1) + size(p.p2))
+            boxes = {id(p.a) for p in self.portals}
+            boxes.update(id(p.b) for p in self.portals)
+            box = p.a
+            total += len(boxes) * (size(box) + size(box.__dict__) + size(box.m_min) + size(box.m_max))
+
+        total += size(self.portal_graph) + sum(size(v) for v in self.portal_graph.values())
+        total += size(self.spatial_grid) + sum(size(k) + size(v) for k, v in self.spatial_grid.items())
+
+        for traps, cells, wide in self._point_indices.values():
+            total += size(traps) + size(wide) + size(cells)
+            total += sum(size(k) + size(v) for k, v in cells.items())
+
+        graph = self._search_graph
+        if graph is not None:
+            total += size(graph.ids) + size(graph.index)
+            total += sum(size(a) for a in (graph.cx, graph.cy, graph.offsets, graph.targets, graph.costs))
+            total += 4 * size(graph.cx)  # one thread's scratch buffers, same length and item size
+        return total
     
+    def _build_point_index(self, tol: float):
+        """
+        Grid of trapezoid positions (in self.trapezoids order) covering every point that
+        find_trapezoid_id_by_coord accepts for this tolerance, including the x range the
+        edge interpolation reaches within tol above and below the trapezoid.
+        """
+        traps = list(self.trapezoids.values())
+        cells: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        wide: List[int] = []
+        inv = 1.0 / self.GRID_SIZE
+        pad = 1.0  # absorbs rounding between this bound and the interpolation in the lookup
+
+        for order, t in enumerate(traps):
+            y_min = t.YB - tol
+            y_max = t.YT + tol
+            if y_min > y_max:
+                continue
+            if t.YT != t.YB:
+                height = t.YT - t.YB
+                r0 = (y_min - t.YB) / height
+                r1 = (y_max - t.YB) / height
+                lefts = (t.XBL + (t.XTL - t.XBL) * r0, t.XBL + (t.XTL - t.XBL) * r1)
+                rights = (t.XBR + (t.XTR - t.XBR) * r0, t.XBR + (t.XTR - t.XBR) * r1)
+            else:
+                lefts = (t.XBL,)
+                rights = (t.XBR,)
+            x_min = min(lefts) - tol
+            x_max = max(rights) + tol
+            if x_min > x_max:
+                continue
+
+            gx_min, gx_max = math.floor((x_min - pad) * inv), math.floor((x_max + pad) * inv)
+            gy_min, gy_max = math.floor((y_min - pad) * inv), math.floor((y_max + pad) * inv)
+            if (gx_max - gx_min + 1) * (gy_max - gy_min + 1) > self.POINT_INDEX_MAX_CELLS:
+                # Slivers whose edge extrapolation spans half the map are tested on every lookup
+                wide.append(order)
+                continue
+            for gx in range(gx_min, gx_max + 1):
+                for gy in range(gy_min, gy_max + 1):
+                    cells[(gx, gy)].append(order)
+
+        if wide:
+            for key, orders in cells.items():
+                cells[key] = sorted(orders + wide)
+        index = (traps, dict(cells), wide)
+        self._point_indices[tol] = index
+        return index
+
     def find_trapezoid_id_by_coord(self, point: Tuple[float, float], tol: float = 20.0) -> Optional[int]:
         """
         Returns the trapezoid ID containing (x, y), using a small tolerance to avoid
         floating-point misses when the point lies exactly on a border or corner.
+        Only the trapezoids indexed under the point's grid cell are tested, in the same
+        order as a full scan, so the first match is the same trapezoid.
         """
         x, y = point
+        if not (math.isfinite(x) and math.isfinite(y)):
+            return None
+
+        index = self._point_indices.get(tol)
+        if index is None:
+            index = self._build_point_index(tol)
+        traps, cells, wide = index
 
-        # 1. Normal trapezoids (floor & standard geometry)
-        for t in self.trapezoids.values():
+        inv = 1.0 / self.GRID_SIZE
+        for order in cells.get((math.floor(x * inv), math.floor(y * inv)), wide):
+            t = traps[order]
             if t.YB - tol <= y <= t.YT + tol:
                 ratio = (y - t.YB) / (t.YT - t.YB) if t.YT != t.YB else 0
                 left_x = t.XBL + (t.XTL - t.XBL) * ratio
@@ -218,22 +387,9 @@ class NavMesh:
                 if left_x - tol <= x <= right_x + tol:
                     return t.id
 
-        # 2. Cross-layer portals (bridge, stairs, elevated geometry)
-        for portal in self.portals:
-            for trap in (portal.a.m_t, portal.b.m_t):
-                if trap.YB - tol <= y <= trap.YT + tol:
-                    ratio = (y - trap.YB) / (trap.YT - trap.YB) if trap.YT != trap.YB else 0
-                    left_x = trap.XBL + (trap.XTL - trap.XBL) * ratio
-                    right_x = trap.XBR + (trap.XTR - trap.XBR) * ratio
-                    if left_x - tol <= x <= right_x + tol:
-                        return trap.id
-
-        # 3. Nothing found
+        # Portal trapezoids are the same objects as self.trapezoids, already covered above
         return None
 
-
-
-    
     def _populate_spatial_grid(self):
         for trap in self.trapezoids.values():
             min_x = int(min(trap.XBL, trap.XTL) // self.GRID_SIZE)
@@ -305,20 +461,181 @@ class NavMesh:
             i = j
         return result
     
-    def save_to_file(self, folder: str):
-        filepath = f"{folder}/navmesh_{self.map_id}.bin"
-        data = {
-            "map_id": self.map_id,
-            "portals": [((p.p1.x, p.p1.y), (p.p2.x, p.p2.y), p.a.m_t.id, p.b.m_t.id) for p in self.portals],
-            "portal_graph": self.portal_graph
-        }
-        with open(filepath, "wb") as f:
-            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+    @staticmethod
+    def _shared_edge(a: PathingTrapezoid, b: PathingTrapezoid) -> Optional[Tuple[float, float, float, bool]]:
+        """(y, x_min, x_max, going_up) of the horizontal edge a and b share, or None."""
+        if a.YB == b.YT:
+            y, lo, hi, going_up = a.YB, max(a.XBL, b.XTL), min(a.XBR, b.XTR), False
+        elif a.YT == b.YB:
+            y, lo, hi, going_up = a.YT, max(a.XTL, b.XBL), min(a.XTR, b.XBR), True
+        else:
+            return None
+        if not hi > lo:
+            return None
+        return y, lo, hi, going_up
+
+    @staticmethod
+    def _funnel(start: Tuple[float, float],
+                portals: List[Tuple[Tuple[float, float], Tuple[float, float]]],
+                goal: Tuple[float, float]) -> List[Tuple[float, float]]:
+        """Simple stupid funnel: shortest path from start to goal through (left, right) portals."""
+        def cross(o, a, b):
+            return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+        portals = [(start, start)] + portals + [(goal, goal)]
+        path = [start]
+        apex = left = right = start
+        apex_i = left_i = right_i = 0
+        i = 1
+        while i < len(portals):
+            portal_left, portal_right = portals[i]
+
+            # Narrow the right side, or restart from the left corner if it crosses over
+            if cross(apex, right, portal_right) >= 0:
+                if apex == right or cross(apex, left, portal_right) < 0:
+                    right, right_i = portal_right, i
+                else:
+                    path.append(left)
+                    apex, apex_i = left, left_i
+                    right, right_i = apex, apex_i
+                    i = apex_i + 1
+                    continue
+
+            # Same for the left side
+            if cross(apex, left, portal_left) <= 0:
+                if apex == left or cross(apex, right, portal_left) > 0:
+                    left, left_i = portal_left, i
+                else:
+                    path.append(right)
+                    apex, apex_i = right, right_i
+                    left, left_i = apex, apex_i
+                    i = apex_i + 1
+                    continue
+            i += 1
 
+        if path[-1] != goal:
+            path.append(goal)
+        return path
+
+    def string_pull(self,
+                    corridor: List[int],
+                    start: Tuple[float, float],
+                    goal: Tuple[float, float],
+                    margin: float = 0.0) -> List[Tuple[float, float]]:
+        """
+        Shortest path from start to goal that stays inside the corridor of trapezoid ids.
+        Consecutive trapezoids sharing a horizontal edge are crossed anywhere on it, `margin`
+        in from its ends (its midpoint if narrower); other links (cross-layer, side contacts)
+        are crossed centroid to centroid, exactly like the raw A* path.
+        """
+        path = [start]
+        run_start = start
+        portals: List[Tuple[Tuple[float, float], Tuple[float, float]]] = []
+        trapezoids = self.trapezoids
+        for k in range(len(corridor) - 1):
+            a, b = trapezoids[corridor[k]], trapezoids[corridor[k + 1]]
+            edge = self._shared_edge(a, b)
+            if edge is None:
+                run_end = self.get_position(a.id)
+                path.extend(self._funnel(run_start, portals, run_end)[1:])
+                run_start = self.get_position(b.id)
+                path.append(run_start)
+                portals = []
+                continue
+
+            y, lo, hi, going_up = edge
+            if hi - lo > 2 * margin:
+                lo, hi = lo + margin, hi - margin
+            else:
+                lo = hi = (lo + hi) / 2
+            # Facing +y the left end is the low x, facing -y it is the high x
+            portals.append(((lo, y), (hi, y)) if going_up else ((hi, y), (lo, y)))
+
+        path.extend(self._funnel(run_start, portals, goal)[1:])
+        # Drop repeats where a run ends on the point the next one starts from
+        return [p for i, p in enumerate(path) if i == 0 or p != path[i - 1]]
 
     @staticmethod
-    def load_from_file(pathing_maps, map_id: int, folder: str) -> "NavMesh":
-        filepath = f"{folder}/navmesh_{map_id}.bin"
+    def cache_file_path(folder: str, map_id: int) -> str:
+        return os.path.join(folder, f"navmesh_{map_id}.bin")
+
+    def _geometry_table(self) -> Tuple[bytes, bytes]:
+        """
+        Trapezoid table as stored on disk (ids, layers, XTL/XTR/YT/XBL/XBR/YB) and a hash
+        of everything the portals are derived from: that table, the neighbour lists and
+        the layer portals.
+        """
+        traps = list(self.trapezoids.values())
+        ids = array("q", [t.id for t in traps])
+        layers = array("q", [self.trap_id_to_layer[t.id] for t in traps])
+        coords = array("d")
+        for t in traps:
+            coords.extend((t.XTL, t.XTR, t.YT, t.XBL, t.XBR, t.YB))
+        table = ids.tobytes() + layers.tobytes() + coords.tobytes()
+
+        digest = hashlib.blake2b(table, digest_size=16)
+        for t in traps:
+            neighbors = array("q", t.neighbor_ids)
+            digest.update(struct.pack("<q", len(neighbors)))
+            digest.update(neighbors.tobytes())
+        for z, portal_list in self.layer_portals.items():
+            digest.update(struct.pack("<qq", z, len(portal_list)))
+            for p in portal_list:
+                trap_ids = array("q", p.trapezoid_indices)
+                digest.update(struct.pack("<qq", p.pair_index, len(trap_ids)))
+                digest.update(trap_ids.tobytes())
+        return table, digest.digest()
+
+    def save_to_file(self, folder: str):
+        """
+        Write the NavMesh as a flat binary file (see NAVMESH_FORMAT_VERSION).
+        Every section is an array of 8-byte values so the file can be mapped and cast in place.
+        """
+        table, geometry_hash = self._geometry_table()
+
+        portals = array("q")
+        for p in self.portals:
+            portals.extend((int(p.p1.x), int(p.p1.y), int(p.p2.x), int(p.p2.y), p.a.m_t.id, p.b.m_t.id))
+
+        graph_keys, graph_offsets, graph_values = array("q"), array("q", [0]), array("q")
+        for t_id, neighbors in self.portal_graph.items():
+            graph_keys.append(t_id)
+            graph_values.extend(neighbors)
+            graph_offsets.append(len(graph_values))
+
+        grid_keys, grid_offsets, grid_values = array("q"), array("q", [0]), array("q")
+        for (gx, gy), traps in self.spatial_grid.items():
+            grid_keys.extend((gx, gy))
+            grid_values.extend(t.id for t in traps)
+            grid_offsets.append(len(grid_values))
+
+        payload = b"".join((table, portals.tobytes(),
+                            graph_keys.tobytes(), graph_offsets.tobytes(), graph_values.tobytes(),
+                            grid_keys.tobytes(), grid_offsets.tobytes(), grid_values.tobytes()))
+        fields = (_NAVMESH_MAGIC, NAVMESH_FORMAT_VERSION, self.map_id, float(self.GRID_SIZE),
+                  len(self.trapezoids), len(self.portals), len(graph_keys), len(graph_values),
+                  len(self.spatial_grid), len(grid_values), len(payload))
+        crc = _navmesh_checksum(_NAVMESH_HEADER.pack(*fields, 0, geometry_hash), payload)
+        header = _NAVMESH_HEADER.pack(*fields, crc, geometry_hash)
+
+        os.makedirs(folder, exist_ok=True)
+        filepath = NavMesh.cache_file_path(folder, self.map_id)
+        tmp_path = filepath + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(header)
+            f.write(payload)
+        os.replace(tmp_path, filepath)  # readers never see a half-written file
+
+    @staticmethod
+    def load_from_file(pathing_maps, map_id: int, folder: str) -> Optional["NavMesh"]:
+        """
+        Load a NavMesh written by save_to_file. Returns None when there is no file or it
+        is unusable (other format version, different geometry, corrupt), so the caller
+        can rebuild and save a fresh one.
+        """
+        filepath = NavMesh.cache_file_path(folder, map_id)
+        if not os.path.isfile(filepath):
+            return None
 
         nav = NavMesh.__new__(NavMesh)
         nav.map_id = map_id
@@ -327,52 +644,220 @@ class NavMesh:
         nav.portal_graph = {}
         nav.trap_id_to_layer = {}
         nav.layer_portals = {}
-
-        for layer in pathing_maps:
-            z = layer.zplane
-            traps = layer.trapezoids
-            nav.layer_portals[z] = layer.portals
-            nav.trapezoids.update({t.id: t for t in traps})
-            nav.trap_id_to_layer.update({t.id: z for t in traps})
-
-        with open(filepath, "rb") as f:
-            data = pickle.load(f)
-
-        for (x1, y1), (x2, y2), a_id, b_id in data["portals"]:
-            a = AABB(nav.trapezoids[a_id])
-            b = AABB(nav.trapezoids[b_id])
-            p1 = Point2D(x1, y1)
-            p2 = Point2D(x2, y2)
-            nav.portals.append(Portal(p1, p2, a, b))
-
-        nav.portal_graph = data["portal_graph"]
+        nav.spatial_grid = {}
+        nav._point_indices = {}
+        nav._search_graph = None
+        nav._index_layers(pathing_maps)
+        table, geometry_hash = nav._geometry_table()
+
+        try:
+            with open(filepath, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                sections = NavMesh._read_sections(mm, map_id, table, geometry_hash)
+        except (OSError, ValueError, struct.error) as e:
+            sections = f"unreadable ({e})"
+
+        if isinstance(sections, str):
+            Py4GW.Console.Log("NavMesh", f"Ignoring NavMesh cache for map {map_id}: {sections}.", Py4GW.Console.MessageType.Warning)
+            return None
+
+        grid_size, portals, graph_keys, graph_offsets, graph_values, grid_keys, grid_offsets, grid_values = sections
+        nav.GRID_SIZE = grid_size
+        # Hundreds of thousands of allocations and no garbage: cyclic GC passes here only cost time
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            nav._fill_from_sections(portals, graph_keys, graph_offsets, graph_values, grid_keys, grid_offsets, grid_values)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
 
         Py4GW.Console.Log("NavMesh", f"Loaded NavMesh for map {map_id} with {len(nav.portals)} portals and {len(nav.trapezoids)} trapezoids.", Py4GW.Console.MessageType.Info)
         return nav
+
+    def _fill_from_sections(self, portals, graph_keys, graph_offsets, graph_values, grid_keys, grid_offsets, grid_values):
+        """Rebuild portals, portal_graph and spatial_grid from decoded cache sections."""
+        trapezoids = self.trapezoids
+        boxes: Dict[int, AABB] = {}  # AABBs are read-only, one per trapezoid is enough
+        for x1, y1, x2, y2, a_id, b_id in zip(*(portals[i::6] for i in range(6))):
+            a = boxes.get(a_id)
+            if a is None:
+                a = boxes[a_id] = AABB(trapezoids[a_id])
+            b = boxes.get(b_id)
+            if b is None:
+                b = boxes[b_id] = AABB(trapezoids[b_id])
+            self.portals.append(Portal(Point2D(x1, y1), Point2D(x2, y2), a, b))
+
+        for i, t_id in enumerate(graph_keys):
+            self.portal_graph[t_id] = graph_values[graph_offsets[i]:graph_offsets[i + 1]]
+
+        for i in range(len(grid_offsets) - 1):
+            traps = grid_values[grid_offsets[i]:grid_offsets[i + 1]]
+            self.spatial_grid[(grid_keys[2 * i], grid_keys[2 * i + 1])] = [trapezoids[t_id] for t_id in traps]
+
+    @staticmethod
+    def _read_sections(mm, map_id: int, table: bytes, geometry_hash: bytes):
+        """Validate a mapped cache file and decode its sections, or return why it was rejected."""
+        header_size = _NAVMESH_HEADER.size
+        if len(mm) < header_size:
+            return "truncated header"
+        (magic, version, file_map_id, grid_size, n_traps, n_portals, n_graph_keys, n_graph_values,
+         n_grid_cells, n_grid_values, payload_size, crc, file_hash) = _NAVMESH_HEADER.unpack_from(mm, 0)
+        if magic != _NAVMESH_MAGIC:
+            return "not a NavMesh cache file"
+        if version != NAVMESH_FORMAT_VERSION:
+            return f"format version {version}, expected {NAVMESH_FORMAT_VERSION}"
+        if file_map_id != map_id or file_hash != geometry_hash:
+            return "pathing geometry changed"
+        if len(mm) != header_size + payload_size:
+            return "truncated payload"
+
+        with memoryview(mm) as view:
+            payload = view[header_size:]
+            if _navmesh_checksum(bytes(view[:header_size]), payload) != crc:
+                payload.release()
+                return "checksum mismatch"
+            if payload[:len(table)] != table:  # hash collisions are not trusted either
+                payload.release()
+                return "pathing geometry changed"
+
+            counts = (6 * n_portals, n_graph_keys, n_graph_keys + 1, n_graph_values,
+                      2 * n_grid_cells, n_grid_cells + 1, n_grid_values)
+            if len(table) != 64 * n_traps or len(table) + 8 * sum(counts) != payload_size:
+                payload.release()
+                return "section sizes do not match the header"
+
+            sections = [grid_size]
+            offset = len(table)
+            for count in counts:
+                end = offset + 8 * count
+                sections.append(payload[offset:end].cast("q").tolist())
+                offset = end
+            payload.release()
+        return sections
     
     
 
 #region AStar
 
-class AStarNode:
-    def __init__(self, node_id, g, f, parent=None):
-        self.id = node_id
-        self.g = g
-        self.f = f
-        self.parent = parent
-    def __lt__(self, other): return self.f < other.f
-    
+class _AStarScratch(threading.local):
+    """Per-thread search state; arrays are stamped per query so they are reused without clearing."""
+
+    def __init__(self, n: int):
+        self.g = array("d", [0.0]) * n
+        self.parent = array("l", [-1]) * n
+        self.seen = array("l", [0]) * n    # query stamp: g/parent are valid for this query
+        self.closed = array("l", [0]) * n  # query stamp: node already expanded
+        self.query = 0
+        self.expanded = 0  # nodes expanded by the last search on this thread
+
+
+class AStarGraph:
+    """
+    Flat-array copy of a NavMesh portal graph for A*: trapezoid centroids and CSR
+    adjacency with precomputed edge costs, indexed by position in navmesh.trapezoids.
+    Searches on different threads get their own scratch buffers.
+    """
+    INTERRUPT_INTERVAL = 256  # expansions between interrupt checks
+
+    def __init__(self, navmesh: NavMesh):
+        self.ids: List[int] = list(navmesh.trapezoids)
+        self.index: Dict[int, int] = {t_id: i for i, t_id in enumerate(self.ids)}
+        self.cx = array("d")
+        self.cy = array("d")
+        for t_id in self.ids:
+            x, y = navmesh.get_position(t_id)
+            self.cx.append(x)
+            self.cy.append(y)
+
+        self.offsets = array("l", [0])
+        self.targets = array("l")
+        self.costs = array("d")
+        cx, cy = self.cx, self.cy
+        for i, t_id in enumerate(self.ids):
+            for neighbor in navmesh.portal_graph.get(t_id, []):
+                j = self.index.get(neighbor)
+                if j is None:
+                    continue
+                self.targets.append(j)
+                self.costs.append(math.hypot(cx[j] - cx[i], cy[j] - cy[i]))
+            self.offsets.append(len(self.targets))
+
+        self._scratch = _AStarScratch(len(self.ids))
+
+    @property
+    def expanded(self) -> int:
+        """Nodes expanded by the last search on the calling thread."""
+        return self._scratch.expanded
+
+    def position(self, i: int) -> Tuple[float, float]:
+        return (self.cx[i], self.cy[i])
+
+    def search(self, start: int, goal: int, interrupt: Optional[Callable[[], bool]] = None) -> Optional[List[int]]:
+        """
+        Node indices of a shortest path from start to goal, or None if unreachable.
+        interrupt is polled every INTERRUPT_INTERVAL expansions; returning True abandons the search.
+        """
+        scratch = self._scratch
+        scratch.query += 1
+        query = scratch.query
+        g, parent, seen, closed = scratch.g, scratch.parent, scratch.seen, scratch.closed
+        cx, cy, offsets, targets, costs = self.cx, self.cy, self.offsets, self.targets, self.costs
+        hypot = math.hypot
+        heappush, heappop = heapq.heappush, heapq.heappop
+        gx, gy = cx[goal], cy[goal]
+
+        seen[start] = query
+        g[start] = 0.0
+        parent[start] = -1
+        # A better cost pushes a new entry; the old one is skipped once its node is closed.
+        open_heap = [(hypot(gx - cx[start], gy - cy[start]), start)]
+        expanded = 0
+        while open_heap:
+            _, u = heappop(open_heap)
+            if closed[u] == query:
+                continue
+            if u == goal:
+                scratch.expanded = expanded
+                path = [u]
+                while parent[u] >= 0:
+                    u = parent[u]
+                    path.append(u)
+                path.reverse()
+                return path
+            closed[u] = query
+            expanded += 1
+            if interrupt is not None and expanded % self.INTERRUPT_INTERVAL == 0 and interrupt():
+                scratch.expanded = expanded
+                return None
+
+            gu = g[u]
+            for k in range(offsets[u], offsets[u + 1]):
+                v = targets[k]
+                new_cost = gu + costs[k]
+                if seen[v] != query or new_cost < g[v]:
+                    seen[v] = query
+                    g[v] = new_cost
+                    parent[v] = u
+                    heappush(open_heap, (new_cost + hypot(gx - cx[v], gy - cy[v]), v))
+
+        scratch.expanded = expanded
+        return None
+
+
 class AStar:
     def __init__(self, navmesh: NavMesh):
         self.navmesh = navmesh
+        self.graph = navmesh.get_search_graph()
         self.path: List[Tuple[float, float]] = []
+        self.corridor: List[int] = []  # trapezoid ids of the last path, start to goal
 
     def heuristic(self, a: int, b: int) -> float:
-        ax, ay = self.navmesh.get_position(a)
-        bx, by = self.navmesh.get_position(b)
-        return math.hypot(bx - ax, by - ay)
+        graph = self.graph
+        i, j = graph.index[a], graph.index[b]
+        return math.hypot(graph.cx[j] - graph.cx[i], graph.cy[j] - graph.cy[i])
 
-    def search(self, start_pos: Tuple[float, float], goal_pos: Tuple[float, float]) -> bool:
+    def search(self, start_pos: Tuple[float, float], goal_pos: Tuple[float, float],
+               interrupt: Optional[Callable[[], bool]] = None) -> bool:
         start_id = self.navmesh.find_trapezoid_id_by_coord(start_pos)
         goal_id = self.navmesh.find_trapezoid_id_by_coord(goal_pos)
 
@@ -380,38 +865,20 @@ class AStar:
             Py4GW.Console.Log("A-Star", f"Invalid start or goal trapezoid: {start_id}, {goal_id}", Py4GW.Console.MessageType.Error)
             return False
 
-        open_list: List[AStarNode] = []
-        heapq.heappush(open_list, AStarNode(start_id, 0, self.heuristic(start_id, goal_id)))
-        came_from: Dict[int, int] = {}
-        cost_so_far: Dict[int, float] = {start_id: 0}
-
-        while open_list:
-            current = heapq.heappop(open_list)
-            if current.id == goal_id:
-                self._reconstruct(came_from, goal_id)
-                # Prepend exact start position, append exact goal position
-                self.path.insert(0, start_pos)
-                self.path.append(goal_pos)
-                return True
-
-            for neighbor in self.navmesh.get_neighbors(current.id):
-                new_cost = cost_so_far[current.id] + self.heuristic(current.id, neighbor)
-                if neighbor not in cost_so_far or new_cost < cost_so_far[neighbor]:
-                    cost_so_far[neighbor] = new_cost
-                    priority = new_cost + self.heuristic(neighbor, goal_id)
-                    heapq.heappush(open_list, AStarNode(neighbor, new_cost, priority, current.id))
-                    came_from[neighbor] = current.id
-
-        Py4GW.Console.Log("A-Star", f"Path not found from {start_id} to {goal_id}", Py4GW.Console.MessageType.Warning)
-        return False
+        graph = self.graph
+        nodes = graph.search(graph.index[start_id], graph.index[goal_id], interrupt)
+        if nodes is None:
+            if interrupt is not None and interrupt():
+                return False  # abandoned by the caller, not a missing path
+            Py4GW.Console.Log("A-Star", f"Path not found from {start_id} to {goal_id}", Py4GW.Console.MessageType.Warning)
+            return False
 
-    def _reconstruct(self, came_from: Dict[int, int], end_id: int):
-        self.path = []
-        while end_id in came_from:
-            self.path.append(self.navmesh.get_position(end_id))
-            end_id = came_from[end_id]
-        self.path.append(self.navmesh.get_position(end_id))  # Add start node
-        self.path.reverse()
+        self.corridor = [graph.ids[i] for i in nodes]
+        self.path = [graph.position(i) for i in nodes]
+        # Prepend exact start position, append exact goal position
+        self.path.insert(0, start_pos)
+        self.path.append(goal_pos)
+        return True
 
     def get_path(self) -> List[Tuple[float, float]]:
         return self.path
@@ -554,6 +1021,456 @@ PATHING_MAP_GROUPS = [
     ],
 ]
 
+# map id -> sorted group tuple; the first group listing a map wins, like the old linear scan
+_MAP_ID_TO_GROUP_KEY: Dict[int, Tuple[int, ...]] = {}
+for _group in PATHING_MAP_GROUPS:
+    for _map_id in _group:
+        _MAP_ID_TO_GROUP_KEY.setdefault(_map_id, tuple(sorted(_group)))
+
+def _prepend_start(path2d: List[Tuple[float, float]], sx: float, sy: float, tol: float = 250.0) -> List[Tuple[float, float]]:
+    if not path2d:
+        path2d.insert(0, (sx, sy))
+        return path2d
+
+    dx = path2d[0][0] - sx
+    dy = path2d[0][1] - sy
+
+    # prepend start only if the first point is farther than 250 units
+    if dx * dx + dy * dy > tol * tol:
+        path2d.insert(0, (sx, sy))
+
+    return path2d
+
+
+def plan_navmesh_path(navmesh: NavMesh,
+                      start: Tuple[float, float, float],
+                      goal: Tuple[float, float, float],
+                      smooth_by_los: bool = True,
+                      margin: float = 100,
+                      step_dist: float = 200.0,
+                      smooth_by_chaikin: bool = False,
+                      chaikin_iterations: int = 1,
+                      interrupt: Optional[Callable[[], bool]] = None) -> Optional[List[Tuple[float, float]]]:
+    """
+    A* over the navmesh plus AutoPathing's smoothing; the finished 2D path, or None.
+    smooth_by_los string-pulls the A* corridor (step_dist is kept for callers, the pull does not sample).
+    """
+    astar = AStar(navmesh)
+    if not astar.search((start[0], start[1]), (goal[0], goal[1]), interrupt):
+        return None
+
+    if smooth_by_los:
+        smoothed = navmesh.string_pull(astar.corridor, (start[0], start[1]), (goal[0], goal[1]), margin)
+    else:
+        smoothed = _prepend_start(astar.get_path(), start[0], start[1])
+
+    if smooth_by_chaikin:
+        smoothed = chaikin_smooth_path(smoothed, chaikin_iterations)
+
+    return densify_path2d(smoothed)  # split long hops into ≤750
+
+
+#region PathPlanning
+
+class PathFuture:
+    """
+    Result of a PathPlanningService request. Generators wait with
+    `path = yield from future.wait()`; closing the waiting generator cancels the request.
+    """
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+    EXPIRED = "expired"
+
+    def __init__(self, job: Callable[[Callable[[], bool]], Optional[list]], priority: int, deadline: Optional[float]):
+        self._job = job
+        self.priority = priority
+        self.deadline = deadline  # time.monotonic() value, or None
+        self.status = PathFuture.PENDING
+        self._result: list = []
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+
+    def done(self) -> bool:
+        return self._event.is_set()
+
+    def cancelled(self) -> bool:
+        return self.status == PathFuture.CANCELLED
+
+    def cancel(self) -> bool:
+        """Cancel unless finished; a running search stops at its next interrupt check."""
+        with self._lock:
+            if self._event.is_set():
+                return False
+            self.status = PathFuture.CANCELLED
+        self._event.set()
+        return True
+
+    def result(self) -> list:
+        """The path, or [] if it failed, expired, was cancelled or is not finished yet."""
+        return list(self._result)
+
+    def wait(self):
+        try:
+            while not self._event.is_set():
+                yield
+        finally:
+            if not self._event.is_set():
+                self.cancel()
+        return self.result()
+
+    def _expired(self) -> bool:
+        return self.deadline is not None and time.monotonic() > self.deadline
+
+    def _should_stop(self) -> bool:
+        time.sleep(0)  # hand the GIL back to the frame thread between chunks of work
+        return self._event.is_set() or self._expired()
+
+    def _start(self) -> bool:
+        with self._lock:
+            if self._event.is_set():
+                return False
+            if self._expired():
+                self.status = PathFuture.EXPIRED
+                self._event.set()
+                return False
+            self.status = PathFuture.RUNNING
+            return True
+
+    def _finish(self, path: Optional[list]):
+        with self._lock:
+            if self._event.is_set():
+                return  # cancelled while running
+            if path is None:
+                self.status = PathFuture.EXPIRED if self._expired() else PathFuture.FAILED
+            else:
+                self._result = path
+                self.status = PathFuture.DONE
+        self._event.set()
+
+
+class PathPlanningService:
+    """
+    Runs navmesh A* and smoothing on a worker thread (started on first use through
+    MultiThreading). Requests run highest priority first, FIFO within a priority;
+    a request still queued or running after its deadline ends as expired.
+    """
+    THREAD_NAME = "PathPlanningService"
+
+    def __init__(self):
+        self._queue: List[Tuple[int, int, PathFuture]] = []
+        self._seq = 0
+        self._cv = threading.Condition()
+        self._stopping = False
+        self._current: Optional[PathFuture] = None
+        self._threads: Optional[MultiThreading] = None
+
+    def submit(self, navmesh: NavMesh,
+               start: Tuple[float, float, float],
+               goal: Tuple[float, float, float],
+               priority: int = 0,
+               timeout: Optional[float] = None,
+               smooth_by_los: bool = True,
+               margin: float = 100,
+               step_dist: float = 200.0,
+               smooth_by_chaikin: bool = False,
+               chaikin_iterations: int = 1) -> PathFuture:
+        """Queue a path request; timeout is in seconds from now. The future's result is the 2D path."""
+        def job(interrupt):
+            return plan_navmesh_path(navmesh, start, goal, smooth_by_los, margin, step_dist,
+                                     smooth_by_chaikin, chaikin_iterations, interrupt)
+
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        future = PathFuture(job, priority, deadline)
+        with self._cv:
+            self._seq += 1
+            heapq.heappush(self._queue, (-priority, self._seq, future))
+            self._cv.notify()
+        self._ensure_worker()
+        return future
+
+    def pending(self) -> int:
+        with self._cv:
+            return len(self._queue)
+
+    def _ensure_worker(self):
+        with self._cv:
+            threads = self._threads
+            if threads is None:
+                self._stopping = False
+                threads = self._threads = MultiThreading()
+                threads.add_thread(self.THREAD_NAME, self._run)
+                return
+        worker = threads.threads.get(self.THREAD_NAME, {}).get("thread")
+        if worker is None or not worker.is_alive():
+            threads.start_thread(self.THREAD_NAME)
+
+    def _run(self):
+        while True:
+            with self._cv:
+                while not self._queue and not self._stopping:
+                    self._cv.wait()
+                if self._stopping:
+                    return
+                _, _, future = heapq.heappop(self._queue)
+                self._current = future
+
+            if future._start():
+                try:
+                    path = future._job(future._should_stop)
+                except Exception as e:
+                    Py4GW.Console.Log("PathPlanning", f"Path request failed: {e}", Py4GW.Console.MessageType.Error)
+                    path = None
+                future._finish(path)
+            with self._cv:
+                self._current = None
+
+    def shutdown(self, timeout: float = 1.0):
+        """Cancel everything queued and stop the worker thread."""
+        with self._cv:
+            self._stopping = True
+            queued = [future for _, _, future in self._queue]
+            if self._current is not None:
+                queued.append(self._current)
+            self._queue.clear()
+            threads, self._threads = self._threads, None
+            self._cv.notify_all()
+        for future in queued:
+            future.cancel()
+        if threads is None:
+            return
+        worker = threads.threads.get(self.THREAD_NAME, {}).get("thread")
+        if worker is not None:
+            worker.join(timeout)
+        threads.stop_all_threads()
+
+
+#region PathCache
+
+class PathCache:
+    """
+    LRU cache of finished 2D paths, keyed by map id, start and goal snapped to a grid of
+    `quantum` units, z planes and the smoothing options. A start that misses but lies within
+    `reuse_tolerance` of a cached path to the same goal, on the same z plane, reuses the rest
+    of that path when the navmesh shows a straight walk from start to where it rejoins.
+    """
+
+    def __init__(self, max_entries: int = 128, quantum: float = 50.0, reuse_tolerance: float = 150.0):
+        self.max_entries = max_entries
+        self.quantum = quantum
+        self.reuse_tolerance = reuse_tolerance
+        self._entries: "OrderedDict[tuple, Tuple[Tuple[float, float], ...]]" = OrderedDict()
+        self._by_route: Dict[tuple, Dict[tuple, None]] = {}  # (map, goal cell, goal z, options) -> keys
+        self.hits = 0
+        self.subpath_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _cell(self, x: float, y: float) -> Tuple[int, int]:
+        return (math.floor(x / self.quantum), math.floor(y / self.quantum))
+
+    def _route(self, map_id: int, goal, options: tuple) -> tuple:
+        return (map_id, self._cell(goal[0], goal[1]), int(goal[2]), options)
+
+    def _key(self, map_id: int, start, goal, options: tuple) -> tuple:
+        return self._route(map_id, goal, options) + (self._cell(start[0], start[1]), int(start[2]))
+
+    def get(self, map_id: int, start, goal, options: tuple,
+            navmesh: Optional["NavMesh"] = None) -> Optional[List[Tuple[float, float]]]:
+        """
+        Cached 2D path for this request, or None. A reused sub-path starts at the first
+        waypoint past the point closest to start; the caller decides whether to prepend start.
+        Sub-paths are only reused with a navmesh to check the splice against.
+        """
+        key = self._key(map_id, start, goal, options)
+        path = self._entries.get(key)
+        if path is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(path)
+
+        sx, sy = start[0], start[1]
+        limit = self.reuse_tolerance * self.reuse_tolerance
+        routes = self._by_route.get(key[:4], ()) if navmesh is not None else ()
+        for other in reversed(list(routes)):
+            if other[5] != key[5]:
+                continue  # cached from another z plane
+            path = self._entries[other]
+            best, best_index = limit, -1
+            for i in range(len(path) - 1):
+                (ax, ay), (bx, by) = path[i], path[i + 1]
+                dx, dy = bx - ax, by - ay
+                length_sq = dx * dx + dy * dy
+                t = 0.0 if length_sq == 0 else max(0.0, min(1.0, ((sx - ax) * dx + (sy - ay) * dy) / length_sq))
+                px, py = ax + t * dx - sx, ay + t * dy - sy
+                dist_sq = px * px + py * py
+                if dist_sq <= best:
+                    best, best_index = dist_sq, i
+            if best_index >= 0:
+                if not navmesh.has_line_of_sight((sx, sy), path[best_index + 1], margin=0.0, step_dist=self.quantum):
+                    continue
+                self._entries.move_to_end(other)
+                self.subpath_hits += 1
+                return list(path[best_index + 1:])
+
+        self.misses += 1
+        return None
+
+    def put(self, map_id: int, start, goal, options: tuple, path2d: List[Tuple[float, float]]):
+        if not path2d or self.max_entries <= 0:
+            return
+        key = self._key(map_id, start, goal, options)
+        self._entries[key] = tuple(path2d)
+        self._entries.move_to_end(key)
+        self._by_route.setdefault(key[:4], {})[key] = None
+        while len(self._entries) > self.max_entries:
+            old_key, _ = self._entries.popitem(last=False)
+            self._forget(old_key)
+            self.evictions += 1
+
+    def _forget(self, key: tuple):
+        keys = self._by_route.get(key[:4])
+        if keys is not None:
+            keys.pop(key, None)
+            if not keys:
+                del self._by_route[key[:4]]
+
+    def invalidate(self, map_ids: Optional[tuple] = None):
+        """Drop the paths of the given map ids, or every path."""
+        if map_ids is None:
+            stale = list(self._entries)
+        else:
+            stale = [key for key in self._entries if key[0] in map_ids]
+        for key in stale:
+            del self._entries[key]
+            self._forget(key)
+        self.invalidations += len(stale)
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "subpath_hits": self.subpath_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+#region NavMeshCache
+
+class NavMeshCache:
+    """
+    NavMeshes by map group key, bounded by an approximate memory budget (see
+    NavMesh.get_memory_usage). Over budget, the least recently used mesh is dropped
+    ("lru"), or the least used one with ties going to the older ("lfu"). The mesh
+    inserted last is always kept. With spill_folder set, an evicted mesh is saved there
+    first unless a cache file already exists, so coming back is a disk load, not a rebuild.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024, policy: str = "lru", spill_folder: Optional[str] = None):
+        if policy not in ("lru", "lfu"):
+            raise ValueError(f"Unknown eviction policy: {policy}")
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.spill_folder = spill_folder
+        self._meshes: "OrderedDict[tuple, NavMesh]" = OrderedDict()
+        self._sizes: Dict[tuple, int] = {}
+        self._uses: Dict[tuple, int] = {}
+        self.total_bytes = 0
+        self.evictions = 0
+        self.spills = 0
+
+    def __contains__(self, key: tuple) -> bool:
+        return key in self._meshes
+
+    def __len__(self) -> int:
+        return len(self._meshes)
+
+    def __getitem__(self, key: tuple) -> NavMesh:
+        navmesh = self.get(key)
+        if navmesh is None:
+            raise KeyError(key)
+        return navmesh
+
+    def __setitem__(self, key: tuple, navmesh: NavMesh):
+        self.put(key, navmesh)
+
+    def get(self, key: tuple, default: Optional[NavMesh] = None) -> Optional[NavMesh]:
+        navmesh = self._meshes.get(key)
+        if navmesh is None:
+            return default
+        self._meshes.move_to_end(key)
+        self._uses[key] += 1
+        return navmesh
+
+    def put(self, key: tuple, navmesh: NavMesh):
+        if key in self._meshes:
+            self.total_bytes -= self._sizes[key]
+        self._meshes[key] = navmesh
+        self._meshes.move_to_end(key)
+        self._uses[key] = self._uses.get(key, 0) + 1
+        self._sizes[key] = navmesh.get_memory_usage()
+        self.total_bytes += self._sizes[key]
+        self._enforce_budget()
+
+    def pop(self, key: tuple) -> Optional[NavMesh]:
+        navmesh = self._meshes.pop(key, None)
+        if navmesh is not None:
+            self.total_bytes -= self._sizes.pop(key)
+            del self._uses[key]
+        return navmesh
+
+    def clear(self):
+        self._meshes.clear()
+        self._sizes.clear()
+        self._uses.clear()
+        self.total_bytes = 0
+
+    def _enforce_budget(self):
+        # Indices built since insertion (A* graph, point lookups) count from here on
+        for key, navmesh in self._meshes.items():
+            size = navmesh.get_memory_usage()
+            self.total_bytes += size - self._sizes[key]
+            self._sizes[key] = size
+
+        newest = next(reversed(self._meshes))
+        while self.total_bytes > self.max_bytes and len(self._meshes) > 1:
+            candidates = [key for key in self._meshes if key != newest]
+            if self.policy == "lfu":
+                victim = min(candidates, key=lambda key: self._uses[key])  # first minimum is the least recent
+            else:
+                victim = candidates[0]
+            self._spill(self._meshes[victim])
+            self.pop(victim)
+            self.evictions += 1
+
+    def _spill(self, navmesh: NavMesh):
+        if not self.spill_folder or os.path.isfile(NavMesh.cache_file_path(self.spill_folder, navmesh.map_id)):
+            return
+        try:
+            navmesh.save_to_file(self.spill_folder)
+            self.spills += 1
+        except Exception as e:
+            Py4GW.Console.Log("AutoPathing", f"Failed to spill NavMesh for map {navmesh.map_id}: {e}", Py4GW.Console.MessageType.Warning)
+
+    def get_stats(self) -> Dict[str, object]:
+        return {
+            "meshes": len(self._meshes),
+            "total_bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+            "spills": self.spills,
+            "bytes_per_mesh": dict(self._sizes),
+        }
+
+
 class AutoPathing:
     _instance = None
 
@@ -568,15 +1485,15 @@ class AutoPathing:
             return
         self.load_time: float = 0.0
         self.is_ready: bool = False
-        self.pathing_map_cache: dict[tuple[int, ...], NavMesh] = {}
+        self.pathing_map_cache = NavMeshCache(spill_folder=self._get_cache_folder())
+        self.path_cache = PathCache()
+        self.planner = PathPlanningService()
         self._last_group_key: Optional[tuple[int, ...]] = None
         self._initialized = True
 
     def _get_group_key(self, map_id: int) -> tuple[int, ...]:
-        for group in PATHING_MAP_GROUPS:
-            if map_id in group:
-                return tuple(sorted(group))
-        return (map_id,)  # Default: treat each unknown map_id as its own group
+        # Default: treat each unknown map_id as its own group
+        return _MAP_ID_TO_GROUP_KEY.get(map_id, (map_id,))
 
     def load_pathing_maps(self):
         map_id = PyMap.PyMap().map_id.ToInt()
@@ -588,15 +1505,25 @@ class AutoPathing:
             return  # Already loaded
 
         pathing_maps = PyPathing.get_pathing_maps()
-        navmesh = NavMesh(pathing_maps, map_id)
+        folder = self._get_cache_folder()
+        navmesh = None
+        try:
+            navmesh = NavMesh.load_from_file(pathing_maps, map_id, folder)
+        except Exception as e:
+            Py4GW.Console.Log("AutoPathing", f"Failed to load NavMesh cache for map {map_id}: {e}", Py4GW.Console.MessageType.Warning)
+
+        if navmesh is None:
+            navmesh = NavMesh(pathing_maps, map_id)
+            try:
+                navmesh.save_to_file(folder)
+            except Exception as e:
+                Py4GW.Console.Log("AutoPathing", f"Failed to save NavMesh cache for map {map_id}: {e}", Py4GW.Console.MessageType.Warning)
         self.pathing_map_cache[group_key] = navmesh
+        self.path_cache.invalidate(group_key)  # paths from before the rebuild may cross stale geometry
         yield
-        
-        """try:
-            navmesh = NavMesh.load_from_file(pathing_maps, map_id, folder="NavMeshCache")
-        except FileNotFoundError:
-            navmesh = NavMesh(pathing_maps, map_id)
-            navmesh.save_to_file("NavMeshCache")"""
+
+    def _get_cache_folder(self) -> str:
+        return os.path.join(Py4GW.Console.get_projects_path(), "NavMeshCache")
 
     def get_navmesh(self) -> Optional[NavMesh]:
         map_id = PyMap.PyMap().map_id.ToInt()
@@ -610,27 +1537,25 @@ class AutoPathing:
                  margin: float = 100,
                  step_dist: float = 200.0,
                  smooth_by_chaikin: bool = False,
-                 chaikin_iterations: int = 1):
+                 chaikin_iterations: int = 1,
+                 priority: int = 0,
+                 timeout: Optional[float] = None):
+        """
+        Plan a path, trying the native planner first and then A* on the navmesh, which runs
+        on the planner thread. priority and timeout (seconds) apply to that A* request.
+        """
         from . import Routines
-        
-        def _prepend_start(path2d: list[tuple[float, float]], sx: float, sy: float, tol: float = 250.0):
-            if not path2d:
-                path2d.insert(0, (sx, sy))
-                return path2d
-
-            dx = path2d[0][0] - sx
-            dy = path2d[0][1] - sy
-
-            # prepend start only if the first point is farther than 250 units
-            if dx * dx + dy * dy > tol * tol:
-                path2d.insert(0, (sx, sy))
-
-            return path2d
-
 
         map_id = PyMap.PyMap().map_id.ToInt()
         group_key = self._get_group_key(map_id)
 
+        options = (smooth_by_los, margin, step_dist, smooth_by_chaikin, chaikin_iterations)
+        cached = self.path_cache.get(map_id, start, goal, options, self.pathing_map_cache.get(group_key))
+        if cached is not None:
+            yield
+            path2d = densify_path2d(_prepend_start(cached, start[0], start[1]))
+            return [(x, y, start[2]) for (x, y) in path2d]
+
         # --- Try fast planner first ---
         path_planner = PyPathing.PathPlanner()
         path_planner.reset()
@@ -653,6 +1578,7 @@ class AutoPathing:
                     path2d = chaikin_smooth_path(path2d, chaikin_iterations)
 
                 path2d = densify_path2d(path2d)  # split long hops into ≤750
+                self.path_cache.put(map_id, start, goal, options, path2d)
                 return [(x, y, start[2]) for (x, y) in path2d]
             
             elif status == PyPathing.PathStatus.Failed:
@@ -669,27 +1595,14 @@ class AutoPathing:
                 return []
 
         yield
-        astar = AStar(navmesh)
-        success = astar.search((start[0], start[1]), (goal[0], goal[1]))
-        yield
-
-        if success:
-            raw_path = astar.get_path()
-            yield
-            raw_path = _prepend_start(raw_path, start[0], start[1])
-            if smooth_by_los:
-                smoothed = navmesh.smooth_path_by_los(raw_path, margin, step_dist)
-            else:
-                smoothed = raw_path
-                
-            if smooth_by_chaikin:
-                smoothed = chaikin_smooth_path(smoothed, chaikin_iterations)
-
-            path2d = densify_path2d(smoothed)  # split long hops into ≤750
-
-            return [(x, y, start[2]) for (x, y) in path2d]
+        future = self.planner.submit(navmesh, start, goal, priority, timeout,
+                                     smooth_by_los, margin, step_dist, smooth_by_chaikin, chaikin_iterations)
+        path2d = yield from future.wait()
+        if not path2d:
+            return []
 
-        return []
+        self.path_cache.put(map_id, start, goal, options, path2d)
+        return [(x, y, start[2]) for (x, y) in path2d]
 
     def get_path_to(self, x: float, y: float,
                     smooth_by_los: bool = True,
@@ -4,6 +4,7 @@ from .py4gwcorelib_src.Console import ConsoleLog, Console
 from .py4gwcorelib_src.Color import Color, ColorPalette
 from .py4gwcorelib_src.Utils import Utils
 from .py4gwcorelib_src.VectorFields import VectorFields
+from .py4gwcorelib_src.Clustering import PointGrid
 from .py4gwcorelib_src.Timer import Timer, ThrottledTimer, FormatTime
 from .py4gwcorelib_src.Keystroke import Keystroke
 from .py4gwcorelib_src.ActionQueue import ActionQueue, ActionQueueNode, ActionQueueManager, QueueTypes
@@ -11,6 +12,7 @@ from .py4gwcorelib_src.BehaviorTree import BehaviorTree
 from .py4gwcorelib_src.FSM import FSM
 from .py4gwcorelib_src.MultiThreading import MultiThreading
 from .py4gwcorelib_src.Lootconfig_src import LootConfig
+from .py4gwcorelib_src.InventoryPlanner import InventoryPlanner, InventoryPlan, InventorySnapshot, PlanItem, AssignStorageSlots
 from .py4gwcorelib_src.AutoInventoryHandler import AutoInventoryHandler
 
 __all__ = ["IniHandler", #IniHandler
@@ -18,6 +20,7 @@ __all__ = ["IniHandler", #IniHandler
               "Color", "ColorPalette", #Color
               "Utils", #Utils
               "VectorFields", #VectorFields
+              "PointGrid", #Clustering
               "Timer", "ThrottledTimer", "FormatTime", #Timer
               "Keystroke", #Keystroke
               "ActionQueue", "ActionQueueNode", "ActionQueueManager", "QueueTypes", #ActionQueue
@@ -25,6 +28,7 @@ __all__ = ["IniHandler", #IniHandler
               "FSM", #FSM
               "MultiThreading", #MultiThreading
               "LootConfig", #LootConfig
+              "InventoryPlanner", "InventoryPlan", "InventorySnapshot", "PlanItem", "AssignStorageSlots", #InventoryPlanner
               "AutoInventoryHandler", #AutoInventoryHandler
              ]
 
@@ -1,95 +1,229 @@
-import traceback
 import math
 from enum import Enum
 import time
 from time import sleep
-import inspect
 import sys
-from dataclasses import dataclass, field
+from importlib import import_module as _import_module
+from types import ModuleType as _ModuleType
 
 import Py4GW
-import PyImGui
-import PyMap
-import PyMissionMap
-import PyAgent
-import PyPlayer
-import PyParty
-import PyItem
-import PyInventory
-import PySkill
-import PySkillbar
-import PyMerchant
-import PyEffects
-import PyKeystroke
-import PyOverlay
-import PyQuest
-import PyPathing
-import PyUIManager
-import PyCamera
-import Py2DRenderer
-
-from .enums import *
-from .ImGui_src.IconsFontAwesome5 import IconsFontAwesome5
-from .Map import *
-from .ImGui import *
-from .model_data import *
-from .Agent import *
-from .Player import *
-from .AgentArray import *
-from .Party import *
-from .Item import *
-from .ItemArray import *
-from .Inventory import *
-from .Skill import *
-from .Skillbar import *
-from .Effect import *
-from .Merchant import *
-from .Quest import *
-from .Camera import *
-
-from .Py4GWcorelib import *
-from .Overlay import *
-from .DXOverlay import *
-from .UIManager import *
-from .Routines import *
-from .SkillManager import *
-from .GlobalCache import GLOBAL_CACHE
-from .Pathing import AutoPathing
-from .BuildMgr import BuildMgr
-from .Botting import BottingClass as Botting
-
-traceback = traceback
-math = math
-Enum = Enum
-time = time
-sleep = sleep
-inspect = inspect
-dataclass = dataclass
-field = field
+
+# Every public name below used to be bound by importing the native modules and star-importing every
+# submodule up front. They now load on first access through __getattr__: name -> (module, attribute),
+# where a None attribute means the module itself. benchmarks/import_benchmark.py --check verifies this
+# table against a full load, and rebuilds it with --print-index.
+_LAZY_ATTRIBUTES = {
+    ".Agent": ("Agent", "AgentName", "ItemOwnerCache"),
+    ".AgentArray": ("AgentArray", "AgentSnapshot", "AgentSpatialGrid", "RawAgentArray"),
+    ".BuildMgr": ("BuildMgr",),
+    ".Camera": ("Camera",),
+    ".DXOverlay": ("DXOverlay",),
+    ".Effect": ("Effects",),
+    ".GlobalCache": ("GLOBAL_CACHE",),
+    ".ImGui_src.IconsFontAwesome5": ("IconsFontAwesome5",),
+    ".ImGui_src.ImGuisrc": ("ImGui",),
+    ".ImGui_src.Textures": ("MapTexture", "SplitTexture", "TextureState", "ThemeTexture", "ThemeTextures"),
+    ".ImGui_src.WindowModule": ("WindowModule",),
+    ".ImGui_src.types": ("ImGuiStyleVar", "StyleColorType", "StyleTheme"),
+    ".Inventory": ("Inventory",),
+    ".Item": ("Bag", "Item"),
+    ".ItemArray": ("ItemArray",),
+    ".Map": ("Map",),
+    ".Merchant": ("Trading",),
+    ".Overlay": ("Overlay",),
+    ".Party": ("Party",),
+    ".Pathing": ("AutoPathing",),
+    ".Player": ("Player",),
+    ".Quest": ("Quest",),
+    ".Routines": ("AgentRoutines", "MovementRoutines", "PartyRoutines", "Routines", "SequentialRoutines",
+                  "TargetingRoutines", "TransitionRoutines", "YieldRoutines"),
+    ".Skill": ("Skill",),
+    ".SkillManager": ("MAX_NUM_PLAYERS", "MAX_SKILLS", "SkillManager"),
+    ".Skillbar": ("SkillBar",),
+    ".UIManager": ("DEFAULT_OFFSET", "DIALOG_CHILD_OFFSET", "NPC_DIALOG_HASH", "UIManager"),
+    ".enums": ("ProfessionTextureMap", "SPIRIT_BUFF_MAP", "ServerLanguageName", "ServerRegionName", "SkillTextureMap",
+               "TITLE_NAME", "explorable_name_to_id", "explorables", "name_to_map_id", "outpost_name_to_id", "outposts"),
+    ".enums_src.GameData_enums": ("Ailment", "Allegiance", "Attribute", "DamageType", "DyeColor", "FactionAllegiance",
+                                  "Inscription", "Profession", "ProfessionShort", "Range", "Reduced_Ailment", "Weapon",
+                                  "WeaporReq"),
+    ".enums_src.Hero_enums": ("HeroType", "PetBehavior"),
+    ".enums_src.IO_enums": ("Key", "MouseButton"),
+    ".enums_src.Item_enums": ("Bags", "IdentifyAllType", "ItemType", "Rarity", "SalvageAllType"),
+    ".enums_src.Model_enums": ("AgentModelID", "ModelID", "PetModelID", "SpiritModelID"),
+    ".enums_src.Multiboxing_enums": ("CombatPrepSkillsType", "SharedCommandType"),
+    ".enums_src.Region_enums": ("Campaign", "Continent", "District", "Language", "RegionType", "ServerLanguage"),
+    ".enums_src.Texture_enums": ("get_texture_for_model",),
+    ".enums_src.Title_enums": ("TitleID",),
+    ".enums_src.UI_enums": ("AntiAliasing", "BoolPreference", "ChatChannel", "ControlAction", "EnumPreference",
+                            "FlagPreference", "FrameLimiter", "ImguiFonts", "InGameClockMode", "InterfaceSize",
+                            "NumberPreference", "Reflections", "ShaderQuality", "ShadowQuality", "StringPreference",
+                            "TerrainQuality", "TextureQuality", "UIMessage", "WindowID"),
+    ".model_data": ("ModelData",),
+    ".py4gwcorelib_src.ActionQueue": ("ActionQueue", "ActionQueueManager", "ActionQueueNode", "QueueTypes"),
+    ".py4gwcorelib_src.AutoInventoryHandler": ("AutoInventoryHandler",),
+    ".py4gwcorelib_src.BehaviorTree": ("BehaviorTree",),
+    ".py4gwcorelib_src.Clustering": ("PointGrid",),
+    ".py4gwcorelib_src.Color": ("Color", "ColorPalette"),
+    ".py4gwcorelib_src.Console": ("Console", "ConsoleLog"),
+    ".py4gwcorelib_src.FSM": ("FSM",),
+    ".py4gwcorelib_src.IniHandler": ("IniHandler",),
+    ".py4gwcorelib_src.InventoryPlanner": ("AssignStorageSlots", "InventoryPlan", "InventoryPlanner",
+                                           "InventorySnapshot", "PlanItem"),
+    ".py4gwcorelib_src.Keystroke": ("Keystroke",),
+    ".py4gwcorelib_src.Lootconfig_src": ("LootConfig",),
+    ".py4gwcorelib_src.MultiThreading": ("MultiThreading",),
+    ".py4gwcorelib_src.Timer": ("FormatTime", "ThrottledTimer", "Timer"),
+    ".py4gwcorelib_src.Utils": ("Utils",),
+    ".py4gwcorelib_src.VectorFields": ("VectorFields",),
+    ".routines_src.Checks": ("Checks",),
+    "HeroAI.cache_data": ("CacheData",),
+    "HeroAI.combat": ("UniqueSkills",),
+    "HeroAI.custom_skill": ("CustomSkillClass",),
+    "HeroAI.players": ("RegisterHeroes", "RegisterPlayer", "UpdatePlayers"),
+    "HeroAI.types": ("SkillNature", "SkillType", "Skilltarget"),
+    "array": ("array",),
+    "collections": ("defaultdict", "deque"),
+    "dataclasses": ("dataclass", "field"),
+    "typing": ("Dict", "List", "Optional", "Tuple"),
+}
+_LAZY_MODULES = (
+    ".Builds", ".Effect", ".GlobalCache", ".ImGui_src", ".ImGui_src.Style", ".Merchant", ".Pathing", ".Py4GWcorelib",
+    ".Skillbar", ".botting_src", ".enums", ".enums_src", ".model_data", ".py4gwcorelib_src", ".routines_src",
+    "Py2DRenderer", "PyAgent", "PyCamera", "PyEffects", "PyImGui", "PyInventory", "PyItem", "PyKeystroke", "PyMap",
+    "PyMerchant", "PyMissionMap", "PyOverlay", "PyParty", "PyPathing", "PyPlayer", "PyQuest", "PySkill",
+    "PySkillbar", "PyUIManager", "inspect", "json", "os", "traceback",
+)
+# Submodules the eager imports used to star-import, in their order; a full load replays them.
+_STAR_MODULES = (
+    ".enums", ".Map", ".ImGui", ".model_data", ".Agent", ".Player", ".AgentArray", ".Party", ".Item", ".ItemArray",
+    ".Inventory", ".Skill", ".Skillbar", ".Effect", ".Merchant", ".Quest", ".Camera", ".Py4GWcorelib", ".Overlay",
+    ".DXOverlay", ".UIManager", ".Routines", ".SkillManager",
+)
+_IMPORTED_AFTER_STAR_MODULES = ("GLOBAL_CACHE", "AutoPathing", "BuildMgr", "Botting")
+
+_LAZY_NAMES = {name: (module, name) for module, names in _LAZY_ATTRIBUTES.items() for name in names}
+_LAZY_NAMES.update((module.rpartition(".")[2], (module, None)) for module in _LAZY_MODULES)
+_LAZY_NAMES["Botting"] = (".Botting", "BottingClass")
+_loading_all = False
+
+
+def _resolve(name):
+    module_name, attribute = _LAZY_NAMES[name]
+    module = _import_module(module_name, __name__)
+    value = module if attribute is None else getattr(module, attribute)
+    globals()[name] = value
+    return value
+
+
+def _load_all():
+    """Bind every public name the eager imports did, the way they did; star imports and index misses need it."""
+    global _loading_all
+    if _loading_all:
+        return
+    _loading_all = True
+    try:
+        namespace = globals()
+        for name in _LAZY_NAMES:
+            _resolve(name)
+        for module_name in _STAR_MODULES:
+            module = _import_module(module_name, __name__)
+            names = getattr(module, "__all__", None)
+            if names is None:
+                names = [name for name in vars(module) if not name.startswith("_")]
+            for name in names:
+                namespace[name] = getattr(module, name)
+        for name in _IMPORTED_AFTER_STAR_MODULES:
+            _resolve(name)
+        namespace["__all__"] = sorted(name for name in namespace if not name.startswith("_"))
+    finally:
+        _loading_all = False
+
+
+def __getattr__(name):
+    if name in _LAZY_NAMES:
+        return _resolve(name)
+    if name.startswith("__") and name != "__all__":
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    _load_all()
+    if name in globals():
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_NAMES))
+
+
+class _LazyPackage(_ModuleType):
+    def __setattr__(self, name, value):
+        # Importing a submodule binds it on the package (Py4GWCoreLib.Routines = <module>); the eager star
+        # imports rebound those names to what the submodule exports, so keep the export reachable.
+        if (isinstance(value, _ModuleType) and value.__name__ == f"{__name__}.{name}"
+                and _LAZY_NAMES.get(name, (None, None))[1] is not None):
+            return
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _LazyPackage
 
 Py4Gw = Py4GW
-Py4GW = Py4GW
-PyImGui = PyImGui
-PyMap = PyMap
-PyMissionMap = PyMissionMap
-PyAgent = PyAgent
-PyPlayer = PyPlayer
-PyParty = PyParty
-PyItem = PyItem
-PyInventory = PyInventory
-PySkill = PySkill
-PySkillbar = PySkillbar
-PyMerchant = PyMerchant
-PyEffects = PyEffects
-PyPathing = PyPathing
-PyOverlay = PyOverlay
-PyQuest = PyQuest
-PyUIManager = PyUIManager
-PyCamera = PyCamera
-Py2DRenderer = Py2DRenderer
-GLOBAL_CACHE = GLOBAL_CACHE
-AutoPathing = AutoPathing
-IconsFontAwesome5 = IconsFontAwesome5
+
+TYPE_CHECKING = False  # type checkers take the branch below for any name spelled like this; typing costs a cold import
+if TYPE_CHECKING:
+    import traceback
+    import inspect
+    from dataclasses import dataclass, field
+
+    import PyImGui
+    import PyMap
+    import PyMissionMap
+    import PyAgent
+    import PyPlayer
+    import PyParty
+    import PyItem
+    import PyInventory
+    import PySkill
+    import PySkillbar
+    import PyMerchant
+    import PyEffects
+    import PyKeystroke
+    import PyOverlay
+    import PyQuest
+    import PyPathing
+    import PyUIManager
+    import PyCamera
+    import Py2DRenderer
+
+    from .enums import *
+    from .ImGui_src.IconsFontAwesome5 import IconsFontAwesome5
+    from .Map import *
+    from .ImGui import *
+    from .model_data import *
+    from .Agent import *
+    from .Player import *
+    from .AgentArray import *
+    from .Party import *
+    from .Item import *
+    from .ItemArray import *
+    from .Inventory import *
+    from .Skill import *
+    from .Skillbar import *
+    from .Effect import *
+    from .Merchant import *
+    from .Quest import *
+    from .Camera import *
+
+    from .Py4GWcorelib import *
+    from .Overlay import *
+    from .DXOverlay import *
+    from .UIManager import *
+    from .Routines import *
+    from .SkillManager import *
+    from .GlobalCache import GLOBAL_CACHE
+    from .Pathing import AutoPathing
+    from .BuildMgr import BuildMgr
+    from .Botting import BottingClass as Botting
+del TYPE_CHECKING
 
 
 #redirect print output to Py4GW Console
@@ -98,17 +232,17 @@ class Py4GWLogger:
         if message.strip():  # Avoid logging empty lines
             Py4GW.Console.Log("print:", f"{message.strip()}", Py4GW.Console.MessageType.Info)
 
-    def flush(self):  
+    def flush(self):
         pass  # Required for sys.stdout but does nothing
-    
+
 class Py4GWLoggerError:
     def write(self, message):
         if message.strip():  # Avoid logging empty lines
             Py4GW.Console.Log("print:", f"{message.strip()}", Py4GW.Console.MessageType.Error)
 
-    def flush(self):  
+    def flush(self):
         pass  # Required for sys.stdout but does nothing
 
 # Redirect Python's print output to Py4GW Console
 sys.stdout = Py4GWLogger()
-sys.stderr = Py4GWLoggerError()
\ No newline at end of file
+sys.stderr = Py4GWLoggerError()
@@ -90,7 +90,7 @@ class _Items:
         from ...Routines import Routines
         from ...py4gwcorelib_src.Lootconfig_src import LootConfig
         loot_singleton = LootConfig()
-        loot_singleton.item_id_whitelist.add(item_id)
+        loot_singleton.AddItemIDToWhitelist(item_id)
         yield from Routines.Yield.wait(100)  # Small wait to ensure the item is added
         
     @_yield_step(label="RemoveItemIDFromWhitelist", counter_key="REMOVE_ITEM_ID_FROM_WHITELIST")
@@ -98,7 +98,7 @@ class _Items:
         from ...Routines import Routines
         from ...py4gwcorelib_src.Lootconfig_src import LootConfig
         loot_singleton = LootConfig()
-        loot_singleton.item_id_whitelist.discard(item_id)
+        loot_singleton.RemoveItemIDFromWhitelist(item_id)
         yield from Routines.Yield.wait(100)  # Small wait to ensure the item is removed
         
     @_yield_step(label="ClearItemIDWhitelist", counter_key="CLEAR_ITEM_ID_WHITELIST")
@@ -106,7 +106,7 @@ class _Items:
         from ...Routines import Routines
         from ...py4gwcorelib_src.Lootconfig_src import LootConfig
         loot_singleton = LootConfig()
-        loot_singleton.item_id_whitelist.clear()
+        loot_singleton.ClearItemIDWhitelist()
         yield from Routines.Yield.wait(100)  # Small wait to ensure the whitelist is cleared
         
     @_yield_step(label="AddItemIDToBlacklist", counter_key="ADD_ITEM_ID_TO_BLACKLIST")
@@ -114,7 +114,7 @@ class _Items:
         from ...Routines import Routines
         from ...py4gwcorelib_src.Lootconfig_src import LootConfig
         loot_singleton = LootConfig()
-        loot_singleton.item_id_blacklist.add(item_id)
+        loot_singleton.AddItemIDToBlacklist(item_id)
         yield from Routines.Yield.wait(100)  # Small wait to ensure the item is added
         
     @_yield_step(label="RemoveItemIDFromBlacklist", counter_key="REMOVE_ITEM_ID_FROM_BLACKLIST")
@@ -122,7 +122,7 @@ class _Items:
         from ...Routines import Routines
         from ...py4gwcorelib_src.Lootconfig_src import LootConfig
         loot_singleton = LootConfig()
-        loot_singleton.item_id_blacklist.discard(item_id)
+        loot_singleton.RemoveItemIDFromBlacklist(item_id)
         yield from Routines.Yield.wait(100)  # Small wait to ensure the item is removed
         
     @_yield_step(label="ClearItemIDBlacklist", counter_key="CLEAR_ITEM_ID_BLACKLIST")
@@ -130,7 +130,7 @@ class _Items:
         from ...Routines import Routines
         from ...py4gwcorelib_src.Lootconfig_src import LootConfig
         loot_singleton = LootConfig()
-        loot_singleton.item_id_blacklist.clear()
+        loot_singleton.ClearItemIDBlacklist()
         yield from Routines.Yield.wait(100)  # Small wait to ensure the blacklist is cleared
         
         
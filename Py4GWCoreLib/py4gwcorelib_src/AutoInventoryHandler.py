@@ -5,9 +5,12 @@ from .IniHandler import IniHandler
 from .Timer import ThrottledTimer
 from .ActionQueue import ActionQueueManager
 from .Lootconfig_src import LootConfig
+from .InventoryPlanner import InventoryPlan, InventoryPlanner, InventorySnapshot, PlanItem
 
 class AutoInventoryHandler():
     _instance = None
+    EVENT_ITEM_GROUPS = (("Alcohol", None), ("Sweets", None), ("Party", None), ("Death Penalty Removal", None),
+                         ("Reward Trophies", "Special Events"))  # (group, subgroup or None for all) in LootGroups
 
     def __new__(cls):
         if cls._instance is None:
@@ -57,6 +60,7 @@ class AutoInventoryHandler():
         self.deposit_event_items = True
         self.deposit_dyes = True
         self.keep_gold = 5000
+        self._event_item_model_ids: Optional[frozenset] = None
         
         self.load_from_ini(self.ini, "AutoLootOptions")
         self._initialized = True
@@ -142,260 +146,207 @@ class AutoInventoryHandler():
         else:
             Inventory.SalvageItem(item_id, first_salv_kit)
             
-    def IdentifyItems(self,progress_callback: Optional[Callable[[float], None]] = None, log: bool = False):
-        from ..ItemArray import ItemArray
-        from ..enums import Bags
-        from ..Inventory import Inventory
-        import PyItem
-        from ..Item import Item
-        from ..Routines import Routines
-        
-        bag_list = ItemArray.CreateBagList(Bags.Backpack, Bags.BeltPouch, Bags.Bag1, Bags.Bag2)
-        item_array = ItemArray.GetItemArray(bag_list)
-        
-        identified_items = 0
-            
-        for item_id in item_array:
-            first_id_kit = Inventory.GetFirstIDKit()
-             
-            if first_id_kit == 0:
-                Console.Log("AutoIdentify", "No ID Kit found in inventory.", Console.MessageType.Warning)
-                return   
-                
-            item_instance = PyItem.PyItem(item_id)
-            is_identified = item_instance.is_identified
-                
-            if is_identified:
-                continue
-                
-            _,rarity = Item.Rarity.GetRarity(item_id)
-            if ((rarity == "White" and self.id_whites) or
+    def GetEventItemModelIDs(self) -> frozenset:
+        """Model ids deposited as event items; LootGroups is static, so this is built once."""
+        if self._event_item_model_ids is None:
+            self._event_item_model_ids = LootConfig().GetLootGroupModelIDs(self.EVENT_ITEM_GROUPS)
+        return self._event_item_model_ids
+
+    def ShouldIdentify(self, item: PlanItem) -> bool:
+        if item.is_identified:
+            return False
+        rarity = item.rarity
+        return ((rarity == "White" and self.id_whites) or
                 (rarity == "Blue" and self.id_blues) or
                 (rarity == "Green" and self.id_greens) or
                 (rarity == "Purple" and self.id_purples) or
-                (rarity == "Gold" and self.id_golds)):
-                ActionQueueManager().AddAction("ACTION", Inventory.IdentifyItem,item_id, first_id_kit)
-                identified_items += 1
-                while True:
-                    yield from Routines.Yield.wait(50)
-                    item_instance.GetContext()
-                    if item_instance.is_identified:
-                        break
-                    
-        if identified_items > 0 and log:
-            ConsoleLog(self.module_name, f"Identified {identified_items} items", Console.MessageType.Success)
-            
-    def SalvageItems(self, progress_callback: Optional[Callable[[float], None]] = None, log: bool = False):
-        from ..ItemArray import ItemArray
-        from ..enums import Bags
-        from ..Inventory import Inventory
-        import PyItem
+                (rarity == "Gold" and self.id_golds))
+
+    def ShouldSalvage(self, item: PlanItem, is_identified: bool) -> bool:
+        """is_identified is the item's state once the plan's identifications are done."""
+        if item.is_customized:
+            return False
+        is_white = item.rarity == "White"
+        if not ((is_white and item.is_salvageable) or (is_identified and item.is_salvageable)):
+            return False
+        if item.item_type in self.item_type_blacklist:
+            return False
+        if item.model_id in self.salvage_blacklist:
+            return False
+        if is_white and item.is_material and item.is_material_salvageable and not self.salvage_rare_materials:
+            return False
+        if is_white and not item.is_material and not self.salvage_whites:
+            return False
+        if item.rarity == "Blue" and not self.salvage_blues:
+            return False
+        if item.rarity == "Purple" and not self.salvage_purples:
+            return False
+        if item.rarity == "Gold" and not self.salvage_golds:
+            return False
+        return True
+
+    def ShouldDeposit(self, item: PlanItem) -> bool:
+        from ..enums import ModelID
+        rarity = item.rarity
+        return (item.is_tome or
+                (item.is_trophy and self.deposit_trophies and rarity == "White") or
+                (item.is_material and self.deposit_materials) or
+                (rarity == "Blue" and self.deposit_blues) or
+                (rarity == "Purple" and self.deposit_purples) or
+                (rarity == "Gold" and self.deposit_golds and item.item_type_name != "Usable" and not item.is_trophy) or
+                (rarity == "Green" and self.deposit_greens) or
+                (item.model_id == ModelID.Vial_Of_Dye.value and self.deposit_dyes) or
+                (item.model_id in self.GetEventItemModelIDs() and self.deposit_event_items))
+
+    def BuildPlan(self, identify: bool = True, salvage: bool = True, deposit: bool = True,
+                  sell_filter: Optional[Callable[[PlanItem], bool]] = None, item_ids=None) -> InventoryPlan:
+        """Plan the enabled phases from one snapshot of the inventory and storage."""
+        return InventoryPlanner(self).Plan(InventorySnapshot.Capture(), identify, salvage, deposit, sell_filter, item_ids)
+
+    def _MatchesPlan(self, plan: InventoryPlan) -> bool:
+        """True if the inventory holds exactly what the plan expected to leave in it."""
         from ..GlobalCache import GLOBAL_CACHE
+        item_ids = GLOBAL_CACHE.ItemArray.GetItemArray(GLOBAL_CACHE.ItemArray.CreateBagList(1, 2, 3, 4))
+        if len(item_ids) != len(plan.expected):
+            return False
+        for item_id in item_ids:
+            expected = plan.expected.get(item_id)
+            if expected is None:
+                return False
+            quantity, identified = expected
+            if GLOBAL_CACHE.Item.Properties.GetQuantity(item_id) != quantity:
+                return False
+            if identified and not GLOBAL_CACHE.Item.Usage.IsIdentified(item_id):
+                return False
+        return True
+
+    def ExecutePlan(self, plan: InventoryPlan, progress_callback: Optional[Callable[[float], None]] = None,
+                    log: bool = False):
+        """
+        Queue the plan phase by phase. Identifications, deposits and sells are queued as one batch each;
+        salvages run one unit at a time, as each may need its materials window confirmed.
+        Returns False as soon as a salvage does not take effect.
+        """
+        from ..GlobalCache import GLOBAL_CACHE
+        from ..Inventory import Inventory
         from ..Routines import Routines
+        from ..UIManager import UIManager
+
+        queues = ActionQueueManager()
 
-        bag_list = ItemArray.CreateBagList(Bags.Backpack, Bags.BeltPouch, Bags.Bag1, Bags.Bag2)
-        item_array = ItemArray.GetItemArray(bag_list)
-
-        salvaged_items = 0
-
-        for item_id in item_array:
-            item_instance = PyItem.PyItem(item_id)
-            item_instance.GetContext()
-            quantity = item_instance.quantity
-            if quantity == 0:
-                continue
-
-            is_customized = GLOBAL_CACHE.Item.Properties.IsCustomized(item_id)
-            if is_customized:
-                # Skip customized items
-                continue
-            _, rarity = GLOBAL_CACHE.Item.Rarity.GetRarity(item_id)
-            is_white = rarity == "White"
-            is_blue = rarity == "Blue"
-            is_green = rarity == "Green"
-            is_purple = rarity == "Purple"
-            is_gold = rarity == "Gold"
-
-            is_material = GLOBAL_CACHE.Item.Type.IsMaterial(item_id)
-            is_material_salvageable = GLOBAL_CACHE.Item.Usage.IsMaterialSalvageable(item_id)
-            is_identified = GLOBAL_CACHE.Item.Usage.IsIdentified(item_id)
-            is_salvageable = GLOBAL_CACHE.Item.Usage.IsSalvageable(item_id)
-            model_id = GLOBAL_CACHE.Item.GetModelID(item_id)
-            item_type,_ = GLOBAL_CACHE.Item.GetItemType(item_id)
-
-            # Filtering logic
-            if not ((is_white and is_salvageable) or (is_identified and is_salvageable)):
-                continue
-            if item_type in self.item_type_blacklist:
-                continue
-            if model_id in self.salvage_blacklist:
-                continue
-            if is_white and is_material and is_material_salvageable and not self.salvage_rare_materials:
-                continue
-            if is_white and not is_material and not self.salvage_whites:
-                continue
-            if is_blue and not self.salvage_blues:
-                continue
-            if is_purple and not self.salvage_purples:
-                continue
-            if is_gold and not self.salvage_golds:
-                continue
-
-            require_materials_confirmation = is_purple or is_gold
-
-            # Repeat until item no longer exists
-            while True:
-                
-                bag_list = ItemArray.CreateBagList(Bags.Backpack, Bags.BeltPouch, Bags.Bag1, Bags.Bag2)
-                item_array = ItemArray.GetItemArray(bag_list)
-                if item_id not in item_array:
-                    break  # Fully consumed / disappeared
-    
-                item_instance.GetContext()
-                quantity = item_instance.quantity
-                if quantity == 0:
+        if plan.identify:
+            self.status = "Identifying"
+            for item_id, id_kit in plan.identify:
+                queues.AddAction("IDENTIFY", Inventory.IdentifyItem, item_id, id_kit)
+            while not queues.IsEmpty("IDENTIFY"):
+                yield from Routines.Yield.wait(50)
+            for _ in range(20):  # let the last identifications land before salvaging relies on them
+                if all(GLOBAL_CACHE.Item.Usage.IsIdentified(item_id) for item_id, _ in plan.identify):
                     break
+                yield from Routines.Yield.wait(50)
+            if log:
+                ConsoleLog(self.module_name, f"Identified {len(plan.identify)} items", Console.MessageType.Success)
+        if progress_callback:
+            progress_callback(0.5)
 
-                salvage_kit = Inventory.GetFirstSalvageKit(use_lesser=True)
-                if salvage_kit == 0:
-                    Console.Log("AutoSalvage", "No Salvage Kit found in inventory.", Console.MessageType.Warning)
-                    return
+        if plan.salvage:
+            self.status = "Salvaging"
+            salvaged_items = 0
+            for item_id, salvage_kit, require_materials_confirmation in plan.salvage:
+                quantity = GLOBAL_CACHE.Item.Properties.GetQuantity(item_id)
+                if quantity == 0 or GLOBAL_CACHE.Item.Properties.GetQuantity(salvage_kit) == 0:
+                    return False  # The item or the kit is not where the plan expected it
 
-                ActionQueueManager().AddAction("ACTION", Inventory.SalvageItem, item_id, salvage_kit)
+                queues.AddAction("ACTION", Inventory.SalvageItem, item_id, salvage_kit)
+                confirmations = 0
                 if require_materials_confirmation:
-                    yield from Routines.Yield.wait(150)
                     yield from Routines.Yield.Items._wait_for_salvage_materials_window()
-                    for i in range(3):
-                        ActionQueueManager().AddAction("ACTION", Inventory.AcceptSalvageMaterialsWindow)
-                        yield from Routines.Yield.wait(50)
+                    queues.AddAction("ACTION", Inventory.AcceptSalvageMaterialsWindow)
+                    confirmations = 1
 
-                while True:
+                for attempt in range(40):
                     yield from Routines.Yield.wait(50)
-
-                    bag_list = ItemArray.CreateBagList(Bags.Backpack, Bags.BeltPouch, Bags.Bag1, Bags.Bag2)
-                    item_array = ItemArray.GetItemArray(bag_list)
-
-                    if item_id not in item_array:
-                        salvaged_items += 1
-                        break  # Fully consumed
-
-                    item_instance.GetContext()
-                    if item_instance.quantity < quantity:
+                    if GLOBAL_CACHE.Item.Properties.GetQuantity(item_id) < quantity:
                         salvaged_items += 1
-                        break  # Successfully salvaged one item
+                        break
+                    if require_materials_confirmation and confirmations < 3 and attempt % 10 == 9 and queues.IsEmpty("ACTION"):
+                        window = UIManager.GetChildFrameID(140452905, [6, 100, 6])
+                        if UIManager.FrameExists(window):  # The confirmation did not register
+                            queues.AddAction("ACTION", Inventory.AcceptSalvageMaterialsWindow)
+                            confirmations += 1
+                else:
+                    return False
+                yield from Routines.Yield.wait(50)
+            if log:
+                ConsoleLog(self.module_name, f"Salvaged {salvaged_items} items", Console.MessageType.Success)
+
+        if plan.deposit:
+            self.status = "Depositing"
+            for item_id, bag_id, slot, quantity in plan.deposit:
+                GLOBAL_CACHE.Inventory.MoveItem(item_id, bag_id, slot, quantity)
+            while not queues.IsEmpty("ACTION"):
+                yield from Routines.Yield.wait(50)
 
+        if plan.sell:
+            self.status = "Selling"
+            for item_id, price in plan.sell:
+                GLOBAL_CACHE.Trading.Merchant.SellItem(item_id, price)
+            while not queues.IsEmpty("ACTION"):  # SellItem queues on ACTION
                 yield from Routines.Yield.wait(50)
+        return True
+
+    def RunPlanned(self, identify: bool = True, salvage: bool = True, deposit: bool = True,
+                   sell_filter: Optional[Callable[[PlanItem], bool]] = None,
+                   progress_callback: Optional[Callable[[float], None]] = None, log: bool = False, max_passes: int = 3):
+        """
+        Plan from one snapshot and execute it, re-planning only when the inventory diverges from the plan:
+        a step did not take effect, or salvaging produced materials to deposit. Later passes only identify
+        and salvage items from the first snapshot, as the sequential routines did.
+        """
+        from ..Routines import Routines
 
-        if salvaged_items > 0 and log:
-            ConsoleLog(self.module_name, f"Salvaged {salvaged_items} items", Console.MessageType.Success)
+        planner = InventoryPlanner(self)
+        item_ids = None
+        warned = set()
+        for _ in range(max_passes):
+            snapshot = InventorySnapshot.Capture()
+            if item_ids is None:
+                item_ids = {item.item_id for item in snapshot.items}
+            plan = planner.Plan(snapshot, identify, salvage, deposit, sell_filter, item_ids)
+            for reason in set(plan.skipped.values()) - warned:
+                ConsoleLog(self.module_name, reason, Console.MessageType.Warning)
+                warned.add(reason)
+            if plan.IsEmpty():
+                break
+
+            completed = yield from self.ExecutePlan(plan, progress_callback, log)
+            progress_callback = None
+            if completed:
+                yield from Routines.Yield.wait(100)
+                if self._MatchesPlan(plan):
+                    break
+        if progress_callback:
+            progress_callback(0.5)
+        self.status = "Idle"
 
+    def IdentifyItems(self,progress_callback: Optional[Callable[[float], None]] = None, log: bool = False):
+        yield from self.RunPlanned(identify=True, salvage=False, deposit=False, log=log)
             
-    def DepositItemsAuto(self):
-        from ..enums import Bags, ModelID
-        from ..GlobalCache import GLOBAL_CACHE
-        from ..Routines import Routines
-        for bag_id in range(Bags.Backpack, Bags.Bag2+1):
-            bag_to_check = GLOBAL_CACHE.ItemArray.CreateBagList(bag_id)
-            item_array = GLOBAL_CACHE.ItemArray.GetItemArray(bag_to_check)
-            
-            for item_id in item_array:
-                # Check if the item is a trophy or material
-                is_trophy = GLOBAL_CACHE.Item.Type.IsTrophy(item_id)
-                is_tome = GLOBAL_CACHE.Item.Type.IsTome(item_id)
-                _, item_type = GLOBAL_CACHE.Item.GetItemType(item_id)
-                is_usable = (item_type == "Usable")
-                
-                is_material = GLOBAL_CACHE.Item.Type.IsMaterial(item_id)
-                _, rarity = GLOBAL_CACHE.Item.Rarity.GetRarity(item_id)
-                is_white =  rarity == "White"
-                is_blue = rarity == "Blue"
-                is_green = rarity == "Green"
-                is_purple = rarity == "Purple"
-                is_gold = rarity == "Gold"
-                
-                model_id = GLOBAL_CACHE.Item.GetModelID(item_id)
-                
-                if is_tome:
-                    GLOBAL_CACHE.Inventory.DepositItemToStorage(item_id)
-                    yield from Routines.Yield.wait(350)
-                
-                if is_trophy and self.deposit_trophies and is_white:
-                    GLOBAL_CACHE.Inventory.DepositItemToStorage(item_id)
-                    yield from Routines.Yield.wait(350)
-                
-                if is_material and self.deposit_materials:
-                    GLOBAL_CACHE.Inventory.DepositItemToStorage(item_id)
-                    yield from Routines.Yield.wait(350)
-                
-                if is_blue and self.deposit_blues:
-                    GLOBAL_CACHE.Inventory.DepositItemToStorage(item_id)
-                    yield from Routines.Yield.wait(350)
-                
-                if is_purple and self.deposit_purples:
-                    GLOBAL_CACHE.Inventory.DepositItemToStorage(item_id)
-                    yield from Routines.Yield.wait(350)
-                
-                if is_gold and self.deposit_golds and not is_usable and not is_trophy:
-                    GLOBAL_CACHE.Inventory.DepositItemToStorage(item_id)
-                    yield from Routines.Yield.wait(350)
-                
-                if is_green and self.deposit_greens:
-                    GLOBAL_CACHE.Inventory.DepositItemToStorage(item_id)
-                    yield from Routines.Yield.wait(350)
-                    
-                if model_id == ModelID.Vial_Of_Dye.value and self.deposit_dyes:
-                    GLOBAL_CACHE.Inventory.DepositItemToStorage(item_id)
-                    yield from Routines.Yield.wait(350)
-                    
-                event_items = set()
-    
-                selected_filters = {
-                    "Alcohol": None,          # include ALL subcategories
-                    "Sweets": None,           # include ALL subcategories
-                    "Party": None,             # include ALL subcategories
-                    "Death Penalty Removal": None,  # include ALL subcategories
-                    "Reward Trophies" : {"Special Events"},
-                }
-
-                # apply filters flexibly
-                for category, subcats in LootConfig().LootGroups.items():
-                    if category not in selected_filters:
-                        continue  # skip whole category
-
-                    allowed_subcats = selected_filters[category]
-                    for subcat, items in subcats.items():
-                        if allowed_subcats is not None and subcat not in allowed_subcats:
-                            continue  # skip this subcategory
-
-                        event_items.update(m.value for m in items)
-                        
-                if model_id in event_items and self.deposit_event_items:
-                    GLOBAL_CACHE.Inventory.DepositItemToStorage(item_id)
-                    yield from Routines.Yield.wait(350)
+    def SalvageItems(self, progress_callback: Optional[Callable[[float], None]] = None, log: bool = False):
+        yield from self.RunPlanned(identify=False, salvage=True, deposit=False, log=log)
             
+    def DepositItemsAuto(self):
+        yield from self.RunPlanned(identify=False, salvage=False, deposit=True)
             
     def IDAndSalvageItems(self, progress_callback: Optional[Callable[[float], None]] = None):
-        self.status = "Identifying"
-        yield from self.IdentifyItems()
-        if progress_callback:
-            progress_callback(0.5)
-        self.status = "Salvaging"
-        yield from self.SalvageItems()
-        self.status = "Idle"
+        yield from self.RunPlanned(identify=True, salvage=True, deposit=False, progress_callback=progress_callback)
         yield
         
     def IDSalvageDepositItems(self):
         from ..Routines import Routines
 
         ConsoleLog("AutoInventoryHandler", "Starting ID, Salvage and Deposit routine", Console.MessageType.Info)
-        self.status = "Identifying"
-        yield from self.IdentifyItems()
-        
-        self.status = "Salvaging"
-        yield from self.SalvageItems()
-        
-        self.status = "Depositing"
-        yield from self.DepositItemsAuto()
+        yield from self.RunPlanned(identify=True, salvage=True, deposit=True)
         
         self.status = "Depositing Gold"
         
@@ -0,0 +1,54 @@
+import math
+
+
+class PointGrid:
+    """
+    Uniform grid over a fixed list of (x, y) points for fixed-radius neighbour lookups.
+    Cells are slightly larger than the radius, so every point within radius of a position
+    is in the 3x3 block of cells around it. Candidates() returns that block; callers apply
+    their own distance test so results stay identical to a brute-force scan.
+    """
+
+    def __init__(self, points, radius: float):
+        self.points = points
+        self.radius = radius
+        # Pad the cell so float rounding can never push an in-range point two cells away
+        self._inv_cell_size = 1.0 / (max(abs(radius), 1e-6) * 1.0001)
+        self._cells: dict[tuple[int, int], list[int]] = {}
+
+        inv = self._inv_cell_size
+        floor = math.floor
+        cells = self._cells
+        for index, (x, y) in enumerate(points):
+            key = (floor(x * inv), floor(y * inv))
+            cell = cells.get(key)
+            if cell is None:
+                cells[key] = [index]
+            else:
+                cell.append(index)
+
+    def Candidates(self, pos) -> list[int]:
+        """Indices of the points in the 3x3 cells around pos, in ascending order."""
+        inv = self._inv_cell_size
+        cx, cy = math.floor(pos[0] * inv), math.floor(pos[1] * inv)
+        get = self._cells.get
+        result = []
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                cell = get((cx + dx, cy + dy))
+                if cell:
+                    result.extend(cell)
+        result.sort()
+        return result
+
+    def Query(self, pos) -> list[int]:
+        """Indices of the points within radius of pos (inclusive), in ascending order."""
+        px, py = pos[0], pos[1]
+        points = self.points
+        radius = self.radius
+        return [i for i in self.Candidates(pos)
+                if math.sqrt((px - points[i][0]) ** 2 + (py - points[i][1]) ** 2) <= radius]
+
+    def Count(self, pos) -> int:
+        """Number of points within radius of pos (inclusive)."""
+        return len(self.Query(pos))
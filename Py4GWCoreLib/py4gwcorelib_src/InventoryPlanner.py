@@ -0,0 +1,267 @@
+#region InventoryPlanner
+from typing import Callable, Dict, List, Optional
+
+MAX_STACK_SIZE = 250
+INVENTORY_BAGS = (1, 2, 3, 4)  # Backpack, Belt Pouch, Bag 1, Bag 2
+STORAGE_BAGS = tuple(range(8, 22))  # Storage 1-14; Storage 5 is the anniversary panel
+ANNIVERSARY_STORAGE_BAG = 12
+
+
+def AssignStorageSlots(storage_bags, item_id: int, model_id: int, quantity: int, is_stackable: bool,
+                       dye1: Optional[int] = None, ammount: int = -1, update: bool = False):
+    """
+    Storage moves for depositing an item, in the order DepositItemToStorage issues them: bag by bag,
+    top up partial stacks of the same model (and dye, when dye1 is given) first, then fill empty slots.
+    storage_bags: [(bag_id, size, [[slot, item_id, model_id, quantity, dye1], ...]), ...], slots ascending.
+    Returns [(bag_id, slot, quantity), ...]. With update=True the bag contents are changed to match.
+    """
+    moves = []
+    remaining = quantity
+    if quantity == 0:
+        return moves
+
+    for bag_id, size, slots in storage_bags:
+        # === Fill partial stacks ===
+        if is_stackable:
+            for entry in slots:
+                if entry[2] != model_id or (dye1 is not None and entry[4] != dye1):
+                    continue
+                if entry[3] < MAX_STACK_SIZE:
+                    to_move = min(MAX_STACK_SIZE - entry[3], remaining)
+                    to_move = min(to_move, ammount) if ammount > 0 else to_move
+                    if to_move > 0:
+                        moves.append((bag_id, entry[0], to_move))
+                        if update:
+                            entry[3] += to_move
+                        remaining -= to_move
+                        if remaining == 0:
+                            return moves
+
+        # === Fill empty slots ===
+        occupied = {entry[0] for entry in slots}
+        for slot in range(size):
+            if slot in occupied:
+                continue
+            to_move = remaining if not is_stackable else min(remaining, MAX_STACK_SIZE)
+            moves.append((bag_id, slot, to_move))
+            if update:
+                slots.append([slot, item_id, model_id, to_move, dye1 if dye1 is not None else 0])
+                slots.sort()
+            remaining -= to_move
+            if remaining == 0:
+                return moves
+
+    return moves
+
+
+class PlanItem:
+    """What the planner needs to know about one inventory item, read once per snapshot."""
+    __slots__ = ("item_id", "bag", "slot", "model_id", "quantity", "value", "rarity", "item_type", "item_type_name",
+                 "is_identified", "is_salvageable", "is_material", "is_material_salvageable", "is_customized",
+                 "is_trophy", "is_tome", "is_stackable", "dye1", "is_id_kit", "is_salvage_kit", "is_lesser_kit", "uses")
+
+    def __init__(self, item_id: int, bag: int = 0, slot: int = 0, model_id: int = 0, quantity: int = 1, value: int = 0,
+                 rarity: str = "White", item_type: int = 0, item_type_name: str = "", is_identified: bool = True,
+                 is_salvageable: bool = False, is_material: bool = False, is_material_salvageable: bool = False,
+                 is_customized: bool = False, is_trophy: bool = False, is_tome: bool = False,
+                 is_stackable: bool = False, dye1: Optional[int] = None, is_id_kit: bool = False,
+                 is_salvage_kit: bool = False, is_lesser_kit: bool = False, uses: int = 0):
+        self.item_id = item_id
+        self.bag = bag
+        self.slot = slot
+        self.model_id = model_id
+        self.quantity = quantity
+        self.value = value
+        self.rarity = rarity
+        self.item_type = item_type
+        self.item_type_name = item_type_name
+        self.is_identified = is_identified
+        self.is_salvageable = is_salvageable
+        self.is_material = is_material
+        self.is_material_salvageable = is_material_salvageable
+        self.is_customized = is_customized
+        self.is_trophy = is_trophy
+        self.is_tome = is_tome
+        self.is_stackable = is_stackable
+        self.dye1 = dye1  # only read for dyes
+        self.is_id_kit = is_id_kit
+        self.is_salvage_kit = is_salvage_kit
+        self.is_lesser_kit = is_lesser_kit
+        self.uses = uses
+
+
+class InventorySnapshot:
+    """
+    Inventory items (bag then slot order) and storage contents in the layout AssignStorageSlots takes.
+    """
+    def __init__(self, items: List[PlanItem], storage_bags):
+        self.items = items
+        self.storage_bags = storage_bags
+
+    @staticmethod
+    def Capture(Anniversary_panel: bool = True) -> "InventorySnapshot":
+        import PyInventory
+        from ..GlobalCache import GLOBAL_CACHE
+        from ..enums import ModelID
+
+        item_cache = GLOBAL_CACHE.Item
+        dye_model = ModelID.Vial_Of_Dye.value
+        items = []
+        for bag_id in INVENTORY_BAGS:
+            for item_id in GLOBAL_CACHE.ItemArray.GetItemArray(GLOBAL_CACHE.ItemArray.CreateBagList(bag_id)):
+                _, slot = GLOBAL_CACHE.Inventory.FindItemBagAndSlot(item_id)
+                item_type, item_type_name = item_cache.GetItemType(item_id)
+                model_id = item_cache.GetModelID(item_id)
+                items.append(PlanItem(
+                    item_id, bag_id, slot or 0, model_id,
+                    quantity=item_cache.Properties.GetQuantity(item_id),
+                    value=item_cache.Properties.GetValue(item_id),
+                    rarity=item_cache.Rarity.GetRarity(item_id)[1],
+                    item_type=item_type,
+                    item_type_name=item_type_name,
+                    is_identified=item_cache.Usage.IsIdentified(item_id),
+                    is_salvageable=item_cache.Usage.IsSalvageable(item_id),
+                    is_material=item_cache.Type.IsMaterial(item_id),
+                    is_material_salvageable=item_cache.Usage.IsMaterialSalvageable(item_id),
+                    is_customized=item_cache.Properties.IsCustomized(item_id),
+                    is_trophy=item_cache.Type.IsTrophy(item_id),
+                    is_tome=item_cache.Type.IsTome(item_id),
+                    is_stackable=item_cache.Customization.IsStackable(item_id),
+                    dye1=item_cache.Customization.GetDyeInfo(item_id).dye1.ToInt() if model_id == dye_model else None,
+                    is_id_kit=item_cache.Usage.IsIDKit(item_id),
+                    is_salvage_kit=item_cache.Usage.IsSalvageKit(item_id),
+                    is_lesser_kit=item_cache.Usage.IsLesserKit(item_id),
+                    uses=item_cache.Usage.GetUses(item_id),
+                ))
+
+        storage_bags = []
+        for bag_id in STORAGE_BAGS:
+            if bag_id == ANNIVERSARY_STORAGE_BAG and not Anniversary_panel:
+                continue
+            try:
+                bag = PyInventory.Bag(bag_id, str(bag_id))
+                size = bag.GetSize()
+                if size <= 0:
+                    continue
+                slots = [[item.slot, item.item_id, item.model_id, item.quantity,
+                          item_cache.Customization.GetDyeInfo(item.item_id).dye1.ToInt() if item.model_id == dye_model else 0]
+                         for item in bag.GetItems()]
+            except Exception:
+                continue
+            storage_bags.append((bag_id, size, sorted(slots)))
+        return InventorySnapshot(items, storage_bags)
+
+
+class InventoryPlan:
+    """
+    Ordered actions for one snapshot. Each list is executed in order, phase by phase:
+    identify (item_id, id_kit_id), salvage one unit per entry (item_id, salvage_kit_id, needs_confirmation),
+    deposit MoveItem calls (item_id, bag_id, slot, quantity) and sell (item_id, price).
+    """
+    def __init__(self):
+        self.identify: List[tuple[int, int]] = []
+        self.salvage: List[tuple[int, int, bool]] = []
+        self.deposit: List[tuple[int, int, int, int]] = []
+        self.sell: List[tuple[int, int]] = []
+        self.skipped: Dict[int, str] = {}  # item_id -> why a wanted action could not be planned
+        self.expected: Dict[int, tuple[int, bool]] = {}  # item_id -> (quantity, identified) left in the inventory
+
+    def IsEmpty(self) -> bool:
+        return not (self.identify or self.salvage or self.deposit or self.sell)
+
+    def ActionCount(self) -> int:
+        """Queued actions, counting one salvage materials confirmation per purple or gold salvage."""
+        confirmations = sum(1 for _, _, confirm in self.salvage if confirm)
+        return len(self.identify) + len(self.salvage) + confirmations + len(self.deposit) + len(self.sell)
+
+
+class InventoryPlanner:
+    """
+    Builds an InventoryPlan from a snapshot. The rules object (AutoInventoryHandler) decides what is
+    wanted through ShouldIdentify, ShouldSalvage and ShouldDeposit; the planner allocates kits the way
+    GetFirstIDKit and GetFirstSalvageKit(use_lesser=True) would pick them before each action, and storage
+    slots the way DepositItemToStorage would, against simulated kit uses and storage contents.
+    """
+    def __init__(self, rules):
+        self.rules = rules
+
+    @staticmethod
+    def _TakeKit(kits: List[list]) -> int:
+        """The first kit with the fewest uses left, spending one use; 0 if none is left."""
+        if not kits:
+            return 0
+        kit = min(kits, key=lambda entry: entry[1])
+        kit[1] -= 1
+        if kit[1] <= 0:
+            kits.remove(kit)
+        return kit[0]
+
+    def Plan(self, snapshot: InventorySnapshot, identify: bool = True, salvage: bool = True, deposit: bool = True,
+             sell_filter: Optional[Callable[[PlanItem], bool]] = None, item_ids=None) -> InventoryPlan:
+        """
+        Plan the enabled phases. item_ids, if given, limits identifying and salvaging to those items
+        (deposits and sells always consider the whole inventory).
+        """
+        plan = InventoryPlan()
+        rules = self.rules
+        id_kits = [[item.item_id, item.uses] for item in snapshot.items if item.is_id_kit and item.uses > 0]
+        salvage_kits = [[item.item_id, item.uses] for item in snapshot.items
+                        if item.is_salvage_kit and item.is_lesser_kit and item.uses > 0]
+        kit_ids = {kit[0] for kit in id_kits + salvage_kits}
+        identified = {item.item_id: item.is_identified for item in snapshot.items}
+        quantities = {item.item_id: item.quantity for item in snapshot.items}
+
+        if identify:
+            for item in snapshot.items:
+                if (item_ids is not None and item.item_id not in item_ids) or not rules.ShouldIdentify(item):
+                    continue
+                kit_id = self._TakeKit(id_kits)
+                if kit_id == 0:
+                    plan.skipped[item.item_id] = "No ID Kit found in inventory."
+                    continue
+                plan.identify.append((item.item_id, kit_id))
+                identified[item.item_id] = True
+
+        if salvage:
+            for item in snapshot.items:
+                if (item_ids is not None and item.item_id not in item_ids) or item.is_id_kit or item.is_salvage_kit:
+                    continue
+                if item.quantity == 0 or not rules.ShouldSalvage(item, identified[item.item_id]):
+                    continue
+                confirm = item.rarity in ("Purple", "Gold")
+                for _ in range(item.quantity):
+                    kit_id = self._TakeKit(salvage_kits)
+                    if kit_id == 0:
+                        plan.skipped[item.item_id] = "No Salvage Kit found in inventory."
+                        break
+                    plan.salvage.append((item.item_id, kit_id, confirm))
+                    quantities[item.item_id] -= 1
+
+        for kit_id in kit_ids.difference(kit[0] for kit in id_kits + salvage_kits):
+            quantities[kit_id] = 0  # used up
+
+        if deposit or sell_filter is not None:
+            for item in snapshot.items:
+                quantity = quantities[item.item_id]
+                if quantity == 0:
+                    continue
+                if sell_filter is not None and sell_filter(item):
+                    plan.sell.append((item.item_id, quantity * item.value))
+                    quantities[item.item_id] = 0
+                    continue
+                if not deposit or not rules.ShouldDeposit(item):
+                    continue
+                moves = AssignStorageSlots(snapshot.storage_bags, item.item_id, item.model_id, quantity,
+                                           item.is_stackable, item.dye1, update=True)
+                moved = sum(move[2] for move in moves)
+                if moved < quantity:
+                    plan.skipped[item.item_id] = "Not enough storage space."
+                plan.deposit.extend((item.item_id, bag_id, slot, amount) for bag_id, slot, amount in moves)
+                quantities[item.item_id] = quantity - moved
+
+        for item in snapshot.items:
+            if quantities[item.item_id] > 0:
+                plan.expected[item.item_id] = (quantities[item.item_id], identified[item.item_id])
+        return plan
+
+#endregion
@@ -1,6 +1,6 @@
 from ..enums_src.GameData_enums import Range
 from ..enums_src.Model_enums import ModelID
-from typing import Dict, List
+from typing import Callable, Dict, List, Optional
 
 LootGroups: Dict[str, Dict[str, List[ModelID]]] = {
     "Alcohol": {
@@ -533,6 +533,9 @@ class LootConfig:
         self.LootGroups: Dict[str, Dict[str, List[ModelID]]] = LootGroups
 
     def reset(self):
+        self._rules_version = getattr(self, "_rules_version", 0) + 1
+        self._compiled_key = None
+        self._compiled_rules = None
         self.loot_gold_coins = False
         self.loot_whites = False
         self.loot_blues = False
@@ -545,6 +548,8 @@ class LootConfig:
         self.item_id_whitelist = set()  # For items that are whitelisted by ID
         self.dye_whitelist = set()
         self.dye_blacklist = set()
+        self.group_whitelist = set()  # (group, subgroup or None for the whole group) from LootGroups
+        self.group_blacklist = set()
 
     def SetProperties(self, loot_whites=False, loot_blues=False, loot_purples=False, loot_golds=False, loot_greens=False, loot_gold_coins=False):
         self.loot_gold_coins = loot_gold_coins
@@ -557,12 +562,15 @@ class LootConfig:
     # ------- Whitelist management -------
     def AddToWhitelist(self, model_id: int):
         self.whitelist.add(model_id)
+        self._rules_version += 1
         
     def RemoveFromWhitelist(self, model_id: int):
         self.whitelist.discard(model_id)
+        self._rules_version += 1
         
     def ClearWhitelist(self):
         self.whitelist.clear()
+        self._rules_version += 1
     
     def IsWhitelisted(self, model_id: int):
         return model_id in self.whitelist
@@ -573,12 +581,15 @@ class LootConfig:
     # ------- Blacklist management ------
     def AddToBlacklist(self, model_id: int):
         self.blacklist.add(model_id)
+        self._rules_version += 1
         
     def RemoveFromBlacklist(self, model_id: int):
         self.blacklist.discard(model_id)
+        self._rules_version += 1
         
     def ClearBlacklist(self):
         self.blacklist.clear()
+        self._rules_version += 1
         
     def IsBlacklisted(self, model_id: int):
         return model_id in self.blacklist
@@ -589,12 +600,15 @@ class LootConfig:
     # ------- Item ID Whitelist management -------    
     def AddItemIDToWhitelist(self, item_id: int):
         self.item_id_whitelist.add(item_id)
+        self._rules_version += 1
         
     def RemoveItemIDFromWhitelist(self, item_id: int):
         self.item_id_whitelist.discard(item_id)
+        self._rules_version += 1
     
     def ClearItemIDWhitelist(self):
         self.item_id_whitelist.clear()
+        self._rules_version += 1
         
     def IsItemIDWhitelisted(self, item_id: int):
         return item_id in self.item_id_whitelist
@@ -602,12 +616,15 @@ class LootConfig:
     # ------- Item ID Blacklist management -------   
     def AddItemIDToBlacklist(self, item_id: int):
         self.item_id_blacklist.add(item_id)
+        self._rules_version += 1
    
     def RemoveItemIDFromBlacklist(self, item_id: int):
         self.item_id_blacklist.discard(item_id)
+        self._rules_version += 1
 
     def ClearItemIDBlacklist(self):
         self.item_id_blacklist.clear()
+        self._rules_version += 1
 
     def IsItemIDBlacklisted(self, item_id: int):
         return item_id in self.item_id_blacklist
@@ -615,6 +632,32 @@ class LootConfig:
     def GetItemIDBlacklist(self):
         return list(self.item_id_blacklist)
     
+    # ------- Loot group management -------
+    def AddLootGroupToWhitelist(self, group: str, subgroup: Optional[str] = None):
+        self.group_whitelist.add((group, subgroup))
+        self._rules_version += 1
+
+    def RemoveLootGroupFromWhitelist(self, group: str, subgroup: Optional[str] = None):
+        self.group_whitelist.discard((group, subgroup))
+        self._rules_version += 1
+
+    def AddLootGroupToBlacklist(self, group: str, subgroup: Optional[str] = None):
+        self.group_blacklist.add((group, subgroup))
+        self._rules_version += 1
+
+    def RemoveLootGroupFromBlacklist(self, group: str, subgroup: Optional[str] = None):
+        self.group_blacklist.discard((group, subgroup))
+        self._rules_version += 1
+
+    def GetLootGroupModelIDs(self, groups) -> frozenset:
+        """Model ids of the given (group, subgroup) pairs; subgroup None means the whole group."""
+        model_ids = set()
+        for group, subgroup in groups:
+            for name, models in self.LootGroups.get(group, {}).items():
+                if subgroup is None or name == subgroup:
+                    model_ids.update(int(model) for model in models)
+        return frozenset(model_ids)
+
     # === Dye-based lists (by dye1 int) ===
     # -- Dye Whitelist management -------
     def AddToDyeWhitelist(self, dye1_int: int):
@@ -648,126 +691,76 @@ class LootConfig:
     def GetDyeBlacklist(self):
         return list(self.dye_blacklist)
 
+    def CompileRules(self) -> Callable[[int, int, int, str], bool]:
+        """
+        The blacklists, whitelists, loot groups and rarity flags as one predicate
+        accepts(agent_id, item_id, model_id, rarity_name). Rebuilt only when the configuration changes.
+        """
+        key = (self._rules_version, self.loot_whites, self.loot_blues, self.loot_purples, self.loot_golds, self.loot_greens)
+        if self._compiled_key == key:
+            return self._compiled_rules
+
+        # Item id sets are read live, so code that edits them directly is still seen
+        item_id_blacklist = self.item_id_blacklist
+        item_id_whitelist = self.item_id_whitelist
+        blacklist = frozenset(self.blacklist) | self.GetLootGroupModelIDs(self.group_blacklist)
+        whitelist = frozenset(self.whitelist) | self.GetLootGroupModelIDs(self.group_whitelist)
+        blocked_rarities = frozenset(name for name, wanted in (("White", self.loot_whites), ("Blue", self.loot_blues),
+                                                               ("Purple", self.loot_purples), ("Gold", self.loot_golds),
+                                                               ("Green", self.loot_greens)) if not wanted)
+
+        def accepts(agent_id: int, item_id: int, model_id: int, rarity_name: str) -> bool:
+            # The item id blacklist has always been keyed by agent id
+            if agent_id in item_id_blacklist or model_id in blacklist:
+                return False
+            if item_id in item_id_whitelist or model_id in whitelist:
+                return True
+            return rarity_name not in blocked_rarities
+
+        self._compiled_key = key
+        self._compiled_rules = accepts
+        return accepts
+
     def GetfilteredLootArray(self, distance: float = Range.SafeCompass.value, multibox_loot: bool = False, allow_unasigned_loot=False) -> list[int]:
         from ..AgentArray import AgentArray
-        from ..GlobalCache import GLOBAL_CACHE
         from ..Routines import Routines
         from ..Agent import Agent
         from ..Item import Item
         from ..Player import Player
         from ..Party import Party
-        
-        def IsValidItem(item_id):
-            if not Agent.IsValid(item_id):
-                return False    
-            player_agent_id = Player.GetAgentID()
-            owner_id = Agent.GetItemAgentOwnerID(item_id)
-            return ((owner_id == player_agent_id) or (owner_id == 0))
-        
-        def IsValidLeaderItem(item_id, allow_unasigned_loot: bool):
-            if not Agent.IsValid(item_id):
-                return False
-            
-            player_agent_id = Player.GetAgentID()
-            owner_id = Agent.GetItemAgentOwnerID(item_id)
-
-            # Always pick up own items
-            if owner_id == player_agent_id:
-                return True
-
-            # Always pick up gold coins (if unassigned)
-            agent = Agent.agent_instance(item_id)
-            item_agent_id = agent.item_agent.item_id
-            model_id = Item.GetModelID(item_agent_id)
-            if model_id == ModelID.Gold_Coins.value and owner_id == 0:
-                return True
-
-            # If allowed, pick up other unassigned items
-            if allow_unasigned_loot and owner_id == 0:
-                return True
-
-            return False
-
-        def IsValidFollowerItem(item_id):
-            if not Agent.IsValid(item_id):
-                return False
-            
-            player_agent_id = Player.GetAgentID()
-            owner_id = Agent.GetItemAgentOwnerID(item_id)
 
-            # Followers only pick up their own items
-            return owner_id == player_agent_id
-
-        
         if not Routines.Checks.Map.MapValid():
             return []
-            
+
         loot_array = AgentArray.GetItemArray()
         loot_array = AgentArray.Filter.ByDistance(loot_array, Player.GetXY(), distance)
 
-        party_leader_id = Party.GetPartyLeaderID()
         player_agent_id = Player.GetAgentID()
-
-        if party_leader_id == player_agent_id:  # Leader or solo
-            loot_array = AgentArray.Filter.ByCondition(
-                loot_array, lambda item_id: IsValidLeaderItem(item_id, allow_unasigned_loot)
-            )
-        else:  # Follower
-            loot_array = AgentArray.Filter.ByCondition(
-                loot_array, lambda item_id: IsValidFollowerItem(item_id)
-            )
-
-
-
-        for agent_id in loot_array[:]:  # Iterate over a copy to avoid modifying while iterating
-            item_data = Agent.GetItemAgent(agent_id)
-            item_id = item_data.item_id
-            model_id = Item.GetModelID(item_id)
-            
-            # --- Hard block: blacklists ---
-            if self.IsItemIDBlacklisted(agent_id):
-                loot_array.remove(agent_id)
-                continue
-
-            if self.IsBlacklisted(model_id):
-                loot_array.remove(agent_id)
+        is_leader = Party.GetPartyLeaderID() == player_agent_id  # Leader or solo
+        gold_coins = ModelID.Gold_Coins.value
+        accepts = self.CompileRules()
+
+        # One pass; each drop's agent and item are read once
+        filtered = []
+        for agent_id in loot_array:
+            agent = Agent.agent_instance(agent_id)
+            if not agent.IsValid(agent_id):
                 continue
-
-            # --- Whitelists ---
-            if self.IsItemIDWhitelisted(item_id):
+            item_agent = agent.item_agent
+            owner_id = item_agent.owner_id if item_agent is not None else 999
+            own_item = owner_id == player_agent_id
+            # Followers only pick up their own items; leaders also take unassigned gold coins, or any
+            # unassigned item when allowed
+            if not own_item and not (is_leader and owner_id == 0):
                 continue
 
-            if self.IsWhitelisted(model_id):
+            item_id = item_agent.item_id
+            item = Item.item_instance(item_id)
+            model_id = item.model_id
+            if not own_item and not allow_unasigned_loot and model_id != gold_coins:
                 continue
+            if accepts(agent_id, item_id, model_id, item.rarity.name):
+                filtered.append(agent_id)
 
-                
-            # Rarity filtering
-            if Item.Rarity.IsWhite(item_id):
-                if not self.loot_whites:
-                    loot_array.remove(agent_id)
-                    continue
-
-            if Item.Rarity.IsBlue(item_id):
-                if not self.loot_blues:
-                    loot_array.remove(agent_id)
-                    continue
-
-            if Item.Rarity.IsPurple(item_id):
-                if not self.loot_purples:
-                    loot_array.remove(agent_id)
-                    continue
-
-            if Item.Rarity.IsGold(item_id):
-                if not self.loot_golds:
-                    loot_array.remove(agent_id)
-                    continue
-
-            if Item.Rarity.IsGreen(item_id):
-                if not self.loot_greens:
-                    loot_array.remove(agent_id)
-                    continue
-
-        loot_array = AgentArray.Sort.ByDistance(loot_array, Player.GetXY())
-
-        return loot_array
+        return AgentArray.Sort.ByDistance(filtered, Player.GetXY())
 #endregion
\ No newline at end of file
@@ -15,11 +15,7 @@ class Agents:
         from ..GlobalCache import GLOBAL_CACHE
         scan_pos = (x,y)
         npc_array = GLOBAL_CACHE.AgentArray.GetNPCMinipetArray()
-        npc_array = AgentArray.Filter.ByDistance(npc_array,scan_pos, distance)
-        npc_array = AgentArray.Sort.ByDistance(npc_array, scan_pos)
-        if len(npc_array) > 0:
-            return npc_array[0]
-        return 0    
+        return AgentArray.Routines.GetNearest(npc_array, scan_pos, distance)
     
     @staticmethod
     def GetNearestGadgetXY(x,y, distance):
@@ -27,11 +23,7 @@ class Agents:
         from ..GlobalCache import GLOBAL_CACHE
         scan_pos = (x,y)
         gadget_array = GLOBAL_CACHE.AgentArray.GetGadgetArray()
-        gadget_array = AgentArray.Filter.ByDistance(gadget_array,scan_pos, distance)
-        gadget_array = AgentArray.Sort.ByDistance(gadget_array, scan_pos)
-        if len(gadget_array) > 0:
-            return gadget_array[0]
-        return 0    
+        return AgentArray.Routines.GetNearest(gadget_array, scan_pos, distance)
                 
     @staticmethod
     def GetNearestItemXY(x,y, distance):
@@ -39,11 +31,7 @@ class Agents:
         from ..GlobalCache import GLOBAL_CACHE
         scan_pos = (x,y)
         item_array = GLOBAL_CACHE.AgentArray.GetItemArray()
-        item_array = AgentArray.Filter.ByDistance(item_array,scan_pos, distance)
-        item_array = AgentArray.Sort.ByDistance(item_array, scan_pos)
-        if len(item_array) > 0:
-            return item_array[0]
-        return 0  
+        return AgentArray.Routines.GetNearest(item_array, scan_pos, distance)
     
     @staticmethod
     def GetNearestNPC(distance:float = 4500.0):
@@ -92,7 +80,7 @@ class Agents:
         """
         from ..GlobalCache import GLOBAL_CACHE
         enemy_array = AgentArray.GetEnemyArray()
-        enemy_array = AgentArray.Filter.ByCondition(enemy_array, lambda agent_id: Utils.Distance((x,y), GLOBAL_CACHE.Agent.GetXY(agent_id)) <= max_distance)
+        enemy_array = AgentArray.Filter.ByDistance(enemy_array, (x,y), max_distance)
         enemy_array = AgentArray.Filter.ByCondition(enemy_array, lambda agent_id: GLOBAL_CACHE.Agent.IsAlive(agent_id))
         enemy_array = AgentArray.Filter.ByCondition(enemy_array, lambda agent_id: GLOBAL_CACHE.Player.GetAgentID() != agent_id)
         if aggressive_only:
@@ -100,63 +88,49 @@ class Agents:
         return enemy_array
                     
     @staticmethod
-    def GetNearestEnemy(max_distance=4500.0, aggressive_only = False):
+    def _GetNearestEnemyMatching(max_distance, aggressive_only, condition=None):
+        """Nearest enemy that GetFilteredEnemyArray would keep and condition accepts, or 0."""
         from ..AgentArray import AgentArray
-        from ..Py4GWcorelib import Utils
         from ..GlobalCache import GLOBAL_CACHE
 
-        player_pos = GLOBAL_CACHE.Player.GetXY()
-        enemy_array = Agents.GetFilteredEnemyArray(player_pos[0], player_pos[1], max_distance, aggressive_only)
-        enemy_array = AgentArray.Sort.ByDistance(enemy_array, player_pos)
-        return Utils.GetFirstFromArray(enemy_array)
+        player_id = GLOBAL_CACHE.Player.GetAgentID()
+
+        def enemy_filter(agent_id):
+            if agent_id == player_id or not GLOBAL_CACHE.Agent.IsAlive(agent_id):
+                return False
+            if aggressive_only and not GLOBAL_CACHE.Agent.IsAggressive(agent_id):
+                return False
+            return condition is None or condition(agent_id)
+
+        return AgentArray.Routines.GetNearest(AgentArray.GetEnemyArray(), GLOBAL_CACHE.Player.GetXY(), max_distance, enemy_filter)
+
+    @staticmethod
+    def GetNearestEnemy(max_distance=4500.0, aggressive_only = False):
+        return Agents._GetNearestEnemyMatching(max_distance, aggressive_only)
     
     @staticmethod
     def GetNearestEnemyCaster(max_distance=4500.0, aggressive_only = False):
-        from ..AgentArray import AgentArray
-        from ..Py4GWcorelib import Utils
         from ..GlobalCache import GLOBAL_CACHE
 
-        player_pos = GLOBAL_CACHE.Player.GetXY()
-        enemy_array = Agents.GetFilteredEnemyArray(player_pos[0], player_pos[1], max_distance, aggressive_only)
-        enemy_array = AgentArray.Filter.ByCondition(enemy_array, lambda agent_id: GLOBAL_CACHE.Agent.IsCaster(agent_id))
-        enemy_array = AgentArray.Sort.ByDistance(enemy_array, player_pos)
-        return Utils.GetFirstFromArray(enemy_array)
+        return Agents._GetNearestEnemyMatching(max_distance, aggressive_only, GLOBAL_CACHE.Agent.IsCaster)
         
     @staticmethod
     def GetNearestEnemyMartial(max_distance=4500.0, aggressive_only = False):
-        from ..AgentArray import AgentArray
-        from ..Py4GWcorelib import Utils
         from ..GlobalCache import GLOBAL_CACHE
 
-        player_pos = GLOBAL_CACHE.Player.GetXY()
-        enemy_array = Agents.GetFilteredEnemyArray(player_pos[0], player_pos[1], max_distance, aggressive_only)
-        enemy_array = AgentArray.Filter.ByCondition(enemy_array, lambda agent_id: GLOBAL_CACHE.Agent.IsMartial(agent_id))
-        enemy_array = AgentArray.Sort.ByDistance(enemy_array, player_pos)
-        return Utils.GetFirstFromArray(enemy_array)   
+        return Agents._GetNearestEnemyMatching(max_distance, aggressive_only, GLOBAL_CACHE.Agent.IsMartial)
     
     @staticmethod
     def GetNearestEnemyMelee(max_distance=4500.0, aggressive_only = False):
-        from ..AgentArray import AgentArray
-        from ..Py4GWcorelib import Utils
         from ..GlobalCache import GLOBAL_CACHE
 
-        player_pos = GLOBAL_CACHE.Player.GetXY()
-        enemy_array = Agents.GetFilteredEnemyArray(player_pos[0], player_pos[1], max_distance, aggressive_only)
-        enemy_array = AgentArray.Filter.ByCondition(enemy_array, lambda agent_id: GLOBAL_CACHE.Agent.IsMelee(agent_id))
-        enemy_array = AgentArray.Sort.ByDistance(enemy_array, player_pos)
-        return Utils.GetFirstFromArray(enemy_array)
+        return Agents._GetNearestEnemyMatching(max_distance, aggressive_only, GLOBAL_CACHE.Agent.IsMelee)
     
     @staticmethod
     def GetNearestEnemyRanged(max_distance=4500.0, aggressive_only = False):
-        from ..AgentArray import AgentArray
-        from ..Py4GWcorelib import Utils
         from ..GlobalCache import GLOBAL_CACHE
 
-        player_pos = GLOBAL_CACHE.Player.GetXY()
-        enemy_array = Agents.GetFilteredEnemyArray(player_pos[0], player_pos[1], max_distance, aggressive_only)
-        enemy_array = AgentArray.Filter.ByCondition(enemy_array, lambda agent_id: GLOBAL_CACHE.Agent.IsRanged(agent_id))
-        enemy_array = AgentArray.Sort.ByDistance(enemy_array, player_pos)
-        return Utils.GetFirstFromArray(enemy_array)
+        return Agents._GetNearestEnemyMatching(max_distance, aggressive_only, GLOBAL_CACHE.Agent.IsRanged)
         
     @staticmethod
     def GetFilteredAllyArray(x, y, max_distance=4500.0, other_ally=False):
@@ -187,12 +161,10 @@ class Agents:
         self_id = GLOBAL_CACHE.Player.GetAgentID()
         player_pos = GLOBAL_CACHE.Player.GetXY()
         ally_array = GLOBAL_CACHE.AgentArray.GetAllyArray()
-        ally_array = AgentArray.Filter.ByDistance(ally_array, player_pos, max_distance)
-        ally_array = AgentArray.Filter.ByCondition(ally_array, lambda agent_id: GLOBAL_CACHE.Agent.IsAlive(agent_id))
-        if exclude_self:
-            ally_array = AgentArray.Filter.ByCondition(ally_array, lambda agent_id: agent_id != self_id)
-        ally_array = AgentArray.Sort.ByDistance(ally_array, player_pos)
-        return Utils.GetFirstFromArray(ally_array)
+        return AgentArray.Routines.GetNearest(
+            ally_array, player_pos, max_distance,
+            lambda agent_id: GLOBAL_CACHE.Agent.IsAlive(agent_id) and not (exclude_self and agent_id == self_id)
+        )
     
     @staticmethod   
     def GetDeadAlly(max_distance=4500.0):
@@ -297,9 +269,7 @@ class Agents:
         from ..GlobalCache import GLOBAL_CACHE
 
         item_array = AgentArray.GetItemArray()
-        item_array = AgentArray.Filter.ByDistance(item_array, GLOBAL_CACHE.Player.GetXY(), max_distance)
-        item_array = AgentArray.Sort.ByDistance(item_array,GLOBAL_CACHE.Player.GetXY())
-        return Utils.GetFirstFromArray(item_array)   
+        return AgentArray.Routines.GetNearest(item_array, GLOBAL_CACHE.Player.GetXY(), max_distance)
 
     @staticmethod
     def GetNearestGadget(max_distance=4500.0):
@@ -308,9 +278,7 @@ class Agents:
         from ..GlobalCache import GLOBAL_CACHE
 
         gadget_array = GLOBAL_CACHE.AgentArray.GetGadgetArray()
-        gadget_array = AgentArray.Filter.ByDistance(gadget_array, GLOBAL_CACHE.Player.GetXY(), max_distance)
-        gadget_array = AgentArray.Sort.ByDistance(gadget_array,GLOBAL_CACHE.Player.GetXY())
-        return Utils.GetFirstFromArray(gadget_array)
+        return AgentArray.Routines.GetNearest(gadget_array, GLOBAL_CACHE.Player.GetXY(), max_distance)
     
     @staticmethod
     def GetNearestGadgetByID(gadget_id: int, max_distance=4500.0):
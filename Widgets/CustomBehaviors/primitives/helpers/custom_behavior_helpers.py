@@ -12,7 +12,7 @@ from Widgets.CustomBehaviors.primitives.helpers.behavior_result import BehaviorR
 from Widgets.CustomBehaviors.primitives.helpers.targeting_order import TargetingOrder
 from Widgets.CustomBehaviors.primitives.skills.custom_skill import CustomSkill
 
-from Py4GWCoreLib import GLOBAL_CACHE, Overlay, SkillBar, ActionQueueManager, Routines, Range, Utils, SPIRIT_BUFF_MAP, SpiritModelID, AgentArray
+from Py4GWCoreLib import GLOBAL_CACHE, Overlay, SkillBar, ActionQueueManager, Routines, Range, Utils, SPIRIT_BUFF_MAP, SpiritModelID, AgentArray, PointGrid
 from Widgets.CustomBehaviors.primitives import constants
 
 MODULE_NAME = "Custom Combat Behavior Helpers"
@@ -772,13 +772,17 @@ class Targets:
         agent_ids = AgentArray.Filter.ByCondition(agent_ids, lambda agent_id: GLOBAL_CACHE.Agent.IsAlive(agent_id))
         if condition is not None: agent_ids = AgentArray.Filter.ByCondition(agent_ids, condition)
 
-        def build_sortable_array(agent_id):
-            agent_pos = GLOBAL_CACHE.Agent.GetXY(agent_id)
+        agent_positions = [GLOBAL_CACHE.Agent.GetXY(agent_id) for agent_id in agent_ids]
+        neighbour_grid = PointGrid(agent_positions, range_to_count_enemies) if range_to_count_enemies is not None else None
+
+        def build_sortable_array(index, agent_id):
+            agent_pos = agent_positions[index]
             enemy_quantity_within_range = 0
 
-            if range_to_count_enemies is not None:
-                for other_agent_id in agent_ids:  # complexity O(n^2) !
-                    if other_agent_id != agent_id and Utils.Distance(GLOBAL_CACHE.Agent.GetXY(other_agent_id), agent_pos) <= range_to_count_enemies:
+            if neighbour_grid is not None:
+                # only the neighbouring grid cells are scanned, no more O(n^2)
+                for other_index in neighbour_grid.Query(agent_pos):
+                    if agent_ids[other_index] != agent_id:
                         enemy_quantity_within_range += 1
 
             return SortableAgentData(
@@ -793,7 +797,7 @@ class Targets:
                 energy=0.0  # Not used for enemies
             )
 
-        data_to_sort = list(map(lambda agent_id: build_sortable_array(agent_id), agent_ids))
+        data_to_sort = [build_sortable_array(index, agent_id) for index, agent_id in enumerate(agent_ids)]
 
         if not sort_key:  # If no sort_key is provided
             return data_to_sort
@@ -1,6 +1,10 @@
 import math
 from typing import List, Tuple, Optional
 
+from Py4GWCoreLib.py4gwcorelib_src.Clustering import PointGrid
+
+GRID_MIN_PLAYERS = 32
+
 def distance(p1: Tuple[float, float], p2: Tuple[float, float]) -> float:
     """Calcule la distance euclidienne entre deux points"""
     return math.sqrt((p1[0] - p2[0])**2 + (p1[1] - p2[1])**2)
@@ -36,14 +40,20 @@ def find_optimal_position_weighted(current_pos: Tuple[float, float],
     if not other_players:
         return (current_pos, 0, 0.0)
     
+    # Grille de voisinage : chaque comptage ne regarde que les cellules proches.
+    # En dessous de GRID_MIN_PLAYERS le parcours direct reste plus rapide.
+    use_grid = len(other_players) >= GRID_MIN_PLAYERS
+    if use_grid:
+        coverage_grid = PointGrid(other_players, radius)
+        count_covered = coverage_grid.Count
+    else:
+        count_covered = lambda center: count_players_in_radius(center, other_players, radius)
+    
     best_position = current_pos
-    best_score = count_players_in_radius(current_pos, other_players, radius)
+    best_score = count_covered(current_pos)
     best_distance = 0.0
     best_count = best_score
     
-    # Test de la position actuelle
-    current_count = count_players_in_radius(current_pos, other_players, radius)
-    
     # Candidats à tester
     candidates = []
     
@@ -60,9 +70,13 @@ def find_optimal_position_weighted(current_pos: Tuple[float, float],
             test_y = player_pos[1] + radius * math.sin(rad)
             candidates.append((test_x, test_y))
     
-    # 3. Intersections de cercles
+    # 3. Intersections de cercles (seules les paires à moins de 2 * radius se croisent)
+    pair_grid = PointGrid(other_players, 2 * radius) if use_grid else None
     for i in range(len(other_players)):
-        for j in range(i + 1, len(other_players)):
+        neighbours = pair_grid.Candidates(other_players[i]) if pair_grid else range(i + 1, len(other_players))
+        for j in neighbours:
+            if j <= i:
+                continue
             intersections = circle_intersections(other_players[i], other_players[j], radius, radius)
             candidates.extend(intersections)
     
@@ -84,7 +98,7 @@ def find_optimal_position_weighted(current_pos: Tuple[float, float],
             continue
         
         # Compter les players couverts
-        count = count_players_in_radius(candidate, other_players, radius)
+        count = count_covered(candidate)
         
         # Score combiné : couverture - pénalité distance
         score = count - distance_weight * move_distance
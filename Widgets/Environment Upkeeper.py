@@ -52,6 +52,7 @@ def main():
 
     GLOBAL_CACHE._update_cache()
     account_email = GLOBAL_CACHE.Player.GetAccountEmail()
+    GLOBAL_CACHE.ShMem.BeginFrame()
     GLOBAL_CACHE.ShMem.SetPlayerData(account_email)
     GLOBAL_CACHE.ShMem.SetHeroesData()
     GLOBAL_CACHE.ShMem.SetPetData()
@@ -0,0 +1,750 @@
+"""
+Headless benchmark and parity check for the agent snapshot queries in Py4GWCoreLib/AgentArray.py.
+
+Runs the real RawAgentArray, AgentSnapshot, AgentCache and AgentArrayCache over a seeded synthetic
+world; PyAgent, PyPlayer and the game-facing modules they import are replaced by small fakes.
+Native agent reads are counted per query.
+
+    python benchmarks/agent_array_benchmark.py                  # every section
+    python benchmarks/agent_array_benchmark.py grid --seeds 100
+    python benchmarks/agent_array_benchmark.py chains --agents 500 --json results.json
+
+Sections:
+    chains    500 agents; the "lambda chain" column repeats each query the way it was written before
+              the snapshot: a Filter.ByCondition or sorted() lambda calling a GLOBAL_CACHE.Agent getter
+              per agent
+    grid      property checks of AgentSpatialGrid radius, k-nearest and polygon queries, and of
+              Filter.ByDistance and Routines.GetNearest, against brute-force scans over many seeds,
+              layouts (spread out, clumped on cell boundaries) and radii (zero, exact, infinite)
+    scaling   grid and snapshot queries against brute-force scans from 50 to 2,000 agents
+    clusters  DetectLargestAgentCluster, GetBestAoETarget, the custom behaviours' enemy counts and
+              find_optimal_position_weighted against the O(n^2) code they replaced, on fixed seeds
+    vanquish  the same pairs timed on vanquish-sized areas: mobs of 3 to 8 foes, 100 to 600 agents
+Every result is compared with the reference; the script exits 1 on a mismatch.
+"""
+import argparse
+import importlib
+import importlib.util
+import json
+import math
+import os
+import random
+import sys
+import time
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ALLEGIANCES = (1, 2, 3, 4, 5, 6)  # Ally, Neutral, Enemy, SpiritPet, Minion, NpcMinipet
+
+
+#region Fakes
+
+class FakeWorld:
+    """The agents the fakes serve, plus a counter of native object reads."""
+    player_agent_id = 1
+    map_id = 200
+    agents = {}  # agent_id -> FakePyAgent
+    visible = []  # ids the player's agent array reports, in game order
+    native_reads = 0
+
+
+class FakeLivingAgent:
+    def __init__(self, allegiance, hp, effects, type_map, model_id):
+        self.allegiance = types.SimpleNamespace(ToInt=lambda: allegiance)
+        self.hp = hp
+        self.max_hp = 480
+        self.energy = 0.5
+        self.effects = effects
+        self.type_map = type_map
+        self.player_number = model_id
+        self.model_state = 0
+        self.is_aggressive = allegiance == 3
+
+
+class FakePyAgent:
+    def __init__(self, agent_id, x=0.0, y=0.0, kind="living", allegiance=3, hp=1.0, effects=0, type_map=0, model_id=0):
+        self.id = agent_id
+        self.x, self.y, self.z = x, y, 0.0
+        self.is_living = kind == "living"
+        self.is_item = kind == "item"
+        self.is_gadget = kind == "gadget"
+        self.living_agent = FakeLivingAgent(allegiance if self.is_living else 0, hp, effects, type_map, model_id)
+        self.item_agent = types.SimpleNamespace(owner_id=0)
+
+    def GetContext(self):
+        FakeWorld.native_reads += 1
+
+    def IsValid(self, agent_id):
+        return agent_id in FakeWorld.agents
+
+
+def fake_pyagent(agent_id):
+    """What PyAgent.PyAgent(agent_id) returns: a fresh read of the agent, or an empty one."""
+    FakeWorld.native_reads += 1
+    return FakeWorld.agents.get(agent_id) or FakePyAgent(agent_id, kind="none")
+
+
+class FakePyPlayer:
+    def GetContext(self): pass
+
+    def GetAgentArray(self):
+        return list(FakeWorld.visible)
+
+    def _by_allegiance(self, allegiance):
+        agents = FakeWorld.agents
+        return [agent_id for agent_id in FakeWorld.visible
+                if agents[agent_id].is_living and agents[agent_id].living_agent.allegiance.ToInt() == allegiance]
+
+    def GetAllyArray(self): return self._by_allegiance(1)
+    def GetNeutralArray(self): return self._by_allegiance(2)
+    def GetEnemyArray(self): return self._by_allegiance(3)
+    def GetSpiritPetArray(self): return self._by_allegiance(4)
+    def GetMinionArray(self): return self._by_allegiance(5)
+    def GetNPCMinipetArray(self): return self._by_allegiance(6)
+    def GetItemArray(self): return [a for a in FakeWorld.visible if FakeWorld.agents[a].is_item]
+    def GetGadgetArray(self): return [a for a in FakeWorld.visible if FakeWorld.agents[a].is_gadget]
+    def IsAgentIDValid(self, agent_id): return agent_id in FakeWorld.agents
+
+
+def install_fakes():
+    """Register the fakes, import AgentArray without the package __init__ and wire up GLOBAL_CACHE."""
+    sys.path.insert(0, ROOT)
+    for name in ("Py4GWCoreLib", "Py4GWCoreLib.GlobalCache", "Py4GWCoreLib.routines_src"):
+        package = types.ModuleType(name)
+        package.__path__ = [os.path.join(ROOT, *name.split("."))]
+        sys.modules[name] = package
+
+    pyagent = types.ModuleType("PyAgent")
+    pyagent.PyAgent = fake_pyagent
+    sys.modules["PyAgent"] = pyagent
+    pyplayer = types.ModuleType("PyPlayer")
+    pyplayer.PyPlayer = FakePyPlayer
+    sys.modules["PyPlayer"] = pyplayer
+
+    enums = importlib.import_module("Py4GWCoreLib.enums_src.GameData_enums")
+    corelib = types.ModuleType("Py4GWCoreLib.Py4GWcorelib")
+    corelib.Utils = importlib.import_module("Py4GWCoreLib.py4gwcorelib_src.Utils").Utils
+    corelib.ThrottledTimer = importlib.import_module("Py4GWCoreLib.py4gwcorelib_src.Timer").ThrottledTimer
+    agent = types.ModuleType("Py4GWCoreLib.Agent")
+    agent.Agent = types.SimpleNamespace(agent_instance=fake_pyagent)
+    agent.Allegiance = enums.Allegiance
+    agent.Tuple = tuple
+    player = types.ModuleType("Py4GWCoreLib.Player")
+    player.Player = types.SimpleNamespace(player_instance=FakePyPlayer)
+    routines = types.ModuleType("Py4GWCoreLib.Routines")
+    routines.Routines = types.SimpleNamespace(Checks=types.SimpleNamespace(Map=types.SimpleNamespace(MapValid=lambda: True)))
+    map_module = types.ModuleType("Py4GWCoreLib.Map")
+    map_module.Map = types.SimpleNamespace(GetMapID=lambda: FakeWorld.map_id)
+    for module in (corelib, agent, player, routines, map_module):
+        sys.modules[module.__name__] = module
+
+    AgentArray = importlib.import_module("Py4GWCoreLib.AgentArray")
+    raw = AgentArray.RawAgentArray()
+    global_cache = sys.modules["Py4GWCoreLib.GlobalCache"]
+    global_cache.GLOBAL_CACHE = types.SimpleNamespace(
+        Agent=importlib.import_module("Py4GWCoreLib.GlobalCache.AgentCache").AgentCache(raw),
+        AgentArray=importlib.import_module("Py4GWCoreLib.GlobalCache.AgentArrayCache").AgentArrayCache(raw),
+        Player=types.SimpleNamespace(GetAgentID=lambda: FakeWorld.player_agent_id,
+                                     GetXY=lambda: (FakeWorld.agents[FakeWorld.player_agent_id].x,
+                                                    FakeWorld.agents[FakeWorld.player_agent_id].y)))
+    return AgentArray
+
+
+#region World
+
+def make_world(count: int, seed: int, spread: float = 5000.0, enemy_rate: float = 0.6):
+    """
+    count agents scattered over a square of side 2 * spread around the player: mostly enemies, about
+    one in ten dead, a few items and gadgets. Positions are rounded to whole units so exact distance
+    ties happen, like agents standing on the same spot in game.
+    """
+    rng = random.Random(seed)
+    agents = {FakeWorld.player_agent_id: FakePyAgent(FakeWorld.player_agent_id, allegiance=1, hp=1.0)}
+    for agent_id in range(2, count + 1):
+        x, y = round(rng.uniform(-spread, spread)), round(rng.uniform(-spread, spread))
+        roll = rng.random()
+        if roll < 0.03:
+            agents[agent_id] = FakePyAgent(agent_id, x, y, kind="item")
+        elif roll < 0.05:
+            agents[agent_id] = FakePyAgent(agent_id, x, y, kind="gadget")
+        else:
+            allegiance = 3 if rng.random() < enemy_rate else rng.choice(ALLEGIANCES)
+            dead = rng.random() < 0.1
+            hp = 0.0 if dead and rng.random() < 0.5 else round(rng.uniform(0.05, 1.0), 2)
+            effects = 0x0010 if dead and hp > 0.0 else 0
+            agents[agent_id] = FakePyAgent(agent_id, x, y, allegiance=allegiance, hp=hp, effects=effects,
+                                           model_id=rng.randrange(1, 4000))
+    FakeWorld.agents = agents
+    FakeWorld.visible = list(agents)
+    rng.shuffle(FakeWorld.visible)
+
+
+def clump_on_cell_edges(seed: int, cell_size: float = 1000.0):
+    """Move about half the agents onto, or one unit either side of, grid cell corners and edges."""
+    rng = random.Random(seed)
+    for agent in FakeWorld.agents.values():
+        if agent.id != FakeWorld.player_agent_id and rng.random() < 0.5:
+            agent.x = rng.randrange(-3, 4) * cell_size + rng.choice((-1, 0, 0, 1))
+            agent.y = rng.randrange(-3, 4) * cell_size + rng.choice((-1, 0, 0, 1))
+
+
+def refresh(AgentArray):
+    """Force one RawAgentArray refresh, then hold the snapshot so timings are not split by rebuilds."""
+    raw = AgentArray.RawAgentArray()
+    raw.update_throttle.SetThrottleTime(0)
+    raw.update()
+    raw.update_throttle.SetThrottleTime(10 ** 9)
+    return raw
+
+
+def add_unseen_agents(count: int, seed: int):
+    """Agents that spawned after the last refresh: the arrays report them, the snapshot does not."""
+    rng = random.Random(seed)
+    first = max(FakeWorld.agents) + 1
+    for agent_id in range(first, first + count):
+        FakeWorld.agents[agent_id] = FakePyAgent(agent_id, round(rng.uniform(-2000, 2000)),
+                                                 round(rng.uniform(-2000, 2000)), hp=0.5)
+        FakeWorld.visible.append(agent_id)
+
+
+#region Queries
+
+def lambda_chain_queries(AgentArray, GLOBAL_CACHE, Utils):
+    """Each query as written before the snapshot, one getter call per agent."""
+    Filter = AgentArray.AgentArray.Filter
+
+    def filtered_enemies(x, y, max_distance):
+        enemy_array = AgentArray.AgentArray.GetEnemyArray()
+        enemy_array = Filter.ByCondition(enemy_array, lambda agent_id: Utils.Distance((x, y), GLOBAL_CACHE.Agent.GetXY(agent_id)) <= max_distance)
+        enemy_array = Filter.ByCondition(enemy_array, lambda agent_id: GLOBAL_CACHE.Agent.IsAlive(agent_id))
+        enemy_array = Filter.ByCondition(enemy_array, lambda agent_id: GLOBAL_CACHE.Player.GetAgentID() != agent_id)
+        return enemy_array
+
+    def by_distance(agent_array, pos, max_distance, negate=False):
+        def distance_filter(agent_id):
+            agent_x, agent_y = GLOBAL_CACHE.Agent.GetXY(agent_id)
+            distance = Utils.Distance((agent_x, agent_y), (pos[0], pos[1]))
+            return (distance > max_distance) if negate else (distance <= max_distance)
+        return Filter.ByCondition(agent_array, distance_filter)
+
+    def sort_by_distance(agent_array, pos):
+        return sorted(agent_array, key=lambda agent_id: Utils.Distance(GLOBAL_CACHE.Agent.GetXY(agent_id), (pos[0], pos[1])))
+
+    def sort_by_health(agent_array):
+        return sorted(agent_array, key=lambda agent_id: GLOBAL_CACHE.Agent.GetHealth(agent_id))
+
+    def nearest_enemy(pos, max_distance):
+        enemies = sort_by_distance(filtered_enemies(pos[0], pos[1], max_distance), pos)
+        return enemies[0] if enemies else 0
+
+    return filtered_enemies, by_distance, sort_by_distance, sort_by_health, nearest_enemy
+
+
+def snapshot_queries(AgentArray, GLOBAL_CACHE):
+    """The same queries through the current AgentArray and Routines code."""
+    Agents = importlib.import_module("Py4GWCoreLib.routines_src.Agents").Agents
+    Filter, Sort = AgentArray.AgentArray.Filter, AgentArray.AgentArray.Sort
+
+    def nearest_enemy(pos, max_distance):
+        player_id = GLOBAL_CACHE.Player.GetAgentID()
+        return AgentArray.AgentArray.Routines.GetNearest(
+            AgentArray.AgentArray.GetEnemyArray(), pos, max_distance,
+            lambda agent_id: agent_id != player_id and GLOBAL_CACHE.Agent.IsAlive(agent_id))
+
+    return Agents.GetFilteredEnemyArray, Filter.ByDistance, Sort.ByDistance, Sort.ByHealth, nearest_enemy
+
+
+def query_plan(rng, count):
+    """(name, call) pairs over a fixed set of positions and radii, identical for both implementations."""
+    positions = [(rng.uniform(-3000, 3000), rng.uniform(-3000, 3000)) for _ in range(count)]
+    radii = [rng.choice((1012.0, 1248.0, 2500.0, 5000.0)) for _ in range(count)]
+
+    def plan(filtered_enemies, by_distance, sort_by_distance, sort_by_health, nearest_enemy, agent_array):
+        return [
+            ("filter enemies", lambda i: filtered_enemies(positions[i][0], positions[i][1], radii[i])),
+            ("ByDistance", lambda i: by_distance(agent_array, positions[i], radii[i])),
+            ("ByDistance negate", lambda i: by_distance(agent_array, positions[i], radii[i], True)),
+            ("Sort.ByDistance", lambda i: sort_by_distance(agent_array, positions[i])),
+            ("Sort.ByHealth", lambda i: sort_by_health(agent_array)),
+            ("filter + sort", lambda i: sort_by_distance(filtered_enemies(positions[i][0], positions[i][1], radii[i]),
+                                                         positions[i])),
+            ("nearest enemy", lambda i: nearest_enemy(positions[i], radii[i])),
+        ]
+    return plan
+
+
+def run_queries(queries, count):
+    """Per query: (results, us per call, native reads per call)."""
+    results = {}
+    for name, query in queries:
+        reads = FakeWorld.native_reads
+        start = time.perf_counter()
+        answers = [query(i) for i in range(count)]
+        elapsed = time.perf_counter() - start
+        results[name] = (answers, elapsed / count * 1e6, (FakeWorld.native_reads - reads) / count)
+    return results
+
+
+def run_chains(AgentArray, agents, queries, seed, problems, unseen=0):
+    GLOBAL_CACHE = sys.modules["Py4GWCoreLib.GlobalCache"].GLOBAL_CACHE
+    Utils = sys.modules["Py4GWCoreLib.Py4GWcorelib"].Utils
+    make_world(agents, seed)
+    raw = refresh(AgentArray)
+    start = time.perf_counter()
+    AgentArray.AgentSnapshot(raw.agent_array)
+    build_us = (time.perf_counter() - start) * 1e6
+    if unseen:
+        add_unseen_agents(unseen, seed)
+
+    plan = query_plan(random.Random(seed), queries)
+    agent_array = AgentArray.AgentArray.GetAgentArray()
+    before = run_queries(plan(*lambda_chain_queries(AgentArray, GLOBAL_CACHE, Utils), agent_array), queries)
+    after = run_queries(plan(*snapshot_queries(AgentArray, GLOBAL_CACHE), agent_array), queries)
+    rows = {}
+    label = f"{agents} agents" + (f" + {unseen} unseen" if unseen else "")
+    for name, (expected, before_us, before_reads) in before.items():
+        answers, after_us, after_reads = after[name]
+        if answers != expected:
+            problems.append(f"{label}, {name}: results differ from the lambda chain")
+        rows[name] = {"lambda_us": before_us, "snapshot_us": after_us,
+                      "lambda_reads": before_reads, "snapshot_reads": after_reads}
+    return label, build_us, rows
+
+
+def print_chains(label, build_us, rows):
+    print(f"\n{label}, snapshot build {build_us:.0f} us per refresh")
+    for name, row in rows.items():
+        print(f"  {name:18s} lambda chain {row['lambda_us']:9.1f} us   snapshot {row['snapshot_us']:9.1f} us"
+              f"   x {row['lambda_us'] / max(row['snapshot_us'], 1e-9):5.1f}   native reads {row['lambda_reads']:.0f} -> {row['snapshot_reads']:.0f}")
+
+
+#region Grid checks
+
+def brute_rows(snapshot, pos, radius, allegiance=None):
+    """Rows within radius of pos, scanning every row with Utils.Distance's formula."""
+    px, py = pos
+    living = snapshot.FLAG_LIVING
+    return [row for row in range(len(snapshot))
+            if (allegiance is None or (snapshot.flags[row] & living and snapshot.allegiance[row] == allegiance))
+            and math.sqrt((snapshot.x[row] - px) ** 2 + (snapshot.y[row] - py) ** 2) <= radius]
+
+
+def brute_nearest(snapshot, pos, k, max_distance, allegiance=None, predicate=None):
+    px, py = pos
+    rows = brute_rows(snapshot, pos, max_distance, allegiance)
+    ranked = sorted((math.sqrt((snapshot.x[row] - px) ** 2 + (snapshot.y[row] - py) ** 2), row) for row in rows
+                    if predicate is None or predicate(snapshot.ids[row]))
+    return [snapshot.ids[row] for _, row in ranked[:k]]
+
+
+def brute_polygon(snapshot, polygon, allegiance=None):
+    rows = brute_rows(snapshot, (0.0, 0.0), math.inf, allegiance)
+    edges = list(zip(polygon, polygon[-1:] + polygon[:-1]))
+
+    def inside(x, y):
+        result = False
+        for (x1, y1), (x2, y2) in edges:
+            if (y1 > y) != (y2 > y) and x < (x2 - x1) * (y - y1) / (y2 - y1) + x1:
+                result = not result
+        return result
+
+    return [snapshot.ids[row] for row in rows if inside(snapshot.x[row], snapshot.y[row])]
+
+
+def query_radii(rng, snapshot, pos):
+    """Fixed radii plus the exact distance to a random agent, so boundary-inclusive hits are exercised."""
+    radii = [0.0, 1.0, 1012.0, 2500.0, math.inf, rng.uniform(0, 6000)]
+    if len(snapshot):
+        row = rng.randrange(len(snapshot))
+        radii.append(math.sqrt((snapshot.x[row] - pos[0]) ** 2 + (snapshot.y[row] - pos[1]) ** 2))
+    return radii
+
+
+def check_grid_seed(AgentArray, GLOBAL_CACHE, seed, problems):
+    """One seeded world and a batch of random queries; appends a line to problems for each mismatch."""
+    rng = random.Random(seed)
+    count = rng.choice((0, 1, 5, 31, 32, 33, 100, 500, 2000))
+    layout = rng.choice(("spread", "clumped", "tight"))
+    make_world(max(count, 1), seed, spread=300.0 if layout == "tight" else 5000.0)
+    if layout == "clumped":
+        clump_on_cell_edges(seed)
+    refresh(AgentArray)
+    snapshot = GLOBAL_CACHE.AgentArray.GetSnapshot()
+    grid = snapshot.Grid()
+    Filter, Routines = AgentArray.AgentArray.Filter, AgentArray.AgentArray.Routines
+    label = f"seed {seed} ({count} agents, {layout})"
+    distance = snapshot.DistanceKey((0.0, 0.0))
+
+    for _ in range(8):
+        if len(snapshot) and rng.random() < 0.3:
+            row = rng.randrange(len(snapshot))
+            pos = (snapshot.x[row], snapshot.y[row])
+        else:
+            pos = (rng.uniform(-6000, 6000), rng.uniform(-6000, 6000))
+        allegiance = rng.choice((None, None, 1, 3, 6))
+        for radius in query_radii(rng, snapshot, pos):
+            expected = brute_rows(snapshot, pos, radius, allegiance)
+            expected_ids = [snapshot.ids[row] for row in expected]
+            if grid.QueryRadius(pos, radius, allegiance) != expected_ids:
+                problems.append(f"{label}: QueryRadius{pos, radius, allegiance}")
+            if grid.QueryRadiusSet(pos, radius, allegiance) != set(expected_ids):
+                problems.append(f"{label}: QueryRadiusSet{pos, radius, allegiance}")
+
+            k = rng.choice((1, 2, 5, 50))
+            predicate = (lambda agent_id: agent_id % 3 != 0) if rng.random() < 0.5 else None
+            if grid.QueryNearest(pos, k, radius, allegiance, predicate) != brute_nearest(snapshot, pos, k, radius, allegiance, predicate):
+                problems.append(f"{label}: QueryNearest{pos, k, radius, allegiance}")
+
+            # Filter.ByDistance over a random subset, above and below MIN_QUERY_SIZE, both negate values
+            agent_array = rng.sample(list(snapshot.ids), min(len(snapshot), rng.choice((10, 40, 2000))))
+            distance = snapshot.DistanceKey(pos)
+            for negate in (False, True):
+                expected_filter = [agent_id for agent_id in agent_array
+                                   if (distance(agent_id) > radius if negate else distance(agent_id) <= radius)]
+                if Filter.ByDistance(agent_array, pos, radius, negate) != expected_filter:
+                    problems.append(f"{label}: Filter.ByDistance{pos, radius, negate} over {len(agent_array)} agents")
+
+            # GetNearest is Filter.ByDistance + a stable Sort.ByDistance + first
+            ranked = sorted((agent_id for agent_id in agent_array if distance(agent_id) <= radius and (predicate is None or predicate(agent_id))),
+                            key=distance)
+            if Routines.GetNearest(agent_array, pos, radius, predicate) != (ranked[0] if ranked else 0):
+                problems.append(f"{label}: GetNearest{pos, radius} over {len(agent_array)} agents")
+
+        size = rng.uniform(10, 4000)
+        polygon = [(pos[0] + size * math.cos(a), pos[1] + size * math.sin(a))
+                   for a in sorted(rng.uniform(0, 2 * math.pi) for _ in range(rng.randrange(3, 8)))]
+        if grid.QueryPolygon(polygon, allegiance) != brute_polygon(snapshot, polygon, allegiance):
+            problems.append(f"{label}: QueryPolygon around {pos}")
+
+
+def run_grid(AgentArray, seeds, first_seed, problems):
+    GLOBAL_CACHE = sys.modules["Py4GWCoreLib.GlobalCache"].GLOBAL_CACHE
+    before = len(problems)
+    for seed in range(first_seed, first_seed + seeds):
+        check_grid_seed(AgentArray, GLOBAL_CACHE, seed, problems)
+    print(f"\nGrid property checks: {seeds} seeds, {len(problems) - before} mismatches")
+    return {"seeds": seeds, "mismatches": len(problems) - before}
+
+
+def run_scaling(AgentArray, counts, queries, seed):
+    """Per agent count: us per call of each grid query and its brute-force scan, plus the grid build."""
+    GLOBAL_CACHE = sys.modules["Py4GWCoreLib.GlobalCache"].GLOBAL_CACHE
+    Utils = sys.modules["Py4GWCoreLib.Py4GWcorelib"].Utils
+    Filter, Routines = AgentArray.AgentArray.Filter, AgentArray.AgentArray.Routines
+    rows = {}
+    for count in counts:
+        make_world(count, seed)
+        refresh(AgentArray)
+        snapshot = GLOBAL_CACHE.AgentArray.GetSnapshot()
+        start = time.perf_counter()
+        grid = AgentArray.AgentSpatialGrid(snapshot)
+        build_us = (time.perf_counter() - start) * 1e6
+        rng = random.Random(seed)
+        positions = [(rng.uniform(-5000, 5000), rng.uniform(-5000, 5000)) for _ in range(queries)]
+        agent_array = AgentArray.AgentArray.GetAgentArray()
+        get_xy = GLOBAL_CACHE.Agent.GetXY
+
+        def lambda_filter(pos):
+            return Filter.ByCondition(agent_array, lambda agent_id: Utils.Distance(get_xy(agent_id), pos) <= 1248.0)
+
+        def lambda_nearest(pos):
+            in_range = lambda_filter(pos)
+            return min(in_range, key=lambda agent_id: Utils.Distance(get_xy(agent_id), pos), default=0)
+
+        pairs = {
+            "radius 1248": (lambda pos: grid.QueryRadius(pos, 1248.0), lambda pos: brute_rows(snapshot, pos, 1248.0)),
+            "nearest": (lambda pos: grid.QueryNearest(pos, 1), lambda pos: brute_nearest(snapshot, pos, 1, math.inf)),
+            "Filter.ByDistance": (lambda pos: Filter.ByDistance(agent_array, pos, 1248.0), lambda_filter),
+            "GetNearest": (lambda pos: Routines.GetNearest(agent_array, pos, 1248.0), lambda_nearest),
+        }
+        row = {"build_us": build_us}
+        for name, (fast, brute) in pairs.items():
+            timings = []
+            for fn in (fast, brute):
+                start = time.perf_counter()
+                for pos in positions:
+                    fn(pos)
+                timings.append((time.perf_counter() - start) / queries * 1e6)
+            row[name] = {"grid_us": timings[0], "brute_us": timings[1]}
+        rows[count] = row
+    return rows
+
+
+def print_scaling(rows):
+    print("\nScaling, us per query (grid / brute-force scan)")
+    names = [name for name in next(iter(rows.values())) if name != "build_us"]
+    print(f"  {'agents':>6s} {'build':>8s}   " + "   ".join(f"{name:>24s}" for name in names))
+    for count, row in rows.items():
+        cells = [f"{row[name]['grid_us']:9.1f} / {row[name]['brute_us']:9.1f}  " for name in names]
+        print(f"  {count:6d} {row['build_us']:8.0f}   " + "   ".join(f"{cell:>24s}" for cell in cells))
+
+
+#region Clustering checks
+
+def load_position_helpers():
+    """custom_behavior_helpers_tests.py by path; it only needs PointGrid from the bare package."""
+    path = os.path.join(ROOT, "Widgets", "CustomBehaviors", "primitives", "helpers", "custom_behavior_helpers_tests.py")
+    spec = importlib.util.spec_from_file_location("custom_behavior_helpers_tests", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def old_detect_largest_cluster(GLOBAL_CACHE, Utils, agent_array, cluster_radius):
+    """DetectLargestAgentCluster before the neighbour grid: a copy of the unvisited set per node."""
+    if not agent_array:
+        return 0
+    cluster_radius_sq = cluster_radius ** 2
+
+    def is_in_radius(agent1, agent2):
+        x1, y1 = GLOBAL_CACHE.Agent.GetXY(agent1)
+        x2, y2 = GLOBAL_CACHE.Agent.GetXY(agent2)
+        dx, dy = x1 - x2, y1 - y2
+        return (dx * dx + dy * dy) <= cluster_radius_sq
+
+    unvisited = set(agent_array)
+    clusters = []
+    while unvisited:
+        current = unvisited.pop()
+        cluster = [current]
+        stack = [current]
+        while stack:
+            node = stack.pop()
+            neighbors = [a for a in list(unvisited) if is_in_radius(node, a)]
+            for n in neighbors:
+                unvisited.remove(n)
+                cluster.append(n)
+                stack.append(n)
+        clusters.append(cluster)
+
+    largest_cluster = max(clusters, key=len)
+    total_x = total_y = 0
+    for agent_id in largest_cluster:
+        x, y = GLOBAL_CACHE.Agent.GetXY(agent_id)
+        total_x += x
+        total_y += y
+    center_pos = (total_x / len(largest_cluster), total_y / len(largest_cluster))
+    return min(largest_cluster, key=lambda agent_id: Utils.Distance(GLOBAL_CACHE.Agent.GetXY(agent_id), center_pos))
+
+
+def old_enemy_counts(GLOBAL_CACHE, Utils, agent_ids, range_to_count_enemies):
+    """_get_all_possible_enemies_ordered_by_priority_raw's O(n^2) count of enemies around each target."""
+    counts = []
+    for agent_id in agent_ids:
+        agent_pos = GLOBAL_CACHE.Agent.GetXY(agent_id)
+        counts.append(sum(1 for other_agent_id in agent_ids
+                          if other_agent_id != agent_id and Utils.Distance(GLOBAL_CACHE.Agent.GetXY(other_agent_id), agent_pos) <= range_to_count_enemies))
+    return counts
+
+
+def grid_enemy_counts(GLOBAL_CACHE, PointGrid, agent_ids, range_to_count_enemies):
+    """The same counts the way the custom behaviours take them now."""
+    agent_positions = [GLOBAL_CACHE.Agent.GetXY(agent_id) for agent_id in agent_ids]
+    neighbour_grid = PointGrid(agent_positions, range_to_count_enemies)
+    return [sum(1 for other_index in neighbour_grid.Query(agent_positions[index]) if agent_ids[other_index] != agent_id)
+            for index, agent_id in enumerate(agent_ids)]
+
+
+def brute_best_aoe_target(GLOBAL_CACHE, Utils, agent_array, aoe_radius):
+    """The agent covering the most of agent_array within aoe_radius, itself included; first wins ties."""
+    if not agent_array:
+        return 0, 0
+    positions = [GLOBAL_CACHE.Agent.GetXY(agent_id) for agent_id in agent_array]
+    counts = [sum(1 for other in positions if Utils.Distance(pos, other) <= aoe_radius) for pos in positions]
+    best = max(range(len(counts)), key=lambda index: (counts[index], -index))
+    return agent_array[best], counts[best]
+
+
+def old_find_optimal_position_weighted(helpers, current_pos, other_players, radius, max_move_distance=None, distance_weight=0.1):
+    """find_optimal_position_weighted before the coverage and pair grids."""
+    if not other_players:
+        return (current_pos, 0, 0.0)
+    distance, count_players_in_radius = helpers.distance, helpers.count_players_in_radius
+    best_position = current_pos
+    best_count = count_players_in_radius(current_pos, other_players, radius)
+    best_distance = 0.0
+
+    candidates = list(other_players)
+    for player_pos in other_players:
+        for angle in range(0, 360, 30):
+            rad = math.radians(angle)
+            candidates.append((player_pos[0] + radius * math.cos(rad), player_pos[1] + radius * math.sin(rad)))
+    for i in range(len(other_players)):
+        for j in range(i + 1, len(other_players)):
+            candidates.extend(helpers.circle_intersections(other_players[i], other_players[j], radius, radius))
+    for angle in range(0, 360, 15):
+        for dist in [radius * 0.5, radius, radius * 1.5]:
+            rad = math.radians(angle)
+            candidates.append((current_pos[0] + dist * math.cos(rad), current_pos[1] + dist * math.sin(rad)))
+
+    for candidate in candidates:
+        move_distance = distance(current_pos, candidate)
+        if max_move_distance and move_distance > max_move_distance:
+            continue
+        count = count_players_in_radius(candidate, other_players, radius)
+        if count > best_count or (count == best_count and move_distance < best_distance):
+            best_position, best_count, best_distance = candidate, count, move_distance
+    return best_position, best_count, best_distance
+
+
+def make_vanquish_world(seed: int, mobs: int, area: float = 6000.0):
+    """
+    Mobs of 3 to 8 foes around random centres, the way a vanquish area looks from the compass, plus a
+    few duplicates standing exactly on a mob mate. The player stands at the origin.
+    """
+    rng = random.Random(seed)
+    agents = {FakeWorld.player_agent_id: FakePyAgent(FakeWorld.player_agent_id, allegiance=1)}
+    agent_id = FakeWorld.player_agent_id + 1
+    for _ in range(mobs):
+        cx, cy = rng.uniform(-area, area), rng.uniform(-area, area)
+        mob = []
+        for _ in range(rng.randrange(3, 9)):
+            if mob and rng.random() < 0.05:
+                x, y = rng.choice(mob)
+            else:
+                x, y = round(cx + rng.gauss(0, 120)), round(cy + rng.gauss(0, 120))
+            mob.append((x, y))
+            agents[agent_id] = FakePyAgent(agent_id, x, y, allegiance=3, hp=round(rng.uniform(0.1, 1.0), 2))
+            agent_id += 1
+    FakeWorld.agents = agents
+    FakeWorld.visible = list(agents)
+    rng.shuffle(FakeWorld.visible)
+
+
+def cluster_pairs(AgentArray, GLOBAL_CACHE, Utils, helpers, PointGrid):
+    """name -> (current, previous), each called as fn(enemies, radius)."""
+    Routines = AgentArray.AgentArray.Routines
+
+    def positions(enemies):
+        return [GLOBAL_CACHE.Agent.GetXY(agent_id) for agent_id in enemies]
+
+    return {
+        "largest cluster": (lambda enemies, radius: Routines.DetectLargestAgentCluster(enemies, radius),
+                            lambda enemies, radius: old_detect_largest_cluster(GLOBAL_CACHE, Utils, enemies, radius)),
+        "best AoE target": (lambda enemies, radius: Routines.GetBestAoETarget(enemies, radius),
+                            lambda enemies, radius: brute_best_aoe_target(GLOBAL_CACHE, Utils, enemies, radius)),
+        "enemy counts": (lambda enemies, radius: grid_enemy_counts(GLOBAL_CACHE, PointGrid, enemies, radius),
+                         lambda enemies, radius: old_enemy_counts(GLOBAL_CACHE, Utils, enemies, radius)),
+        "optimal position": (lambda enemies, radius: helpers.find_optimal_position_weighted((0.0, 0.0), positions(enemies)[:128], radius),
+                             lambda enemies, radius: old_find_optimal_position_weighted(helpers, (0.0, 0.0), positions(enemies)[:128], radius)),
+    }
+
+
+def check_clusters_seed(AgentArray, pairs, seed, problems):
+    rng = random.Random(seed)
+    if rng.random() < 0.5:
+        make_vanquish_world(seed, rng.randrange(0, 30), area=rng.choice((800.0, 3000.0, 6000.0)))
+    else:
+        make_world(rng.randrange(1, 150), seed, spread=rng.choice((300.0, 2000.0)), enemy_rate=1.0)
+    refresh(AgentArray)
+    enemies = AgentArray.AgentArray.GetEnemyArray()
+    radii = rng.sample((0.0, -1.0, 1.0, 166.0, 240.0, 312.0, 1012.0), 3) + [rng.uniform(50, 600)]
+    for radius in radii:
+        for name, (current, previous) in pairs.items():
+            if name == "optimal position" and (radius <= 0.0 or len(enemies) > 96):
+                continue  # the pre-grid search is quadratic in pairs; keep the check quick
+            if current(enemies, radius) != previous(enemies, radius):
+                problems.append(f"seed {seed} ({len(enemies)} enemies), {name} at radius {radius}")
+
+
+def run_clusters(AgentArray, seeds, first_seed, problems):
+    GLOBAL_CACHE = sys.modules["Py4GWCoreLib.GlobalCache"].GLOBAL_CACHE
+    Utils = sys.modules["Py4GWCoreLib.Py4GWcorelib"].Utils
+    PointGrid = importlib.import_module("Py4GWCoreLib.py4gwcorelib_src.Clustering").PointGrid
+    pairs = cluster_pairs(AgentArray, GLOBAL_CACHE, Utils, load_position_helpers(), PointGrid)
+    before = len(problems)
+    for seed in range(first_seed, first_seed + seeds):
+        check_clusters_seed(AgentArray, pairs, seed, problems)
+    print(f"\nClustering parity: {seeds} seeds, {len(problems) - before} mismatches")
+    return {"seeds": seeds, "mismatches": len(problems) - before}
+
+
+def run_vanquish(AgentArray, mob_counts, seed, problems, radius=312.0):
+    """us per call of each clustering routine and the code it replaced, per vanquish-sized area."""
+    GLOBAL_CACHE = sys.modules["Py4GWCoreLib.GlobalCache"].GLOBAL_CACHE
+    Utils = sys.modules["Py4GWCoreLib.Py4GWcorelib"].Utils
+    PointGrid = importlib.import_module("Py4GWCoreLib.py4gwcorelib_src.Clustering").PointGrid
+    pairs = cluster_pairs(AgentArray, GLOBAL_CACHE, Utils, load_position_helpers(), PointGrid)
+    rows = {}
+    for mobs in mob_counts:
+        make_vanquish_world(seed, mobs)
+        refresh(AgentArray)
+        enemies = AgentArray.AgentArray.GetEnemyArray()
+        row = {}
+        for name, (current, previous) in pairs.items():
+            timings, answers = [], []
+            for fn in (current, previous):
+                rounds = 1 if fn is previous and len(enemies) > 300 else 3
+                start = time.perf_counter()
+                for _ in range(rounds):
+                    answer = fn(enemies, radius)
+                timings.append((time.perf_counter() - start) / rounds * 1e6)
+                answers.append(answer)
+            if answers[0] != answers[1]:
+                problems.append(f"vanquish {mobs} mobs, {name}: result differs from the previous code")
+            row[name] = {"current_us": timings[0], "previous_us": timings[1]}
+        rows[len(enemies)] = row
+    return rows
+
+
+def print_vanquish(rows, radius=312.0):
+    print(f"\nVanquish areas, radius {radius:.0f}, us per call (current / previous)")
+    names = list(next(iter(rows.values())))
+    print(f"  {'foes':>6s}   " + "   ".join(f"{name:>26s}" for name in names))
+    for foes, row in rows.items():
+        cells = [f"{row[name]['current_us']:9.0f} / {row[name]['previous_us']:11.0f}" for name in names]
+        print(f"  {foes:6d}   " + "   ".join(f"{cell:>26s}" for cell in cells))
+
+
+SECTIONS = ("chains", "grid", "scaling", "clusters", "vanquish")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("sections", nargs="*", help=f"sections to run (default: all of {', '.join(SECTIONS)})")
+    parser.add_argument("--agents", type=int, default=500, help="agents in the synthetic world")
+    parser.add_argument("--seeds", type=int, default=40, help="worlds the grid and clustering checks generate")
+    parser.add_argument("--counts", type=int, nargs="+", default=[50, 100, 250, 500, 1000, 2000],
+                        help="agent counts for the scaling section")
+    parser.add_argument("--mobs", type=int, nargs="+", default=[20, 40, 80],
+                        help="mob counts for the vanquish section")
+    parser.add_argument("--queries", type=int, default=50, help="query positions per measurement")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+    unknown = [name for name in args.sections if name not in SECTIONS]
+    if unknown:
+        parser.error(f"unknown sections {unknown}, choose from {SECTIONS}")
+    sections = args.sections or SECTIONS
+
+    AgentArray = install_fakes()
+    problems = []
+    results = {}
+    if "chains" in sections:
+        for unseen in (0, 25):
+            label, build_us, rows = run_chains(AgentArray, args.agents, args.queries, args.seed, problems, unseen)
+            results[label] = {"build_us": build_us, "queries": rows}
+            print_chains(label, build_us, rows)
+    if "grid" in sections:
+        results["grid"] = run_grid(AgentArray, args.seeds, args.seed, problems)
+    if "scaling" in sections:
+        results["scaling"] = run_scaling(AgentArray, args.counts, args.queries, args.seed)
+        print_scaling(results["scaling"])
+    if "clusters" in sections:
+        results["clusters"] = run_clusters(AgentArray, args.seeds, args.seed, problems)
+    if "vanquish" in sections:
+        results["vanquish"] = run_vanquish(AgentArray, args.mobs, args.seed, problems)
+        print_vanquish(results["vanquish"])
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "results": results, "problems": problems}, f, indent=2)
+    for problem in problems:
+        print(f"FAIL {problem}")
+    if problems:
+        sys.exit(1)
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+"""
+Headless benchmark for the frame-stamped effects cache (Py4GWCoreLib/GlobalCache/EffectCache.py).
+
+Runs the real EffectsCache with PyEffects, PyPlayer and the action queue replaced by fakes, and
+simulates frames in which every agent's buffs and effects are asked about many times, the way
+HeroAI's condition checks and the shared-memory mirror do.
+
+    python benchmarks/effects_cache_benchmark.py
+    python benchmarks/effects_cache_benchmark.py --agents 24 --frames 50 --json results.json
+
+Two caches are compared on the same agents:
+    before    EffectsCache before the frame stamps: a PyEffects read for every query
+    cached    EffectsCache driven by _update_cache once per frame
+Every answer is checked against a direct PyEffects read, the cache must construct PyEffects exactly once per
+queried agent per frame (GetCacheStats must agree), a map change must clear it, and queries made while
+nothing drives _update_cache must read live. Exits 1 on a failure.
+"""
+import argparse
+import importlib
+import json
+import os
+import random
+import sys
+import time
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PLAYER_ID = 1
+
+
+class FakeEffectType:
+    def __init__(self, skill_id, attribute_level, effect_id, agent_id, duration, time_remaining):
+        self.skill_id = skill_id
+        self.attribute_level = attribute_level
+        self.effect_id = effect_id
+        self.agent_id = agent_id
+        self.duration = duration
+        self.timestamp = 0
+        self.time_elapsed = duration - time_remaining
+        self.time_remaining = time_remaining
+
+
+class FakeBuffType:
+    def __init__(self, skill_id, buff_id, target_agent_id):
+        self.skill_id = skill_id
+        self.buff_id = buff_id
+        self.target_agent_id = target_agent_id
+
+
+class FakeWorld:
+    """Buffs and effects per agent, and how many PyEffects objects were constructed."""
+    def __init__(self):
+        self.buffs = {}
+        self.effects = {}
+        self.constructions = 0
+
+
+WORLD = FakeWorld()
+
+
+class FakePyEffects:
+    def __init__(self, agent_id):
+        WORLD.constructions += 1
+        self.agent_id = agent_id
+
+    def GetBuffs(self):
+        return list(WORLD.buffs.get(self.agent_id, ()))
+
+    def GetEffects(self):
+        return list(WORLD.effects.get(self.agent_id, ()))
+
+    def GetBuffCount(self):
+        return len(WORLD.buffs.get(self.agent_id, ()))
+
+    def GetEffectCount(self):
+        return len(WORLD.effects.get(self.agent_id, ()))
+
+    def BuffExists(self, skill_id):
+        return any(buff.skill_id == skill_id for buff in WORLD.buffs.get(self.agent_id, ()))
+
+    def EffectExists(self, skill_id):
+        return any(effect.skill_id == skill_id for effect in WORLD.effects.get(self.agent_id, ()))
+
+    def DropBuff(self, buff_id):
+        WORLD.buffs[self.agent_id] = [buff for buff in WORLD.buffs.get(self.agent_id, ()) if buff.buff_id != buff_id]
+
+
+def install_fakes():
+    """Register the fakes and import EffectCache without Py4GWCoreLib's package __init__."""
+    sys.path.insert(0, ROOT)
+    py_effects = types.ModuleType("PyEffects")
+    py_effects.PyEffects = FakePyEffects
+    py_effects.EffectType = FakeEffectType
+    py_effects.BuffType = FakeBuffType
+    sys.modules["PyEffects"] = py_effects
+    py_player = types.ModuleType("PyPlayer")
+    py_player.PyPlayer = lambda: types.SimpleNamespace(id=PLAYER_ID)
+    sys.modules["PyPlayer"] = py_player
+    core = types.ModuleType("Py4GWCoreLib")
+    core.__path__ = [os.path.join(ROOT, "Py4GWCoreLib")]
+    sys.modules["Py4GWCoreLib"] = core
+    global_cache = types.ModuleType("Py4GWCoreLib.GlobalCache")
+    global_cache.__path__ = [os.path.join(ROOT, "Py4GWCoreLib", "GlobalCache")]
+    sys.modules["Py4GWCoreLib.GlobalCache"] = global_cache
+    corelib = types.ModuleType("Py4GWCoreLib.Py4GWcorelib")
+    corelib.ActionQueueManager = lambda: types.SimpleNamespace(AddAction=lambda queue, action: action())
+    sys.modules["Py4GWCoreLib.Py4GWcorelib"] = corelib
+    return importlib.import_module("Py4GWCoreLib.GlobalCache.EffectCache").EffectsCache
+
+
+#region Direct reads
+class BeforeEffectsCache:
+    """The getters this benchmark calls, as EffectsCache had them before the frame stamps."""
+    _buff_cache: dict[int, list] = {}
+    _effect_cache: dict[int, list] = {}
+    _buff_id_cache: dict[int, set[int]] = {}
+    _effect_id_cache: dict[int, set[int]] = {}
+
+    @classmethod
+    def _update_or_insert(cls, agent_id: int):
+        effects = FakePyEffects(agent_id)
+        buffs = effects.GetBuffs()
+        effect_list = effects.GetEffects()
+        cls._buff_cache[agent_id] = buffs
+        cls._effect_cache[agent_id] = effect_list
+        cls._buff_id_cache[agent_id] = {buff.skill_id for buff in buffs}
+        cls._effect_id_cache[agent_id] = {effect.skill_id for effect in effect_list}
+
+    @classmethod
+    def GetBuffs(cls, agent_id: int):
+        cls._update_or_insert(agent_id)
+        return cls._buff_cache[agent_id]
+
+    @classmethod
+    def GetEffects(cls, agent_id: int):
+        cls._update_or_insert(agent_id)
+        return cls._effect_cache[agent_id]
+
+    @classmethod
+    def GetBuffCount(cls, agent_id: int):
+        return len(cls.GetBuffs(agent_id))
+
+    @classmethod
+    def GetEffectCount(cls, agent_id: int):
+        return len(cls.GetEffects(agent_id))
+
+    @classmethod
+    def BuffExists(cls, agent_id: int, skill_id: int):
+        cls._update_or_insert(agent_id)
+        return skill_id in cls._buff_id_cache[agent_id]
+
+    @classmethod
+    def EffectExists(cls, agent_id: int, skill_id: int):
+        cls._update_or_insert(agent_id)
+        return skill_id in cls._effect_id_cache[agent_id]
+
+    @classmethod
+    def HasEffect(cls, agent_id: int, skill_id: int):
+        cls._update_or_insert(agent_id)
+        return skill_id in cls._effect_id_cache[agent_id] or skill_id in cls._buff_id_cache[agent_id]
+
+    @classmethod
+    def EffectAttributeLevel(cls, agent_id: int, skill_id: int):
+        for effect in cls.GetEffects(agent_id):
+            if effect.skill_id == skill_id:
+                return effect.attribute_level
+        return 0
+
+    @classmethod
+    def GetEffectTimeRemaining(cls, agent_id: int, skill_id: int):
+        for effect in cls.GetEffects(agent_id):
+            if effect.skill_id == skill_id:
+                return effect.time_remaining
+        return 0
+
+    @classmethod
+    def GetBuffID(cls, skill_id: int) -> int:
+        for buff in cls.GetBuffs(PLAYER_ID):
+            if buff.skill_id == skill_id:
+                return buff.buff_id
+        return 0
+
+
+def direct_answers(agent_id, skill_ids):
+    """Every getter answered straight from one fresh PyEffects."""
+    effects = FakePyEffects(agent_id)
+    buffs = effects.GetBuffs()
+    effect_list = effects.GetEffects()
+    answers = [[(buff.skill_id, buff.buff_id) for buff in buffs],
+               [(effect.skill_id, effect.time_remaining) for effect in effect_list],
+               len(buffs), len(effect_list)]
+    for skill_id in skill_ids:
+        effect = next((effect for effect in effect_list if effect.skill_id == skill_id), None)
+        answers.append((effects.BuffExists(skill_id),
+                        effects.EffectExists(skill_id),
+                        effects.BuffExists(skill_id) or effects.EffectExists(skill_id),
+                        effect.attribute_level if effect is not None else 0,
+                        effect.time_remaining if effect is not None else 0))
+    if agent_id == PLAYER_ID:
+        for skill_id in skill_ids:
+            buff = next((buff for buff in buffs if buff.skill_id == skill_id), None)
+            answers.append(buff.buff_id if buff is not None else 0)
+    return answers
+
+
+def cached_answers(cache, agent_id, skill_ids):
+    answers = [[(buff.skill_id, buff.buff_id) for buff in cache.GetBuffs(agent_id)],
+               [(effect.skill_id, effect.time_remaining) for effect in cache.GetEffects(agent_id)],
+               cache.GetBuffCount(agent_id), cache.GetEffectCount(agent_id)]
+    for skill_id in skill_ids:
+        answers.append((cache.BuffExists(agent_id, skill_id),
+                        cache.EffectExists(agent_id, skill_id),
+                        cache.HasEffect(agent_id, skill_id),
+                        cache.EffectAttributeLevel(agent_id, skill_id),
+                        cache.GetEffectTimeRemaining(agent_id, skill_id)))
+    if agent_id == PLAYER_ID:
+        for skill_id in skill_ids:
+            answers.append(cache.GetBuffID(skill_id))
+    return answers
+#endregion
+
+
+#region World
+def randomize_agent(rng, agent_id, skills):
+    """New buffs and effects for the agent; skill ids repeat so first-occurrence order matters."""
+    WORLD.buffs[agent_id] = [FakeBuffType(rng.choice(skills), rng.randrange(1, 10_000), agent_id)
+                             for _ in range(rng.randrange(0, 8))]
+    effects = []
+    for _ in range(rng.randrange(0, 12)):
+        duration = rng.randrange(1, 60_000)
+        effects.append(FakeEffectType(rng.choice(skills), rng.randrange(0, 21), rng.randrange(1, 10_000),
+                                      agent_id, duration, rng.randrange(0, duration)))
+    WORLD.effects[agent_id] = effects
+
+
+def make_world(rng, agents, skills):
+    WORLD.buffs.clear()
+    WORLD.effects.clear()
+    for agent_id in agents:
+        randomize_agent(rng, agent_id, skills)
+#endregion
+
+
+#region Checks
+def run_frames(cache, mode, rng, agents, skills, frames, queries, problems):
+    """Frames of queries; agents change between frames. Returns us per frame."""
+    elapsed = 0.0
+    for frame in range(frames):
+        for agent_id in rng.sample(agents, max(1, len(agents) // 4)):
+            randomize_agent(rng, agent_id, skills)
+        queried = [rng.sample(skills, queries) for _ in agents]
+        expected = [direct_answers(agent_id, skill_ids) for agent_id, skill_ids in zip(agents, queried)]
+        WORLD.constructions = 0
+        cache.ResetCacheStats()
+        start = time.perf_counter()
+        if mode == "before":
+            answers = [cached_answers(BeforeEffectsCache, agent_id, skill_ids)
+                       for agent_id, skill_ids in zip(agents, queried)]
+        else:
+            cache._update_cache(cache._map_id)
+            answers = [cached_answers(cache, agent_id, skill_ids) for agent_id, skill_ids in zip(agents, queried)]
+        elapsed += time.perf_counter() - start
+        if answers != expected:
+            problems.append(f"{mode}: frame {frame} answers differ from direct PyEffects reads")
+        if mode == "cached":
+            hits, misses = cache.GetCacheStats()
+            if WORLD.constructions != len(agents):
+                problems.append(f"frame {frame}: {WORLD.constructions} PyEffects constructions for {len(agents)} agents")
+            if misses != len(agents) or hits == 0:
+                problems.append(f"frame {frame}: GetCacheStats() is ({hits}, {misses}) for {len(agents)} agents")
+    return elapsed / frames * 1e6
+
+
+def check_map_change(cache, rng, agents, skills, problems):
+    """A new map id clears every agent, and the next query reads PyEffects again."""
+    cache._update_cache(cache._map_id)
+    for agent_id in agents:
+        cache.GetBuffs(agent_id)
+    cache._update_cache(cache._map_id + 1)
+    if cache._frame_stamps or cache._buff_cache or cache._effect_by_skill:
+        problems.append("a map change left agents in the cache")
+    agent_id = agents[0]
+    randomize_agent(rng, agent_id, skills)
+    WORLD.constructions = 0
+    if cached_answers(cache, agent_id, skills) != direct_answers(agent_id, skills):
+        problems.append("answers after a map change differ from direct PyEffects reads")
+    if WORLD.constructions != 2:
+        problems.append(f"{WORLD.constructions - 1} PyEffects constructions for one agent after a map change")
+
+
+def check_undriven(cache, rng, agents, skills, problems):
+    """Without _update_cache every query reads live, so changes within a frame are seen."""
+    cache._update_cache(cache._map_id)
+    cache._last_tick = time.monotonic() - 2 * cache._max_tick_gap
+    agent_id = agents[0]
+    for _ in range(5):
+        randomize_agent(rng, agent_id, skills)
+        WORLD.constructions = 0
+        cache.ResetCacheStats()
+        answers = cached_answers(cache, agent_id, skills)
+        if answers != direct_answers(agent_id, skills):
+            problems.append("an undriven query returned cached effects")
+            break
+        hits, _ = cache.GetCacheStats()
+        if hits:
+            problems.append(f"{hits} cache hits while nothing drives _update_cache")
+            break
+#endregion
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--agents", type=int, default=16, help="agents queried per frame (party, allies, foes)")
+    parser.add_argument("--skills", type=int, default=40, help="distinct skill ids in play")
+    parser.add_argument("--queries", type=int, default=10, help="skill ids asked about per agent per frame")
+    parser.add_argument("--frames", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    cache = install_fakes()
+    rng = random.Random(args.seed)
+    agents = [PLAYER_ID] + [100 + i for i in range(args.agents - 1)]
+    skills = list(range(1, args.skills + 1))
+    queries = min(args.queries, args.skills)
+    problems = []
+    results = {}
+    for mode in ("before", "cached"):
+        make_world(random.Random(args.seed), agents, skills)
+        results[mode] = run_frames(cache, mode, random.Random(args.seed), agents, skills, args.frames, queries, problems)
+    check_map_change(cache, rng, agents, skills, problems)
+    check_undriven(cache, rng, agents, skills, problems)
+
+    print(f"{len(agents)} agents x {queries} skill ids, {args.frames} frames")
+    for mode, frame_us in results.items():
+        print(f"  {mode:8s} {frame_us:10.1f} us per frame   x {results['before'] / frame_us:6.1f}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "frame_us": results, "problems": problems}, f, indent=2)
+    for problem in problems:
+        print(f"FAIL {problem}")
+    if problems:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
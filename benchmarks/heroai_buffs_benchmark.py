@@ -0,0 +1,179 @@
+"""
+Headless benchmark for HeroAI's party buff table (HeroAI/shared_memory_manager.py).
+
+Runs the real SharedMemoryManager over a private shared-memory segment with Py4GW and GLOBAL_CACHE
+replaced by fakes, and simulates a full party's frames: every member refreshes its buffs (set_buff,
+which only moves LastUpdated) and then runs its skills' condition checks, which ask HasEffect of every
+party member for the skill and its shared effects.
+
+    python benchmarks/heroai_buffs_benchmark.py
+    python benchmarks/heroai_buffs_benchmark.py --members 8 --frames 50 --json results.json
+
+Three lookups are compared on the same table:
+    scan      what CombatClass.HasEffect did before the index: get_agent_buffs over all 240 slots
+    keys      the first index, rebuilt whenever a copy of the PlayerID/Buff_id columns differed
+    version   the index rebuilt only when PlayerBuffsVersion moves
+Every answer is checked against the scan, and a second manager on the same segment checks that a buff
+added or reset by another process is seen. Exits 1 on a mismatch.
+"""
+import argparse
+import importlib
+import json
+import os
+import random
+import sys
+import time
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def install_fakes():
+    """Register the fakes and import HeroAI's manager without Py4GWCoreLib's package __init__."""
+    sys.path.insert(0, ROOT)
+    py4gw = types.ModuleType("Py4GW")
+    py4gw.Console = types.SimpleNamespace(MessageType=types.SimpleNamespace(Info=0, Warning=1, Error=2, Success=3),
+                                          Log=lambda *args: None)
+    sys.modules["Py4GW"] = py4gw
+    core = types.ModuleType("Py4GWCoreLib")
+    core.__path__ = [os.path.join(ROOT, "Py4GWCoreLib")]
+    skill_ids = {}
+    core.GLOBAL_CACHE = types.SimpleNamespace(Skill=types.SimpleNamespace(
+        GetID=lambda skill_name: skill_ids.setdefault(skill_name, 1000 + len(skill_ids))))
+    sys.modules["Py4GWCoreLib"] = core
+    core.Range = importlib.import_module("Py4GWCoreLib.enums_src.GameData_enums").Range
+    return importlib.import_module("HeroAI.shared_memory_manager")
+
+
+def keys_refresh(manager):
+    """The previous _refresh_buff_index: copy and compare both key columns on every call."""
+    words = memoryview(bytes(manager.game_struct.PlayerBuffs)).cast('i')
+    player_ids = words[0::3]
+    buff_ids = words[1::3]
+    keys = player_ids.tobytes() + buff_ids.tobytes()
+    if keys == getattr(manager, "_bench_keys", b""):
+        return
+    buff_index = {}
+    for index, key in enumerate(zip(player_ids.tolist(), buff_ids.tolist())):
+        buff_index.setdefault(key, index)
+    manager._bench_keys = keys
+    manager._buff_index = buff_index
+
+
+def has_effect_scan(manager, agent_id, skill_id, shared_effects):
+    """CombatClass.HasEffect's party-member branch before the index."""
+    result = False
+    for buff in manager.get_agent_buffs(agent_id):
+        if buff == skill_id or buff in shared_effects:
+            result = True
+    return result
+
+
+def has_effect_index(manager, agent_id, skill_id, shared_effects):
+    """CombatClass.HasEffect's party-member branch now."""
+    buff_exists = manager.buff_exists
+    return buff_exists(agent_id, skill_id) or any(buff_exists(agent_id, shared_buff) for shared_buff in shared_effects)
+
+
+def make_party(members, buffs_per_member, skills_per_member, rng):
+    agents = [100 + i for i in range(members)]
+    buffs = {agent_id: rng.sample(range(1, 400), buffs_per_member) for agent_id in agents}
+    checks = [(rng.randrange(1, 400), frozenset(rng.sample(range(1, 400), 2)))
+              for _ in range(members * skills_per_member)]
+    return agents, buffs, checks
+
+
+def run_frames(module, manager, mode, agents, buffs, checks, frames):
+    """Frames of the party's buff refresh plus condition checks; returns (us per frame, answers)."""
+    has_effect = has_effect_scan if mode == "scan" else has_effect_index
+    manager._buff_version = None
+    if mode == "keys":
+        manager._refresh_buff_index = types.MethodType(keys_refresh, manager)
+    else:
+        manager.__dict__.pop("_refresh_buff_index", None)
+    answers = []
+    elapsed = 0.0
+    for _ in range(frames):
+        start = time.perf_counter()
+        now = module.get_base_timestamp()
+        for agent_id in agents:
+            for skill_id in buffs[agent_id]:
+                manager.set_buff({"PlayerID": agent_id, "Buff_id": skill_id, "LastUpdated": now})
+        frame_answers = [has_effect(manager, agent_id, skill_id, shared_effects)
+                         for skill_id, shared_effects in checks for agent_id in agents]
+        elapsed += time.perf_counter() - start
+        answers.append(frame_answers)
+    manager.__dict__.pop("_refresh_buff_index", None)
+    return elapsed / frames * 1e6, answers
+
+
+def check_other_process(module, name, manager, problems):
+    """A second manager on the segment adds and resets a buff; the first must see both through the version."""
+    other = object.__new__(module.SharedMemoryManager)
+    other.shm = module.shared_memory.SharedMemory(name=name)
+    other.game_struct = module.GameStruct.from_buffer(other.shm.buf)
+    other._buff_version = None
+    other._buff_index = {}
+    agent_id, skill_id = 999, 4242
+    manager.buff_exists(agent_id, skill_id)  # builds the first manager's index
+    other.set_buff({"PlayerID": agent_id, "Buff_id": skill_id, "LastUpdated": module.get_base_timestamp()})
+    if not manager.buff_exists(agent_id, skill_id):
+        problems.append("a buff set by another process was not found")
+    words = memoryview(bytes(other.game_struct.PlayerBuffs)).cast('i').tolist()
+    for index in range(len(words) // 3):
+        if words[3 * index] == agent_id and words[3 * index + 1] == skill_id:
+            other.reset_buff(index)
+    if manager.buff_exists(agent_id, skill_id):
+        problems.append("a buff reset by another process was still found")
+    del other.game_struct
+    other.shm.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--members", type=int, default=8, help="party members (player, heroes and other accounts)")
+    parser.add_argument("--buffs", type=int, default=12, help="buffs and effects per member")
+    parser.add_argument("--skills", type=int, default=8, help="condition checks per member per frame")
+    parser.add_argument("--frames", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    module = install_fakes()
+    name = f"HeroAI_Bench_{os.getpid()}"
+    manager = module.SharedMemoryManager(name=name)
+    problems = []
+    try:
+        agents, buffs, checks = make_party(args.members, args.buffs, args.skills, random.Random(args.seed))
+        results = {}
+        expected = None
+        for mode in ("scan", "keys", "version"):
+            frame_us, answers = run_frames(module, manager, mode, agents, buffs, checks, args.frames)
+            if expected is None:
+                expected = answers
+            elif answers != expected:
+                problems.append(f"{mode}: condition checks differ from the scan")
+            results[mode] = frame_us
+        check_other_process(module, name, manager, problems)
+    finally:
+        del manager.game_struct
+        manager.shm.close()
+        manager.shm.unlink()
+
+    checks_per_frame = len(checks) * len(agents)
+    print(f"{args.members} members x {args.buffs} buffs, {checks_per_frame} HasEffect checks per frame")
+    for mode, frame_us in results.items():
+        print(f"  {mode:8s} {frame_us:10.1f} us per frame   {frame_us / checks_per_frame:6.2f} us per check"
+              f"   x {results['scan'] / frame_us:6.1f}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "frame_us": results, "problems": problems}, f, indent=2)
+    for problem in problems:
+        print(f"FAIL {problem}")
+    if problems:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
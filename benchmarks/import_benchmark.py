@@ -0,0 +1,378 @@
+"""
+Cold import benchmark, import-time profiler and regression check for the Py4GWCoreLib package.
+
+Every measurement runs in a fresh interpreter. The native modules (Py4GW, PyImGui, PyMap, ... as listed in
+stubs/) are replaced by permissive runtime stubs, so the timings cover the Python side only. The package needs
+the Python the game embeds (3.12+); pick another interpreter with --python.
+
+    python benchmarks/import_benchmark.py                    # cold import time and modules loaded per scenario;
+                                                             # exit 1 if a light import loads heavy modules
+    python benchmarks/import_benchmark.py --profile "from Py4GWCoreLib import *"   # slowest modules, -X importtime
+    python benchmarks/import_benchmark.py --check            # lazy name index against a full load
+    python benchmarks/import_benchmark.py --print-index      # rebuild _LAZY_ATTRIBUTES after adding exports
+    python benchmarks/import_benchmark.py --save-baseline    # store this run as the baseline
+    python benchmarks/import_benchmark.py --compare          # exit 1 if slower/loading more than the baseline
+
+The light scenarios (the bare package and ConsoleLog) must not load any of HEAVY_MODULES or more than
+LIGHT_MODULE_LIMIT package modules. That holds on any machine, so it is checked on every run; the timing
+baseline is optional and local.
+"""
+import argparse
+import importlib.abc
+import importlib.machinery
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+DEFAULT_BASELINE = os.path.join(HERE, "import_baseline.json")
+PACKAGE = "Py4GWCoreLib"
+HEAVY_MODULES = ("Py4GWCoreLib.model_data", "Py4GWCoreLib.enums_src.Model_enums", "Py4GWCoreLib.SkillManager",
+                 "Py4GWCoreLib.Routines", "Py4GWCoreLib.GlobalCache", "Py4GWCoreLib.Botting")
+LIGHT_SCENARIOS = ("package", "ConsoleLog")
+LIGHT_MODULE_LIMIT = 8
+SCENARIOS = (
+    ("package", "import Py4GWCoreLib"),
+    ("ConsoleLog", "from Py4GWCoreLib import ConsoleLog"),
+    ("enums", "from Py4GWCoreLib import Bags, ModelID, Range"),
+    ("GLOBAL_CACHE", "from Py4GWCoreLib import GLOBAL_CACHE"),
+    ("widget", "from Py4GWCoreLib import ImGui, Player, Map, Routines"),
+    ("Botting", "from Py4GWCoreLib import Botting"),
+    ("star", "from Py4GWCoreLib import *"),
+)
+
+
+#region Native stubs
+
+class Stub:
+    """Stands in for any native object: attributes, calls, iteration, numbers and subclassing all work."""
+    def __init__(self, name):
+        self._name = name
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        value = Stub(f"{self._name}.{name}")
+        setattr(self, name, value)  # the same attribute is the same object, as with a real module
+        return value
+
+    def __call__(self, *args, **kwargs): return Stub(f"{self._name}()")
+    def __mro_entries__(self, bases): return (object,)
+    def __iter__(self): return iter(())
+    def __len__(self): return 0
+    def __bool__(self): return False
+    def __int__(self): return 0
+    def __index__(self): return 0
+    def __float__(self): return 0.0
+    def __or__(self, other): return self
+    __ror__ = __and__ = __rand__ = __add__ = __radd__ = __sub__ = __rsub__ = __mul__ = __rmul__ = __or__
+    def __repr__(self): return f"<stub {self._name}>"
+
+
+class NativeStubFinder(importlib.abc.MetaPathFinder, importlib.abc.Loader):
+    def __init__(self, names):
+        self.names = names
+
+    def find_spec(self, name, path, target=None):
+        return importlib.machinery.ModuleSpec(name, self) if name in self.names else None
+
+    def create_module(self, spec):
+        module = types.ModuleType(spec.name)
+
+        def module_getattr(name):
+            if name.startswith("__"):
+                raise AttributeError(name)
+            value = Stub(f"{spec.name}.{name}")
+            setattr(module, name, value)
+            return value
+
+        module.__getattr__ = module_getattr
+        return module
+
+    def exec_module(self, module):
+        pass
+
+
+def install_stubs(root):
+    names = {name[:-4] for name in os.listdir(os.path.join(root, "stubs")) if name.endswith(".pyi")}
+    sys.meta_path.insert(0, NativeStubFinder(names | {"PyTrading"}))
+    py4gw = importlib.import_module("Py4GW")
+    py4gw.Console = types.SimpleNamespace(
+        MessageType=types.SimpleNamespace(Info=0, Warning=1, Error=2, Debug=3, Success=4, Performance=5, Notice=6),
+        Log=lambda *args, **kwargs: None, get_projects_path=lambda: root)
+    sys.path.insert(0, root)
+    os.chdir(os.environ.get("IMPORT_BENCHMARK_CWD", root))
+
+
+#region Child processes
+
+def child_measure(code):
+    """Time one statement from a cold start; report the package modules it pulled in."""
+    start = time.perf_counter()
+    exec(compile(code, "<scenario>", "exec"), {"__name__": "__scenario__"})
+    seconds = time.perf_counter() - start
+    loaded = sorted(name for name in sys.modules if name == PACKAGE or name.startswith(PACKAGE + "."))
+    return {"cold_ms": seconds * 1e3, "modules": len(loaded), "heavy": [name for name in HEAVY_MODULES if name in loaded]}
+
+
+def child_check(names):
+    """Resolve names lazily from a cold start, then compare them with what a full load binds."""
+    package = importlib.import_module(PACKAGE)
+    bound_by_init = {name for name in vars(package) if not name.startswith("_")}
+    lazy = {name: getattr(package, name) for name in names}
+    namespace = {}
+    exec(f"from {PACKAGE} import *", namespace)
+    problems = [f"{name}: lazy value differs from the full load" for name, value in lazy.items()
+                if namespace.get(name) is not value]
+    index = set(package._LAZY_NAMES)
+    public = {name for name in namespace if not name.startswith("__")}
+    problems += [f"{name}: in the index but not bound by a full load" for name in sorted(index - public)]
+    return {"problems": problems, "unindexed": sorted(public - index - bound_by_init), "public": sorted(public)}
+
+
+def child_index():
+    """_LAZY_ATTRIBUTES rebuilt from a full load, keeping entries that still resolve to the same object."""
+    package = importlib.import_module(PACKAGE)
+    bound_by_init = {name for name in vars(package) if not name.startswith("_")}
+    namespace = {}
+    exec(f"from {PACKAGE} import *", namespace)
+    table = {}
+    for name, value in sorted(namespace.items()):
+        if name.startswith("_") or name in bound_by_init or isinstance(value, types.ModuleType) or name == "Botting":
+            continue
+        source = None
+        current = package._LAZY_NAMES.get(name)
+        if current and current[1] == name and getattr(importlib.import_module(current[0], PACKAGE), name) is value:
+            source = current[0]
+        owner = getattr(value, "__module__", None)
+        if source is None and isinstance(owner, str) and getattr(sys.modules.get(owner), name, None) is value:
+            source = owner
+        if source is None:
+            for star in package._STAR_MODULES:
+                if getattr(sys.modules[PACKAGE + star], name, None) is value:
+                    source = PACKAGE + star
+                    break
+        if source.startswith(PACKAGE + "."):
+            source = source[len(PACKAGE):]
+        table.setdefault(source, []).append(name)
+    return {"table": {source: sorted(names) for source, names in sorted(
+        table.items(), key=lambda item: (not item[0].startswith("."), item[0]))}}
+
+
+def run_child(python, root, mode, argument, extra_flags=()):
+    env = dict(os.environ, IMPORT_BENCHMARK_CWD=tempfile.gettempdir())  # keep .ini files out of the tree
+    command = [python, *extra_flags, os.path.abspath(__file__), "--child", mode, "--root", root, argument]
+    completed = subprocess.run(command, capture_output=True, text=True, env=env)
+    lines = [line for line in completed.stdout.splitlines() if line.startswith("{")]
+    if completed.returncode != 0 or not lines:
+        error = (completed.stderr.strip().splitlines() or ["no output"])[-1]
+        return {"error": error}, completed.stderr
+    return json.loads(lines[-1]), completed.stderr
+
+
+def child_main(mode, root, argument):
+    install_stubs(root)
+    try:
+        if mode == "measure":
+            result = child_measure(argument)
+        elif mode == "check":
+            result = child_check(json.loads(argument))
+        else:
+            result = child_index()
+    except Exception as e:  # the package redirects sys.stderr to the game console, so report it here
+        result = {"error": f"{type(e).__name__}: {e}"}
+    sys.__stdout__.write(json.dumps(result) + "\n")  # the package redirects sys.stdout to the game console
+    return 0
+
+
+#region Measurements
+
+def measure(python, root, rounds):
+    results = {}
+    for name, code in SCENARIOS:
+        best = None
+        for _ in range(max(1, rounds)):
+            result, _ = run_child(python, root, "measure", code)
+            if "error" in result:
+                best = result
+                break
+            if best is None or result["cold_ms"] < best["cold_ms"]:
+                best = result
+        results[name] = best
+    return results
+
+
+def profile(python, root, code, top):
+    """-X importtime for one statement: the modules with the largest self and cumulative times."""
+    _, stderr = run_child(python, root, "measure", code, ("-X", "importtime"))
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(self_us), int(cumulative_us), name.strip()))
+    total = sum(row[0] for row in rows)
+    print(f"{code}\n  {len(rows)} modules, {total / 1e3:.1f} ms self time in total")
+    for title, key in (("cumulative", 1), ("self", 0)):
+        print(f"\n  slowest by {title} time")
+        for self_us, cumulative_us, name in sorted(rows, key=lambda row: row[key], reverse=True)[:top]:
+            print(f"    {cumulative_us / 1e3:9.1f} ms cumulative {self_us / 1e3:9.1f} ms self   {name}")
+
+
+def check(python, root):
+    """Resolve every index group from its own cold start and compare it with a full load."""
+    probe, _ = run_child(python, root, "check", json.dumps([]))
+    if "error" in probe:
+        print(f"Full load failed: {probe['error']}")
+        return 1
+    groups = {}
+    probe_index, _ = run_child(python, root, "index", "")
+    if "error" in probe_index:
+        print(f"Full load failed: {probe_index['error']}")
+        return 1
+    for source, names in probe_index["table"].items():
+        groups[source] = names
+    groups["Botting"] = ["Botting"]
+    with ThreadPoolExecutor(max_workers=os.cpu_count() or 4) as pool:
+        results = dict(zip(groups, pool.map(lambda names: run_child(python, root, "check", json.dumps(names))[0],
+                                            groups.values())))
+    problems = []
+    for source, result in results.items():
+        if "error" in result:
+            problems.append(f"{source}: {result['error']}")
+        problems += [f"{source}: {message}" for message in result.get("problems", [])]
+    unindexed = probe["unindexed"]
+    print(f"{len(probe['public'])} public names, {len(groups)} index groups each resolved from a cold start")
+    for message in problems:
+        print(f"  {message}")
+    if unindexed:
+        print(f"  not in the index (resolved by a full load): {', '.join(unindexed)}; run --print-index")
+    return 1 if problems or unindexed else 0
+
+
+#region Regression check
+
+def compare(results, baseline, threshold, min_delta_ms):
+    """Messages for every scenario slower, or loading more modules, than the baseline by more than threshold."""
+    regressions = []
+    for scenario, stats in results.items():
+        base = baseline.get(scenario)
+        if not base or "error" in base:
+            continue
+        if "error" in stats:
+            regressions.append(f"{scenario}: {stats['error']}")
+            continue
+        if stats["cold_ms"] > base["cold_ms"] * (1 + threshold) and stats["cold_ms"] - base["cold_ms"] > min_delta_ms:
+            regressions.append(f"{scenario} cold_ms: {stats['cold_ms']:.1f} vs baseline {base['cold_ms']:.1f}")
+        if stats["modules"] > base["modules"] * (1 + threshold):
+            regressions.append(f"{scenario} modules: {stats['modules']} vs baseline {base['modules']}")
+        for name in sorted(set(stats["heavy"]) - set(base["heavy"])):
+            regressions.append(f"{scenario} now loads {name}")
+    return regressions
+
+
+def check_light(results):
+    """Messages for every light scenario that failed, loaded a heavy module or more than LIGHT_MODULE_LIMIT modules."""
+    problems = []
+    for scenario in LIGHT_SCENARIOS:
+        stats = results[scenario]
+        if "error" in stats:
+            problems.append(f"{scenario}: {stats['error']}")
+            continue
+        for name in stats["heavy"]:
+            problems.append(f"{scenario} loads {name}")
+        if stats["modules"] > LIGHT_MODULE_LIMIT:
+            problems.append(f"{scenario} loads {stats['modules']} package modules, limit {LIGHT_MODULE_LIMIT}")
+    return problems
+
+
+def print_results(results):
+    for scenario, stats in results.items():
+        if "error" in stats:
+            print(f"  {scenario:<14} failed: {stats['error']}")
+            continue
+        heavy = ", ".join(name[len(PACKAGE) + 1:] for name in stats["heavy"]) or "-"
+        print(f"  {scenario:<14} {stats['cold_ms']:9.1f} ms   {stats['modules']:4d} package modules   heavy: {heavy}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--python", default=sys.executable, help="interpreter to measure with")
+    parser.add_argument("--root", default=ROOT, help="tree to import the package from")
+    parser.add_argument("--rounds", type=int, default=5, help="cold starts per scenario, fastest one kept")
+    parser.add_argument("--profile", metavar="STATEMENT", help="profile one import statement instead")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--check", action="store_true")
+    parser.add_argument("--print-index", action="store_true")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative slowdown (0.25 = 25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=5.0, help="ignore changes smaller than this")
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--child", nargs=1, choices=["measure", "check", "index"], help=argparse.SUPPRESS)
+    parser.add_argument("argument", nargs="?", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    root = os.path.abspath(args.root)
+
+    if args.child:
+        return child_main(args.child[0], root, args.argument)
+    if args.profile:
+        profile(args.python, root, args.profile, args.top)
+        return 0
+    if args.check:
+        return check(args.python, root)
+    if args.print_index:
+        result, _ = run_child(args.python, root, "index", "")
+        if "error" in result:
+            print(f"Full load failed: {result['error']}")
+            return 1
+        print("_LAZY_ATTRIBUTES = {")
+        for source, names in result["table"].items():
+            quoted = ", ".join(json.dumps(name) for name in names)
+            print(f"    {json.dumps(source)}: ({quoted}{',' if len(names) == 1 else ''}),")
+        print("}")
+        return 0
+
+    results = measure(args.python, root, args.rounds)
+    print(f"Cold imports, fastest of {args.rounds} fresh interpreters")
+    print_results(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    problems = check_light(results)
+    for message in problems:
+        print(f"FAIL {message}")
+    if problems:
+        return 1
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+
+    if args.compare:
+        if not os.path.isfile(args.baseline):
+            print(f"\nNo baseline at {args.baseline}; run with --save-baseline first.")
+            return 2
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for message in regressions:
+                print(f"  {message}")
+            return 1
+        print(f"\nNo regressions beyond {args.threshold:.0%}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,371 @@
+"""
+Headless benchmark for the GlobalCache inventory lookups (RawItemCache, InventoryCache).
+
+PyInventory and PyItem are replaced by a fake inventory that counts native calls: Bag constructions,
+GetContext, GetItems, FindItemById and IsItemValid calls, and PyItem objects materialized.
+
+    python benchmarks/inventory_benchmark.py
+    python benchmarks/inventory_benchmark.py --storage-fill 0.9 --json results.json
+
+The update rows also report RawItemCache's refresh counters (bags read and rebuilt, items read) per update.
+
+A copy of the update that read every bag each time gives the reference: steady-state updates must make
+fewer GetItems calls and PyItem objects than it, and after random inventory, transfer and storage-only
+changes the cached lookups must match a full read, at once for inventory changes and transfers and
+within one round-robin cycle for storage-only ones. Exits 1 otherwise.
+"""
+import argparse
+import importlib
+import json
+import os
+import random
+import sys
+import time
+import types
+from collections import Counter
+
+from pathing_benchmark import percentiles
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INVENTORY_BAGS = {1: 20, 2: 5, 3: 10, 4: 10}
+STORAGE_BAGS = {bag: 25 for bag in range(8, 22)}
+EQUIPPED_BAG = 22
+
+
+#region Fake inventory
+
+class FakeInventory:
+    """
+    Bag contents the fakes serve: bag_id -> (size, {slot: item fields}), items outside any bag
+    (item_id -> fields), plus native call counters.
+    """
+    bags = {}
+    loose = {}
+    calls = Counter()
+
+    @classmethod
+    def find(cls, item_id):
+        for bag_id, (_, slots) in cls.bags.items():
+            for slot, fields in slots.items():
+                if fields["item_id"] == item_id:
+                    return bag_id, slot, fields
+        if item_id in cls.loose:
+            return None, 0, cls.loose[item_id]
+        return None
+
+
+class FakePyItem:
+    def __init__(self, item_id, fields=None):
+        FakeInventory.calls["PyItem"] += 1
+        if fields is None:
+            found = FakeInventory.find(item_id)
+            fields = found[2] if found else {"item_id": 0}
+        self.__dict__.update(ITEM_DEFAULTS)
+        self.__dict__.update(fields)
+
+    def IsItemValid(self, item_id):
+        FakeInventory.calls["IsItemValid"] += 1
+        return FakeInventory.find(item_id) is not None
+
+    def IsItemNameReady(self): return True
+    def GetName(self): return f"Item {self.item_id}"
+
+
+ITEM_DEFAULTS = {"item_id": 0, "agent_id": 0, "agent_item_id": 0, "model_id": 0, "quantity": 1, "slot": 0, "uses": 0,
+                 "is_id_kit": False, "is_salvage_kit": False, "is_lesser_kit": False, "is_expert_salvage_kit": False,
+                 "is_perfect_salvage_kit": False, "is_identified": True, "is_salvageable": False}
+
+
+class FakeBag:
+    """Construction and GetContext read the bag's slots; GetItems materializes a PyItem per item."""
+    def __init__(self, bag_id, name):
+        FakeInventory.calls["Bag"] += 1
+        self.id = bag_id
+        self.name = name
+        self._read()
+
+    def _read(self):
+        size, slots = FakeInventory.bags.get(self.id, (0, {}))
+        self._size = size
+        self._slots = sorted((slot, dict(fields)) for slot, fields in slots.items())
+        self.items_count = len(self._slots)
+
+    def GetContext(self):
+        FakeInventory.calls["GetContext"] += 1
+        self._read()
+
+    def GetItems(self):
+        FakeInventory.calls["GetItems"] += 1
+        return [FakePyItem(fields["item_id"], dict(fields, slot=slot)) for slot, fields in self._slots]
+
+    def FindItemById(self, item_id):
+        FakeInventory.calls["FindItemById"] += 1
+        for slot, fields in self._slots:
+            if fields["item_id"] == item_id:
+                return FakePyItem(item_id, dict(fields, slot=slot))
+        return None
+
+    def GetItemCount(self): return len(self._slots)
+    def GetSize(self): return self._size
+
+
+def install_fakes():
+    """Register the fakes and import the item/inventory caches without the package __init__ files."""
+    sys.path.insert(0, ROOT)
+
+    pyinventory = types.ModuleType("PyInventory")
+    pyinventory.Bag = FakeBag
+    pyinventory.PyInventory = lambda: types.SimpleNamespace()
+    sys.modules["PyInventory"] = pyinventory
+    pyitem = types.ModuleType("PyItem")
+    pyitem.PyItem = FakePyItem
+    sys.modules["PyItem"] = pyitem
+    py4gw = types.ModuleType("Py4GW")
+    py4gw.Console = types.SimpleNamespace(MessageType=types.SimpleNamespace(Error=0), Log=lambda *args: None)
+    sys.modules["Py4GW"] = py4gw
+    pyskill = types.ModuleType("PySkill")  # Model_enums resolves spirit skill ids at import
+    pyskill.Skill = lambda name: types.SimpleNamespace(id=types.SimpleNamespace(id=0))
+    sys.modules["PySkill"] = pyskill
+
+    for name in ("Py4GWCoreLib", "Py4GWCoreLib.GlobalCache"):
+        package = types.ModuleType(name)
+        package.__path__ = [os.path.join(ROOT, *name.split("."))]
+        sys.modules[name] = package
+    core = sys.modules["Py4GWCoreLib"]
+    item_enums = importlib.import_module("Py4GWCoreLib.enums_src.Item_enums")
+    core.Bag = core.Bags = item_enums.Bags
+    core.ModelID = importlib.import_module("Py4GWCoreLib.enums_src.Model_enums").ModelID
+    core.WindowID = importlib.import_module("Py4GWCoreLib.enums_src.UI_enums").WindowID
+    core.ConsoleLog = lambda *args, **kwargs: None
+    core.Item = types.SimpleNamespace()
+
+    corelib = types.ModuleType("Py4GWCoreLib.Py4GWcorelib")
+    corelib.ThrottledTimer = importlib.import_module("Py4GWCoreLib.py4gwcorelib_src.Timer").ThrottledTimer
+    corelib.ActionQueueManager = object
+    corelib.AssignStorageSlots = importlib.import_module("Py4GWCoreLib.py4gwcorelib_src.InventoryPlanner").AssignStorageSlots
+    sys.modules[corelib.__name__] = corelib
+    uimanager = types.ModuleType("Py4GWCoreLib.UIManager")
+    uimanager.UIManager = object
+    sys.modules[uimanager.__name__] = uimanager
+
+    item_cache = importlib.import_module("Py4GWCoreLib.GlobalCache.ItemCache")
+    inventory_cache = importlib.import_module("Py4GWCoreLib.GlobalCache.InventoryCache")
+    return item_cache, inventory_cache
+
+
+#region Inventories
+
+def make_inventory(rng: random.Random, inventory_fill: float, storage_fill: float, models: int = 120):
+    """Random items over inventory, storage and equipped bags, with a few ID and salvage kits."""
+    next_id = [1000]
+
+    def item(**fields):
+        next_id[0] += 1
+        return {"item_id": next_id[0], "model_id": rng.randrange(1, models), "quantity": rng.choice([1, 1, 1, 5, 250]),
+                "is_identified": rng.random() < 0.6, "is_salvageable": rng.random() < 0.5, **fields}
+
+    bags = {}
+    for bag_id, size in {**INVENTORY_BAGS, **STORAGE_BAGS}.items():
+        fill = inventory_fill if bag_id in INVENTORY_BAGS else storage_fill
+        bags[bag_id] = (size, {slot: item() for slot in range(size) if rng.random() < fill})
+    bags[EQUIPPED_BAG] = (9, {slot: item() for slot in range(7)})
+
+    kits = [dict(model_id=2989, is_id_kit=True), dict(model_id=5899, is_id_kit=True),
+            dict(model_id=2992, is_salvage_kit=True, is_lesser_kit=True),
+            dict(model_id=2991, is_salvage_kit=True, is_expert_salvage_kit=True)]
+    for kit in kits + rng.sample(kits, 2):
+        bag_id = rng.choice(list(INVENTORY_BAGS))
+        size, slots = bags[bag_id]
+        free = [slot for slot in range(size) if slot not in slots]
+        if free:
+            slots[rng.choice(free)] = item(uses=rng.randrange(1, 100), **kit)
+    FakeInventory.bags = bags
+
+
+def mutate(rng: random.Random):
+    """Change one random inventory slot: move, restack or remove an item."""
+    bag_id = rng.choice(list(INVENTORY_BAGS))
+    size, slots = FakeInventory.bags[bag_id]
+    if not slots:
+        return
+    slot = rng.choice(list(slots))
+    action = rng.random()
+    if action < 0.4:
+        slots[slot] = dict(slots[slot], quantity=slots[slot]["quantity"] + 1)
+    elif action < 0.7:
+        free = [s for s in range(size) if s not in slots]
+        if free:
+            slots[rng.choice(free)] = slots.pop(slot)
+    else:
+        del slots[slot]
+
+
+def mutate_storage(rng: random.Random):
+    """A storage-only change that keeps every bag's item count: swap two items or restack one."""
+    storage = [bag_id for bag_id in STORAGE_BAGS if FakeInventory.bags[bag_id][1]]
+    bag_a, bag_b = rng.choice(storage), rng.choice(storage)
+    slots_a, slots_b = FakeInventory.bags[bag_a][1], FakeInventory.bags[bag_b][1]
+    slot_a, slot_b = rng.choice(list(slots_a)), rng.choice(list(slots_b))
+    if rng.random() < 0.4:
+        slots_a[slot_a] = dict(slots_a[slot_a], quantity=slots_a[slot_a]["quantity"] + 1)
+    else:
+        slots_a[slot_a], slots_b[slot_b] = slots_b[slot_b], slots_a[slot_a]
+
+
+def transfer(rng: random.Random):
+    """Move an item between an inventory bag and a storage bag."""
+    bags = [rng.choice(list(INVENTORY_BAGS)), rng.choice(list(STORAGE_BAGS))]
+    rng.shuffle(bags)
+    (_, source), (size, target) = FakeInventory.bags[bags[0]], FakeInventory.bags[bags[1]]
+    free = [slot for slot in range(size) if slot not in target]
+    if source and free:
+        target[rng.choice(free)] = source.pop(rng.choice(list(source)))
+
+
+#region Reference
+
+def full_read_index(ItemCache, Bag_enum):
+    """RawItemCache.update before the incremental refresh: a new Bag and GetItems for every bag."""
+    index = ItemCache.InventoryIndex()
+    for bag in range(Bag_enum.Backpack.value, Bag_enum.Max.value):
+        bag_instance = FakeBag(bag, str(bag))
+        index.update_bag(bag, bag_instance.GetItems())
+    return index
+
+
+def lookup_mismatches(ItemCache, Bag_enum, raw):
+    """Index lookups that differ between the cache and a full read of every bag."""
+    reference = full_read_index(ItemCache, Bag_enum)
+    index = raw.index
+    bag_ids = sorted(FakeInventory.bags)
+    mismatches = []
+    if set(index.items) != set(reference.items):
+        mismatches.append(f"item ids differ by {sorted(set(index.items) ^ set(reference.items))[:5]}")
+    for item_id in reference.items:
+        if index.find(item_id, bag_ids) != reference.find(item_id, bag_ids):
+            mismatches.append(f"item {item_id} at {index.find(item_id, bag_ids)}, full read {reference.find(item_id, bag_ids)}")
+    models = {item.model_id for item in reference.items.values()}
+    for model_id in models:
+        for bags in (list(INVENTORY_BAGS), list(STORAGE_BAGS)):
+            if index.get_model_quantity(model_id, bags) != reference.get_model_quantity(model_id, bags):
+                mismatches.append(f"model {model_id} quantity in bags {bags[0]}-{bags[-1]}")
+            if index.get_model_item_ids(model_id, bags) != reference.get_model_item_ids(model_id, bags):
+                mismatches.append(f"model {model_id} item ids in bags {bags[0]}-{bags[-1]}")
+    for kind in ItemCache.InventoryIndex.KIT_KINDS:
+        if index.get_kits(kind, bag_ids) != reference.get_kits(kind, bag_ids):
+            mismatches.append(f"{kind} kits")
+    return mismatches
+
+
+def check_lookups(ItemCache, Bag_enum, raw, rng: random.Random, rounds: int, problems):
+    """Random changes, each followed by the updates it may take to show up, then a full-read comparison."""
+    cycle = sum(1 for bag in raw.bags if bag not in raw.LIVE_BAGS)
+    cases = Counter()
+    for _ in range(rounds):
+        kind = rng.choice(("inventory", "transfer", "storage"))
+        {"inventory": mutate, "transfer": transfer, "storage": mutate_storage}[kind](rng)
+        for _ in range(cycle if kind == "storage" else 1):
+            raw.update()
+        cases[kind] += 1
+        for mismatch in lookup_mismatches(ItemCache, Bag_enum, raw)[:3]:
+            when = f"after {cycle} updates" if kind == "storage" else "after one update"
+            problems.append(f"{kind} change, {when}: {mismatch}")
+    return cases
+
+
+#region Measurements
+
+def measure(fn, runs):
+    FakeInventory.calls.clear()
+    samples = []
+    for i in range(runs):
+        start = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - start)
+    stats = percentiles(samples)
+    stats.update({name: count / runs for name, count in sorted(FakeInventory.calls.items())})
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--runs", type=int, default=200, help="calls per measurement")
+    parser.add_argument("--rounds", type=int, default=300, help="random changes checked against a full read")
+    parser.add_argument("--inventory-fill", type=float, default=0.8)
+    parser.add_argument("--storage-fill", type=float, default=0.7)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    ItemCache, InventoryCache = install_fakes()
+    rng = random.Random(args.seed)
+    make_inventory(rng, args.inventory_fill, args.storage_fill)
+
+    raw = ItemCache.RawItemCache()  # singleton, already built at import
+    raw.update_throttle.SetThrottleTime(0)
+    raw.reset()
+    item_cache = ItemCache.ItemCache(raw)
+    inventory = InventoryCache.InventoryCache(None, raw, item_cache)
+    raw.update()
+
+    inventory_ids = [fields["item_id"] for bag_id in INVENTORY_BAGS for fields in FakeInventory.bags[bag_id][1].values()]
+    model_ids = [fields["model_id"] for bag_id in INVENTORY_BAGS for fields in FakeInventory.bags[bag_id][1].values()]
+
+    def changed_update(i):
+        mutate(rng)
+        raw.update()
+
+    benches = {
+        "update_steady": lambda i: raw.update(),
+        "update_one_slot_changed": changed_update,
+        "get_item_by_id": lambda i: raw.get_item_by_id(inventory_ids[i % len(inventory_ids)]),
+        "GetModelCount": lambda i: inventory.GetModelCount(model_ids[i % len(model_ids)]),
+        "GetModelCountInStorage": lambda i: inventory.GetModelCountInStorage(model_ids[i % len(model_ids)]),
+        "GetFirstIDKit": lambda i: inventory.GetFirstIDKit(),
+        "GetFirstSalvageKit": lambda i: inventory.GetFirstSalvageKit(),
+        "FindItemBagAndSlot": lambda i: inventory.FindItemBagAndSlot(inventory_ids[i % len(inventory_ids)]),
+        "GetItemIdFromModelID": lambda i: item_cache.GetItemIdFromModelID(model_ids[i % len(model_ids)]),
+    }
+    results = {}
+    for name, fn in benches.items():
+        raw.reset_refresh_stats()
+        results[name] = measure(fn, args.runs)
+        refresh = raw.get_refresh_stats()
+        if refresh["updates"]:
+            for key in ("bags_read", "bags_rebuilt", "items_read"):
+                results[name][f"{key}/update"] = refresh[key] / refresh["updates"]
+
+    Bag_enum = ItemCache.Bag_enum
+    FakeInventory.calls.clear()
+    full_read_index(ItemCache, Bag_enum)
+    full_read = dict(FakeInventory.calls)
+    FakeInventory.calls.clear()
+    problems = []
+    steady = results["update_steady"]
+    for name in ("GetItems", "PyItem"):
+        if not steady.get(name, 0) < full_read[name]:
+            problems.append(f"steady update: {steady.get(name, 0):.1f} {name} per update, full read {full_read[name]}")
+    if steady.get("Bag", 0):
+        problems.append(f"steady update: {steady['Bag']:.1f} Bag constructions per update")
+    items = sum(len(slots) for _, slots in FakeInventory.bags.values())
+    cases = check_lookups(ItemCache, Bag_enum, raw, rng, args.rounds, problems)
+
+    print(f"{items} items in {len(FakeInventory.bags)} bags")
+    print(f"  full read per update: {full_read['Bag']} Bag  {full_read['GetItems']} GetItems  {full_read['PyItem']} PyItem")
+    for name, stats in results.items():
+        calls = "  ".join(f"{key} {value:.1f}" for key, value in stats.items() if key not in ("p50_ms", "p99_ms", "n"))
+        print(f"  {name:<26} p50 {stats['p50_ms']:8.4f} ms   p99 {stats['p99_ms']:8.4f} ms   {calls}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    print("Lookups checked against a full read after " + ", ".join(f"{n} {kind}" for kind, n in sorted(cases.items())) + " changes")
+    for problem in problems[:50]:
+        print(f"FAIL {problem}")
+    if problems:
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
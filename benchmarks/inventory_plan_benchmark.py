@@ -0,0 +1,280 @@
+"""
+Headless benchmark for AutoInventoryHandler's identify/salvage/deposit planner.
+
+Plans synthetic inventories (random rarities, stacks, trophies, tomes, dyes, event items, kits and a
+partly filled storage) with InventoryPlanner, checks the plan against the lower bounds it should meet,
+and compares its action count and scripted waits with a model of the sequential routines it replaced.
+
+    python benchmarks/inventory_plan_benchmark.py
+    python benchmarks/inventory_plan_benchmark.py --inventories 50 --json results.json
+"""
+import argparse
+import importlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import types
+
+from pathing_benchmark import percentiles
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RARITIES = ["White", "White", "White", "Blue", "Purple", "Gold", "Green"]
+MATERIALS = [921, 929, 948, 940, 946]  # Bone, Pile of Glittering Dust, Iron Ingot, ...
+TROPHIES = [423, 424, 425, 426]
+TOMES = [21786, 21796, 21793]
+DYE = 146
+ID_KIT, LESSER_SALVAGE_KIT = 2989, 2992
+
+
+#region Fakes
+
+def install_fakes():
+    """Import the planner and the handler without the package __init__ or any native module."""
+    sys.path.insert(0, ROOT)
+    py4gw = types.ModuleType("Py4GW")
+    py4gw.Console = types.SimpleNamespace(MessageType=types.SimpleNamespace(Info=0, Warning=1, Error=2, Success=3),
+                                          Log=lambda *args: None)
+    sys.modules["Py4GW"] = py4gw
+    pyskill = types.ModuleType("PySkill")  # Model_enums resolves spirit skill ids at import
+    pyskill.Skill = lambda name: types.SimpleNamespace(id=types.SimpleNamespace(id=0))
+    sys.modules["PySkill"] = pyskill
+    package = types.ModuleType("Py4GWCoreLib")
+    package.__path__ = [os.path.join(ROOT, "Py4GWCoreLib")]
+    sys.modules["Py4GWCoreLib"] = package
+    enums = types.ModuleType("Py4GWCoreLib.enums")  # ShouldDeposit only needs ModelID
+    enums.ModelID = importlib.import_module("Py4GWCoreLib.enums_src.Model_enums").ModelID
+    sys.modules[enums.__name__] = enums
+
+    planner = importlib.import_module("Py4GWCoreLib.py4gwcorelib_src.InventoryPlanner")
+    handler = importlib.import_module("Py4GWCoreLib.py4gwcorelib_src.AutoInventoryHandler")
+    return planner, handler
+
+
+#region Inventories
+
+def make_snapshot(planner, rng: random.Random, event_models, storage_fill: float):
+    """A full 45-slot inventory with a few kits, and 14 storage bags of 25 slots."""
+    next_id = [1000]
+    event_items = sorted(event_models)[:6]
+    trophies = TROPHIES + event_items[::2]  # some event items are reward trophies
+    models = MATERIALS + TROPHIES + TOMES + [DYE] + event_items
+
+    def new_id():
+        next_id[0] += 1
+        return next_id[0]
+
+    items = []
+    slots = [(bag, slot) for bag, size in ((1, 20), (2, 5), (3, 10), (4, 10)) for slot in range(size)]
+    kit_slots = rng.sample(range(len(slots)), 4)
+    for index, (bag, slot) in enumerate(slots):
+        item_id = new_id()
+        if index in kit_slots:
+            is_id_kit = kit_slots.index(index) < 2
+            items.append(planner.PlanItem(item_id, bag, slot, ID_KIT if is_id_kit else LESSER_SALVAGE_KIT,
+                                          is_id_kit=is_id_kit, is_salvage_kit=not is_id_kit,
+                                          is_lesser_kit=not is_id_kit, uses=rng.randrange(1, 25)))
+            continue
+        kind = rng.random()
+        if kind < 0.45:  # weapons and armor
+            rarity = rng.choice(RARITIES)
+            items.append(planner.PlanItem(item_id, bag, slot, rng.randrange(5000, 5100), value=rng.randrange(10, 300),
+                                          rarity=rarity, item_type=rng.choice([2, 5, 12, 24, 26]),
+                                          is_identified=rarity == "White" or rng.random() < 0.2,
+                                          is_salvageable=rng.random() < 0.9, is_customized=rng.random() < 0.03))
+        else:
+            model_id = rng.choice(models)
+            is_material = model_id in MATERIALS
+            items.append(planner.PlanItem(item_id, bag, slot, model_id, quantity=rng.choice([1, 3, 10, 60, 250]),
+                                          value=rng.randrange(1, 50), rarity="Gold" if model_id in TOMES else "White",
+                                          item_type_name="Usable" if model_id in TOMES else "", is_material=is_material,
+                                          is_salvageable=is_material and rng.random() < 0.2,
+                                          is_material_salvageable=is_material and rng.random() < 0.3,
+                                          is_trophy=model_id in trophies,
+                                          is_tome=model_id in TOMES,
+                                          is_stackable=True, dye1=rng.randrange(1, 4) if model_id == DYE else None))
+
+    storage_bags = []
+    for bag_id in range(8, 22):
+        contents = []
+        for slot in range(25):
+            if rng.random() < storage_fill:
+                model_id = rng.choice(models + [rng.randrange(6000, 6100)])
+                contents.append([slot, new_id(), model_id, rng.randrange(1, 251),
+                                 rng.randrange(1, 4) if model_id == DYE else 0])
+        storage_bags.append((bag_id, 25, contents))
+    return planner.InventorySnapshot(items, storage_bags)
+
+
+#region Sequential routines
+
+def sequential_model(planner, handler, snapshot):
+    """
+    Actions and scripted waits of the routines the planner replaced: IdentifyItems, SalvageItems and
+    DepositItemsAuto, run one after the other. Each DepositItemToStorage call counts its MoveItem actions;
+    the second and later calls for an item that matched several deposit rules count one each.
+    """
+    counts = {"identify": 0, "salvage": 0, "confirm": 0, "deposit_calls": 0, "moves": 0, "wait_ms": 0,
+              "duplicate_deposit_calls": 0, "event_set_builds": 0}
+    id_kits = [[i.item_id, i.uses] for i in snapshot.items if i.is_id_kit and i.uses > 0]
+    salvage_kits = [[i.item_id, i.uses] for i in snapshot.items if i.is_salvage_kit and i.is_lesser_kit and i.uses > 0]
+    identified = {i.item_id: i.is_identified for i in snapshot.items}
+    quantities = {i.item_id: i.quantity for i in snapshot.items}
+    take = planner.InventoryPlanner._TakeKit
+
+    for item in snapshot.items:
+        if not id_kits:
+            break  # IdentifyItems returns when it finds no kit
+        if handler.ShouldIdentify(item):
+            take(id_kits)
+            identified[item.item_id] = True
+            counts["identify"] += 1
+            counts["wait_ms"] += 50
+
+    stop = False
+    for item in snapshot.items:
+        if stop:
+            break
+        if item.is_id_kit or item.is_salvage_kit or item.quantity == 0:
+            continue
+        if not handler.ShouldSalvage(item, identified[item.item_id]):
+            continue
+        confirm = item.rarity in ("Purple", "Gold")
+        for _ in range(item.quantity):
+            if not salvage_kits:
+                stop = True  # SalvageItems returns when it finds no kit
+                break
+            take(salvage_kits)
+            quantities[item.item_id] -= 1
+            counts["salvage"] += 1
+            counts["confirm"] += 3 if confirm else 0
+            counts["wait_ms"] += 100 + (300 + 150 if confirm else 0)
+
+    storage = [(bag_id, size, [list(entry) for entry in slots]) for bag_id, size, slots in snapshot.storage_bags]
+    used_up = {kit for kit, _ in ((i.item_id, 0) for i in snapshot.items if i.is_id_kit or i.is_salvage_kit)} - \
+        {kit[0] for kit in id_kits + salvage_kits}
+    for item in snapshot.items:
+        if quantities[item.item_id] == 0 or item.item_id in used_up:
+            continue
+        counts["event_set_builds"] += 1
+        calls = sum(rule for rule in deposit_rules(handler, item))
+        if calls == 0:
+            continue
+        moves = planner.AssignStorageSlots(storage, item.item_id, item.model_id, quantities[item.item_id],
+                                           item.is_stackable, item.dye1, update=True)
+        counts["deposit_calls"] += calls
+        counts["duplicate_deposit_calls"] += calls - 1
+        counts["moves"] += len(moves) + (calls - 1)
+        counts["wait_ms"] += 350 * calls
+    counts["actions"] = counts["identify"] + counts["salvage"] + counts["confirm"] + counts["moves"]
+    return counts
+
+
+def deposit_rules(handler, item):
+    """The deposit clauses of DepositItemsAuto, each of which issued its own DepositItemToStorage call."""
+    rarity = item.rarity
+    return [item.is_tome,
+            item.is_trophy and handler.deposit_trophies and rarity == "White",
+            item.is_material and handler.deposit_materials,
+            rarity == "Blue" and handler.deposit_blues,
+            rarity == "Purple" and handler.deposit_purples,
+            rarity == "Gold" and handler.deposit_golds and item.item_type_name != "Usable" and not item.is_trophy,
+            rarity == "Green" and handler.deposit_greens,
+            item.model_id == DYE and handler.deposit_dyes,
+            item.model_id in handler.GetEventItemModelIDs() and handler.deposit_event_items]
+
+
+#region Checks
+
+def check_plan(planner, handler, snapshot, plan):
+    """The plan meets the lower bounds: every wanted action that kits and storage allow, and nothing twice."""
+    id_uses = sum(i.uses for i in snapshot.items if i.is_id_kit)
+    salvage_uses = sum(i.uses for i in snapshot.items if i.is_salvage_kit and i.is_lesser_kit)
+    wanted_ids = [i for i in snapshot.items if handler.ShouldIdentify(i)]
+    assert len(plan.identify) == min(len(wanted_ids), id_uses)
+    assert len({item_id for item_id, _ in plan.identify}) == len(plan.identify)
+
+    identified = {i.item_id: i.is_identified for i in snapshot.items}
+    identified.update((item_id, True) for item_id, _ in plan.identify)
+    units = sum(i.quantity for i in snapshot.items
+                if not (i.is_id_kit or i.is_salvage_kit) and i.quantity and handler.ShouldSalvage(i, identified[i.item_id]))
+    assert len(plan.salvage) == min(units, salvage_uses)
+
+    moved = {}
+    for item_id, bag_id, slot, quantity in plan.deposit:
+        moved[item_id] = moved.get(item_id, 0) + quantity
+    by_id = {i.item_id: i for i in snapshot.items}
+    for item_id, quantity in moved.items():
+        salvaged = sum(1 for salvage_id, _, _ in plan.salvage if salvage_id == item_id)
+        assert quantity == by_id[item_id].quantity - salvaged - plan.expected.get(item_id, (0, False))[0]
+        assert handler.ShouldDeposit(by_id[item_id])
+
+    for bag_id, size, slots in snapshot.storage_bags:  # the simulated storage after the plan
+        assert len({entry[0] for entry in slots}) == len(slots) and all(0 <= entry[0] < size for entry in slots)
+        assert all(entry[3] <= planner.MAX_STACK_SIZE for entry in slots)
+
+
+#region Measurements
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--inventories", type=int, default=200)
+    parser.add_argument("--storage-fill", type=float, default=0.6)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    planner, handler_module = install_fakes()
+    os.chdir(tempfile.mkdtemp())  # the handler keeps its options in AutoLoot.ini in the working directory
+    handler = handler_module.AutoInventoryHandler()
+    handler.salvage_golds = True
+    rng = random.Random(args.seed)
+    event_models = handler.GetEventItemModelIDs()
+
+    samples = []
+    totals = {"plan_actions": 0, "plan_wait_ms": 0, "sequential_actions": 0, "sequential_wait_ms": 0,
+              "duplicate_deposit_calls": 0, "event_set_builds_before": 0}
+    for _ in range(args.inventories):
+        snapshot = make_snapshot(planner, rng, event_models, args.storage_fill)
+        pristine = make_copy(planner, snapshot)
+        sequential = sequential_model(planner, handler, pristine)
+
+        start = time.perf_counter()
+        plan = planner.InventoryPlanner(handler).Plan(snapshot, sell_filter=None)
+        samples.append(time.perf_counter() - start)
+        check_plan(planner, handler, make_copy(planner, pristine), plan)
+
+        confirmations = sum(1 for _, _, confirm in plan.salvage if confirm)
+        totals["plan_actions"] += plan.ActionCount()
+        totals["plan_wait_ms"] += 150 * len(plan.identify) + 100 * len(plan.salvage) + 200 * confirmations + \
+            50 * len(plan.deposit)
+        totals["sequential_actions"] += sequential["actions"]
+        totals["sequential_wait_ms"] += sequential["wait_ms"]
+        totals["duplicate_deposit_calls"] += sequential["duplicate_deposit_calls"]
+        totals["event_set_builds_before"] += sequential["event_set_builds"]
+
+    stats = percentiles(samples)
+    results = {"plan": stats, **{key: value / args.inventories for key, value in totals.items()}}
+    print(f"{args.inventories} inventories of 45 slots, storage {args.storage_fill:.0%} full")
+    print(f"  plan time            p50 {stats['p50_ms']:8.3f} ms   p99 {stats['p99_ms']:8.3f} ms")
+    print(f"  actions per run      planned {results['plan_actions']:7.1f}   sequential {results['sequential_actions']:7.1f}")
+    print(f"  scripted waits (s)   planned {results['plan_wait_ms'] / 1000:7.2f}   "
+          f"sequential {results['sequential_wait_ms'] / 1000:7.2f}")
+    print(f"  duplicate deposits   {results['duplicate_deposit_calls']:7.1f} before, 0 planned   "
+          f"LootGroups event-set builds before {results['event_set_builds_before']:.1f} (now 1 per handler)")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+def make_copy(planner, snapshot):
+    """The planner updates the storage it is given; plans and models each get their own copy."""
+    storage = [(bag_id, size, [list(entry) for entry in slots]) for bag_id, size, slots in snapshot.storage_bags]
+    return planner.InventorySnapshot(snapshot.items, storage)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
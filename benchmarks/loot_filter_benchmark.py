@@ -0,0 +1,313 @@
+"""
+Headless benchmark for LootConfig.GetfilteredLootArray on large drop piles.
+
+The game-facing modules the filter imports (Agent, Item, Player, Party, AgentArray, Routines) are
+replaced by small fakes over a seeded random pile; native reads are counted per call.
+
+    python benchmarks/loot_filter_benchmark.py
+    python benchmarks/loot_filter_benchmark.py --sizes 100 1000 --json results.json
+
+Every pile is also filtered by a copy of the GetfilteredLootArray the compiled rules replaced, for
+leader and follower, before and after the item id lists change through the LootConfig methods and
+through direct edits of the sets. Exits 1 if a result differs.
+"""
+import argparse
+import importlib
+import json
+import os
+import random
+import sys
+import time
+import types
+
+from pathing_benchmark import percentiles
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RARITIES = ["White", "Blue", "Purple", "Gold", "Green"]
+
+
+#region Fakes
+
+class FakeWorld:
+    """The drop pile the fakes serve, plus counters for native object reads."""
+    player_agent_id = 1
+    party_leader_id = 1
+    drops = {}  # agent_id -> dict(valid, owner_id, item_id, model_id, rarity, x, y)
+    agent_reads = 0
+    item_reads = 0
+
+
+class FakeItemAgent:
+    def __init__(self, drop):
+        self.owner_id = drop["owner_id"]
+        self.item_id = drop["item_id"]
+
+
+class FakePyAgent:
+    def __init__(self, agent_id):
+        FakeWorld.agent_reads += 1
+        self.drop = FakeWorld.drops.get(agent_id)
+        self.item_agent = FakeItemAgent(self.drop) if self.drop else None
+
+    def IsValid(self, agent_id):
+        return bool(self.drop and self.drop["valid"])
+
+
+class FakePyItem:
+    def __init__(self, item_id):
+        FakeWorld.item_reads += 1
+        drop = FakeWorld.items.get(item_id)
+        self.model_id = drop["model_id"] if drop else 0
+        name = drop["rarity"] if drop else "White"
+        self.rarity = types.SimpleNamespace(name=name, value=RARITIES.index(name))
+
+
+def install_fakes():
+    """Register the fakes and import Lootconfig_src without the package __init__."""
+    sys.path.insert(0, ROOT)
+    package = types.ModuleType("Py4GWCoreLib")
+    package.__path__ = [os.path.join(ROOT, "Py4GWCoreLib")]
+    sys.modules["Py4GWCoreLib"] = package
+
+    class Agent:
+        @staticmethod
+        def IsValid(agent_id): return FakePyAgent(agent_id).IsValid(agent_id)
+        @staticmethod
+        def agent_instance(agent_id): return FakePyAgent(agent_id)
+        @staticmethod
+        def GetItemAgent(agent_id): return Agent.agent_instance(agent_id).item_agent
+
+        @staticmethod
+        def GetItemAgentOwnerID(agent_id):
+            item_data = Agent.GetItemAgent(agent_id)
+            return 999 if item_data is None else item_data.owner_id
+
+    class Item:
+        @staticmethod
+        def item_instance(item_id): return FakePyItem(item_id)
+        @staticmethod
+        def GetModelID(item_id): return Item.item_instance(item_id).model_id
+
+        class Rarity:
+            @staticmethod
+            def GetRarity(item_id):
+                return Item.item_instance(item_id).rarity.value, Item.item_instance(item_id).rarity.name
+            IsWhite = staticmethod(lambda item_id: Item.Rarity.GetRarity(item_id)[1] == "White")
+            IsBlue = staticmethod(lambda item_id: Item.Rarity.GetRarity(item_id)[1] == "Blue")
+            IsPurple = staticmethod(lambda item_id: Item.Rarity.GetRarity(item_id)[1] == "Purple")
+            IsGold = staticmethod(lambda item_id: Item.Rarity.GetRarity(item_id)[1] == "Gold")
+            IsGreen = staticmethod(lambda item_id: Item.Rarity.GetRarity(item_id)[1] == "Green")
+
+    class Player:
+        @staticmethod
+        def GetAgentID(): return FakeWorld.player_agent_id
+        @staticmethod
+        def GetXY(): return (0.0, 0.0)
+
+    class Party:
+        @staticmethod
+        def GetPartyLeaderID(): return FakeWorld.party_leader_id
+
+    def distance(agent_id):
+        drop = FakeWorld.drops[agent_id]
+        return (drop["x"] ** 2 + drop["y"] ** 2) ** 0.5
+
+    class AgentArray:
+        @staticmethod
+        def GetItemArray(): return list(FakeWorld.drops)
+
+        class Filter:
+            @staticmethod
+            def ByDistance(agent_array, pos, max_distance): return [a for a in agent_array if distance(a) <= max_distance]
+            @staticmethod
+            def ByCondition(agent_array, filter_func): return list(filter(filter_func, agent_array))
+
+        class Sort:
+            @staticmethod
+            def ByDistance(agent_array, pos): return sorted(agent_array, key=distance)
+
+    class Routines:
+        Checks = types.SimpleNamespace(Map=types.SimpleNamespace(MapValid=lambda: True))
+
+    for name, value in (("Agent", Agent), ("Item", Item), ("Player", Player), ("Party", Party),
+                        ("AgentArray", AgentArray), ("Routines", Routines)):
+        module = types.ModuleType(f"Py4GWCoreLib.{name}")
+        setattr(module, name, value)
+        sys.modules[module.__name__] = module
+    sys.modules["Py4GWCoreLib.GlobalCache"] = types.ModuleType("Py4GWCoreLib.GlobalCache")
+
+    pyskill = types.ModuleType("PySkill")  # Model_enums resolves spirit skill ids at import
+    pyskill.Skill = lambda name: types.SimpleNamespace(id=types.SimpleNamespace(id=0))
+    sys.modules["PySkill"] = pyskill
+
+    return importlib.import_module("Py4GWCoreLib.py4gwcorelib_src.Lootconfig_src")
+
+
+#region Drop piles
+
+def make_pile(rng: random.Random, size: int, model_ids):
+    """size drops spread over 2500 units; owners, rarities, models and invalid agents drawn at random."""
+    drops = {}
+    for i in range(size):
+        agent_id = 100 + i
+        drops[agent_id] = {
+            "valid": rng.random() > 0.03,
+            "owner_id": rng.choice([0, 0, FakeWorld.player_agent_id, FakeWorld.player_agent_id, 7, 8]),
+            "item_id": 0 if rng.random() < 0.01 else 5000 + i,
+            "model_id": rng.choice(model_ids),
+            "rarity": rng.choice(RARITIES),
+            "x": rng.uniform(-2500, 2500),
+            "y": rng.uniform(-2500, 2500),
+        }
+    FakeWorld.drops = drops
+    FakeWorld.items = {drop["item_id"]: drop for drop in drops.values() if drop["item_id"]}
+
+
+def configure(config, rng: random.Random, model_ids, item_ids):
+    """Random rarity flags and lists, plus a couple of loot groups."""
+    config.reset()
+    config.SetProperties(*(rng.random() < 0.5 for _ in range(6)))
+    for model_id in rng.sample(model_ids, 8):
+        config.AddToWhitelist(model_id)
+    for model_id in rng.sample(model_ids, 8):
+        config.AddToBlacklist(model_id)
+    for item_id in rng.sample(item_ids, min(len(item_ids), 10)):
+        config.AddItemIDToWhitelist(item_id)
+    for agent_id in rng.sample(sorted(FakeWorld.drops), min(len(FakeWorld.drops), 10)):
+        config.AddItemIDToBlacklist(agent_id)
+    config.AddLootGroupToWhitelist("Keys")
+    config.AddLootGroupToBlacklist("Trophies", "S")
+
+
+#region Reference
+
+def old_filtered_loot_array(config, gold_coins, distance, allow_unasigned_loot):
+    """
+    GetfilteredLootArray before the rules were compiled. Loot groups came later; they are folded into
+    the model lists here, as CompileRules does.
+    """
+    Agent = sys.modules["Py4GWCoreLib.Agent"].Agent
+    Item = sys.modules["Py4GWCoreLib.Item"].Item
+    Player = sys.modules["Py4GWCoreLib.Player"].Player
+    Party = sys.modules["Py4GWCoreLib.Party"].Party
+    AgentArray = sys.modules["Py4GWCoreLib.AgentArray"].AgentArray
+    group_blacklist = config.GetLootGroupModelIDs(config.group_blacklist)
+    group_whitelist = config.GetLootGroupModelIDs(config.group_whitelist)
+
+    def IsValidLeaderItem(item_id):
+        if not Agent.IsValid(item_id):
+            return False
+        owner_id = Agent.GetItemAgentOwnerID(item_id)
+        if owner_id == Player.GetAgentID():
+            return True
+        model_id = Item.GetModelID(Agent.agent_instance(item_id).item_agent.item_id)
+        if model_id == gold_coins and owner_id == 0:
+            return True
+        return allow_unasigned_loot and owner_id == 0
+
+    def IsValidFollowerItem(item_id):
+        return Agent.IsValid(item_id) and Agent.GetItemAgentOwnerID(item_id) == Player.GetAgentID()
+
+    loot_array = AgentArray.Filter.ByDistance(AgentArray.GetItemArray(), Player.GetXY(), distance)
+    if Party.GetPartyLeaderID() == Player.GetAgentID():
+        loot_array = AgentArray.Filter.ByCondition(loot_array, IsValidLeaderItem)
+    else:
+        loot_array = AgentArray.Filter.ByCondition(loot_array, IsValidFollowerItem)
+
+    for agent_id in loot_array[:]:
+        item_id = Agent.GetItemAgent(agent_id).item_id
+        model_id = Item.GetModelID(item_id)
+        if config.IsItemIDBlacklisted(agent_id) or config.IsBlacklisted(model_id) or model_id in group_blacklist:
+            loot_array.remove(agent_id)
+            continue
+        if config.IsItemIDWhitelisted(item_id) or config.IsWhitelisted(model_id) or model_id in group_whitelist:
+            continue
+        for rarity, wanted in (("White", config.loot_whites), ("Blue", config.loot_blues), ("Purple", config.loot_purples),
+                               ("Gold", config.loot_golds), ("Green", config.loot_greens)):
+            if Item.Rarity.GetRarity(item_id)[1] == rarity:
+                if not wanted:
+                    loot_array.remove(agent_id)
+                break
+
+    return AgentArray.Sort.ByDistance(loot_array, Player.GetXY())
+
+
+def list_edits(config, rng: random.Random):
+    """Item id list changes as bot helpers and scripts make them, through the methods and directly on the sets."""
+    agent_ids, item_ids = sorted(FakeWorld.drops), sorted(FakeWorld.items)
+    picks = lambda ids: rng.sample(ids, min(len(ids), 5))
+    yield "AddItemIDToBlacklist", lambda: [config.AddItemIDToBlacklist(a) for a in picks(agent_ids)]
+    yield "AddItemIDToWhitelist", lambda: [config.AddItemIDToWhitelist(i) for i in picks(item_ids)]
+    yield "RemoveItemIDFromBlacklist", lambda: [config.RemoveItemIDFromBlacklist(a) for a in list(config.item_id_blacklist)[:3]]
+    yield "item_id_blacklist.add", lambda: [config.item_id_blacklist.add(a) for a in picks(agent_ids)]
+    yield "item_id_whitelist.discard", lambda: [config.item_id_whitelist.discard(i) for i in list(config.item_id_whitelist)[:3]]
+    yield "ClearItemIDWhitelist", config.ClearItemIDWhitelist
+    yield "item_id_blacklist.clear", config.item_id_blacklist.clear
+
+
+def check_parity(config, gold_coins, rng: random.Random, label: str, problems):
+    """The compiled filter against the reference, before and after each list edit."""
+    edits = [("configured", lambda: None)] + list(list_edits(config, rng))
+    for name, edit in edits:
+        edit()
+        picked = config.GetfilteredLootArray(distance=5000.0, allow_unasigned_loot=True)
+        expected = old_filtered_loot_array(config, gold_coins, 5000.0, True)
+        if picked != expected:
+            problems.append(f"{label} after {name}: picked {len(picked)} drops, the previous filter {len(expected)}")
+
+
+#region Measurements
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 200, 1000, 5000], help="drops per pile")
+    parser.add_argument("--runs", type=int, default=20, help="filter calls per pile")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    Lootconfig = install_fakes()
+    config = Lootconfig.LootConfig()
+    model_ids = sorted({int(m) for groups in Lootconfig.LootGroups.values() for models in groups.values() for m in models})
+    model_ids.append(Lootconfig.ModelID.Gold_Coins.value)
+
+    results = {}
+    problems = []
+    for size in args.sizes:
+        rng = random.Random(args.seed * 1000 + size)
+        make_pile(rng, size, model_ids)
+        configure(config, rng, model_ids, sorted(FakeWorld.items))
+        for role, leader in (("leader", FakeWorld.player_agent_id), ("follower", 2)):
+            FakeWorld.party_leader_id = leader
+            samples = []
+            FakeWorld.agent_reads = FakeWorld.item_reads = 0
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                picked = config.GetfilteredLootArray(distance=5000.0, allow_unasigned_loot=True)
+                samples.append(time.perf_counter() - start)
+            stats = percentiles(samples)
+            stats["agent_reads"] = FakeWorld.agent_reads / args.runs
+            stats["item_reads"] = FakeWorld.item_reads / args.runs
+            stats["picked"] = len(picked)
+            results[f"{size}-{role}"] = stats
+            print(f"{size:>6} drops {role:<9} p50 {stats['p50_ms']:9.3f} ms   p99 {stats['p99_ms']:9.3f} ms"
+                  f"   agent reads {stats['agent_reads']:8.0f}   item reads {stats['item_reads']:8.0f}"
+                  f"   picked {stats['picked']}")
+        # The edits accumulate, so the follower starts from the leader's last lists
+        for role, leader in (("leader", FakeWorld.player_agent_id), ("follower", 2)):
+            FakeWorld.party_leader_id = leader
+            check_parity(config, Lootconfig.ModelID.Gold_Coins.value, rng, f"{size}-{role}", problems)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    for problem in problems:
+        print(f"FAIL {problem}")
+    if problems:
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
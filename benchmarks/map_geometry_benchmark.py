@@ -0,0 +1,173 @@
+"""
+Headless benchmark for Map.Pathing's trapezoid geometry getters.
+
+Times and measures allocations of the per-trapezoid Quad path the getters used to take against
+Map.Pathing.GeometryCache, on the same trapezoid sets as pathing_benchmark.py, and checks that
+both produce the same points.
+
+    python benchmarks/map_geometry_benchmark.py
+    python benchmarks/map_geometry_benchmark.py --quick --json results.json
+"""
+import argparse
+import importlib
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+
+from pathing_benchmark import install_fakes, percentiles, scenarios
+
+
+#region Fakes
+
+class FakeMapID:
+    def __init__(self, value): self.value = value
+    def ToInt(self): return self.value
+
+
+class FakeMapState:
+    """What PyMap and PyMissionMap expose to the projection, shared by every instance."""
+    map_id = 1
+    map_boundaries = [0, -24000.0, -18000.0, 26000.0, 21000.0]
+    icon_start_x, icon_start_y, icon_end_x, icon_end_y = 2000, 1500, 2700, 2100
+    icon_start_x_dupe = icon_start_y_dupe = icon_end_x_dupe = icon_end_y_dupe = 0
+    pan_offset_x, pan_offset_y = 2300.0, 1800.0
+    scale_x, scale_y = 1.6, 1.6
+    zoom = 1.0
+    mission_map_screen_center_x, mission_map_screen_center_y = 960.0, 540.0
+
+
+def install_map(pathing_maps):
+    """Load Py4GWCoreLib.Map on top of pathing_benchmark's fakes; returns the Map class."""
+    install_fakes(tempfile.gettempdir())
+    sys.modules["PyPathing"].current_maps = pathing_maps
+
+    class PyMap:
+        def __init__(self):
+            for name, value in vars(FakeMapState).items():
+                if not name.startswith("__"):
+                    setattr(self, name, value)
+            self.map_id = FakeMapID(FakeMapState.map_id)
+
+    sys.modules["PyMap"].PyMap = PyMap
+    missionmap = types.ModuleType("PyMissionMap")
+    missionmap.PyMissionMap = PyMap
+    sys.modules["PyMissionMap"] = missionmap
+
+    from typing import List
+
+    class Overlay:
+        @staticmethod
+        def FindZ(x, y): return 0.0
+
+    for name, attrs in (("UIManager", {"List": List}), ("Overlay", {"Overlay": Overlay})):
+        module = types.ModuleType(f"Py4GWCoreLib.{name}")
+        module.__dict__.update(attrs)
+        sys.modules[module.__name__] = module
+    enums = types.ModuleType("Py4GWCoreLib.enums")  # just what Map.py imports, the full module needs more natives
+    enums.__dict__.update(vars(importlib.import_module("Py4GWCoreLib.enums_src.Map_enums")))
+    enums.FlagPreference = importlib.import_module("Py4GWCoreLib.enums_src.UI_enums").FlagPreference
+    sys.modules["Py4GWCoreLib.enums"] = enums
+    return importlib.import_module("Py4GWCoreLib.Map").Map
+
+
+#region Measurements
+
+def legacy(Map, method, *args):
+    """The getters as they were: one Quad (and its screen projection) per trapezoid per call."""
+    geometry = []
+    for layer in Map.Pathing.GetPathingMaps():
+        for trapezoid in layer.trapezoids:
+            geometry.append(getattr(Map.Pathing.Quad(trapezoid), method)(*args))
+    return geometry
+
+
+def as_tuples(geometry):
+    return [[(p.x, p.y) for p in quad] for quad in geometry]
+
+
+def measure(fn, runs, before=None):
+    """p50/p99 time of fn over runs calls, then the peak traced allocation (KB) of one more call."""
+    times = []
+    for _ in range(runs):
+        if before:
+            before()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    stats = percentiles(times)
+
+    if before:
+        before()
+    tracemalloc.start()  # separate call: tracing slows allocation-heavy code several times over
+    fn()
+    stats["peak_kb"] = tracemalloc.get_traced_memory()[1] / 1e3
+    tracemalloc.stop()
+    return stats
+
+
+def run_scenario(Map, maps, runs):
+    cache = Map.Pathing.GeometryCache
+    pathing = Map.Pathing
+    sys.modules["PyPathing"].current_maps = maps
+    cache.Invalidate()
+
+    # Same points as the Quad path, for every getter, including after a pan
+    for pan in (0.0, 37.5):
+        FakeMapState.pan_offset_x += pan
+        assert as_tuples(pathing.GetComputedGeometry()) == as_tuples(legacy(Map, "GetPoints"))
+        assert as_tuples(pathing.GetScreenComputedGeometry()) == as_tuples(legacy(Map, "GetScreenPoints"))
+        assert as_tuples(pathing.GetShiftedComputedGeometry(1234.5, -321.25)) == \
+            as_tuples(legacy(Map, "GetShiftedPoints", 1234.5, -321.25))
+        assert as_tuples(pathing.GetshiftedScreenComputedGeometry(1234.5, -321.25)) == \
+            as_tuples(legacy(Map, "GetShiftedScreenPoints", 1234.5, -321.25))
+
+    def pan():
+        FakeMapState.pan_offset_x += 1.0
+
+    results = {
+        "legacy_game": measure(lambda: legacy(Map, "GetPoints"), max(1, runs // 5)),  # seconds per call
+        "legacy_screen": measure(lambda: legacy(Map, "GetScreenPoints"), max(1, runs // 5)),
+        "cached_game_cold": measure(pathing.GetComputedGeometry, runs, before=cache.Invalidate),
+        "cached_game_warm": measure(pathing.GetComputedGeometry, runs),
+        "cached_screen_panned": measure(pathing.GetScreenComputedGeometry, runs, before=pan),
+        "cached_screen_warm": measure(pathing.GetScreenComputedGeometry, runs),
+        "cached_screen_merged_panned": measure(lambda: pathing.GetScreenComputedGeometry(bucket_size=500.0), runs,
+                                               before=pan),
+    }
+    results["quads"] = {"trapezoids": sum(len(m.trapezoids) for m in maps),
+                        "merged_500": len(pathing.GetComputedGeometry(bucket_size=500.0))}
+    return results
+
+
+def print_results(results):
+    for scenario, benches in results.items():
+        quads = benches["quads"]
+        print(f"\n{scenario}  ({quads['trapezoids']} trapezoids, {quads['merged_500']} after 500-unit bucket merge)")
+        for bench, stats in benches.items():
+            if bench != "quads":
+                print(f"  {bench:<28} p50 {stats['p50_ms']:9.3f} ms   p99 {stats['p99_ms']:9.3f} ms"
+                      f"   peak {stats['peak_kb']:9.1f} KB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=15, help="timed calls per measurement")
+    parser.add_argument("--quick", action="store_true", help="skip the largest synthetic mesh")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    Map = install_map([])
+    results = {name: run_scenario(Map, make_maps(), args.runs) for name, make_maps in scenarios(args.quick)}
+    print_results(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
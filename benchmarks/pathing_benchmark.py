@@ -0,0 +1,447 @@
+"""
+Headless benchmark and regression check for Py4GWCoreLib/Pathing.py.
+
+Runs outside the game: the native modules Pathing.py needs (Py4GW, PyPathing, PyOverlay, PyMap)
+are replaced by small fakes serving synthetic trapezoid sets, plus any JSON fixtures in
+benchmarks/fixtures/ (record one in game with record_fixture()).
+
+    python benchmarks/pathing_benchmark.py                   # print p50/p99 timings and memory
+    python benchmarks/pathing_benchmark.py --save-baseline   # store this run as the baseline
+    python benchmarks/pathing_benchmark.py --compare         # exit 1 if slower/bigger than the baseline
+"""
+import argparse
+import enum
+import gc
+import importlib
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HERE = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_DIR = os.path.join(HERE, "fixtures")
+DEFAULT_BASELINE = os.path.join(HERE, "pathing_baseline.json")
+FRAME_SECONDS = 0.001  # pause between generator steps, like the gap between game frames
+
+
+#region Fakes
+
+class FakeTrapezoid:
+    __slots__ = ("id", "XTL", "XTR", "YT", "XBL", "XBR", "YB", "portal_left", "portal_right", "neighbor_ids")
+
+    def __init__(self, id, XTL, XTR, YT, XBL, XBR, YB, neighbor_ids=None):
+        self.id = id
+        self.XTL, self.XTR, self.YT = XTL, XTR, YT
+        self.XBL, self.XBR, self.YB = XBL, XBR, YB
+        self.portal_left = 0
+        self.portal_right = 0
+        self.neighbor_ids = neighbor_ids if neighbor_ids is not None else []
+
+
+class FakePortal:
+    def __init__(self, pair_index, trapezoid_indices):
+        self.pair_index = pair_index
+        self.trapezoid_indices = trapezoid_indices
+        self.count = len(trapezoid_indices)
+        self.left_layer_id = 0
+        self.right_layer_id = 0
+        self.h0004 = 0
+
+
+class FakePathingMap:
+    def __init__(self, zplane, trapezoids, portals):
+        self.zplane = zplane
+        self.trapezoids = trapezoids
+        self.portals = portals
+
+
+def install_fakes(projects_path: str):
+    """Register fake native modules and load Py4GWCoreLib.Pathing without the package __init__."""
+    py4gw = types.ModuleType("Py4GW")
+
+    class MessageType:
+        Info, Warning, Error, Debug, Success, Performance, Notice = range(7)
+
+    py4gw.Console = types.SimpleNamespace(MessageType=MessageType, Log=lambda *args, **kwargs: None,
+                                          get_projects_path=lambda: projects_path)
+    sys.modules["Py4GW"] = py4gw
+
+    pathing = types.ModuleType("PyPathing")
+
+    class PathStatus(enum.Enum):
+        Idle = 0
+        Pending = 1
+        Ready = 2
+        Failed = 3
+
+    class PathPlanner:
+        """Always fails, so AutoPathing.get_path exercises the Python A* fallback. Counts plan() calls."""
+        plans = 0
+
+        def reset(self): pass
+
+        def plan(self, **kwargs):
+            PathPlanner.plans += 1
+
+        def get_status(self): return PathStatus.Failed
+        def get_path(self): return []
+
+    pathing.PathingTrapezoid = FakeTrapezoid
+    pathing.Portal = FakePortal
+    pathing.PathingMap = FakePathingMap
+    pathing.PathStatus = PathStatus
+    pathing.PathPlanner = PathPlanner
+    pathing.current_maps = []
+    pathing.get_pathing_maps = lambda: pathing.current_maps
+    sys.modules["PyPathing"] = pathing
+
+    overlay = types.ModuleType("PyOverlay")
+
+    class Point2D:
+        __slots__ = ("x", "y")
+
+        def __init__(self, x, y):
+            self.x, self.y = x, y
+
+        def __iter__(self):
+            yield self.x
+            yield self.y
+
+    overlay.Point2D = Point2D
+    sys.modules["PyOverlay"] = overlay
+
+    pymap = types.ModuleType("PyMap")
+
+    class MapID:
+        def __init__(self, value): self.value = value
+        def ToInt(self): return self.value
+
+    class PyMap:
+        current_map_id = 1
+
+        def __init__(self):
+            self.map_id = MapID(PyMap.current_map_id)
+
+    pymap.PyMap = PyMap
+    sys.modules["PyMap"] = pymap
+
+    # Bare package so importing Pathing does not pull in the whole game API through __init__
+    sys.path.insert(0, ROOT)
+    package = types.ModuleType("Py4GWCoreLib")
+    package.__path__ = [os.path.join(ROOT, "Py4GWCoreLib")]
+    sys.modules["Py4GWCoreLib"] = package
+    package.Utils = importlib.import_module("Py4GWCoreLib.py4gwcorelib_src.Utils").Utils
+    sys.modules["Py4GWCoreLib.enums"] = importlib.import_module("Py4GWCoreLib.enums_src.Map_enums")
+
+    routines = types.ModuleType("Py4GWCoreLib.Routines")
+
+    class Yield:
+        @staticmethod
+        def wait(ms):
+            yield
+
+    routines.Yield = Yield
+    sys.modules["Py4GWCoreLib.Routines"] = routines
+    package.Routines = routines
+
+    return importlib.import_module("Py4GWCoreLib.Pathing")
+
+
+#region Trapezoid sets
+
+def band_map(seed: int, bands: int, cols: int, layers: int = 2, band_h: float = 200.0, col_w: float = 300.0,
+             hole_rate: float = 0.08):
+    """Columns of slanted trapezoids per layer, overlapping layers joined by cross-layer portal groups."""
+    rng = random.Random(seed)
+    maps, grids, next_id = [], [], 0
+    for z in range(layers):
+        x0, y0 = z * cols * col_w * 0.8, z * 37.0
+        lines = [[x0 + c * col_w + (rng.uniform(-col_w * 0.3, col_w * 0.3) if 0 < c < cols else 0.0)
+                  for c in range(cols + 1)] for _ in range(bands + 1)]
+        cells = {}
+        for b in range(bands):
+            for c in range(cols):
+                if rng.random() < hole_rate:
+                    continue
+                cells[(b, c)] = FakeTrapezoid(next_id, lines[b + 1][c], lines[b + 1][c + 1], y0 + (b + 1) * band_h,
+                                              lines[b][c], lines[b][c + 1], y0 + b * band_h)
+                next_id += 1
+        for (b, c), t in cells.items():
+            for other in ((b + 1, c), (b - 1, c), (b, c + 1), (b, c - 1)):
+                if other in cells:
+                    t.neighbor_ids.append(cells[other].id)
+        maps.append(FakePathingMap(z, list(cells.values()), []))
+        grids.append(cells)
+
+    for z in range(layers - 1):
+        for k in range(min(bands, 12)):
+            row = k * bands // 12
+            left = [t.id for (b, c), t in grids[z].items() if b == row and c >= cols - 3]
+            right = [t.id for (b, c), t in grids[z + 1].items() if b == row and c <= 2]
+            if left and right:
+                maps[z].portals.append(FakePortal(z * 1000 + k, left))
+                maps[z + 1].portals.append(FakePortal(z * 1000 + k, right))
+    return maps
+
+
+def brick_map(seed: int, bands: int, cols: int, band_h: float = 200.0, col_w: float = 300.0, hole_rate: float = 0.05):
+    """Staggered rows; each trapezoid neighbours the overlapping ones above and below (2D-connected graph)."""
+    rng = random.Random(seed)
+    rows, traps, next_id = [], [], 0
+    for b in range(bands):
+        offset = col_w / 2 if b % 2 else 0.0
+        row = []
+        for c in range(cols):
+            if rng.random() < hole_rate:
+                continue
+            xl = offset + c * col_w + rng.uniform(-20, 20)
+            xr = offset + (c + 1) * col_w + rng.uniform(-20, 20)
+            t = FakeTrapezoid(next_id, xl, xr, (b + 1) * band_h, xl, xr, b * band_h)
+            next_id += 1
+            row.append(t)
+            traps.append(t)
+        rows.append(row)
+    for b, row in enumerate(rows):
+        for t in row:
+            for nb in (b - 1, b + 1):
+                if 0 <= nb < bands:
+                    t.neighbor_ids.extend(o.id for o in rows[nb] if o.XBL < t.XBR and t.XBL < o.XBR)
+    return [FakePathingMap(0, traps, [])]
+
+
+def record_fixture(path: str):
+    """In game: write the current map's pathing maps to a JSON fixture for this harness."""
+    import PyMap
+    import PyPathing
+
+    layers = []
+    for layer in PyPathing.get_pathing_maps():
+        layers.append({
+            "zplane": layer.zplane,
+            "trapezoids": [[t.id, t.XTL, t.XTR, t.YT, t.XBL, t.XBR, t.YB, list(t.neighbor_ids)]
+                           for t in layer.trapezoids],
+            "portals": [[p.pair_index, list(p.trapezoid_indices)] for p in layer.portals],
+        })
+    with open(path, "w") as f:
+        json.dump({"map_id": PyMap.PyMap().map_id.ToInt(), "layers": layers}, f)
+
+
+def load_fixture(path: str):
+    with open(path) as f:
+        data = json.load(f)
+    return [FakePathingMap(layer["zplane"],
+                           [FakeTrapezoid(*t[:7], neighbor_ids=list(t[7])) for t in layer["trapezoids"]],
+                           [FakePortal(pair, list(ids)) for pair, ids in layer["portals"]])
+            for layer in data["layers"]]
+
+
+def scenarios(quick: bool):
+    sets = [("band-30x30x2", lambda: band_map(1, 30, 30)),
+            ("brick-60x60", lambda: brick_map(2, 60, 60))]
+    if not quick:
+        sets.append(("brick-150x150", lambda: brick_map(3, 150, 150)))
+    if os.path.isdir(FIXTURE_DIR):
+        for name in sorted(os.listdir(FIXTURE_DIR)):
+            if name.endswith(".json"):
+                sets.append((f"fixture-{name[:-5]}", lambda path=os.path.join(FIXTURE_DIR, name): load_fixture(path)))
+    return sets
+
+
+#region Measurements
+
+def percentiles(samples):
+    ordered = sorted(samples)
+
+    def rank(p):
+        return ordered[min(len(ordered) - 1, max(0, math.ceil(p * len(ordered)) - 1))]
+
+    return {"p50_ms": rank(0.50) * 1e3, "p99_ms": rank(0.99) * 1e3, "n": len(ordered)}
+
+
+def timed(fn, items, collect=False):
+    samples = []
+    for item in items:
+        if collect:
+            gc.collect()  # don't bill the previous sample's garbage to this one
+        start = time.perf_counter()
+        fn(item)
+        samples.append(time.perf_counter() - start)
+    return percentiles(samples)
+
+
+def random_inside(rng, t):
+    y = rng.uniform(t.YB, t.YT)
+    k = (y - t.YB) / (t.YT - t.YB) if t.YT != t.YB else 0.0
+    left = t.XBL + (t.XTL - t.XBL) * k
+    right = t.XBR + (t.XTR - t.XBR) * k
+    return (rng.uniform(left + (right - left) * 0.05, right - (right - left) * 0.05), y)
+
+
+def run_scenario(Pathing, name, make_maps, seed, queries, cache_dir):
+    rng = random.Random(seed)
+    maps = make_maps()
+    results = {}
+
+    gc.collect()
+    builds = 3 if sum(len(m.trapezoids) for m in maps) > 10000 else 5
+    results["navmesh_build"] = timed(lambda _: Pathing.NavMesh(maps, 1), range(builds), collect=True)
+    navmesh = Pathing.NavMesh(maps, 1)
+
+    navmesh.save_to_file(cache_dir)
+
+    def load(_):
+        if Pathing.NavMesh.load_from_file(maps, 1, cache_dir) is None:
+            raise RuntimeError(f"{name}: load_from_file rejected the file save_to_file just wrote")
+
+    results["navmesh_cache_load"] = timed(load, range(builds), collect=True)
+
+    traps = list(navmesh.trapezoids.values())
+    points = [random_inside(rng, rng.choice(traps)) for _ in range(queries * 10)]
+    navmesh.find_trapezoid_id_by_coord(points[0])
+    results["point_lookup"] = timed(navmesh.find_trapezoid_id_by_coord, points)
+
+    navmesh.get_search_graph()
+    routes = []
+    for _ in range(queries * 20):
+        start, goal = random_inside(rng, rng.choice(traps)), random_inside(rng, rng.choice(traps))
+        astar = Pathing.AStar(navmesh)
+        if astar.search(start, goal):
+            routes.append((start, goal, astar.corridor, astar.get_path()))
+            if len(routes) == queries:
+                break
+    if not routes:
+        return results
+
+    results["astar_search"] = timed(lambda r: Pathing.AStar(navmesh).search(r[0], r[1]), routes)
+    results["string_pull"] = timed(lambda r: navmesh.string_pull(r[2], r[0], r[1], 100), routes)
+    results["smooth_path_by_los"] = timed(lambda r: navmesh.smooth_path_by_los(r[3], 100, 200.0), routes)
+    results["densify_path2d"] = timed(lambda r: Pathing.densify_path2d(r[3]), routes)
+    results["chaikin_smooth_path"] = timed(lambda r: Pathing.chaikin_smooth_path(r[3], 1), routes)
+
+    sys.modules["PyPathing"].current_maps = maps
+    sys.modules["PyMap"].PyMap.current_map_id = 1
+    auto = Pathing.AutoPathing()
+    auto.pathing_map_cache.clear()
+    auto.pathing_map_cache[auto._get_group_key(1)] = navmesh
+
+    def get_path(route):
+        auto.path_cache.invalidate()
+        generator = auto.get_path((*route[0], 0), (*route[1], 0))
+        try:
+            while True:
+                next(generator)
+                time.sleep(FRAME_SECONDS)
+        except StopIteration:
+            pass
+
+    results["get_path_end_to_end"] = timed(get_path, routes)
+
+    gc.collect()
+    tracemalloc.start()
+    fresh = Pathing.NavMesh(maps, 1)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    fresh.find_trapezoid_id_by_coord(points[0])
+    fresh.get_search_graph()
+    results["memory"] = {"build_peak_mb": peak / 1e6, "navmesh_mb": fresh.get_memory_usage() / 1e6}
+    return results
+
+
+#region Regression check
+
+def compare(results, baseline, threshold, min_delta_ms):
+    """Messages for every timing p50 or memory figure worse than the baseline by more than threshold."""
+    regressions = []
+    for scenario, benches in results.items():
+        for bench, stats in benches.items():
+            base = baseline.get(scenario, {}).get(bench)
+            if not base:
+                continue
+            for metric, value in stats.items():
+                if metric in ("n", "p99_ms") or metric not in base:
+                    continue
+                limit = base[metric] * (1 + threshold)
+                noise = min_delta_ms if metric.endswith("_ms") else 0.0
+                if value > limit and value - base[metric] > noise:
+                    regressions.append(f"{scenario}/{bench} {metric}: {value:.3f} vs baseline {base[metric]:.3f}")
+    return regressions
+
+
+def best_of(rounds):
+    """Per benchmark, the round with the lowest p50 (or smallest memory); damps scheduler noise."""
+    best = {}
+    for results in rounds:
+        for bench, stats in results.items():
+            key = "p50_ms" if "p50_ms" in stats else "build_peak_mb"
+            if bench not in best or stats[key] < best[bench][key]:
+                best[bench] = stats
+    return best
+
+
+def print_results(results):
+    for scenario, benches in results.items():
+        print(f"\n{scenario}")
+        for bench, stats in benches.items():
+            if bench == "memory":
+                print(f"  {bench:<22} build peak {stats['build_peak_mb']:8.2f} MB   navmesh {stats['navmesh_mb']:8.2f} MB")
+            else:
+                print(f"  {bench:<22} p50 {stats['p50_ms']:10.3f} ms   p99 {stats['p99_ms']:10.3f} ms   n={stats['n']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--queries", type=int, default=30, help="routes per scenario")
+    parser.add_argument("--quick", action="store_true", help="skip the largest synthetic mesh")
+    parser.add_argument("--rounds", type=int, default=3, help="runs per scenario, best one kept")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative slowdown (0.25 = 25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.05, help="ignore p50 changes smaller than this")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        Pathing = install_fakes(tmp)
+        results = {}
+        for name, make_maps in scenarios(args.quick):
+            results[name] = best_of(run_scenario(Pathing, name, make_maps, args.seed, args.queries,
+                                                 os.path.join(tmp, "NavMeshCache"))
+                                    for _ in range(max(1, args.rounds)))
+        Pathing.AutoPathing().planner.shutdown()
+
+    print_results(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+
+    if args.compare:
+        if not os.path.isfile(args.baseline):
+            print(f"\nNo baseline at {args.baseline}; run with --save-baseline first.")
+            return 2
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for message in regressions:
+                print(f"  {message}")
+            return 1
+        print(f"\nNo regressions beyond {args.threshold:.0%}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
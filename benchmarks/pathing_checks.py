@@ -0,0 +1,743 @@
+"""
+Correctness checks for Py4GWCoreLib/Pathing.py against brute-force scans and the code the pathing
+optimisations replaced. Uses pathing_benchmark's fakes and synthetic meshes, plus meshes with the
+degenerate trapezoids real maps contain.
+
+    python benchmarks/pathing_checks.py                # every check
+    python benchmarks/pathing_checks.py points --seeds 20
+
+Checks:
+    points    find_trapezoid_id_by_coord's per-tolerance index against a scan of every trapezoid and
+              portal, on random, corner, border, off-mesh and non-finite points, tolerances 0/20/150,
+              before and after a cache round-trip
+    portals   local and cross-layer portals and portal_graph against the pairwise builders the sweep
+              replaced, on maps with portal groups above and below TOUCH_SWEEP_MIN_PAIRS, edges at and
+              around the touching tolerances, and shared, repeated and unknown trapezoid ids
+    astar     AStar's path cost and reachability against the heap-of-nodes AStar it replaced, for random
+              start/goal pairs on every mesh kind
+    growth    AutoPathing's NavMesh cache across hundreds of map transitions with a small budget, for
+              both eviction policies: the budget holds after every transition, evicted meshes are freed,
+              and every map is built once and reloaded from disk after eviction
+    latency   frames driving AutoPathing.get_path generators while PathPlanningService runs long searches
+              on its worker: no frame may take more than a fraction of one inline search
+    pull      string_pull properties for A* routes at margins 0/50/100: the path starts and ends at the
+              request, every segment sampled every 2 units is on the mesh by find_trapezoid_id_by_coord
+              and inside the corridor (bar the centroid hops A* itself makes) at the 20-unit tolerance
+              A* resolves start and goal with, and at margin 0 it is never longer than the raw A* path
+    cache     PathCache's exact hits, LRU evictions and sub-path reuse, which must stay on the start's z
+              plane and never splice through a wall; AutoPathing drops a map's paths when it rebuilds the
+              navmesh and makes no plan() call on a hit. NavMesh files round-trip with equal portals,
+              portal_graph and spatial grid, and load_from_file returns None for a missing file, another
+              format version, changed geometry, truncation, flipped bytes and bad magic
+Exits 1 on any failure.
+"""
+import argparse
+import gc
+import heapq
+import math
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+from pathing_benchmark import FRAME_SECONDS, FakePathingMap, FakePortal, FakeTrapezoid, band_map, brick_map, install_fakes, random_inside
+
+TOLERANCES = (0.0, 20.0, 150.0)
+
+
+#region Meshes
+
+def sliver_map(seed: int):
+    """
+    A band map with the odd shapes real pathing maps contain added to its first layer: inverted and
+    zero-height trapezoids, near-flat slivers whose slanted edges extrapolate across the map, and
+    trapezoids stacked on top of existing ones so the first match in scan order matters.
+    """
+    rng = random.Random(seed)
+    maps = band_map(seed, 12, 12)
+    layer = maps[0].trapezoids
+    next_id = max(t.id for m in maps for t in m.trapezoids) + 1
+    for _ in range(12):
+        base = rng.choice(layer)
+        kind = rng.choice(("inverted", "flat", "sliver", "stacked"))
+        if kind == "inverted":
+            t = FakeTrapezoid(next_id, base.XBL, base.XBR, base.YB, base.XTL, base.XTR, base.YT)
+        elif kind == "flat":
+            t = FakeTrapezoid(next_id, base.XTL, base.XTR, base.YT, base.XTL - 40, base.XTR + 40, base.YT)
+        elif kind == "sliver":
+            slant = rng.uniform(2000, 20000) * rng.choice((-1, 1))
+            t = FakeTrapezoid(next_id, base.XBL + slant, base.XBR + slant, base.YB + rng.uniform(1e-3, 0.5),
+                              base.XBL, base.XBR, base.YB)
+        else:
+            t = FakeTrapezoid(next_id, base.XTL + 10, base.XTR - 10, base.YT - 10, base.XBL + 10, base.XBR - 10, base.YB + 10)
+        layer.insert(rng.randrange(len(layer) + 1), t)
+        next_id += 1
+    return maps
+
+
+def portal_group_map(seed: int):
+    """
+    Two or three layers of loosely gridded trapezoids whose facing edges sit at and around the
+    touching tolerances, tied together by portal groups from a handful of pairs up to thousands.
+    Groups also carry unknown and repeated ids, and some trapezoids share ids across layers.
+    """
+    rng = random.Random(seed)
+    offsets = (0.0, 0.4, 1.0, 50.0, 100.1, 100.2, 100.21, 100.59, 100.6, 100.61, 101.0, 101.7, 300.0)
+    maps, all_ids, next_id = [], [], 0
+    for z in range(rng.randint(2, 3)):
+        traps = []
+        for _ in range(rng.randint(20, 90)):
+            xbl = rng.randrange(8) * 500.0 + rng.choice(offsets) * rng.choice((-1, 1))
+            yb = rng.randrange(8) * 400.0 + rng.choice(offsets) * rng.choice((-1, 1))
+            width = rng.choice((500.0, 500.0 - rng.choice(offsets), rng.uniform(0, 900)))
+            height = rng.choice((400.0, 400.0 + rng.choice(offsets), 0.0, -50.0))
+            slant = rng.choice((0.0, 0.0, rng.uniform(-150, 150)))
+            if all_ids and rng.random() < 0.05:
+                trap_id = rng.choice(all_ids)  # the same id on two layers
+            else:
+                trap_id = next_id
+                next_id += 1
+            t = FakeTrapezoid(trap_id, xbl + slant, xbl + width + slant, yb + height, xbl, xbl + width, yb)
+            traps.append(t)
+        for t in traps:
+            t.neighbor_ids.extend(o.id for o in rng.sample(traps, min(len(traps), 6)))
+        all_ids.extend(t.id for t in traps)
+        portals = [FakePortal(0, [t.id for t in traps] + [10 ** 6])]  # one group with every trapezoid
+        for pair_index in range(1, rng.randint(3, 12)):
+            ids = [t.id for t in rng.sample(traps, rng.randint(1, min(len(traps), 40)))]
+            ids += rng.sample(ids, min(len(ids), 2))  # repeated ids
+            portals.append(FakePortal(pair_index + rng.choice((0, 0, 0, 100 * z)), ids))
+        maps.append(FakePathingMap(z, traps, portals))
+    return maps
+
+
+def meshes(seeds: int, first_seed: int):
+    """(name, pathing maps) per seed, cycling through the generators."""
+    makers = (("band", lambda seed: band_map(seed, 20, 20)),
+              ("brick", lambda seed: brick_map(seed, 25, 25)),
+              ("slivers", sliver_map))
+    for seed in range(first_seed, first_seed + seeds):
+        name, make = makers[seed % len(makers)]
+        yield f"{name}-{seed}", seed, make(seed)
+
+
+#region Portals
+
+def pairwise_navmesh_class(Pathing):
+    class PairwiseNavMesh(Pathing.NavMesh):
+        """NavMesh with the portal builders from before the sweep: every cross-layer pair tested, an AABB per pair."""
+
+        def create_all_local_portals(self):
+            zplane_traps = defaultdict(list)
+            for trap_id, z in self.trap_id_to_layer.items():
+                zplane_traps[z].append(self.trapezoids[trap_id])
+            for traps in zplane_traps.values():
+                trap_by_id = {t.id: t for t in traps}
+                for ti in traps:
+                    for nid in ti.neighbor_ids:
+                        tj = trap_by_id.get(nid)
+                        if not tj or ti.id == tj.id:
+                            continue
+                        ai = Pathing.AABB(ti)
+                        aj = Pathing.AABB(tj)
+                        side = self.get_adjacent_side(ti, tj)
+                        if side:
+                            self.create_portal(ai, aj, side)
+
+        def create_all_cross_layer_portals(self):
+            portal_groups = defaultdict(lambda: defaultdict(list))
+            for z, portal_list in self.layer_portals.items():
+                for p in portal_list:
+                    for trap_id in p.trapezoid_indices:
+                        trap = self.trapezoids.get(trap_id)
+                        if not trap:
+                            continue
+                        portal_groups[p.pair_index][z].append(trap)
+            for zplane_map in portal_groups.values():
+                zplanes = list(zplane_map.keys())
+                if len(zplanes) < 2:
+                    continue
+                for i in range(len(zplanes)):
+                    for j in range(i + 1, len(zplanes)):
+                        for ti in zplane_map[zplanes[i]]:
+                            ai = Pathing.AABB(ti)
+                            for tj in zplane_map[zplanes[j]]:
+                                if ti.id == tj.id:
+                                    continue
+                                aj = Pathing.AABB(tj)
+                                if self.touching(ai, aj):
+                                    self.create_portal(ai, aj, None)
+
+    return PairwiseNavMesh
+
+
+def portal_signature(navmesh):
+    """Everything the search and the cache read from the portals, in order."""
+    portals = [(p.p1.x, p.p1.y, p.p2.x, p.p2.y, p.a.m_t.id, p.b.m_t.id, p.a.m_min, p.a.m_max, p.b.m_min, p.b.m_max)
+               for p in navmesh.portals]
+    return repr(portals), repr(navmesh.portal_graph)
+
+
+def largest_group_pairs(maps):
+    groups = defaultdict(lambda: defaultdict(int))
+    for z, layer in enumerate(maps):
+        for portal in layer.portals:
+            groups[portal.pair_index][z] += len(portal.trapezoid_indices)
+    return max((a * b for sizes in groups.values() for a, b in zip(sizes.values(), list(sizes.values())[1:])), default=0)
+
+
+def check_portals(Pathing, seeds, first_seed, problems):
+    PairwiseNavMesh = pairwise_navmesh_class(Pathing)
+    cases = [(f"groups-{seed}", seed, portal_group_map(seed)) for seed in range(first_seed, first_seed + 4 * seeds)]
+    cases += list(meshes(seeds, first_seed))
+    portals = swept = 0
+    for name, seed, maps in cases:
+        navmesh = Pathing.NavMesh(maps, seed)
+        expected = PairwiseNavMesh(maps, seed)
+        portals += len(expected.portals)
+        swept += largest_group_pairs(maps) >= Pathing.NavMesh.TOUCH_SWEEP_MIN_PAIRS
+        found, wanted = portal_signature(navmesh), portal_signature(expected)
+        if found[0] != wanted[0]:
+            problems.append(f"{name}: {len(navmesh.portals)} portals, pairwise builder made {len(expected.portals)}"
+                            f" or they differ in order, endpoints or boxes")
+        if found[1] != wanted[1]:
+            problems.append(f"{name}: portal_graph differs from the pairwise builder")
+    print(f"Portals: {len(cases)} maps ({swept} with sweep-sized groups), {portals} portals match the pairwise builders")
+
+
+#region A*
+
+class ReferenceNode:
+    def __init__(self, node_id, g, f, parent=None):
+        self.id = node_id
+        self.g = g
+        self.f = f
+        self.parent = parent
+
+    def __lt__(self, other): return self.f < other.f
+
+
+def reference_astar(navmesh, start_pos, goal_pos):
+    """AStar.search before the flat-array graph: centroid waypoints from start to goal, or None."""
+    start_id = navmesh.find_trapezoid_id_by_coord(start_pos)
+    goal_id = navmesh.find_trapezoid_id_by_coord(goal_pos)
+    if start_id is None or goal_id is None:
+        return None
+
+    def heuristic(a, b):
+        ax, ay = navmesh.get_position(a)
+        bx, by = navmesh.get_position(b)
+        return math.hypot(bx - ax, by - ay)
+
+    open_list = [ReferenceNode(start_id, 0, heuristic(start_id, goal_id))]
+    came_from = {}
+    cost_so_far = {start_id: 0}
+    while open_list:
+        current = heapq.heappop(open_list)
+        if current.id == goal_id:
+            path = []
+            end_id = goal_id
+            while end_id in came_from:
+                path.append(navmesh.get_position(end_id))
+                end_id = came_from[end_id]
+            path.append(navmesh.get_position(end_id))
+            path.reverse()
+            return path
+        for neighbor in navmesh.get_neighbors(current.id):
+            new_cost = cost_so_far[current.id] + heuristic(current.id, neighbor)
+            if neighbor not in cost_so_far or new_cost < cost_so_far[neighbor]:
+                cost_so_far[neighbor] = new_cost
+                heapq.heappush(open_list, ReferenceNode(neighbor, new_cost, new_cost + heuristic(neighbor, goal_id), current.id))
+                came_from[neighbor] = current.id
+    return None
+
+
+def path_cost(points):
+    return sum(math.dist(a, b) for a, b in zip(points, points[1:]))
+
+
+def check_astar(Pathing, seeds, first_seed, queries, problems):
+    cases = list(meshes(seeds, first_seed))
+    cases += [(f"groups-{seed}", seed, portal_group_map(seed)) for seed in range(first_seed, first_seed + seeds)]
+    reachable = identical = total = 0
+    for name, seed, maps in cases:
+        rng = random.Random(seed)
+        navmesh = Pathing.NavMesh(maps, seed)
+        astar = Pathing.AStar(navmesh)
+        traps = list(navmesh.trapezoids.values())
+        for _ in range(queries):
+            start, goal = random_inside(rng, rng.choice(traps)), random_inside(rng, rng.choice(traps))
+            if rng.random() < 0.05:
+                goal = (goal[0] + 1e6, goal[1])
+            expected = reference_astar(navmesh, start, goal)
+            found = astar.get_path()[1:-1] if astar.search(start, goal) else None
+            total += 1
+            if (found is None) != (expected is None):
+                problems.append(f"{name}: {start} -> {goal} found={found is not None}, reference found={expected is not None}")
+                continue
+            if found is None:
+                continue
+            reachable += 1
+            identical += found == expected
+            cost, expected_cost = path_cost(found), path_cost(expected)
+            if abs(cost - expected_cost) > 1e-6 * max(1.0, expected_cost):
+                problems.append(f"{name}: {start} -> {goal} costs {cost:.3f}, reference {expected_cost:.3f}")
+    print(f"A*: {len(cases)} meshes, {total} queries, {reachable} reachable with equal cost"
+          f" ({identical} with identical waypoints)")
+
+
+#region Cache growth
+
+def check_growth(Pathing, seeds, first_seed, transitions, problems):
+    pathing, pymap = sys.modules["PyPathing"], sys.modules["PyMap"]
+    map_ids = [10000 + seed for seed in range(first_seed, first_seed + 4 * seeds)]
+    maps_by_id = {map_id: (band_map(map_id, 10, 10) if map_id % 2 else brick_map(map_id, 14, 14)) for map_id in map_ids}
+    sizes = sorted(Pathing.NavMesh(maps, map_id).get_memory_usage() for map_id, maps in maps_by_id.items())
+    budget = 5 * sizes[len(sizes) // 2]
+
+    builds = []
+    build_portals = Pathing.NavMesh.create_all_local_portals
+
+    def counting_build(navmesh):
+        builds.append(navmesh.map_id)
+        build_portals(navmesh)
+
+    Pathing.NavMesh.create_all_local_portals = counting_build
+    auto = Pathing.AutoPathing()
+    saved_cache = auto.pathing_map_cache
+    try:
+        for policy in ("lru", "lfu"):
+            builds.clear()
+            with tempfile.TemporaryDirectory() as cache_dir:
+                auto._get_cache_folder = lambda: cache_dir
+                cache = auto.pathing_map_cache = Pathing.NavMeshCache(budget, policy, cache_dir)
+                rng = random.Random(first_seed)
+                live_peak = 0
+                for step in range(transitions):
+                    # Revisit recent maps more often than the rest, as a player moving between nearby areas does
+                    map_id = map_ids[min(int(rng.expovariate(0.15)), len(map_ids) - 1)] if step % 3 else rng.choice(map_ids)
+                    pymap.PyMap.current_map_id = map_id
+                    pathing.current_maps = maps_by_id[map_id]
+                    for _ in auto.load_pathing_maps():
+                        pass
+                    navmesh = auto.get_navmesh()
+                    if navmesh is None:
+                        problems.append(f"growth/{policy}: step {step} has no mesh for map {map_id}")
+                        continue
+                    traps = list(navmesh.trapezoids.values())
+                    navmesh.find_trapezoid_id_by_coord(random_inside(rng, rng.choice(traps)))
+                    navmesh.get_search_graph()
+                    cache[auto._get_group_key(map_id)] = navmesh  # re-measure with its indices built
+                    if cache.total_bytes > budget and len(cache) > 1:
+                        problems.append(f"growth/{policy}: step {step} holds {cache.total_bytes} bytes, budget {budget}")
+                    if step % 25 == 0:
+                        del navmesh
+                        gc.collect()
+                        live = sum(isinstance(o, Pathing.NavMesh) for o in gc.get_objects())
+                        live_peak = max(live_peak, live)
+                        if live > len(cache):
+                            problems.append(f"growth/{policy}: step {step} keeps {live} meshes alive, the cache holds {len(cache)}")
+                repeats = len(builds) - len(set(builds))
+                if repeats:
+                    problems.append(f"growth/{policy}: {repeats} meshes were rebuilt instead of loaded from disk")
+                stats = cache.get_stats()
+                if not stats["evictions"]:
+                    problems.append(f"growth/{policy}: the budget never evicted anything")
+                print(f"Growth ({policy}): {transitions} transitions over {len(map_ids)} maps, budget {budget / 1e6:.1f} MB,"
+                      f" {stats['evictions']} evictions, {len(set(builds))} builds,"
+                      f" at most {live_peak} meshes alive")
+    finally:
+        Pathing.NavMesh.create_all_local_portals = build_portals
+        auto.pathing_map_cache = saved_cache
+        del auto._get_cache_folder
+
+
+#region Frame latency
+
+def check_latency(Pathing, seed, searches, problems, frame_budget_ms=20.0):
+    pathing, pymap = sys.modules["PyPathing"], sys.modules["PyMap"]
+    maps = brick_map(seed, 100, 100)
+    navmesh = Pathing.NavMesh(maps, 1)
+    rows = sorted(navmesh.trapezoids.values(), key=lambda t: (t.YB, t.XBL))
+    rng = random.Random(seed)
+
+    def long_route():
+        """Corner to opposite corner, so each search expands most of the mesh."""
+        a, b = rng.choice(rows[:20]), rng.choice(rows[-20:])
+        return random_inside(rng, a), random_inside(rng, b)
+
+    inline = Pathing.AStar(navmesh)
+    start = time.perf_counter()
+    inline.search(*long_route())
+    inline_ms = (time.perf_counter() - start) * 1e3
+
+    pathing.current_maps = maps
+    pymap.PyMap.current_map_id = 1
+    auto = Pathing.AutoPathing()
+    auto.pathing_map_cache.clear()
+    auto.pathing_map_cache[auto._get_group_key(1)] = navmesh
+
+    def request():
+        auto.path_cache.invalidate()
+        route = long_route()
+        return auto.get_path((*route[0], 0), (*route[1], 0), smooth_by_los=False)
+
+    active = [request() for _ in range(3)]
+    frames, busy_frames, empty, done = [], 0, 0, 0
+    while active:
+        busy = auto.planner._current is not None
+        start = time.perf_counter()
+        for generator in list(active):
+            try:
+                next(generator)
+            except StopIteration as finished:
+                active.remove(generator)
+                done += 1
+                empty += not finished.value
+                if done + len(active) < searches:
+                    active.append(request())
+        frames.append((time.perf_counter() - start) * 1e3)
+        busy_frames += busy
+        time.sleep(FRAME_SECONDS)
+
+    frames.sort()
+    worst, p99 = frames[-1], frames[min(len(frames) - 1, int(0.99 * len(frames)))]
+    limit = min(frame_budget_ms, inline_ms / 2)
+    if empty:
+        problems.append(f"latency: {empty} of {done} requests came back without a path")
+    if not busy_frames:
+        problems.append("latency: no frame ran while the worker was searching")
+    if worst > limit:
+        problems.append(f"latency: slowest frame took {worst:.2f} ms, limit {limit:.2f} ms (inline search {inline_ms:.1f} ms)")
+    print(f"Latency: {len(navmesh.trapezoids)} trapezoids, inline search {inline_ms:.1f} ms; {done} worker searches over"
+          f" {len(frames)} frames ({busy_frames} during a search), frame p99 {p99:.3f} ms, max {worst:.3f} ms")
+
+
+#region String pulling
+
+def check_pull(Pathing, seeds, first_seed, queries, problems, step=2.0, tol=20.0):
+    cases = list(meshes(seeds, first_seed))
+    paths = samples = hops = 0
+    for name, seed, maps in cases:
+        rng = random.Random(seed)
+        navmesh = Pathing.NavMesh(maps, seed)
+        astar = Pathing.AStar(navmesh)
+        traps = list(navmesh.trapezoids.values())
+        routes = []
+        for _ in range(queries * 10):
+            start, goal = random_inside(rng, rng.choice(traps)), random_inside(rng, rng.choice(traps))
+            if astar.search(start, goal):
+                routes.append((start, goal, list(astar.corridor), astar.get_path()))
+                if len(routes) == queries:
+                    break
+
+        for start, goal, corridor, raw in routes:
+            corridor_traps = [navmesh.trapezoids[t_id] for t_id in corridor]
+            # Links without a shared edge are crossed centroid to centroid, as A* does
+            centroid_hops = {(navmesh.get_position(a.id), navmesh.get_position(b.id))
+                             for a, b in zip(corridor_traps, corridor_traps[1:])
+                             if navmesh._shared_edge(a, b) is None}
+            for margin in (0.0, 50.0, 100.0):
+                path = navmesh.string_pull(corridor, start, goal, margin)
+                paths += 1
+                label = f"{name}: {start} -> {goal} margin {margin}"
+                if path[0] != start or path[-1] != goal:
+                    problems.append(f"{label} runs {path[0]} -> {path[-1]}")
+                if margin == 0.0 and path_cost(path) > path_cost(raw) + 1e-6:
+                    problems.append(f"{label} is {path_cost(path):.1f} long, raw A* path {path_cost(raw):.1f}")
+                for p, q in zip(path, path[1:]):
+                    if (p, q) in centroid_hops:
+                        hops += 1
+                        continue
+                    count = max(1, math.ceil(math.dist(p, q) / step))
+                    for i in range(count + 1):
+                        point = (p[0] + (q[0] - p[0]) * i / count, p[1] + (q[1] - p[1]) * i / count)
+                        samples += 1
+                        if navmesh.find_trapezoid_id_by_coord(point, tol) is None:
+                            problems.append(f"{label}: {point} on segment {p} -> {q} is off the mesh")
+                            break
+                        if not any(contains(t, point, tol) for t in corridor_traps):
+                            problems.append(f"{label}: {point} on segment {p} -> {q} leaves the corridor")
+                            break
+    print(f"String pull: {len(cases)} meshes, {paths} paths, {samples} samples on the mesh and in the corridor"
+          f" ({hops} centroid hops kept from A*)")
+
+
+#region Point index
+
+def contains(t, point, tol):
+    """find_trapezoid_id_by_coord's test for one trapezoid."""
+    x, y = point
+    if t.YB - tol <= y <= t.YT + tol:
+        ratio = (y - t.YB) / (t.YT - t.YB) if t.YT != t.YB else 0
+        left_x = t.XBL + (t.XTL - t.XBL) * ratio
+        right_x = t.XBR + (t.XTR - t.XBR) * ratio
+        return left_x - tol <= x <= right_x + tol
+    return False
+
+
+def scan_trapezoid_id(navmesh, point, tol):
+    """find_trapezoid_id_by_coord before the index: every trapezoid, then every portal's trapezoids."""
+    for t in navmesh.trapezoids.values():
+        if contains(t, point, tol):
+            return t.id
+    for portal in navmesh.portals:
+        for trap in (portal.a.m_t, portal.b.m_t):
+            if contains(trap, point, tol):
+                return trap.id
+    return None
+
+
+def probe_points(rng, navmesh, count):
+    """Points inside trapezoids, on and just around their corners, across the bounding box and beyond."""
+    traps = list(navmesh.trapezoids.values())
+    min_x = min(min(t.XBL, t.XTL) for t in traps)
+    max_x = max(max(t.XBR, t.XTR) for t in traps)
+    min_y = min(t.YB for t in traps)
+    max_y = max(t.YT for t in traps)
+    points = [random_inside(rng, rng.choice(traps)) for _ in range(count)]
+    for _ in range(count):
+        t = rng.choice(traps)
+        x, y = rng.choice(((t.XTL, t.YT), (t.XTR, t.YT), (t.XBL, t.YB), (t.XBR, t.YB)))
+        offset = rng.choice((0.0, 1e-9, 19.999, 20.0, 20.001, 150.0, 150.5))
+        points.append((x + rng.choice((-1, 0, 1)) * offset, y + rng.choice((-1, 0, 1)) * offset))
+    points += [(rng.uniform(min_x - 500, max_x + 500), rng.uniform(min_y - 500, max_y + 500)) for _ in range(count)]
+    points += [(-1e7, 0.0), (1e7, 1e7), (math.nan, 0.0), (0.0, math.nan), (math.inf, min_y), (min_x, -math.inf)]
+    return points
+
+
+def check_points(Pathing, seeds, first_seed, queries, problems):
+    checked = 0
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for name, seed, maps in meshes(seeds, first_seed):
+            rng = random.Random(seed)
+            navmesh = Pathing.NavMesh(maps, seed)
+            navmesh.save_to_file(cache_dir)
+            loaded = Pathing.NavMesh.load_from_file(maps, seed, cache_dir)
+            if loaded is None:
+                problems.append(f"{name}: cache round-trip returned no mesh")
+                loaded = navmesh
+            points = probe_points(rng, navmesh, queries)
+            for tol in TOLERANCES:
+                for point in points:
+                    expected = scan_trapezoid_id(navmesh, point, tol)
+                    for label, mesh in (("built", navmesh), ("loaded", loaded)):
+                        found = mesh.find_trapezoid_id_by_coord(point, tol)
+                        if found != expected:
+                            problems.append(f"{name} ({label}): point {point} tol {tol} -> {found}, scan says {expected}")
+                    checked += 1
+    print(f"Point index: {seeds} meshes, {checked} lookups on the built and the reloaded mesh match the scan")
+
+
+#region Path and mesh caches
+
+def wall_map():
+    """
+    Two bands of floor joined at the right end, with a 60-unit wall between them everywhere else:
+        y 260..460  x 0..1000
+        y 200..260  x 800..1000 (the gap)
+        y   0..200  x 0..1000
+    """
+    traps = [FakeTrapezoid(1, 0.0, 1000.0, 200.0, 0.0, 1000.0, 0.0, [2]),
+             FakeTrapezoid(2, 800.0, 1000.0, 260.0, 800.0, 1000.0, 200.0, [1, 3]),
+             FakeTrapezoid(3, 0.0, 1000.0, 460.0, 0.0, 1000.0, 260.0, [2])]
+    return [FakePathingMap(0, traps, [])]
+
+
+def run_to_end(generator):
+    while True:
+        try:
+            next(generator)
+        except StopIteration as finished:
+            return finished.value
+        time.sleep(FRAME_SECONDS)
+
+
+def check_path_cache(Pathing, problems):
+    pathing, pymap = sys.modules["PyPathing"], sys.modules["PyMap"]
+    options = (False, 100, 200.0, False, 1)
+
+    def expect(label, got, expected):
+        if got != expected:
+            problems.append(f"cache: {label} returned {got}, expected {expected}")
+
+    # Exact hits and LRU eviction
+    cache = Pathing.PathCache(max_entries=4)
+    goal = (5000.0, 5000.0, 0)
+    for i in range(4):
+        cache.put(1, (i * 1000.0, 0.0, 0), goal, options, [(i * 1000.0, 0.0), (5000.0, 5000.0)])
+    expect("an exact hit", cache.get(1, (10.0, 10.0, 0), goal, options), [(0.0, 0.0), (5000.0, 5000.0)])
+    for i in range(4, 6):
+        cache.put(1, (i * 1000.0, 0.0, 0), goal, options, [(i * 1000.0, 0.0), (5000.0, 5000.0)])
+    for i, kept in enumerate((True, False, False, True, True, True)):
+        path = cache.get(1, (i * 1000.0, 0.0, 0), goal, options)
+        if (path is not None) != kept:
+            problems.append(f"cache: entry {i} {'was evicted' if kept else 'survived'} (LRU, 4 entries, entry 0 touched)")
+    expect("another z plane", cache.get(1, (0.0, 0.0, 1), goal, options), None)
+    expect("another map", cache.get(2, (0.0, 0.0, 0), goal, options), None)
+    expect("other options", cache.get(1, (0.0, 0.0, 0), goal, (True,) + options[1:]), None)
+    stats = cache.get_stats()
+    expect("the LRU stats", (stats["entries"], stats["hits"], stats["misses"], stats["evictions"]), (4, 5, 5, 2))
+
+    # Sub-path reuse
+    navmesh = Pathing.NavMesh(wall_map(), 1)
+    cache = Pathing.PathCache()
+    cache.put(1, (50.0, 100.0, 0), (950.0, 100.0, 0), options, [(50.0, 100.0), (500.0, 100.0), (950.0, 100.0)])
+    expect("a sub-path from another z plane", cache.get(1, (200.0, 150.0, 5), (950.0, 100.0, 0), options, navmesh), None)
+    expect("a sub-path without a navmesh", cache.get(1, (200.0, 150.0, 0), (950.0, 100.0, 0), options), None)
+    expect("a sub-path", cache.get(1, (200.0, 150.0, 0), (950.0, 100.0, 0), options, navmesh), [(500.0, 100.0), (950.0, 100.0)])
+    around = [(100.0, 420.0), (900.0, 420.0), (900.0, 180.0), (100.0, 180.0)]
+    cache.put(1, (100.0, 420.0, 0), (100.0, 180.0, 0), options, around)
+    expect("a sub-path spliced through the wall", cache.get(1, (300.0, 275.0, 0), (100.0, 180.0, 0), options, navmesh), None)
+    expect("a sub-path spliced along the floor", cache.get(1, (300.0, 380.0, 0), (100.0, 180.0, 0), options, navmesh), around[1:])
+    stats = cache.get_stats()
+    expect("the sub-path stats", (stats["hits"], stats["subpath_hits"], stats["misses"]), (0, 2, 3))
+
+    # AutoPathing: hits never plan, and rebuilding a map's navmesh drops its paths
+    map_id = 20001
+    pymap.PyMap.current_map_id = map_id
+    pathing.current_maps = wall_map()
+    auto = Pathing.AutoPathing()
+    auto.pathing_map_cache.pop(auto._get_group_key(map_id))
+    auto.path_cache.invalidate()
+    auto.path_cache.put(map_id, (100.0, 100.0, 0), (900.0, 100.0, 0), options, [(100.0, 100.0), (900.0, 100.0)])
+    auto.path_cache.put(map_id + 1, (100.0, 100.0, 0), (900.0, 100.0, 0), options, [(100.0, 100.0), (900.0, 100.0)])
+    for _ in auto.load_pathing_maps():
+        pass
+    expect("a path cached before the rebuild", auto.path_cache.get(map_id, (100.0, 100.0, 0), (900.0, 100.0, 0), options), None)
+    if auto.path_cache.get(map_id + 1, (100.0, 100.0, 0), (900.0, 100.0, 0), options) is None:
+        problems.append("cache: rebuilding one map's navmesh dropped another map's paths")
+
+    start, goal = (100.0, 380.0, 0), (100.0, 100.0, 0)
+    planned = pathing.PathPlanner.plans
+    first = run_to_end(auto.get_path(start, goal, smooth_by_los=False))
+    if not first or pathing.PathPlanner.plans != planned + 1:
+        problems.append(f"cache: the first request returned {first} after {pathing.PathPlanner.plans - planned} plan() calls")
+    hits = auto.path_cache.hits
+    again = run_to_end(auto.get_path(start, goal, smooth_by_los=False))
+    if again != first or auto.path_cache.hits != hits + 1:
+        problems.append("cache: a repeated request was not served from the cache")
+    subpath_hits = auto.path_cache.subpath_hits
+    nearby = run_to_end(auto.get_path((start[0] + 120.0, start[1] + 40.0, 0), goal, smooth_by_los=False))
+    if not nearby or auto.path_cache.subpath_hits != subpath_hits + 1:
+        problems.append("cache: a nearby start did not reuse the cached sub-path")
+    if pathing.PathPlanner.plans != planned + 1:
+        problems.append(f"cache: cache hits made {pathing.PathPlanner.plans - planned - 1} plan() calls")
+    auto.path_cache.invalidate()
+    print(f"Path cache: LRU, z plane, wall splice, rebuild invalidation and {pathing.PathPlanner.plans - planned} plan() call"
+          f" for 3 requests checked")
+
+
+def copy_maps(maps):
+    return [FakePathingMap(m.zplane, [FakeTrapezoid(t.id, t.XTL, t.XTR, t.YT, t.XBL, t.XBR, t.YB, list(t.neighbor_ids))
+                                      for t in m.trapezoids], m.portals) for m in maps]
+
+
+def grid_signature(navmesh):
+    return sorted((cell, [t.id for t in traps]) for cell, traps in navmesh.spatial_grid.items())
+
+
+def check_mesh_file(Pathing, seeds, first_seed, problems):
+    """save_to_file/load_from_file round-trips, and every stale or damaged file is rejected with None."""
+    rejected = 0
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for name, seed, maps in meshes(seeds, first_seed):
+            navmesh = Pathing.NavMesh(maps, seed)
+            navmesh.save_to_file(cache_dir)
+            loaded = Pathing.NavMesh.load_from_file(maps, seed, cache_dir)
+            if loaded is None:
+                problems.append(f"cache: {name} did not load back from its file")
+                continue
+            if portal_signature(loaded) != portal_signature(navmesh):
+                problems.append(f"cache: {name} loaded different portals or portal_graph")
+            if grid_signature(loaded) != grid_signature(navmesh) or loaded.GRID_SIZE != navmesh.GRID_SIZE:
+                problems.append(f"cache: {name} loaded a different spatial grid")
+
+            path = Pathing.NavMesh.cache_file_path(cache_dir, seed)
+            with open(path, "rb") as f:
+                good = f.read()
+            header_size = Pathing._NAVMESH_HEADER.size
+            rng = random.Random(seed)
+            version = Pathing._NAVMESH_HEADER.unpack_from(good, 0)[1]
+            damaged = [("another format version", good[:4] + (version + 1).to_bytes(4, "little") + good[8:]),
+                       ("bad magic", b"XXXX" + good[4:]),
+                       ("an empty file", b""),
+                       ("a truncated header", good[:header_size // 2]),
+                       ("a header without payload", good[:header_size]),
+                       ("a truncated payload", good[:-8]),
+                       ("a trailing byte", good + b"\0")]
+            flips = list(range(header_size)) + rng.sample(range(header_size, len(good)), min(64, len(good) - header_size))
+            for offset in flips:
+                damaged.append((f"byte {offset} flipped", good[:offset] + bytes([good[offset] ^ 0x5A]) + good[offset + 1:]))
+            for label, data in damaged:
+                with open(path, "wb") as f:
+                    f.write(data)
+                if Pathing.NavMesh.load_from_file(maps, seed, cache_dir) is not None:
+                    problems.append(f"cache: {name} loaded a file with {label}")
+                rejected += 1
+            with open(path, "wb") as f:
+                f.write(good)
+
+            moved = copy_maps(maps)
+            trap = rng.choice(moved[0].trapezoids)
+            trap.XTL -= 1.0
+            relinked = copy_maps(maps)
+            rng.choice(relinked[-1].trapezoids).neighbor_ids.append(-1)
+            for label, changed in (("a moved trapezoid", moved), ("a changed neighbour list", relinked)):
+                if Pathing.NavMesh.load_from_file(changed, seed, cache_dir) is not None:
+                    problems.append(f"cache: {name} loaded a file saved before {label}")
+                rejected += 1
+            if Pathing.NavMesh.load_from_file(maps, seed + 1_000_000, cache_dir) is not None:
+                problems.append(f"cache: {name} loaded a file for a map that was never saved")
+            rejected += 1
+    print(f"Mesh file: {seeds} meshes round-trip with equal portals, graph and grid; {rejected} stale or damaged files rejected")
+
+
+CHECKS = ("points", "portals", "astar", "growth", "latency", "pull", "cache")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("checks", nargs="*", help=f"checks to run (default: all of {', '.join(CHECKS)})")
+    parser.add_argument("--seeds", type=int, default=9, help="meshes per check")
+    parser.add_argument("--seed", type=int, default=1, help="first seed")
+    parser.add_argument("--transitions", type=int, default=300, help="map changes per eviction policy")
+    parser.add_argument("--searches", type=int, default=12, help="worker searches while frames are timed")
+    parser.add_argument("--queries", type=int, default=200, help="probes of each kind per mesh")
+    args = parser.parse_args()
+    unknown = [name for name in args.checks if name not in CHECKS]
+    if unknown:
+        parser.error(f"unknown checks {unknown}, choose from {CHECKS}")
+    checks = args.checks or CHECKS
+
+    with tempfile.TemporaryDirectory() as projects_path:
+        Pathing = install_fakes(projects_path)
+        problems = []
+        if "points" in checks:
+            check_points(Pathing, args.seeds, args.seed, args.queries, problems)
+        if "portals" in checks:
+            check_portals(Pathing, args.seeds, args.seed, problems)
+        if "astar" in checks:
+            check_astar(Pathing, args.seeds, args.seed, args.queries // 2, problems)
+        if "growth" in checks:
+            check_growth(Pathing, args.seeds, args.seed, args.transitions, problems)
+        if "latency" in checks:
+            check_latency(Pathing, args.seed, args.searches, problems)
+        if "pull" in checks:
+            check_pull(Pathing, args.seeds, args.seed, args.queries // 10, problems)
+        if "cache" in checks:
+            check_path_cache(Pathing, problems)
+            check_mesh_file(Pathing, args.seeds, args.seed, problems)
+        Pathing.AutoPathing().planner.shutdown()
+
+    for problem in problems[:50]:
+        print(f"FAIL {problem}")
+    if problems:
+        print(f"{len(problems)} failures")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
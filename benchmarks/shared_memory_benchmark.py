@@ -0,0 +1,382 @@
+"""
+Headless benchmark for the GlobalCache shared-memory manager (Py4GWCoreLib/GlobalCache/SharedMemory.py).
+
+Runs on an anonymous local shared-memory segment. Py4GW, PyEffects, PyPlayer and the game API the
+manager reads (Map, Party, Player, Agent) are replaced by small fakes.
+
+    python benchmarks/shared_memory_benchmark.py
+    python benchmarks/shared_memory_benchmark.py --calls 20000 --json results.json
+
+The "previous" column repeats each access the way the manager did it before the views were cached:
+a fresh AllAccounts.from_buffer over the mapping on every touch. The seqlock rows compare a protected
+snapshot read or slot write with the same access made without the slot seqlock.
+"""
+import argparse
+import gc
+import importlib
+import json
+import os
+import sys
+import time
+import types
+from multiprocessing import shared_memory
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ACTIVE_ACCOUNTS = 8
+
+
+#region Fakes
+
+class FakeGame:
+    """What the fake game API reports for the local client."""
+    map_id = 248
+    region = 2
+    district = 1
+    party_id = 7
+    player_agent_id = 10
+    account_email = "bench@local"
+    heroes = []  # [SimpleNamespace(agent_id, hero_id, owner_player_id)]
+    buffs = {}   # agent_id -> [skill_id, ...]
+    tick = 0     # bumped per simulated frame, moves positions and health
+
+
+class FakeMapInstance:
+    def __init__(self):
+        self.instance_type = types.SimpleNamespace(GetName=lambda: "Explorable")
+        self.is_in_cinematic = False
+        self.is_map_ready = True
+        self.map_id = types.SimpleNamespace(ToInt=lambda: FakeGame.map_id)
+        self.server_region = types.SimpleNamespace(ToInt=lambda: FakeGame.region)
+        self.region_type = types.SimpleNamespace(ToInt=lambda: FakeGame.region)
+        self.district = FakeGame.district
+
+    def GetContext(self): pass
+
+
+class FakeAgentInstance:
+    def __init__(self, agent_id):
+        moved = FakeGame.tick * 0.5
+        self.x, self.y, self.z = agent_id * 100.0 + moved, agent_id * 50.0, 0.0
+        self.rotation_angle = 0.25
+        self.living_agent = types.SimpleNamespace(hp=1.0 - (FakeGame.tick % 10) * 0.01, max_hp=480, hp_regen=0.0,
+                                                  energy=0.5, max_energy=30, energy_regen=0.03)
+
+    def GetContext(self): pass
+
+
+class FakePlayerInstance:
+    def __init__(self):
+        self.id = FakeGame.player_agent_id
+        self.account_name = "Bench Account"
+        self.account_email = FakeGame.account_email
+        self.target_id = 0
+
+    @property
+    def agent(self):
+        return FakeAgentInstance(self.id)
+
+    def GetContext(self): pass
+
+
+class FakePartyInstance:
+    is_party_loaded = True
+    is_party_leader = True
+
+    def __init__(self):
+        self.party_id = FakeGame.party_id
+        self.players = [types.SimpleNamespace(login_number=1)]
+
+    @property
+    def heroes(self):
+        return FakeGame.heroes
+
+    def GetContext(self): pass
+    def GetAgentIDByLoginNumber(self, login_number): return FakeGame.player_agent_id
+    def GetPlayerNameByLoginNumber(self, login_number): return "Bench Player"
+    def GetIsPlayerTicked(self, party_number): return False
+    def GetPetInfo(self, owner_agent_id): return None
+
+
+class FakeEffect:
+    __slots__ = ("skill_id",)
+
+    def __init__(self, skill_id):
+        self.skill_id = skill_id
+
+
+class FakeEffectsCache:
+    @staticmethod
+    def GetBuffs(agent_id):
+        return [FakeEffect(skill_id) for skill_id in FakeGame.buffs.get(agent_id, ())[::2]]
+
+    @staticmethod
+    def GetEffects(agent_id):
+        return [FakeEffect(skill_id) for skill_id in FakeGame.buffs.get(agent_id, ())[1::2]]
+
+
+def install_fakes():
+    """Register the fakes and import SharedMemory without the package __init__ files."""
+    sys.path.insert(0, ROOT)
+    py4gw = types.ModuleType("Py4GW")
+    py4gw.Console = types.SimpleNamespace(MessageType=types.SimpleNamespace(Info=0, Warning=1, Error=2, Success=3),
+                                          Log=lambda *args: None)
+    sys.modules["Py4GW"] = py4gw
+
+    for name in ("Py4GWCoreLib", "Py4GWCoreLib.GlobalCache"):
+        package = types.ModuleType(name)
+        package.__path__ = [os.path.join(ROOT, *name.split("."))]
+        sys.modules[name] = package
+    core = sys.modules["Py4GWCoreLib"]
+    core.ConsoleLog = lambda *args, **kwargs: None
+    core.ThrottledTimer = importlib.import_module("Py4GWCoreLib.py4gwcorelib_src.Timer").ThrottledTimer
+    core.SharedCommandType = importlib.import_module("Py4GWCoreLib.enums_src.Multiboxing_enums").SharedCommandType
+    core.Map = types.SimpleNamespace(map_instance=FakeMapInstance)
+    core.Player = types.SimpleNamespace(player_instance=FakePlayerInstance)
+    core.Agent = types.SimpleNamespace(agent_instance=FakeAgentInstance)
+    core.Party = types.SimpleNamespace(party_instance=FakePartyInstance, Players=types.SimpleNamespace(
+        GetAgentIDByLoginNumber=lambda login_number: FakeGame.player_agent_id))
+
+    effect_cache = types.ModuleType("Py4GWCoreLib.GlobalCache.EffectCache")
+    effect_cache.EffectsCache = FakeEffectsCache
+    sys.modules[effect_cache.__name__] = effect_cache
+    return importlib.import_module("Py4GWCoreLib.GlobalCache.SharedMemory")
+
+
+#region Segments
+
+def create_manager(SharedMemory):
+    """The singleton manager over a fresh anonymous segment; returns (manager, segment)."""
+    segment = shared_memory.SharedMemory(create=True, size=SharedMemory.sizeof(SharedMemory.AllAccounts))
+    SharedMemory.Py4GWSharedMemoryManager._instance = None
+    manager = SharedMemory.Py4GWSharedMemoryManager(name=segment.name)
+    return manager, segment
+
+
+def attach(SharedMemory, name):
+    """
+    Another client's manager over an existing segment, the way a second game process maps it,
+    without the singleton or the full reset its __init__ does on startup.
+    """
+    manager = object.__new__(SharedMemory.Py4GWSharedMemoryManager)
+    manager.shm_name = name
+    manager.max_num_players = SharedMemory.SHMEM_MAX_NUM_PLAYERS
+    manager.size = SharedMemory.sizeof(SharedMemory.AllAccounts)
+    manager.map_instance = FakeMapInstance()
+    manager.party_instance = None
+    manager.player_instance = None
+    manager.throttle_timer_150 = SharedMemory.ThrottledTimer(150)
+    manager.throttle_timer_63 = SharedMemory.ThrottledTimer(63)
+    manager.shm = shared_memory.SharedMemory(name=name)
+    manager._attach_views()
+    manager._initialized = True
+    return manager
+
+
+def release(manager, segment=None):
+    """Drop every ctypes view over the mapping so it can be closed, then close (and unlink) it."""
+    shm = manager.shm
+    manager.__dict__.clear()
+    gc.collect()
+    shm.close()
+    if segment is not None:
+        segment.close()
+        segment.unlink()
+
+
+def fill_accounts(manager, count: int = ACTIVE_ACCOUNTS):
+    """Register count accounts in the first free slots, in one party on one map."""
+    emails = [f"account{i}@local" for i in range(count)]
+    for i, email in enumerate(emails):
+        index = manager.GetAccountSlot(email)
+        player = manager.GetAccountDataSlot(index)
+        with manager._slot_write(index):
+            player.IsAccount = True
+            player.PlayerID = 100 + i
+            player.PartyID = FakeGame.party_id
+            player.MapID, player.MapRegion, player.MapDistrict = FakeGame.map_id, FakeGame.region, FakeGame.district
+        manager._commit_slot_keys(index)
+    return emails
+
+
+#region Measurements
+
+def per_call_us(fn, calls: int, rounds: int = 5) -> float:
+    """Mean cost of one call in microseconds, best of rounds."""
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for i in range(calls):
+            fn(i)
+        best = min(best, (time.perf_counter() - start) / calls)
+    return best * 1e6
+
+
+def view_benchmarks(SharedMemory, manager):
+    """(name, previous access, cached access) pairs for the struct view layer."""
+    AllAccounts = SharedMemory.AllAccounts
+    queue_size = SharedMemory.SHMEM_MESSAGE_QUEUE_SIZE
+    slots = manager.max_num_players
+    buf = manager.shm.buf
+
+    def previous_scan(i):
+        for index in range(slots):
+            player = AllAccounts.from_buffer(buf).AccountData[index]
+            if not player.IsSlotActive:
+                continue
+            if AllAccounts.from_buffer(buf).AccountData[index].AccountEmail == "missing@local" and player.IsAccount:
+                return index
+        return -1
+
+    def cached_scan(i):
+        for index in range(slots):
+            player = manager.GetAccountDataSlot(index)
+            if not player.IsSlotActive:
+                continue
+            if player.AccountEmail == "missing@local" and player.IsAccount:
+                return index
+        return -1
+
+    return [
+        ("GetStruct", lambda i: AllAccounts.from_buffer(buf), lambda i: manager.GetStruct()),
+        ("AccountData field read",
+         lambda i: AllAccounts.from_buffer(buf).AccountData[i % slots].PlayerHP,
+         lambda i: manager.GetAccountDataSlot(i % slots).PlayerHP),
+        ("AccountData field write",
+         lambda i: setattr(AllAccounts.from_buffer(buf).AccountData[i % slots], "PlayerTargetID", i),
+         lambda i: setattr(manager.GetAccountDataSlot(i % slots), "PlayerTargetID", i)),
+        ("SharedMessage field read",
+         lambda i: AllAccounts.from_buffer(buf).MessageQueues[i % slots].Messages[i % queue_size].Command,
+         lambda i: manager.GetSharedMessageSlot((i % slots) * queue_size + i % queue_size).Command),
+        ("HeroAIOptions field read",
+         lambda i: AllAccounts.from_buffer(buf).HeroAIOptions[i % slots].Following,
+         lambda i: manager.GetHeroAIOptionsSlot(i % slots).Following),
+        ("scan 64 slots (miss)", previous_scan, cached_scan),
+    ]
+
+
+def run_views(SharedMemory, manager, calls: int):
+    results = {}
+    for name, previous, cached in view_benchmarks(SharedMemory, manager):
+        scan_calls = max(1, calls // SharedMemory.SHMEM_MAX_NUM_PLAYERS) if name.startswith("scan") else calls
+        results[name] = {"previous_us": per_call_us(previous, scan_calls), "cached_us": per_call_us(cached, scan_calls)}
+    return results
+
+
+def seqlock_benchmarks(SharedMemory, manager):
+    """(name, seqlock-protected access, unprotected access) pairs for one active slot."""
+    AccountData = SharedMemory.AccountData
+    view = manager.GetAccountDataSlot(0)
+
+    def protected_write(i):
+        with manager._slot_write(0):
+            view.PlayerTargetID = i
+
+    def bare_write(i):
+        view.PlayerTargetID = i
+
+    buffs = (SharedMemory.c_uint * SharedMemory.SHMEM_MAX_NUMBER_OF_BUFFS)(*range(SharedMemory.SHMEM_MAX_NUMBER_OF_BUFFS))
+
+    def protected_buffs(i):
+        with manager._slot_write(0):
+            view.PlayerBuffs = buffs
+
+    def bare_buffs(i):
+        view.PlayerBuffs = buffs
+
+    return [
+        ("slot snapshot read", lambda i: manager.GetAccountDataSnapshot(0), lambda i: AccountData.from_buffer_copy(view)),
+        ("field write", protected_write, bare_write),
+        ("PlayerBuffs write", protected_buffs, bare_buffs),
+    ]
+
+
+def run_seqlock(SharedMemory, manager, calls: int):
+    return {name: {"seqlock_us": per_call_us(protected, calls), "bare_us": per_call_us(bare, calls)}
+            for name, protected, bare in seqlock_benchmarks(SharedMemory, manager)}
+
+
+def make_party(heroes: int, rng):
+    """The local player plus heroes, each with a dozen buffs and effects."""
+    FakeGame.heroes = [types.SimpleNamespace(agent_id=FakeGame.player_agent_id + 1 + i, owner_player_id=1,
+                                             hero_id=types.SimpleNamespace(GetID=lambda i=i: i + 1,
+                                                                           GetName=lambda i=i: f"Hero {i + 1}"))
+                       for i in range(heroes)]
+    agents = [FakeGame.player_agent_id] + [hero.agent_id for hero in FakeGame.heroes]
+    FakeGame.buffs = {agent_id: rng.sample(range(1, 3000), 12) for agent_id in agents}
+    return agents
+
+
+def run_party_frames(SharedMemory, manager, heroes: int, frames: int, buff_change_rate: float, seed: int = 1):
+    """
+    Frames of the Environment Upkeeper's shared-memory pass for one client: positions and health move
+    every frame, buffs change on a fraction of them. Bytes are what Set*Data copied into the segment.
+    """
+    import random
+    rng = random.Random(seed)
+    agents = make_party(heroes, rng)
+    full_record = SharedMemory.sizeof(SharedMemory.AccountData) * len(agents)
+
+    def frame(i):
+        FakeGame.tick = i
+        if rng.random() < buff_change_rate:
+            FakeGame.buffs[rng.choice(agents)][rng.randrange(12)] = rng.randrange(1, 3000)
+        manager.BeginFrame()
+        manager.SetPlayerData(FakeGame.account_email)
+        manager.SetHeroesData()
+        manager.SetPetData()
+        bytes_per_frame.append(manager.bytes_written_this_frame)
+
+    bytes_per_frame = []
+    frame(0)  # claims the slots and writes every record once
+    bytes_per_frame.clear()
+    frame_us = per_call_us(frame, frames, rounds=1)
+    FakeGame.heroes, FakeGame.buffs, FakeGame.tick = [], {}, 0
+    return {"slots": len(agents), "frame_us": frame_us, "bytes_per_frame": sum(bytes_per_frame) / len(bytes_per_frame),
+            "full_records_bytes": full_record}
+
+
+def print_table(title, results, columns):
+    """One row per benchmark, ending with the ratio of the first column to the second."""
+    print(f"\n{title}")
+    for name, stats in results.items():
+        cells = "   ".join(f"{label} {stats[key]:9.3f} us" for key, label in columns)
+        ratio = stats[columns[0][0]] / stats[columns[1][0]] if stats[columns[1][0]] else float("inf")
+        print(f"  {name:<28} {cells}   x{ratio:6.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20000, help="calls per measurement")
+    parser.add_argument("--heroes", type=int, default=8, help="heroes in the synthetic party")
+    parser.add_argument("--frames", type=int, default=2000, help="upkeeper frames in the party benchmark")
+    parser.add_argument("--buff-change-rate", type=float, default=0.05, help="fraction of frames a buff changes")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    SharedMemory = install_fakes()
+    manager, segment = create_manager(SharedMemory)
+    try:
+        fill_accounts(manager)
+        results = {"views": run_views(SharedMemory, manager, args.calls),
+                   "seqlock": run_seqlock(SharedMemory, manager, args.calls)}
+        manager.ResetAllData()
+        results["party"] = run_party_frames(SharedMemory, manager, args.heroes, args.frames, args.buff_change_rate)
+    finally:
+        release(manager, segment)
+
+    print(f"AllAccounts segment: {SharedMemory.sizeof(SharedMemory.AllAccounts)} bytes, "
+          f"{ACTIVE_ACCOUNTS} active accounts")
+    print_table("Struct views, per call", results["views"], [("previous_us", "previous"), ("cached_us", "cached")])
+    print_table("Seqlock overhead, per call", results["seqlock"], [("seqlock_us", "seqlock"), ("bare_us", "unprotected")])
+    party = results["party"]
+    print(f"\nPlayer and {args.heroes} heroes, {args.frames} frames, buffs changing on {args.buff_change_rate:.0%} of them")
+    print(f"  Set*Data per frame {party['frame_us']:9.1f} us   {party['bytes_per_frame']:8.1f} bytes written "
+          f"(full records: {party['full_records_bytes']} bytes)")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,486 @@
+"""
+Multi-process stress checks for the GlobalCache shared-memory manager (Linux, fork).
+
+Every scenario maps one anonymous segment into several forked processes, the way multiboxed game clients
+map Py4GW_Shared_Mem, with the game API faked as in shared_memory_benchmark.py. Writers and readers run
+concurrently for --seconds; each reader checks invariants while they run and again once the writers stop.
+Exits 1 on the first scenario that reports a problem.
+
+    python benchmarks/shared_memory_stress.py                    # every scenario
+    python benchmarks/shared_memory_stress.py index --seconds 10 --writers 6
+"""
+import argparse
+import multiprocessing
+import queue
+import random
+import sys
+import time
+import traceback
+
+from shared_memory_benchmark import attach, create_manager, install_fakes, release
+
+SharedMemory = None  # the module, imported with fakes before forking
+
+
+#region Process harness
+
+def _child(role, target, name, stop, settled, results, args):
+    manager = None
+    try:
+        manager = attach(SharedMemory, name)
+        results.put((role, target(manager, stop, settled, *args)))
+    except Exception:
+        results.put((role, {"problems": [f"{role} crashed:\n{traceback.format_exc()}"]}))
+    finally:
+        if manager is not None:
+            release(manager)
+
+
+def run_processes(name, writers, readers, seconds):
+    """
+    Run (role, target, args) writers and readers against the segment; returns {role: result}.
+    Readers are told the segment has settled once every writer has stopped and reported.
+    """
+    context = multiprocessing.get_context("fork")
+    stop, settled, results = context.Event(), context.Event(), context.Queue()
+    processes = {}
+    for role, target, args in writers + readers:
+        process = context.Process(target=_child, args=(role, target, name, stop, settled, results, args))
+        process.start()
+        processes[role] = process
+
+    time.sleep(seconds)
+    stop.set()
+    # Drain results while waiting: a child cannot exit before the parent reads what it put on the queue
+    collected = {}
+    writer_roles = {role for role, _, _ in writers}
+    deadline = time.monotonic() + 60
+    while len(collected) < len(processes) and time.monotonic() < deadline:
+        if writer_roles <= set(collected):
+            settled.set()
+        try:
+            role, result = results.get(timeout=0.1)
+        except queue.Empty:
+            continue
+        collected[role] = result
+    settled.set()
+    for role, process in processes.items():
+        process.join(timeout=5)
+        if process.is_alive():
+            process.kill()
+        if role not in collected:
+            collected[role] = {"problems": [f"{role} reported nothing (exit code {process.exitcode})"]}
+    return collected
+
+
+#region Index
+
+SLOTS_PER_WRITER = 4
+INDEX_MAPS = [(248, 2, 1), (248, 2, 2), (640, 1, 1)]
+
+
+def write_account(manager, index, email, player_id, party_id, map_key):
+    player = manager.GetAccountDataSlot(index)
+    with manager._slot_write(index):
+        player.IsSlotActive = True
+        player.IsAccount = True
+        player.IsHero = False
+        player.OwnerPlayerID = 0
+        player.HeroID = 0
+        player.AccountEmail = email
+        player.PlayerID = player_id
+        player.PartyID = party_id
+        player.MapID, player.MapRegion, player.MapDistrict = map_key
+        player.LastUpdated = manager.GetBaseTimestamp()
+    manager._commit_slot_keys(index)
+
+
+def write_hero(manager, index, owner_id, hero_id, party_id, map_key):
+    hero = manager.GetAccountDataSlot(index)
+    with manager._slot_write(index):
+        hero.IsSlotActive = True
+        hero.IsAccount = False
+        hero.IsHero = True
+        hero.AccountEmail = ""
+        hero.OwnerPlayerID = owner_id
+        hero.HeroID = hero_id
+        hero.PlayerID = owner_id * 10 + hero_id
+        hero.PartyID = party_id
+        hero.MapID, hero.MapRegion, hero.MapDistrict = map_key
+        hero.LastUpdated = manager.GetBaseTimestamp()
+    manager._commit_slot_keys(index)
+
+
+def index_writer(manager, stop, settled, writer):
+    """Leave the writer's first slot (its stable account) alone; churn the others between accounts, heroes, maps, parties and resets."""
+    rng = random.Random(writer)
+    first = writer * SLOTS_PER_WRITER
+    player_id = 1000 + writer
+    writes = 0
+    while not stop.is_set():
+        index = rng.randrange(first + 1, first + SLOTS_PER_WRITER)
+        action = rng.random()
+        if action < 0.15:
+            manager.ResetPlayerData(index)
+        elif action < 0.5:
+            write_hero(manager, index, player_id, rng.randrange(1, 4), writer, rng.choice(INDEX_MAPS))
+        else:
+            write_account(manager, index, f"churn{writer}-{rng.randrange(4)}@local", 2000 + index,
+                          rng.randrange(3), rng.choice(INDEX_MAPS))
+        writes += 1
+    return {"writes": writes, "problems": []}
+
+
+def scan_find_account(manager, email):
+    """FindAccount as it was before the index: a scan of every slot."""
+    for i in range(manager.max_num_players):
+        player = manager.GetAccountDataSlot(i)
+        if player.IsSlotActive and player.AccountEmail == email and player.IsAccount:
+            return i
+    return -1
+
+
+def scan_tables(manager):
+    """The lookup tables SharedMemoryIndex should hold, built by scanning every slot."""
+    tables = {"active": set(), "by_email": {}, "by_player_id": {}, "by_owner": {}, "by_party": {}, "by_map": {}}
+    for i in range(manager.max_num_players):
+        player = manager.GetAccountDataSlot(i)
+        if not player.IsSlotActive:
+            continue
+        tables["active"].add(i)
+        if player.IsAccount:
+            tables["by_email"].setdefault(player.AccountEmail, set()).add(i)
+        if player.IsHero or player.IsPet:
+            tables["by_owner"].setdefault(player.OwnerPlayerID, set()).add(i)
+        tables["by_player_id"].setdefault(player.PlayerID, set()).add(i)
+        tables["by_party"].setdefault(player.PartyID, set()).add(i)
+        tables["by_map"].setdefault((player.MapID, player.MapRegion, player.MapDistrict), set()).add(i)
+    return tables
+
+
+def index_reader(manager, stop, settled, writers):
+    problems, lookups = [], 0
+    emails = [f"churn{w}-{k}@local" for w in range(writers) for k in range(4)]
+    while not stop.is_set():
+        for w in range(writers):
+            first = w * SLOTS_PER_WRITER
+            index = manager.FindAccount(f"stable{w}@local")
+            if index != first:
+                problems.append(f"FindAccount(stable{w}) returned {index}, expected {first}")
+            for k in range(4):
+                index = manager.FindAccount(f"churn{w}-{k}@local")
+                if index != -1 and not first < index < first + SLOTS_PER_WRITER:
+                    problems.append(f"FindAccount(churn{w}-{k}) returned slot {index} of another writer")
+            for hero in manager.GetHeroesFromPlayers(1000 + w):
+                if not hero.IsHero or hero.OwnerPlayerID != 1000 + w:
+                    problems.append(f"GetHeroesFromPlayers({1000 + w}) returned a slot it does not own")
+            for map_key in INDEX_MAPS:
+                for player in manager.GetPlayersFromParty(w, *map_key):
+                    if player.PartyID != w or (player.MapID, player.MapRegion, player.MapDistrict) != map_key:
+                        problems.append(f"GetPlayersFromParty({w}, {map_key}) returned a player elsewhere")
+            lookups += 4 + SLOTS_PER_WRITER + len(INDEX_MAPS)
+        if len(problems) > 20:
+            break
+
+    settled.wait()
+    refreshed_before = manager.index.reindexed_slots
+    manager.index.Refresh()
+    expected = scan_tables(manager)
+    index = manager.index
+    for table, slots in expected.items():
+        if getattr(index, table) != slots:
+            problems.append(f"index.{table} differs from a full scan once writers stopped")
+    for email in emails + [f"stable{w}@local" for w in range(writers)]:
+        if manager.FindAccount(email) != scan_find_account(manager, email):
+            problems.append(f"FindAccount({email}) differs from a full scan once writers stopped")
+    return {"lookups": lookups, "reindexed_slots": refreshed_before, "problems": problems}
+
+
+def scenario_index(args):
+    manager, segment = create_manager(SharedMemory)
+    for w in range(args.writers):
+        write_account(manager, w * SLOTS_PER_WRITER, f"stable{w}@local", 1000 + w, w, INDEX_MAPS[0])
+    try:
+        results = run_processes(segment.name,
+                                [(f"writer{w}", index_writer, (w,)) for w in range(args.writers)],
+                                [(f"reader{r}", index_reader, (args.writers,)) for r in range(args.readers)],
+                                args.seconds)
+    finally:
+        release(manager, segment)
+    writes = sum(r.get("writes", 0) for role, r in results.items() if role.startswith("writer"))
+    lookups = sum(r.get("lookups", 0) for role, r in results.items() if role.startswith("reader"))
+    reindexed = sum(r.get("reindexed_slots", 0) for role, r in results.items() if role.startswith("reader"))
+    summary = f"{writes} slot writes, {lookups} indexed lookups, {reindexed} slots re-indexed by {args.readers} readers"
+    return summary, results
+
+
+#region Messages
+
+RECEIVERS = 3
+MESSAGE_COMMANDS = ("PickUpLoot", "UseSkill")
+
+
+def message_producer(manager, stop, settled, producer, receivers):
+    """Spam PickUpLoot and UseSkill at random receivers, retrying whenever a queue is full."""
+    SharedCommandType = SharedMemory.SharedCommandType
+    rng = random.Random(producer)
+    sent, overflows, sequence = [], 0, 0
+    while not stop.is_set():
+        receiver = rng.randrange(receivers)
+        command = getattr(SharedCommandType, rng.choice(MESSAGE_COMMANDS))
+        tag = f"{producer}:{sequence}"
+        deadline = time.monotonic() + 10
+        while not manager.SendMessage(f"producer{producer}@local", f"receiver{receiver}@local", command,
+                                      (float(producer), float(sequence), 0.0, 0.0), (tag, command.name)):
+            overflows += 1
+            if time.monotonic() > deadline:
+                return {"sent": sent, "overflows": overflows,
+                        "problems": [f"producer{producer} could not send to receiver{receiver} for 10 s"]}
+            time.sleep(0)
+        sent.append((receiver, producer, sequence))
+        sequence += 1
+    return {"sent": sent, "overflows": overflows, "problems": []}
+
+
+def message_consumer(manager, stop, settled, receiver):
+    """
+    Handle every message for one receiver the way Widgets/Messaging.py does. The first one is marked running
+    and never finished, like a handler that died mid-command; it must not hold up the rest of the queue.
+    """
+    email = f"receiver{receiver}@local"
+    received, problems = [], []
+    stuck = None
+    idle_since = None
+    while True:
+        index, message = manager.GetNextMessage(email)
+        if index == -1:
+            if settled.is_set():
+                idle_since = idle_since or time.monotonic()
+                if time.monotonic() - idle_since > 0.5:
+                    break
+            time.sleep(0)
+            continue
+        idle_since = None
+        producer, sequence = int(message.Params[0]), int(message.Params[1])
+        tag = manager._c_wchar_array_to_str(message.ExtraData[0])
+        if tag != f"{producer}:{sequence}" or message.ReceiverEmail != email:
+            problems.append(f"{email} read a torn message: params {producer}:{sequence}, tag {tag!r}")
+        received.append((receiver, producer, sequence))
+        manager.MarkMessageAsRunning(email, index)
+        if stuck is None:
+            stuck = index
+            continue
+        manager.MarkMessageAsFinished(email, index)
+    pending, sent, overflows = manager.GetMessageQueueStats(email)
+    if pending != 1:
+        problems.append(f"{email} has {pending} messages queued once drained, expected only the stuck one")
+    return {"received": received, "problems": problems}
+
+
+def scenario_messages(args):
+    manager, segment = create_manager(SharedMemory)
+    for receiver in range(RECEIVERS):
+        write_account(manager, receiver, f"receiver{receiver}@local", 500 + receiver, 0, INDEX_MAPS[0])
+    try:
+        results = run_processes(segment.name,
+                                [(f"producer{p}", message_producer, (p, RECEIVERS)) for p in range(args.writers)],
+                                [(f"consumer{r}", message_consumer, (r,)) for r in range(RECEIVERS)],
+                                args.seconds)
+    finally:
+        release(manager, segment)
+
+    sent = [entry for role, r in results.items() if role.startswith("producer") for entry in r.get("sent", [])]
+    received = [entry for role, r in results.items() if role.startswith("consumer") for entry in r.get("received", [])]
+    problems = []
+    duplicates = len(received) - len(set(received))
+    lost = set(sent) - set(received)
+    unexpected = set(received) - set(sent)
+    if duplicates:
+        problems.append(f"{duplicates} messages were delivered more than once")
+    if lost:
+        problems.append(f"{len(lost)} messages were sent but never delivered, e.g. {sorted(lost)[:3]}")
+    if unexpected:
+        problems.append(f"{len(unexpected)} messages were delivered but never sent, e.g. {sorted(unexpected)[:3]}")
+    last = {}
+    for receiver, producer, sequence in received:
+        if sequence < last.get((receiver, producer), -1):
+            problems.append(f"receiver{receiver} got producer{producer}'s messages out of order")
+            break
+        last[(receiver, producer)] = sequence
+    results["check"] = {"problems": problems}
+    overflows = sum(r.get("overflows", 0) for role, r in results.items() if role.startswith("producer"))
+    summary = (f"{len(sent)} messages from {args.writers} producers to {RECEIVERS} receivers, "
+               f"{len(received)} delivered, {overflows} sends refused while a queue was full")
+    return summary, results
+
+
+#region Seqlock
+
+SLOTS_PER_OWNER = 2
+ABANDONED_SLOTS = 4
+
+
+def write_pattern(manager, index, value, last_updated):
+    """Fill the slot so every checked field holds value; a snapshot mixing two writes shows as a mismatch."""
+    player = manager.GetAccountDataSlot(index)
+    buffs = (SharedMemory.c_uint * SharedMemory.SHMEM_MAX_NUMBER_OF_BUFFS)(*([value] * SharedMemory.SHMEM_MAX_NUMBER_OF_BUFFS))
+    with manager._slot_write(index):
+        player.IsSlotActive = True
+        player.IsAccount = True
+        player.AccountEmail = f"slot{index}@local"
+        player.PlayerTargetID = value
+        player.PlayerBuffs = buffs
+        player.PlayerHP = float(value)
+        player.PlayerLoginNumber = value
+        player.LastUpdated = last_updated
+    manager._commit_slot_keys(index)
+
+
+def is_consistent(snapshot):
+    """Written by write_pattern or zeroed by a reset, never half of each."""
+    value = snapshot.PlayerTargetID
+    return (snapshot.PlayerLoginNumber == value and snapshot.PlayerHP == float(value) and
+            all(buff == value for buff in snapshot.PlayerBuffs))
+
+
+def seqlock_owner(manager, stop, settled, owner):
+    """Rewrite this owner's slots as fast as possible, keeping them fresh so no one times them out."""
+    first = owner * SLOTS_PER_OWNER
+    value, writes = 0, 0
+    while not stop.is_set():
+        value = (value + 1) % 100000
+        for index in range(first, first + SLOTS_PER_OWNER):
+            write_pattern(manager, index, value, manager.GetBaseTimestamp())
+            writes += 1
+    return {"writes": writes, "problems": []}
+
+
+def seqlock_resetter(manager, stop, settled):
+    """Run the timeouts every client runs, racing the other resetters on the abandoned slots."""
+    passes = 0
+    while not stop.is_set():
+        manager.UpdateTimeouts()
+        passes += 1
+    return {"passes": passes, "problems": []}
+
+
+def seqlock_reviver(manager, stop, settled, first, count):
+    """
+    Reclaim abandoned slots as soon as they are reset, already timed out again. Reclaims go through the
+    mutex so the scenario isolates resets racing each other from a claim racing a reset.
+    """
+    timeout = SharedMemory.SHMEM_SUBSCRIBE_TIMEOUT_MILISECONDS
+    value, revivals = 0, 0
+    while not stop.is_set():
+        for index in range(first, first + count):
+            if manager.GetAccountDataSlot(index).IsSlotActive:
+                continue
+            value = value % 100000 + 1
+            with manager._mutex:
+                write_pattern(manager, index, value, max(0, manager.GetBaseTimestamp() - 2 * timeout))
+            revivals += 1
+        time.sleep(0)
+    return {"revivals": revivals, "problems": []}
+
+
+def seqlock_reader(manager, stop, settled, slots):
+    problems, reads = [], 0
+    while not stop.is_set():
+        for index in range(slots):
+            snapshot = manager.GetAccountDataSnapshot(index)
+            reads += 1
+            if not is_consistent(snapshot):
+                problems.append(f"slot {index}: inconsistent snapshot (target {snapshot.PlayerTargetID}, "
+                                f"login {snapshot.PlayerLoginNumber}, buffs[0] {snapshot.PlayerBuffs[0]})")
+        if len(problems) > 20:
+            break
+    retries, stale = manager.seqlock_read_retries, manager.seqlock_stale_reads
+
+    settled.wait()
+    sequences = manager._slot_sequences
+    odd = [index for index in range(slots) if sequences[index] & 1]
+    if odd:
+        problems.append(f"sequences left odd with no writer running: slots {odd}")
+    before = manager.seqlock_read_retries
+    for index in range(slots):
+        manager.GetAccountDataSnapshot(index)
+    if manager.seqlock_read_retries != before:
+        problems.append(f"{manager.seqlock_read_retries - before} read retries with no writer running")
+    return {"reads": reads, "retries": retries, "stale": stale, "problems": problems}
+
+
+def check_interrupted_write(manager):
+    """A writer that dies mid-write leaves the sequence odd; the next write to the slot must repair it."""
+    sequences = manager._slot_sequences
+    sequences[0] |= 1
+    write_pattern(manager, 0, 1, manager.GetBaseTimestamp())
+    retries = manager.seqlock_read_retries
+    snapshot = manager.GetAccountDataSnapshot(0)
+    problems = []
+    if sequences[0] & 1:
+        problems.append("the sequence stays odd after a write following an interrupted one")
+    if manager.seqlock_read_retries != retries or snapshot.PlayerTargetID != 1:
+        problems.append("readers retry or read stale data after a write following an interrupted one")
+    return problems
+
+
+def scenario_seqlock(args):
+    manager, segment = create_manager(SharedMemory)
+    owned = args.writers * SLOTS_PER_OWNER
+    slots = owned + ABANDONED_SLOTS
+    try:
+        writers = [(f"owner{w}", seqlock_owner, (w,)) for w in range(args.writers)]
+        writers += [(f"resetter{r}", seqlock_resetter, ()) for r in range(3)]
+        writers += [("reviver", seqlock_reviver, (owned, ABANDONED_SLOTS))]
+        results = run_processes(segment.name, writers,
+                                [(f"reader{r}", seqlock_reader, (slots,)) for r in range(args.readers)],
+                                args.seconds)
+        results["interrupted write"] = {"problems": check_interrupted_write(manager)}
+    finally:
+        release(manager, segment)
+
+    def total(prefix, key):
+        return sum(r.get(key, 0) for role, r in results.items() if role.startswith(prefix))
+
+    summary = (f"{total('owner', 'writes')} owner writes, {total('reviver', 'revivals')} abandoned slots reset "
+               f"by 3 racing clients, {total('reader', 'reads')} snapshots read with {total('reader', 'retries')} "
+               f"retries and {total('reader', 'stale')} stale fallbacks")
+    return summary, results
+
+
+#region Main
+
+SCENARIOS = {
+    "index": scenario_index,
+    "messages": scenario_messages,
+    "seqlock": scenario_seqlock,
+}
+
+
+def main(argv=None):
+    global SharedMemory
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("scenarios", nargs="*", metavar="scenario",
+                        help=f"scenarios to run: {', '.join(SCENARIOS)} (default: all)")
+    parser.add_argument("--seconds", type=float, default=3.0, help="how long writers and readers run")
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=2)
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+
+    SharedMemory = install_fakes()
+    failed = False
+    for name in args.scenarios or SCENARIOS:
+        summary, results = SCENARIOS[name](args)
+        problems = [problem for result in results.values() for problem in result.get("problems", [])]
+        print(f"{name:<8} {'FAIL' if problems else 'ok  '}  {summary}")
+        for problem in problems[:10]:
+            print(f"    {problem}")
+        failed = failed or bool(problems)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())